@@ -0,0 +1,32 @@
+from django.db import migrations
+
+# Expression GIN index for fuzzy search on the full name; must stay identical to
+# FullName in posts.trigram_search so the planner can use it for the % operator
+FULL_NAME_EXPRESSION = "(first_name || ' ' || last_name)"
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('accounts', 'User')._meta.db_table
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {table}_full_name_trgm ON {table} USING gin ({FULL_NAME_EXPRESSION} gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('accounts', 'User')._meta.db_table
+    schema_editor.execute(f'DROP INDEX IF EXISTS {table}_full_name_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_user_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
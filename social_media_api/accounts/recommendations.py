@@ -0,0 +1,210 @@
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+logger = logging.getLogger(__name__)
+
+# Per-user suggestion lists and the shared popular-accounts fallback
+FOLLOW_SUGGESTIONS_KEY = 'follow_suggestions_{}'
+POPULAR_SUGGESTIONS_KEY = 'follow_suggestions_popular'
+
+DEFAULT_FOLLOW_SUGGESTIONS_CONFIG = {
+    'top_n': 30,                   # Suggestions stored per user
+    'fof_weight': 1.0,             # Per followed account that follows the candidate
+    'cofollow_weight': 0.25,       # Per shared followee with someone who follows the candidate
+    'block_size': 2000,            # Rows of the score matrix computed at once
+    'max_incremental_fanout': 500, # Followees of a newly followed account scored on a follow event
+    'popular_size': 200,           # Most-followed accounts kept for the fallback, whatever the request limit
+    'cache_timeout': 7 * 86400,    # Lists outlive the daily full run
+}
+
+
+def get_follow_suggestions_config():
+    """Return who-to-follow settings merged over the defaults."""
+    config = dict(DEFAULT_FOLLOW_SUGGESTIONS_CONFIG)
+    config.update(getattr(settings, 'FOLLOW_SUGGESTIONS_CONFIG', {}))
+    return config
+
+
+def _follow_edges():
+    """Return (follower_ids, followee_ids) for every follow, read straight from the through table."""
+    Follow = get_user_model().followers.through
+    # user.followers holds the accounts following `user`: from_user is followed by to_user
+    rows = list(Follow.objects.values_list('to_user_id', 'from_user_id'))
+    return [follower for follower, _ in rows], [followee for _, followee in rows]
+
+
+def _excluded_by_user():
+    """Return {user_id: ids never suggested to them} for blocks in either direction."""
+    Block = get_user_model().blocked_users.through
+    excluded = {}
+    for blocker, blocked in Block.objects.values_list('from_user_id', 'to_user_id'):
+        excluded.setdefault(blocker, set()).add(blocked)
+        excluded.setdefault(blocked, set()).add(blocker)
+    return excluded
+
+
+def _blocked_ids(user_id):
+    """Return the ids user_id has blocked or been blocked by."""
+    Block = get_user_model().blocked_users.through
+    rows = Block.objects.filter(Q(from_user_id=user_id) | Q(to_user_id=user_id)).values_list(
+        'from_user_id', 'to_user_id'
+    )
+    return {blocked if blocker == user_id else blocker for blocker, blocked in rows}
+
+
+def _top_scores(row, limit, skip):
+    """Return [(candidate_index, score)] for the best `limit` entries of a sparse row."""
+    import numpy as np
+
+    indices, scores = row.indices, row.data
+    if len(scores) > limit + len(skip):
+        keep = np.argpartition(-scores, limit + len(skip) - 1)[:limit + len(skip)]
+        indices, scores = indices[keep], scores[keep]
+    order = np.argsort(-scores, kind='stable')
+    ranked = [(int(indices[i]), float(scores[i])) for i in order if int(indices[i]) not in skip]
+    return ranked[:limit]
+
+
+def compute_follow_suggestions():
+    """
+    Rebuild every user's who-to-follow list from the follow graph.
+
+    With A the sparse user x user follow matrix (A[i, j] = 1 when i follows
+    j), friends-of-friends scores are A @ A (how many accounts you follow
+    follow the candidate) and co-follow scores are (A @ A.T) @ A (accounts
+    followed by people whose followees overlap with yours, weighted by the
+    overlap). Rows are computed in blocks so memory stays bounded, already
+    followed and blocked accounts are dropped, and the top N per user go to
+    the cache together with a popularity list for users with no signal.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    config = get_follow_suggestions_config()
+    User = get_user_model()
+    top_n, timeout = config['top_n'], config['cache_timeout']
+
+    user_ids = list(User.objects.filter(is_active=True).order_by('id').values_list('id', flat=True))
+    position = {user_id: index for index, user_id in enumerate(user_ids)}
+    edges = {
+        (position[follower], position[followee])
+        for follower, followee in zip(*_follow_edges())
+        if follower in position and followee in position and follower != followee
+    }
+    size = len(user_ids)
+    if not size:
+        return 0
+
+    rows, columns = zip(*edges) if edges else ((), ())
+    follows = sparse.csr_matrix(
+        (np.ones(len(edges), dtype=np.float32), (rows, columns)), shape=(size, size)
+    )
+    followed_by = follows.T.tocsr()
+
+    in_degree = np.asarray(follows.sum(axis=0)).ravel()
+    popular = [
+        int(user_ids[i]) for i in np.argsort(-in_degree, kind='stable')[:config['popular_size']] if in_degree[i] > 0
+    ]
+    cache.set(POPULAR_SUGGESTIONS_KEY, popular, timeout)
+
+    excluded = _excluded_by_user()
+    stored = 0
+    for start in range(0, size, config['block_size']):
+        block = follows[start:start + config['block_size']]
+        # The diagonal (a user's overlap with themselves) only scores accounts they already follow
+        overlap = block @ followed_by
+        scores = (config['fof_weight'] * (block @ follows) + config['cofollow_weight'] * (overlap @ follows)).tocsr()
+
+        entries = {}
+        for offset in range(block.shape[0]):
+            index = start + offset
+            user_id = int(user_ids[index])
+            row = scores.getrow(offset)
+            skip = set(block.getrow(offset).indices.tolist())
+            skip.add(index)
+            skip.update(position[blocked] for blocked in excluded.get(user_id, ()) if blocked in position)
+            ranked = _top_scores(row, top_n, skip)
+            if ranked:
+                entries[FOLLOW_SUGGESTIONS_KEY.format(user_id)] = [
+                    (int(user_ids[candidate]), round(score, 4)) for candidate, score in ranked
+                ]
+        if entries:
+            cache.set_many(entries, timeout)
+            stored += len(entries)
+
+    logger.info(f"Computed follow suggestions for {stored} of {size} users from {len(edges)} follows")
+    return stored
+
+
+def record_follow(follower_id, followee_id):
+    """
+    Fold a new follow into the follower's stored list between full runs: the
+    followed account drops out and the accounts it follows gain a
+    friends-of-friends point each, unless blocked in either direction.
+    """
+    config = get_follow_suggestions_config()
+    key = FOLLOW_SUGGESTIONS_KEY.format(follower_id)
+    User = get_user_model()
+
+    scores = dict(cache.get(key) or [])
+    scores.pop(followee_id, None)
+
+    Follow = User.followers.through
+    candidates = list(Follow.objects.filter(to_user_id=followee_id).values_list(
+        'from_user_id', flat=True
+    )[:config['max_incremental_fanout']])
+    if candidates:
+        already = set(Follow.objects.filter(to_user_id=follower_id, from_user_id__in=candidates).values_list(
+            'from_user_id', flat=True
+        ))
+        # Blocks in either direction, as in the full run
+        Block = User.blocked_users.through
+        for blocker, blocked in Block.objects.filter(
+            Q(from_user_id=follower_id, to_user_id__in=candidates) |
+            Q(to_user_id=follower_id, from_user_id__in=candidates)
+        ).values_list('from_user_id', 'to_user_id'):
+            already.add(blocked if blocker == follower_id else blocker)
+        for candidate in candidates:
+            if candidate != follower_id and candidate not in already:
+                scores[candidate] = scores.get(candidate, 0) + config['fof_weight']
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:config['top_n']]
+    cache.set(key, ranked, config['cache_timeout'])
+
+
+def get_popular_suggestions():
+    """
+    Most-followed accounts, computed inline only before the first full run.
+    The list is always popular_size long so every caller can trim its own.
+    """
+    popular = cache.get(POPULAR_SUGGESTIONS_KEY)
+    if popular is None:
+        Follow = get_user_model().followers.through
+        popular = list(
+            Follow.objects.values('from_user_id').annotate(total=Count('id'))
+            .order_by('-total', 'from_user_id').values_list('from_user_id', flat=True)
+            [:get_follow_suggestions_config()['popular_size']]
+        )
+        cache.set(POPULAR_SUGGESTIONS_KEY, popular, 3600)
+    return popular
+
+
+def get_follow_suggestions(user_id=None, limit=10):
+    """Suggested user IDs for user_id (or anyone), best first, from one cache lookup."""
+    if user_id is not None:
+        suggestions = cache.get(FOLLOW_SUGGESTIONS_KEY.format(user_id))
+        if suggestions:
+            return [candidate for candidate, _ in suggestions[:limit]]
+    popular = get_popular_suggestions()
+    if user_id is None:
+        return popular[:limit]
+    Follow = get_user_model().followers.through
+    skip = set(Follow.objects.filter(to_user_id=user_id).values_list('from_user_id', flat=True))
+    # Blocks in either direction, as in the stored lists
+    skip.update(_blocked_ids(user_id))
+    skip.add(user_id)
+    return [candidate for candidate in popular if candidate not in skip][:limit]
@@ -0,0 +1,38 @@
+# accounts/signals.py
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import User
+from .typeahead import user_typeahead_index, invalidate_viewer_context
+from .recommendations import record_follow
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def update_user_typeahead_index(sender, instance, **kwargs):
+    """Publish username/display-name changes to the typeahead index."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields and not set(update_fields) & {'username', 'first_name', 'last_name', 'profile_image', 'is_verified', 'is_active'}:
+        # e.g. last_login updates on every sign-in
+        return
+    user_typeahead_index.record_change(instance.id)
+
+
+@receiver(m2m_changed, sender=User.followers.through)
+@receiver(m2m_changed, sender=User.blocked_users.through)
+def invalidate_typeahead_viewer_context(sender, instance, action, pk_set, **kwargs):
+    """Follow/block changes alter ranking and filtering for both sides."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    invalidate_viewer_context(instance.pk, *(pk_set or ()))
+
+
+@receiver(m2m_changed, sender=User.followers.through)
+def update_follow_suggestions(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep the follower's who-to-follow list fresh between full recommendation runs."""
+    if action != 'post_add':
+        return
+    for pk in pk_set or ():
+        # instance.followers.add(pk) means pk follows instance; instance.following.add(pk) the reverse
+        follower_id, followee_id = (instance.pk, pk) if reverse else (pk, instance.pk)
+        record_follow(follower_id, followee_id)
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+
+@shared_task
+def compute_follow_suggestions():
+    """Rebuild every user's who-to-follow list from the follow graph"""
+    from .recommendations import compute_follow_suggestions as compute
+
+    return compute()
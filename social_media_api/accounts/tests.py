@@ -154,3 +154,174 @@ class UserBlockMuteTestCase(APITestCase):
         url = reverse('accounts:profile-mute', kwargs={'username': 'user2'})
         response = self.client.post(url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class UserTypeaheadIndexTestCase(APITestCase):
+    """Test cases for the in-memory user typeahead index"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from accounts.typeahead import user_typeahead_index
+
+        cache.clear()
+        user_typeahead_index.reset()
+        self.index = user_typeahead_index
+
+        self.viewer = User.objects.create_user(username='viewer', password='password123')
+        self.messi = User.objects.create_user(username='leo_messi', password='password123', first_name='Lionel', last_name='Messi')
+        self.mess = User.objects.create_user(username='messfan', password='password123')
+        self.blocked = User.objects.create_user(username='messblocked', password='password123')
+        self.viewer.blocked_users.add(self.blocked)
+
+    def test_prefix_matches_username_and_display_name(self):
+        """Prefixes of usernames, first names and last names all match"""
+        self.assertEqual([r['id'] for r in self.index.search('leo')], [self.messi.id])
+        self.assertEqual([r['id'] for r in self.index.search('lion')], [self.messi.id])
+        self.assertEqual(
+            {r['id'] for r in self.index.search('MESS')},
+            {self.messi.id, self.mess.id, self.blocked.id}
+        )
+
+    def test_followed_users_ranked_first(self):
+        """Followed users come before better lexical matches"""
+        results = self.index.search('mess', followed_ids={self.messi.id})
+        self.assertEqual(results[0]['id'], self.messi.id)
+        self.assertTrue(results[0]['is_followed'])
+        self.assertFalse(results[1]['is_followed'])
+
+    def test_wide_prefix_ranks_before_truncating(self):
+        """The best-ranked matches win, not the lexicographically first ones"""
+        for i in range(12):
+            User.objects.create_user(username=f'maaaaaaa{i:02d}', password='password123')
+        short = User.objects.create_user(username='mz', password='password123')
+
+        results = self.index.search('m', limit=3)
+        self.assertEqual(results[0]['id'], short.id)
+        self.assertEqual(len(results), 3)
+
+    def test_saves_update_index_incrementally(self):
+        """Renames and deletes are picked up from the shared change log"""
+        self.index.search('mess')  # Build the index
+
+        self.mess.username = 'ronaldo_fan'
+        self.mess.save()
+        self.assertNotIn(self.mess.id, [r['id'] for r in self.index.search('mess')])
+        self.assertEqual([r['id'] for r in self.index.search('ronaldo')], [self.mess.id])
+
+        self.messi.delete()
+        self.assertEqual(self.index.search('leo'), [])
+
+    def test_shared_cache_fallback(self):
+        """Workers that cannot hold the index fall back to cached prefix queries"""
+        from django.test import override_settings
+
+        with override_settings(TYPEAHEAD_CONFIG={'max_local_users': 0}):
+            self.index.reset()
+            results = self.index.search('mess', followed_ids={self.mess.id})
+        self.assertEqual(results[0]['id'], self.mess.id)
+        self.assertEqual(len(results), 3)
+
+    def test_typeahead_endpoint(self):
+        """Typeahead endpoint excludes blocked users and the viewer"""
+        self.viewer.following.add(self.mess)
+        self.client.force_authenticate(user=self.viewer)
+
+        response = self.client.get(reverse('search-typeahead'), {'q': 'mess', 'context': 'messaging'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [r['id'] for r in response.data['results']]
+        self.assertEqual(ids, [self.mess.id, self.messi.id])
+        self.assertTrue(response.data['results'][0]['is_followed'])
+
+
+class FollowSuggestionsTestCase(APITestCase):
+    """Test cases for the precomputed who-to-follow recommendations"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.alice, self.bob, self.carol, self.dave, self.erin, self.frank = [
+            User.objects.create_user(username=name, password='password123')
+            for name in ('alice', 'bob', 'carol', 'dave', 'erin', 'frank')
+        ]
+        # alice follows bob and carol; both follow dave; carol also follows erin
+        self.alice.following.add(self.bob, self.carol)
+        self.bob.following.add(self.dave)
+        self.carol.following.add(self.dave, self.erin)
+        # frank shares both of alice's followees and also follows erin
+        self.frank.following.add(self.bob, self.carol, self.erin)
+
+    def test_friends_of_friends_ranked_and_followed_excluded(self):
+        """Accounts followed by more of your followees rank higher; followed accounts never appear"""
+        from accounts.recommendations import compute_follow_suggestions, get_follow_suggestions
+
+        self.assertEqual(compute_follow_suggestions(), 4)
+        suggestions = get_follow_suggestions(self.alice.id)
+        # dave: followed by bob and carol (2); erin: followed by carol (1) plus frank, who shares two followees (0.5)
+        self.assertEqual(suggestions, [self.dave.id, self.erin.id])
+        self.assertNotIn(self.bob.id, suggestions)
+        self.assertNotIn(self.alice.id, suggestions)
+
+    def test_blocked_accounts_excluded(self):
+        """Accounts blocked in either direction are dropped from the list"""
+        from accounts.recommendations import compute_follow_suggestions, get_follow_suggestions
+
+        self.erin.blocked_users.add(self.alice)
+        compute_follow_suggestions()
+        self.assertNotIn(self.erin.id, get_follow_suggestions(self.alice.id))
+
+    def test_follow_event_updates_list_incrementally(self):
+        """A new follow drops the followed account and scores the accounts it follows"""
+        from accounts.recommendations import compute_follow_suggestions, get_follow_suggestions
+
+        compute_follow_suggestions()
+        newcomer = User.objects.create_user(username='newcomer', password='password123')
+        self.dave.following.add(newcomer)
+        self.assertEqual(get_follow_suggestions(self.alice.id), [self.dave.id, self.erin.id])
+
+        self.dave.followers.add(self.alice)
+        self.assertEqual(get_follow_suggestions(self.alice.id), [self.erin.id, newcomer.id])
+
+    def test_follow_event_skips_blocked_accounts(self):
+        """Accounts scored on a follow event are filtered against blocks in both directions"""
+        from accounts.recommendations import compute_follow_suggestions, get_follow_suggestions
+
+        compute_follow_suggestions()
+        blocked, blocker = [User.objects.create_user(username=name, password='password123') for name in ('gina', 'hank')]
+        self.dave.following.add(blocked, blocker)
+        self.alice.blocked_users.add(blocked)
+        blocker.blocked_users.add(self.alice)
+
+        self.dave.followers.add(self.alice)
+        self.assertEqual(get_follow_suggestions(self.alice.id), [self.erin.id])
+
+    def test_popular_fallback_skips_blocks_and_ignores_first_limit(self):
+        """The popular fallback drops blocked accounts and is not cut to the first caller's limit"""
+        from accounts.recommendations import get_follow_suggestions
+
+        self.assertEqual(get_follow_suggestions(limit=1), [self.bob.id])
+        self.assertEqual(
+            get_follow_suggestions(limit=5), [self.bob.id, self.carol.id, self.dave.id, self.erin.id]
+        )
+
+        gina = User.objects.create_user(username='gina', password='password123')
+        gina.blocked_users.add(self.bob)
+        self.dave.blocked_users.add(gina)
+        self.assertEqual(get_follow_suggestions(gina.id), [self.carol.id, self.erin.id])
+
+    def test_suggested_users_endpoint(self):
+        """Authenticated users get their own list; anonymous users get the most followed accounts"""
+        from accounts.recommendations import compute_follow_suggestions
+
+        compute_follow_suggestions()
+        self.client.force_authenticate(user=self.alice)
+        response = self.client.get(reverse('post:suggested-users'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual([user['id'] for user in results], [self.dave.id, self.erin.id])
+
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse('post:suggested-users'))
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual([user['id'] for user in results][:2], [self.bob.id, self.carol.id])
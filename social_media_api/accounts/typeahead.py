@@ -0,0 +1,312 @@
+import bisect
+import heapq
+import logging
+import threading
+import unicodedata
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+# Shared cache keys used to keep the per-worker indexes in step
+TYPEAHEAD_VERSION_KEY = 'typeahead_users_version'
+TYPEAHEAD_CHANGES_KEY = 'typeahead_users_changes'
+TYPEAHEAD_VIEWER_KEY = 'typeahead_viewer_{}'
+TYPEAHEAD_PREFIX_KEY = 'typeahead_users_prefix_{}_{}'
+
+DEFAULT_TYPEAHEAD_CONFIG = {
+    'max_local_users': 200000,     # Above this, workers use the shared-cache fallback
+    'change_log_size': 500,        # Changes kept in the shared log before a full rebuild
+    'prefix_cache_timeout': 300,   # Fallback prefix results (seconds)
+    'viewer_cache_timeout': 60,    # Viewer follow/block sets (seconds)
+    'max_results': 10,
+}
+
+
+def get_typeahead_config():
+    """Return typeahead settings merged over the defaults."""
+    config = dict(DEFAULT_TYPEAHEAD_CONFIG)
+    config.update(getattr(settings, 'TYPEAHEAD_CONFIG', {}))
+    return config
+
+
+def normalize_term(value):
+    """Casefold and strip accents so 'Mbappé' and 'mbappe' share a prefix."""
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(value))
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.casefold().split())
+
+
+def display_name(first_name, last_name, username):
+    """Mirror UserSerializer.get_name for index entries."""
+    name = f"{first_name or ''} {last_name or ''}".strip()
+    return name or username
+
+
+class IndexSnapshot(namedtuple('IndexSnapshot', 'terms users user_terms version built local_enabled')):
+    """
+    One generation of the local index. Never modified once published:
+    writers build the next snapshot and swap it in, so readers need no lock.
+    """
+
+
+EMPTY_SNAPSHOT = IndexSnapshot([], {}, {}, None, False, True)
+
+
+class UserTypeaheadIndex:
+    """
+    Per-worker prefix index over usernames and display names.
+
+    Terms are held in a sorted list of (term, user_id) tuples, so a prefix
+    lookup is a bisect plus a forward scan. Each worker builds its copy
+    lazily on first use and catches up with other workers through a
+    version counter and change log in the shared cache; user saves only
+    append to that log. When the user table is too large to hold in memory
+    the index answers from prefix queries cached in the shared cache instead.
+
+    Queries read the current IndexSnapshot without locking; the lock only
+    serializes rebuilds and change application, which publish a new snapshot.
+    """
+
+    ENTRY_FIELDS = ('id', 'username', 'first_name', 'last_name', 'profile_image', 'is_verified')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = EMPTY_SNAPSHOT
+
+    def reset(self):
+        """Drop the local copy; the next query rebuilds it."""
+        with self._lock:
+            self._snapshot = EMPTY_SNAPSHOT
+
+    # Building and incremental maintenance
+
+    def _terms_for(self, entry):
+        terms = {normalize_term(entry['username'])}
+        name = normalize_term(entry['name'])
+        if name:
+            terms.add(name)
+            terms.update(name.split(' '))
+        terms.discard('')
+        return terms
+
+    def _make_entry(self, row):
+        return {
+            'id': row['id'],
+            'username': row['username'],
+            'name': display_name(row['first_name'], row['last_name'], row['username']),
+            'profile_image': row['profile_image'] or '',
+            'is_verified': row['is_verified'],
+        }
+
+    def _build(self):
+        """Load every user into a new snapshot. Call with the lock held."""
+        config = get_typeahead_config()
+        User = get_user_model()
+        version = cache.get(TYPEAHEAD_VERSION_KEY, 0)
+        if User.objects.count() > config['max_local_users']:
+            logger.info("User typeahead index disabled locally; using shared cache fallback")
+            return IndexSnapshot([], {}, {}, version, True, False)
+
+        terms, users, user_terms = [], {}, {}
+        for row in User.objects.filter(is_active=True).values(*self.ENTRY_FIELDS).iterator():
+            entry = self._make_entry(row)
+            users[entry['id']] = entry
+            user_terms[entry['id']] = self._terms_for(entry)
+            terms.extend((term, entry['id']) for term in user_terms[entry['id']])
+        terms.sort()
+        logger.info(f"Built user typeahead index with {len(users)} users")
+        return IndexSnapshot(terms, users, user_terms, version, True, True)
+
+    def build(self):
+        """Load every user into the local index."""
+        with self._lock:
+            self._snapshot = self._build()
+
+    def _apply_changes(self, snapshot, user_ids, version):
+        """A copy of `snapshot` with the given users reloaded."""
+        User = get_user_model()
+        rows = {
+            row['id']: row
+            for row in User.objects.filter(id__in=user_ids, is_active=True).values(*self.ENTRY_FIELDS)
+        }
+        terms, users, user_terms = list(snapshot.terms), dict(snapshot.users), dict(snapshot.user_terms)
+        for user_id in user_ids:
+            for term in user_terms.pop(user_id, ()):
+                position = bisect.bisect_left(terms, (term, user_id))
+                if position < len(terms) and terms[position] == (term, user_id):
+                    del terms[position]
+            users.pop(user_id, None)
+            if user_id in rows:
+                entry = self._make_entry(rows[user_id])
+                users[user_id] = entry
+                user_terms[user_id] = self._terms_for(entry)
+                for term in user_terms[user_id]:
+                    bisect.insort(terms, (term, user_id))
+        return snapshot._replace(terms=terms, users=users, user_terms=user_terms, version=version)
+
+    def sync(self):
+        """
+        Bring the local index up to the shared version, rebuilding if the log
+        has gaps, and return the current snapshot. Only a stale index takes the lock.
+        """
+        snapshot = self._snapshot
+        if snapshot.built and cache.get(TYPEAHEAD_VERSION_KEY, 0) == snapshot.version:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if not snapshot.built:
+                self._snapshot = self._build()
+                return self._snapshot
+
+            shared_version = cache.get(TYPEAHEAD_VERSION_KEY, 0)
+            if shared_version == snapshot.version:
+                return snapshot
+            if not snapshot.local_enabled:
+                self._snapshot = snapshot._replace(version=shared_version)
+                return self._snapshot
+
+            changes = [c for c in cache.get(TYPEAHEAD_CHANGES_KEY, []) if c[0] > snapshot.version]
+            expected = set(range(snapshot.version + 1, shared_version + 1))
+            if shared_version < snapshot.version or {c[0] for c in changes} != expected:
+                self._snapshot = self._build()
+            else:
+                self._snapshot = self._apply_changes(
+                    snapshot, {user_id for _, user_id in changes}, shared_version
+                )
+            return self._snapshot
+
+    @staticmethod
+    def record_change(user_id):
+        """Publish a changed user to every worker's index."""
+        config = get_typeahead_config()
+        try:
+            cache.add(TYPEAHEAD_VERSION_KEY, 0, None)
+            version = cache.incr(TYPEAHEAD_VERSION_KEY)
+        except ValueError:
+            # Key evicted between add and incr; start a fresh log
+            cache.set(TYPEAHEAD_VERSION_KEY, 1, None)
+            version = 1
+
+        changes = cache.get(TYPEAHEAD_CHANGES_KEY, [])
+        changes.append((version, user_id))
+        cache.set(TYPEAHEAD_CHANGES_KEY, changes[-config['change_log_size']:], None)
+
+    # Queries
+
+    def _sort_key(self, entry, prefix):
+        username = normalize_term(entry['username'])
+        return (username != prefix, not username.startswith(prefix), len(username), username)
+
+    def _search_local(self, snapshot, prefix, limit, followed_ids, exclude_ids):
+        terms, users = snapshot.terms, snapshot.users
+        followed, seen = [], set(exclude_ids)
+        low = bisect.bisect_left(terms, (prefix,))
+        high = bisect.bisect_left(terms, (prefix + '\U0010ffff',))
+
+        if high - low > 4 * len(followed_ids):
+            # Wide prefix: check followed users directly rather than finding them in the scan
+            for user_id in followed_ids:
+                if user_id in seen or user_id not in snapshot.user_terms:
+                    continue
+                if any(term.startswith(prefix) for term in snapshot.user_terms[user_id]):
+                    followed.append(users[user_id])
+                    seen.add(user_id)
+
+        def matches():
+            for position in range(low, high):
+                user_id = terms[position][1]
+                if user_id in seen:
+                    continue
+                seen.add(user_id)
+                if user_id in followed_ids:
+                    followed.append(users[user_id])
+                else:
+                    yield users[user_id]
+
+        # Rank the whole range before truncating; lexicographic order is not rank order
+        others = heapq.nsmallest(limit, matches(), key=lambda e: self._sort_key(e, prefix))
+        followed.sort(key=lambda e: self._sort_key(e, prefix))
+        return followed, others
+
+    def _search_shared(self, prefix, limit, followed_ids, exclude_ids):
+        """Fallback for workers without a local index: cached DB prefix queries."""
+        config = get_typeahead_config()
+        version = cache.get(TYPEAHEAD_VERSION_KEY, 0)
+        cache_key = TYPEAHEAD_PREFIX_KEY.format(version, prefix)
+        entries = cache.get(cache_key)
+        if entries is None:
+            User = get_user_model()
+            rows = User.objects.filter(is_active=True).filter(
+                Q(username__istartswith=prefix) |
+                Q(first_name__istartswith=prefix) |
+                Q(last_name__istartswith=prefix)
+            ).order_by('username').values(*self.ENTRY_FIELDS)[:limit * 5]
+            entries = [self._make_entry(row) for row in rows]
+            cache.set(cache_key, entries, config['prefix_cache_timeout'])
+
+        followed, others = [], []
+        for entry in entries:
+            if entry['id'] in exclude_ids:
+                continue
+            (followed if entry['id'] in followed_ids else others).append(entry)
+        followed.sort(key=lambda e: self._sort_key(e, prefix))
+        others.sort(key=lambda e: self._sort_key(e, prefix))
+        return followed, others
+
+    def search(self, query, limit=None, followed_ids=frozenset(), exclude_ids=frozenset()):
+        """
+        Return up to `limit` entries whose username or display name starts with `query`.
+        Followed users are ranked first; each entry carries an `is_followed` flag.
+        """
+        prefix = normalize_term(query)
+        if not prefix:
+            return []
+        limit = limit or get_typeahead_config()['max_results']
+
+        try:
+            snapshot = self.sync()
+        except Exception as e:
+            logger.error(f"Failed to sync user typeahead index: {e}")
+            snapshot = self._snapshot
+
+        if snapshot.built and snapshot.local_enabled:
+            followed, others = self._search_local(snapshot, prefix, limit, followed_ids, exclude_ids)
+        else:
+            followed, others = self._search_shared(prefix, limit, followed_ids, exclude_ids)
+
+        results = [dict(entry, is_followed=True) for entry in followed]
+        results += [dict(entry, is_followed=False) for entry in others]
+        return results[:limit]
+
+
+def get_viewer_context(user):
+    """Return cached (followed_ids, blocked_ids) for ranking and filtering typeahead results."""
+    if not user or not user.is_authenticated:
+        return frozenset(), frozenset()
+
+    cache_key = TYPEAHEAD_VIEWER_KEY.format(user.id)
+    context = cache.get(cache_key)
+    if context is None:
+        context = (
+            list(user.following.values_list('id', flat=True)),
+            list(user.blocked_users.values_list('id', flat=True)),
+        )
+        cache.set(cache_key, context, get_typeahead_config()['viewer_cache_timeout'])
+    return frozenset(context[0]), frozenset(context[1])
+
+
+def invalidate_viewer_context(*user_ids):
+    """Forget cached follow/block sets after a relationship change."""
+    cache.delete_many([TYPEAHEAD_VIEWER_KEY.format(user_id) for user_id in user_ids])
+
+
+# Global index instance (one per worker process)
+user_typeahead_index = UserTypeaheadIndex()
@@ -1,12 +1,17 @@
 # messages/consumers.py
+import asyncio
 import json
+import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from asgiref.sync import async_to_sync
 from django.contrib.auth.models import AnonymousUser
 from django.utils import timezone
+from .delivery import get_chat_socket_config, message_event, persist_messages
 from .models import Conversation, Message
 
+logger = logging.getLogger(__name__)
+
 
 class ChatConsumer(AsyncWebsocketConsumer):
     """
@@ -16,6 +21,12 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     async def connect(self):
         print("ChatConsumer connect called")
+        # Messages received over the socket and not yet saved
+        self.pending = []
+        self.flush_task = None
+        # Held while a batch is saved and broadcast, so batches go out in order
+        self.flush_lock = asyncio.Lock()
+        self.config = get_chat_socket_config()
         try:
             # Get user from scope (authenticated by ASGI middleware)
             self.user = self.scope.get('user', AnonymousUser())
@@ -70,6 +81,13 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     async def disconnect(self, close_code):
         print(f"ChatConsumer disconnect called, close_code: {close_code}")
+        # Write whatever is still queued; it has already been acknowledged. A
+        # pending timer is still sleeping and is skipped; a batch already being
+        # saved holds the lock, so this flush waits for it before leaving the room
+        if self.flush_task:
+            self.flush_task.cancel()
+            self.flush_task = None
+        await self.flush()
         if hasattr(self, 'room_group_name'):
             await self.channel_layer.group_discard(
                 self.room_group_name,
@@ -77,11 +95,92 @@ class ChatConsumer(AsyncWebsocketConsumer):
             )
         print("ChatConsumer disconnected")
 
-    # WebSocket consumers for chat don't need to receive messages from clients
-    # Messages are sent via REST API and broadcast via signals
     async def receive(self, text_data):
-        # For now, just acknowledge receipt but don't process
-        pass
+        """
+        Send path: {"type": "message", "client_id": "...", "content": "...",
+        "reply_to_id": optional}. The frame is acknowledged with its client_id
+        at once and queued; the queue is saved in micro-batches and each
+        saved message is broadcast to the room carrying the same client_id.
+        """
+        try:
+            frame = json.loads(text_data)
+        except (TypeError, ValueError):
+            await self.send_error(None, 'Invalid JSON')
+            return
+        if not isinstance(frame, dict) or frame.get('type') != 'message':
+            await self.send_error(None, 'Unsupported frame type')
+            return
+
+        client_id = frame.get('client_id')
+        content = frame.get('content')
+        content = content.strip() if isinstance(content, str) else ''
+        if not client_id:
+            await self.send_error(None, 'client_id is required')
+            return
+        if not content:
+            await self.send_error(client_id, 'content is required')
+            return
+        if len(content) > self.config['max_length']:
+            await self.send_error(client_id, f"content is longer than {self.config['max_length']} characters")
+            return
+        try:
+            reply_to_id = self.parse_message_id(frame.get('reply_to_id'))
+        except ValueError:
+            await self.send_error(client_id, 'reply_to_id must be a message id')
+            return
+
+        self.pending.append({
+            'client_id': client_id,
+            'content': content,
+            'reply_to_id': reply_to_id,
+            'timestamp': timezone.now(),
+        })
+        await self.send(text_data=json.dumps({'type': 'ack', 'client_id': client_id}))
+
+        if len(self.pending) >= self.config['max_batch']:
+            await self.flush()
+        elif self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush_later())
+
+    async def flush_later(self):
+        await asyncio.sleep(self.config['flush_interval'])
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        """Save the queued messages in one batch and broadcast them to the room."""
+        async with self.flush_lock:
+            batch, self.pending = self.pending, []
+            if not batch:
+                return
+            try:
+                messages = await self.persist_messages(batch)
+            except Exception:
+                logger.exception(f"Error saving {len(batch)} chat messages in conversation {self.conversation.id}")
+                for entry in batch:
+                    await self.send_error(entry['client_id'], 'Message could not be saved')
+                return
+
+            for message, entry in zip(messages, batch):
+                await self.channel_layer.group_send(
+                    self.room_group_name,
+                    message_event(message, self.user, entry['client_id'])
+                )
+
+    @staticmethod
+    def parse_message_id(value):
+        """A message id from a frame as an int, accepting digit strings; None when absent. Raises ValueError."""
+        if value is None:
+            return None
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError(value)
+        value = int(value)
+        if not 0 < value < 2 ** 63:
+            raise ValueError(value)
+        return value
+
+    async def send_error(self, client_id, error):
+        await self.send(text_data=json.dumps({'type': 'error', 'client_id': client_id, 'error': error}))
 
     # Receive message from room group
     async def chat_message(self, event):
@@ -93,6 +192,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'message': message
         }))
 
+    @database_sync_to_async
+    def persist_messages(self, batch):
+        return persist_messages(self.conversation, self.user, batch)
+
     @database_sync_to_async
     def get_user_by_username(self, username):
         from accounts.models import User
@@ -103,16 +206,5 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     @database_sync_to_async
     def get_or_create_conversation(self, user1, user2):
-        # Find existing conversation
-        conversation = Conversation.objects.filter(
-            participants=user1
-        ).filter(
-            participants=user2
-        ).first()
-
-        if not conversation:
-            # Create new conversation
-            conversation = Conversation.objects.create()
-            conversation.participants.add(user1, user2)
-
+        conversation, _ = Conversation.get_or_create_direct(user1, user2)
         return conversation
\ No newline at end of file
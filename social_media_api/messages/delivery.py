@@ -0,0 +1,110 @@
+"""
+Persistence for messages sent over the chat WebSocket.
+
+ChatConsumer acknowledges each frame as soon as it is accepted and queues
+it. The queue is written in micro-batches: one sequence reservation, one
+bulk_create, one summary update and at most one notification per recipient
+for the whole batch. The consumer then broadcasts the saved messages to the
+conversation group itself, without the post_save signal round trip of the
+REST path.
+"""
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from notifications.models import Notification
+from .models import Conversation, Message
+from .summaries import record_messages
+
+DEFAULT_CHAT_SOCKET_CONFIG = {
+    'flush_interval': 0.05,  # Seconds a queued message waits for others to share its write
+    'max_batch': 50,         # Flush early once this many messages are queued
+    'max_length': 1000,      # Same limit as SendMessageSerializer
+}
+
+
+def get_chat_socket_config():
+    """Return chat WebSocket settings merged over the defaults."""
+    config = dict(DEFAULT_CHAT_SOCKET_CONFIG)
+    config.update(getattr(settings, 'CHAT_SOCKET_CONFIG', {}))
+    return config
+
+
+def message_event(message, sender, client_id=None):
+    """Group event broadcasting a saved message, as ChatConsumer.chat_message sends it on."""
+    data = {
+        'id': message.id,
+        'content': message.content,
+        'sender': {
+            'id': sender.id,
+            'username': sender.username,
+            'name': sender.get_full_name() or sender.username
+        },
+        'created_at': message.timestamp.isoformat(),
+        'conversation_id': message.conversation_id
+    }
+    if client_id is not None:
+        data['client_id'] = client_id
+    return {'type': 'chat_message', 'message': data}
+
+
+def persist_messages(conversation, sender, pending):
+    """
+    Save queued messages in one transaction and return them, oldest first.
+    `pending` holds dicts with content, timestamp and an optional
+    reply_to_id; replies to messages outside the conversation are dropped.
+    """
+    reply_ids = {entry['reply_to_id'] for entry in pending if entry.get('reply_to_id')}
+    with transaction.atomic():
+        if reply_ids:
+            reply_ids = set(conversation.messages.filter(id__in=reply_ids).values_list('id', flat=True))
+
+        # Reserve the batch's sequence numbers with a single UPDATE
+        Conversation.objects.filter(pk=conversation.pk).update(
+            last_sequence=F('last_sequence') + len(pending), updated_at=timezone.now()
+        )
+        last_sequence = Conversation.objects.values_list('last_sequence', flat=True).get(pk=conversation.pk)
+        first_sequence = last_sequence - len(pending) + 1
+
+        messages = Message.objects.bulk_create([
+            Message(
+                conversation=conversation,
+                sender=sender,
+                content=entry['content'],
+                timestamp=entry['timestamp'],
+                reply_to_id=entry.get('reply_to_id') if entry.get('reply_to_id') in reply_ids else None,
+                sequence=first_sequence + index,
+            )
+            for index, entry in enumerate(pending)
+        ])
+        record_messages(messages)
+        notify_recipients(conversation, sender)
+    return messages
+
+
+def notify_recipients(conversation, sender):
+    """
+    One 'messaged' notification per recipient and conversation: recipients
+    who still have an unread one from this sender are not notified again.
+    """
+    content_type = ContentType.objects.get_for_model(Conversation)
+    recipients = conversation.participants.exclude(id=sender.id)
+    already_notified = set(Notification.objects.filter(
+        recipient__in=recipients,
+        actor=sender,
+        verb='messaged',
+        content_type=content_type,
+        object_id=conversation.id,
+        is_read=False
+    ).values_list('recipient_id', flat=True))
+
+    for recipient in recipients:
+        if recipient.id not in already_notified:
+            Notification.objects.create(
+                recipient=recipient,
+                actor=sender,
+                verb='messaged',
+                target=conversation
+            )
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_summaries(apps, schema_editor):
+    """One summary row per participant, filled from the existing messages."""
+    Conversation = apps.get_model('messaging_app', 'Conversation')
+    ConversationSummary = apps.get_model('messaging_app', 'ConversationSummary')
+    rows = []
+    for conversation in Conversation.objects.prefetch_related('participants'):
+        participant_ids = [user.id for user in conversation.participants.all()]
+        last_message = conversation.messages.order_by('-timestamp').first()
+        for user_id in participant_ids:
+            others = [other for other in participant_ids if other != user_id]
+            content = ' '.join(last_message.content.split()) if last_message else ''
+            rows.append(ConversationSummary(
+                conversation=conversation,
+                user_id=user_id,
+                other_user_id=others[0] if len(others) == 1 else None,
+                last_message=last_message,
+                last_message_snippet=content if len(content) <= 100 else content[:99] + '…',
+                last_message_at=last_message.timestamp if last_message else None,
+                unread_count=conversation.messages.filter(is_read=False).exclude(sender_id=user_id).count(),
+            ))
+    ConversationSummary.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging_app', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_snippet', models.CharField(blank=True, max_length=100)),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='summaries', to='messaging_app.conversation')),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='messaging_app.message')),
+                ('other_user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-last_message_at'], name='messaging_a_user_id_378a40_idx')],
+                'unique_together': {('conversation', 'user')},
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
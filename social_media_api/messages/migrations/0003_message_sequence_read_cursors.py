@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:05
+
+from django.db import migrations, models
+
+
+def derive_read_cursors(apps, schema_editor):
+    """
+    Number each conversation's messages in order, then place every
+    participant's cursor just before the first message they had not read,
+    or at their own latest message if that is further.
+    """
+    Conversation = apps.get_model('messaging_app', 'Conversation')
+    Message = apps.get_model('messaging_app', 'Message')
+    ConversationSummary = apps.get_model('messaging_app', 'ConversationSummary')
+
+    for conversation in Conversation.objects.all().iterator():
+        messages = list(conversation.messages.order_by('timestamp', 'id'))
+        for sequence, message in enumerate(messages, start=1):
+            message.sequence = sequence
+        Message.objects.bulk_update(messages, ['sequence'], batch_size=1000)
+        Conversation.objects.filter(pk=conversation.pk).update(last_sequence=len(messages))
+
+        summaries = list(ConversationSummary.objects.filter(conversation=conversation))
+        for summary in summaries:
+            received = [message for message in messages if message.sender_id != summary.user_id]
+            first_unread = next((message for message in received if not message.is_read), None)
+            sent = [message.sequence for message in messages if message.sender_id == summary.user_id]
+            summary.last_read_sequence = max(
+                first_unread.sequence - 1 if first_unread else len(messages),
+                # Sending a message reads everything before it
+                max(sent, default=0),
+            )
+            read_times = [
+                message.read_at for message in received
+                if message.read_at and message.sequence <= summary.last_read_sequence
+            ]
+            summary.last_read_at = max(read_times) if read_times else None
+        ConversationSummary.objects.bulk_update(summaries, ['last_read_sequence', 'last_read_at'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging_app', '0002_conversation_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_sequence',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='sequence',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='conversationsummary',
+            name='last_read_sequence',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversationsummary',
+            name='last_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(derive_read_cursors, migrations.RunPython.noop),
+    ]
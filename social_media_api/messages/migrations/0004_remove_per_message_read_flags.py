@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging_app', '0003_message_sequence_read_cursors'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='conversationsummary',
+            name='unread_count',
+        ),
+        migrations.RemoveField(
+            model_name='message',
+            name='is_read',
+        ),
+        migrations.RemoveField(
+            model_name='message',
+            name='read_at',
+        ),
+        migrations.AddConstraint(
+            model_name='message',
+            constraint=models.UniqueConstraint(fields=('conversation', 'sequence'), name='unique_message_sequence'),
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:34
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def snippet(content):
+    content = ' '.join(content.split())
+    return content if len(content) <= 100 else content[:99] + '…'
+
+
+def merge_into(keep, duplicates, apps):
+    """
+    Move the messages of `duplicates` into `keep`, renumber them by time and
+    rebuild both participants' summaries, keeping what each had read.
+    """
+    Message = apps.get_model('messaging_app', 'Message')
+    ConversationSummary = apps.get_model('messaging_app', 'ConversationSummary')
+    group = [keep] + duplicates
+
+    cursors = {
+        (summary.conversation_id, summary.user_id): summary
+        for summary in ConversationSummary.objects.filter(conversation__in=group)
+    }
+    messages = sorted(Message.objects.filter(conversation__in=group), key=lambda message: (message.timestamp, message.id))
+    user_ids = {user_id for conversation_id, user_id in cursors} | set(keep.participants.values_list('id', flat=True))
+    was_read = {
+        (message.id, user_id): message.sequence <= getattr(cursors.get((message.conversation_id, user_id)), 'last_read_sequence', 0)
+        for message in messages for user_id in user_ids
+    }
+
+    # Park every sequence above the current range first so the moves never
+    # collide with the unique (conversation, sequence) constraint
+    for sequence, message in enumerate(messages, start=1):
+        message.sequence = len(messages) + sequence
+    Message.objects.bulk_update(messages, ['sequence'], batch_size=1000)
+    for sequence, message in enumerate(messages, start=1):
+        message.sequence = sequence
+        message.conversation_id = keep.id
+    Message.objects.bulk_update(messages, ['sequence', 'conversation'], batch_size=1000)
+
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    content_type = ContentType.objects.filter(app_label='messaging_app', model='conversation').first()
+    if content_type:
+        Notification = apps.get_model('notifications', 'Notification')
+        Notification.objects.filter(
+            content_type_id=content_type.id, object_id__in=[duplicate.id for duplicate in duplicates]
+        ).update(object_id=keep.id)
+
+    last = messages[-1] if messages else None
+    summaries = []
+    for user_id in user_ids:
+        others = [other for other in user_ids if other != user_id]
+        received = [message for message in messages if message.sender_id != user_id]
+        first_unread = next((message for message in received if not was_read[message.id, user_id]), None)
+        sent = [message.sequence for message in messages if message.sender_id == user_id]
+        read_times = [
+            cursors[conversation.id, user_id].last_read_at for conversation in group
+            if (conversation.id, user_id) in cursors and cursors[conversation.id, user_id].last_read_at
+        ]
+        summaries.append(ConversationSummary(
+            conversation_id=keep.id,
+            user_id=user_id,
+            other_user_id=others[0] if len(others) == 1 else None,
+            last_message=last,
+            last_message_snippet=snippet(last.content) if last else '',
+            last_message_at=last.timestamp if last else None,
+            last_read_sequence=max(first_unread.sequence - 1 if first_unread else len(messages), max(sent, default=0)),
+            last_read_at=max(read_times) if read_times else None,
+        ))
+    ConversationSummary.objects.filter(conversation__in=group).delete()
+    ConversationSummary.objects.bulk_create(summaries)
+
+    keep.last_sequence = len(messages)
+    keep.save(update_fields=['last_sequence'])
+    for duplicate in duplicates:
+        duplicate.delete()
+
+
+def assign_direct_keys(apps, schema_editor):
+    """
+    Key every one-to-one conversation by its participant pair, merging
+    conversations that share a pair into the oldest one first.
+    """
+    Conversation = apps.get_model('messaging_app', 'Conversation')
+    by_pair = defaultdict(list)
+    for conversation in Conversation.objects.prefetch_related('participants').order_by('created_at', 'id'):
+        participant_ids = sorted(user.id for user in conversation.participants.all())
+        if len(participant_ids) == 1:
+            participant_ids *= 2  # a user's conversation with themselves
+        if len(participant_ids) == 2:
+            by_pair[f"{participant_ids[0]}:{participant_ids[1]}"].append(conversation)
+
+    keyed = []
+    for direct_key, conversations in by_pair.items():
+        keep, duplicates = conversations[0], conversations[1:]
+        if duplicates:
+            merge_into(keep, duplicates, apps)
+        keep.direct_key = direct_key
+        keyed.append(keep)
+    Conversation.objects.bulk_update(keyed, ['direct_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging_app', '0004_remove_per_message_read_flags'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('notifications', '0002_alter_notification_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='direct_key',
+            field=models.CharField(blank=True, editable=False, max_length=41, null=True, unique=True),
+        ),
+        migrations.RunPython(assign_direct_keys, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,8 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
 from django.utils import timezone
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from notifications.models import Notification
 
 class Conversation(models.Model):
     """
@@ -18,6 +17,13 @@ class Conversation(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Sequence number of the latest message; read cursors are measured against it
+    last_sequence = models.PositiveIntegerField(default=0)
+
+    # "<lower user id>:<higher user id>" for one-to-one conversations, so each
+    # pair has exactly one and finding it is a unique index lookup
+    direct_key = models.CharField(max_length=41, unique=True, null=True, blank=True, editable=False)
+
     class Meta:
         ordering = ['-updated_at']
 
@@ -27,6 +33,36 @@ class Conversation(models.Model):
             return f"Chat between {participants[0].username} and {participants[1].username}"
         return f"Group chat with {len(participants)} participants"
 
+    @staticmethod
+    def direct_key_for(user_a, user_b):
+        """Canonical key of the one-to-one conversation between two users."""
+        low, high = sorted([user_a.pk, user_b.pk])
+        return f"{low}:{high}"
+
+    @classmethod
+    def get_direct(cls, user_a, user_b):
+        """The one-to-one conversation between two users, or None."""
+        return cls.objects.filter(direct_key=cls.direct_key_for(user_a, user_b)).first()
+
+    @classmethod
+    def get_or_create_direct(cls, user_a, user_b):
+        """
+        Return (conversation, created) for the one-to-one conversation between
+        two users. Concurrent callers race on the unique direct_key; the loser
+        rolls back and picks up the winner's conversation.
+        """
+        direct_key = cls.direct_key_for(user_a, user_b)
+        conversation = cls.objects.filter(direct_key=direct_key).first()
+        if conversation:
+            return conversation, False
+        try:
+            with transaction.atomic():
+                conversation = cls.objects.create(direct_key=direct_key)
+                conversation.participants.add(user_a, user_b)
+            return conversation, True
+        except IntegrityError:
+            return cls.objects.get(direct_key=direct_key), False
+
     @property
     def last_message(self):
         """Get the most recent message in this conversation."""
@@ -34,7 +70,19 @@ class Conversation(models.Model):
 
     def unread_count_for_user(self, user):
         """Get unread message count for a specific user."""
-        return self.messages.exclude(sender=user).filter(is_read=False).count()
+        cursor = self.summaries.filter(user=user).values_list('last_read_sequence', flat=True).first()
+        if cursor is None:
+            return 0
+        return max(self.last_sequence - cursor, 0)
+
+    def allocate_sequence(self):
+        """
+        Claim the next message sequence number. Must run inside a transaction:
+        the UPDATE locks the row until commit, so concurrent senders queue up.
+        """
+        Conversation.objects.filter(pk=self.pk).update(last_sequence=models.F('last_sequence') + 1)
+        self.last_sequence = Conversation.objects.values_list('last_sequence', flat=True).get(pk=self.pk)
+        return self.last_sequence
 
 
 class Message(models.Model):
@@ -57,8 +105,9 @@ class Message(models.Model):
 
     # Message metadata
     timestamp = models.DateTimeField(default=timezone.now)
-    is_read = models.BooleanField(default=False)
-    read_at = models.DateTimeField(null=True, blank=True)
+    # Position in the conversation, assigned on create; read state comes from
+    # comparing it with each participant's read cursor (ConversationSummary)
+    sequence = models.PositiveIntegerField(default=0, editable=False)
 
     # For message threading/replies (optional)
     reply_to = models.ForeignKey(
@@ -75,33 +124,85 @@ class Message(models.Model):
             models.Index(fields=['conversation', 'timestamp']),
             models.Index(fields=['sender', 'timestamp']),
         ]
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'sequence'], name='unique_message_sequence'),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.username}: {self.content[:50]}..."
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.sequence:
+            with transaction.atomic():
+                self.sequence = self.conversation.allocate_sequence()
+                super().save(*args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
+
     def mark_as_read(self):
-        """Mark message as read."""
-        if not self.is_read:
-            self.is_read = True
-            self.read_at = timezone.now()
-            self.save(update_fields=['is_read', 'read_at'])
+        """Mark message, and everything before it, as read by the other participants."""
+        from .summaries import mark_read_through
+        mark_read_through(self)
+
+
+class ConversationSummary(models.Model):
+    """
+    One participant's inbox row for a conversation: the other participant,
+    the latest message and their read cursor, the sequence number of the
+    last message they have read. Kept current by messages.summaries when
+    messages are sent and read, so the inbox is a single query over these
+    rows and marking a conversation read is a single-row write.
+    """
+    SNIPPET_LENGTH = 100
+
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name='summaries'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='conversation_summaries'
+    )
+    other_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+
+    last_message = models.ForeignKey(
+        Message,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    last_message_snippet = models.CharField(max_length=SNIPPET_LENGTH, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+
+    last_read_sequence = models.PositiveIntegerField(default=0)
+    last_read_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        unique_together = ['conversation', 'user']
+        indexes = [
+            models.Index(fields=['user', '-last_message_at']),
+        ]
+
+    def __str__(self):
+        return f"Conversation {self.conversation_id} for user {self.user_id} ({self.unread_count} unread)"
+
+    @property
+    def unread_count(self):
+        """Messages past the read cursor; select the conversation with the row."""
+        return max(self.conversation.last_sequence - self.last_read_sequence, 0)
 
 @receiver(post_save, sender=Message)
 def create_message_notification(sender, instance, created, **kwargs):
-    """Create notification when a new message is sent."""
+    """Notify the other participants of a new message, as the chat socket does for its batches."""
     if created:
-        # Find the recipient (the other participant in the conversation)
-        recipient = None
-        for participant in instance.conversation.participants.all():
-            if participant != instance.sender:
-                recipient = participant
-                break
-
-        if recipient:
-            Notification.objects.create(
-                recipient=recipient,
-                actor=instance.sender,
-                verb="messaged",
-                target=instance.conversation
-            )
+        from .delivery import notify_recipients
+        notify_recipients(instance.conversation, instance.sender)
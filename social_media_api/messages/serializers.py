@@ -1,6 +1,7 @@
 from rest_framework import serializers
-from .models import Conversation, Message
+from .models import Conversation, ConversationSummary, Message
 from accounts.models import User
+from .summaries import mark_conversation_read, read_cursors, read_state
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -15,6 +16,10 @@ class MessageSerializer(serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
     reply_to = serializers.SerializerMethodField()
     created_at = serializers.DateTimeField(source='timestamp', read_only=True)  # Frontend expects 'created_at'
+    # Derived from the participants' read cursors; context['read_cursors']
+    # caches them per conversation ({conversation_id: read_cursors(...)})
+    is_read = serializers.SerializerMethodField()
+    read_at = serializers.SerializerMethodField()
 
     class Meta:
         model = Message
@@ -24,10 +29,23 @@ class MessageSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'timestamp', 'created_at', 'is_read', 'read_at']
 
+    def get_read_state(self, obj):
+        cursors = self.context.setdefault('read_cursors', {})
+        if obj.conversation_id not in cursors:
+            cursors[obj.conversation_id] = read_cursors(obj.conversation_id)
+        return read_state(obj, cursors[obj.conversation_id])
+
+    def get_is_read(self, obj):
+        return self.get_read_state(obj)[0]
+
+    def get_read_at(self, obj):
+        read_at = self.get_read_state(obj)[1]
+        return serializers.DateTimeField().to_representation(read_at) if read_at else None
+
     def get_reply_to(self, obj):
         """Get reply-to message if it exists."""
         if obj.reply_to:
-            return MessageSerializer(obj.reply_to).data
+            return MessageSerializer(obj.reply_to, context=self.context).data
         return None
 
 
@@ -50,7 +68,7 @@ class ConversationSerializer(serializers.ModelSerializer):
         """Get the last message in the conversation."""
         last_msg = obj.last_message
         if last_msg:
-            return MessageSerializer(last_msg).data
+            return MessageSerializer(last_msg, context=self.context).data
         return None
 
     def get_unread_count(self, obj):
@@ -78,6 +96,62 @@ class ConversationSerializer(serializers.ModelSerializer):
         return None
 
 
+
+class ConversationSummarySerializer(serializers.ModelSerializer):
+    """
+    Inbox entry from the viewer's ConversationSummary row, with the fields
+    of ConversationSerializer plus the message snippet. Expects the
+    conversation, both users and the last message (with its sender and
+    reply) to be selected along with the row, and the cursor of the other
+    readers annotated as others_read_sequence/others_read_at. Group
+    conversations list their participants from conversation.participants,
+    which the inbox view prefetches for those rows only.
+    """
+    id = serializers.IntegerField(source='conversation_id', read_only=True)
+    participants = serializers.SerializerMethodField()
+    last_message = serializers.SerializerMethodField()
+    user = serializers.SerializerMethodField()
+    created_at = serializers.DateTimeField(source='conversation.created_at', read_only=True)
+    updated_at = serializers.DateTimeField(source='conversation.updated_at', read_only=True)
+
+    class Meta:
+        model = ConversationSummary
+        fields = [
+            'id', 'participants', 'last_message', 'last_message_snippet', 'last_message_at',
+            'unread_count', 'user', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+    def get_participants(self, obj):
+        if obj.other_user_id is None:
+            participants = obj.conversation.participants.all()
+        else:
+            participants = [obj.user, obj.other_user]
+        return UserSerializer(participants, many=True).data
+
+    def get_last_message(self, obj):
+        if obj.last_message:
+            # The viewer's cursor, the furthest of the others' (keyed 0 so it never
+            # matches a sender) and the sender's, who has read up to their message
+            message = obj.last_message
+            cursors = {
+                0: (obj.others_read_sequence or 0, obj.others_read_at),
+                message.sender_id: (message.sequence, message.timestamp),
+                obj.user_id: (obj.last_read_sequence, obj.last_read_at),
+            }
+            context = {**self.context, 'read_cursors': {obj.conversation_id: cursors}}
+            return MessageSerializer(obj.last_message, context=context).data
+        return None
+
+    def get_user(self, obj):
+        """The other participant in a 1-on-1 conversation."""
+        if obj.other_user:
+            user_data = UserSerializer(obj.other_user).data
+            # Add 'name' field for frontend compatibility (same as username for now)
+            user_data['name'] = user_data['username']
+            return user_data
+        return None
+
 class SendMessageSerializer(serializers.Serializer):
     """Serializer for sending messages."""
     content = serializers.CharField(required=True, max_length=1000)
@@ -99,11 +173,8 @@ class SendMessageSerializer(serializers.Serializer):
         conversation = self.context['conversation']
         sender = self.context['sender']
 
-        # Mark previous messages as read for the sender
-        conversation.messages.filter(
-            sender=sender,
-            is_read=False
-        ).update(is_read=True, read_at=validated_data.get('timestamp'))
+        # Replying means the sender has read the conversation
+        mark_conversation_read(conversation, sender)
 
         return Message.objects.create(
             conversation=conversation,
@@ -1,10 +1,29 @@
 # messages/signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, m2m_changed
 from django.dispatch import receiver
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
-from .models import Message
+from .models import Conversation, Message
+from .delivery import message_event
+from .summaries import create_summaries, record_message
+
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def create_conversation_summaries(sender, instance, action, reverse, pk_set, **kwargs):
+    """Give participants added to a conversation their inbox row."""
+    if action != 'post_add':
+        return
+    conversations = Conversation.objects.filter(pk__in=pk_set) if reverse else [instance]
+    for conversation in conversations:
+        create_summaries(conversation)
+
+
+@receiver(post_save, sender=Message)
+def update_conversation_summaries(sender, instance, created, **kwargs):
+    """Move the conversation to the top of each participant's inbox."""
+    if created:
+        record_message(instance)
 
 
 @receiver(post_save, sender=Message)
@@ -21,26 +40,10 @@ def broadcast_new_message(sender, instance, created, **kwargs):
     channel_layer = get_channel_layer()
     room_group_name = f'chat_{instance.conversation.id}'
 
-    # Prepare message data for WebSocket
-    message_data = {
-        'id': instance.id,
-        'content': instance.content,
-        'sender': {
-            'id': instance.sender.id,
-            'username': instance.sender.username,
-            'name': instance.sender.get_full_name() or instance.sender.username
-        },
-        'created_at': instance.timestamp.isoformat(),
-        'conversation_id': instance.conversation.id
-    }
-
     # Broadcast to all participants in the conversation
     async_to_sync(channel_layer.group_send)(
         room_group_name,
-        {
-            'type': 'chat_message',
-            'message': message_data,
-        }
+        message_event(instance, instance.sender)
     )
 
     print(f"Message {instance.id} broadcasted to group {room_group_name}")
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""
+Maintenance of ConversationSummary rows.
+
+Every participant has one summary row per conversation. Sending a message
+moves it to the top of each participant's inbox and advances the sender's
+read cursor; reading a conversation advances the reader's cursor to the
+latest message. Unread counts are the distance from the cursor to the
+conversation's last sequence number, so nothing is written per message.
+"""
+from django.db.models import Case, F, OuterRef, PositiveIntegerField, Subquery, Value, When
+from django.utils import timezone
+
+from .models import Conversation, ConversationSummary
+
+
+def snippet(content):
+    """Inbox preview of a message body."""
+    length = ConversationSummary.SNIPPET_LENGTH
+    content = ' '.join(content.split())
+    return content if len(content) <= length else content[:length - 1] + '…'
+
+
+def create_summaries(conversation):
+    """Give every participant a summary row, naming the other participant of a one-on-one chat."""
+    participant_ids = list(conversation.participants.values_list('id', flat=True))
+    rows = []
+    for user_id in participant_ids:
+        others = [other for other in participant_ids if other != user_id]
+        rows.append(ConversationSummary(
+            conversation=conversation, user_id=user_id, other_user_id=others[0] if len(others) == 1 else None
+        ))
+    ConversationSummary.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=['conversation', 'user'], update_fields=['other_user']
+    )
+
+
+def record_message(message):
+    """Make `message` the latest of its conversation; its sender has read up to it."""
+    record_messages([message])
+
+
+def record_messages(messages):
+    """
+    Record a run of new messages from one conversation, oldest first: the
+    last becomes the latest and each sender has read up to their own.
+    """
+    last = messages[-1]
+    read_through = {message.sender_id: message for message in messages}
+    ConversationSummary.objects.filter(conversation_id=last.conversation_id).update(
+        last_message=last,
+        last_message_snippet=snippet(last.content),
+        last_message_at=last.timestamp,
+        last_read_sequence=Case(
+            *[When(user_id=user_id, then=Value(message.sequence)) for user_id, message in read_through.items()],
+            default=F('last_read_sequence'),
+            output_field=PositiveIntegerField(),
+        ),
+        last_read_at=Case(
+            *[When(user_id=user_id, then=Value(message.timestamp)) for user_id, message in read_through.items()],
+            default=F('last_read_at'),
+        ),
+    )
+
+
+def advance_cursors(summaries, sequence):
+    """Move the read cursors of `summaries` forward to `sequence`; cursors behind it are left alone."""
+    return summaries.filter(last_read_sequence__lt=sequence).update(
+        last_read_sequence=sequence,
+        last_read_at=timezone.now(),
+    )
+
+
+def mark_conversation_read(conversation, user):
+    """Advance the user's cursor to the latest message of the conversation."""
+    latest = Conversation.objects.filter(pk=OuterRef('conversation_id')).values('last_sequence')
+    return advance_cursors(
+        ConversationSummary.objects.filter(conversation=conversation, user=user), Subquery(latest)
+    )
+
+
+def mark_read_through(message):
+    """The recipients have read `message` and everything before it."""
+    return advance_cursors(
+        ConversationSummary.objects.filter(conversation_id=message.conversation_id).exclude(
+            user_id=message.sender_id
+        ),
+        message.sequence,
+    )
+
+
+def read_cursors(conversation_id):
+    """{user_id: (last_read_sequence, last_read_at)} for every participant of a conversation."""
+    return {
+        user_id: (sequence, read_at)
+        for user_id, sequence, read_at in ConversationSummary.objects.filter(
+            conversation_id=conversation_id
+        ).values_list('user_id', 'last_read_sequence', 'last_read_at')
+    }
+
+
+def read_state(message, cursors):
+    """
+    (is_read, read_at) for a message, for the is_read/read_at API fields.
+    A message is read once another participant's cursor reaches it; read_at
+    is when that cursor last moved, which is when the message was read or
+    later.
+    """
+    readers = [
+        read_at for user_id, (sequence, read_at) in cursors.items()
+        if user_id != message.sender_id and sequence >= message.sequence
+    ]
+    if not readers:
+        return False, None
+    return True, min(readers, key=lambda read_at: (read_at is None, read_at))
@@ -1,3 +1,391 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from notifications.models import Notification
+
+from .models import Conversation, ConversationSummary, Message
+from .routing import websocket_urlpatterns
+from .summaries import mark_conversation_read
+from .views import MessageViewSet
+
+
+class ConversationSummaryTest(APITestCase):
+    """Inbox rows kept up to date on send and read"""
+
+    def setUp(self):
+        User = get_user_model()
+        self.alice = User.objects.create_user(username='alice', password='pw')
+        self.bob = User.objects.create_user(username='bob', password='pw')
+        self.carol = User.objects.create_user(username='carol', password='pw')
+        self.client.force_authenticate(self.alice)
+
+    def conversation(self, user, other_user):
+        return Conversation.get_or_create_direct(user, other_user)[0]
+
+    def summary(self, conversation, user):
+        return ConversationSummary.objects.get(conversation=conversation, user=user)
+
+    def test_send_and_read_update_unread_counts(self):
+        conversation = self.conversation(self.alice, self.bob)
+        self.assertEqual(self.summary(conversation, self.alice).other_user, self.bob)
+
+        Message.objects.create(conversation=conversation, sender=self.bob, content='Kick-off at 8?')
+        last = Message.objects.create(conversation=conversation, sender=self.bob, content='  See\nyou there  ')
+        alice_summary = self.summary(conversation, self.alice)
+        self.assertEqual((alice_summary.unread_count, alice_summary.last_message), (2, last))
+        self.assertEqual(alice_summary.last_message_snippet, 'See you there')
+        self.assertEqual(self.summary(conversation, self.bob).unread_count, 0)
+
+        Message.objects.filter(content='Kick-off at 8?').get().mark_as_read()
+        self.assertEqual(self.summary(conversation, self.alice).unread_count, 1)
+
+        # Reading is one write to the reader's cursor, however many messages it covers
+        with self.assertNumQueries(1):
+            mark_conversation_read(conversation, self.alice)
+        self.assertEqual(self.summary(conversation, self.alice).unread_count, 0)
+        response = self.client.get(reverse('messaging_app:conversation-messages', args=[conversation.id]))
+        self.assertEqual([message['is_read'] for message in response.data['results']], [True, True])
+        self.assertIsNotNone(response.data['results'][1]['read_at'])
+
+        # Replying reads the conversation for the sender and counts for the recipient
+        Message.objects.create(conversation=conversation, sender=self.bob, content='Bring boots')
+        self.client.post(reverse('messaging_app:chat', args=['bob']), {'content': 'Will do'}, format='json')
+        self.assertEqual(self.summary(conversation, self.alice).unread_count, 0)
+        self.assertEqual(self.summary(conversation, self.bob).unread_count, 1)
+        conversation.refresh_from_db()
+        self.assertEqual(conversation.unread_count_for_user(self.bob), 1)
+        self.assertEqual(list(conversation.messages.values_list('sequence', flat=True)), [1, 2, 3, 4])
+
+        self.client.force_authenticate(self.bob)
+        self.assertFalse(self.client.get(reverse('messaging_app:conversations')).data[0]['last_message']['is_read'])
+        # Opening the chat reads Alice's reply before the history is listed
+        history = self.client.get(reverse('messaging_app:chat', args=['alice'])).data['results']
+        self.assertEqual([message['is_read'] for message in history], [True, True, True, True])
+        self.assertEqual(self.summary(conversation, self.bob).unread_count, 0)
+
+    def test_inbox_is_one_query_ordered_by_activity(self):
+        with_bob = self.conversation(self.alice, self.bob)
+        with_carol = self.conversation(self.alice, self.carol)
+        empty = self.conversation(self.alice, get_user_model().objects.create_user(username='dave', password='pw'))
+        old_news = Message.objects.create(conversation=with_bob, sender=self.bob, content='Old news')
+        Message.objects.create(conversation=with_carol, sender=self.carol, content='Lineup?')
+        Message.objects.create(conversation=with_bob, sender=self.alice, content='Fresh news', reply_to=old_news)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('messaging_app:conversations'))
+
+        self.assertEqual([entry['id'] for entry in response.data], [with_bob.id, with_carol.id, empty.id])
+        latest = response.data[0]
+        self.assertEqual(latest['user']['username'], 'bob')
+        self.assertEqual(latest['last_message']['content'], 'Fresh news')
+        # Alice's reply moved her cursor past Bob's message
+        self.assertEqual(latest['unread_count'], 0)
+        self.assertEqual(response.data[1]['unread_count'], 1)
+        self.assertFalse(latest['last_message']['is_read'])
+        self.assertTrue(latest['last_message']['reply_to']['is_read'])
+        self.assertIsNone(response.data[2]['last_message'])
+
+    def test_group_inbox_lists_every_participant(self):
+        self.conversation(self.alice, self.bob)
+        earlier_group = Conversation.objects.create()
+        earlier_group.participants.add(self.alice, self.bob, self.carol)
+        group = Conversation.objects.create()
+        group.participants.add(self.alice, self.bob, self.carol)
+        Message.objects.create(conversation=earlier_group, sender=self.carol, content='Kit is in the car')
+        Message.objects.create(conversation=group, sender=self.carol, content='Five-a-side tonight?')
+
+        def viewset_conversations():
+            request = APIRequestFactory().get('/conversations/')
+            force_authenticate(request, user=self.alice)
+            return MessageViewSet.as_view({'get': 'conversations'})(request)
+
+        endpoints = {
+            'list view': lambda: self.client.get(reverse('messaging_app:conversations')),
+            'viewset action': viewset_conversations,
+        }
+        for name, fetch in endpoints.items():
+            with self.subTest(endpoint=name):
+                # One more query, for every group's participants at once
+                with self.assertNumQueries(2):
+                    response = fetch()
+
+                entry = response.data[0]
+                self.assertEqual(entry['id'], group.id)
+                self.assertIsNone(entry['user'])
+                self.assertEqual(sorted(user['username'] for user in entry['participants']), ['alice', 'bob', 'carol'])
+                self.assertEqual(
+                    sorted(user['username'] for user in response.data[1]['participants']), ['alice', 'bob', 'carol']
+                )
+                self.assertEqual([user['username'] for user in response.data[2]['participants']], ['alice', 'bob'])
+
+
+class DirectConversationTest(APITestCase):
+    """One conversation per user pair, found by its key"""
+
+    def setUp(self):
+        User = get_user_model()
+        self.alice = User.objects.create_user(username='alice', password='pw')
+        self.bob = User.objects.create_user(username='bob', password='pw')
+
+    def test_pair_has_one_conversation(self):
+        conversation, created = Conversation.get_or_create_direct(self.bob, self.alice)
+        self.assertTrue(created)
+        self.assertEqual(conversation.direct_key, f'{self.alice.id}:{self.bob.id}')
+        self.assertEqual(Conversation.get_or_create_direct(self.alice, self.bob), (conversation, False))
+        with self.assertNumQueries(1):
+            self.assertEqual(Conversation.get_direct(self.alice, self.bob), conversation)
+
+        self.client.force_authenticate(self.alice)
+        self.client.post(reverse('messaging_app:chat', args=['bob']), {'content': 'Hi'}, format='json')
+        self.client.force_authenticate(self.bob)
+        self.client.post(reverse('messaging_app:send-message'), {'recipient_id': self.alice.id, 'content': 'Hey'})
+        self.assertEqual(Conversation.objects.count(), 1)
+        self.assertEqual(conversation.messages.count(), 2)
+
+    def test_losing_a_creation_race_returns_the_winner(self):
+        winner = Conversation.objects.create(direct_key=Conversation.direct_key_for(self.alice, self.bob))
+        with patch('messages.models.Conversation.objects.filter') as lookup:
+            # The lookup misses as if the winner committed just after it
+            lookup.return_value.first.return_value = None
+            conversation, created = Conversation.get_or_create_direct(self.alice, self.bob)
+        self.assertEqual((conversation, created), (winner, False))
+        self.assertEqual(Conversation.objects.count(), 1)
+
+    def test_rest_messages_share_one_unread_notification(self):
+        """Messages sent over REST notify the recipient once until the notification is read"""
+        self.client.force_authenticate(self.alice)
+        for content in ('Hi', 'Are you there?'):
+            self.client.post(reverse('messaging_app:chat', args=['bob']), {'content': content}, format='json')
+        notifications = Notification.objects.filter(recipient=self.bob, verb='messaged')
+        self.assertEqual(notifications.count(), 1)
+
+        notifications.update(is_read=True)
+        self.client.post(reverse('messaging_app:chat', args=['bob']), {'content': 'Kick-off moved'}, format='json')
+        self.assertEqual(notifications.filter(is_read=False).count(), 1)
+
+
+@override_settings(CHAT_SOCKET_CONFIG={'flush_interval': 60, 'max_batch': 3})
+class ChatSocketSendTest(TransactionTestCase):
+    """Messages sent over the chat socket are acked at once and saved in batches"""
+
+    def setUp(self):
+        User = get_user_model()
+        self.alice = User.objects.create_user(username='alice', password='pw')
+        self.bob = User.objects.create_user(username='bob', password='pw')
+
+    async def receive(self, communicator):
+        return json.loads(await communicator.receive_from())
+
+    @async_to_sync
+    async def exchange(self):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), '/ws/chat/bob/')
+        communicator.scope['user'] = self.alice
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        for index in range(4):
+            await communicator.send_to(text_data=json.dumps(
+                {'type': 'message', 'client_id': f'c{index}', 'content': f'Goal {index}'}
+            ))
+            if index < 2:
+                # Acked while still queued
+                self.assertEqual(await self.receive(communicator), {'type': 'ack', 'client_id': f'c{index}'})
+                self.assertEqual(await Message.objects.acount(), 0)
+        frames = [await self.receive(communicator) for _ in range(5)]
+        await communicator.send_to(text_data=json.dumps({'type': 'message', 'client_id': 'c4', 'content': ' '}))
+        frames.append(await self.receive(communicator))
+
+        # Leaving flushes the fourth message, already acknowledged
+        await communicator.disconnect()
+        return frames
+
+    @async_to_sync
+    async def send_replies(self, reply_ids):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), '/ws/chat/bob/')
+        communicator.scope['user'] = self.alice
+        await communicator.connect()
+        frames = []
+        for index, reply_to_id in enumerate(reply_ids):
+            await communicator.send_to(text_data=json.dumps(
+                {'type': 'message', 'client_id': f'c{index}', 'content': f'Reply {index}', 'reply_to_id': reply_to_id}
+            ))
+            frames.append(await self.receive(communicator))
+        await communicator.disconnect()
+        return frames
+
+    def test_reply_ids_checked_per_frame(self):
+        """A bad reply_to_id rejects only its own frame; digit strings are accepted"""
+        conversation = Conversation.get_or_create_direct(self.alice, self.bob)[0]
+        original = Message.objects.create(conversation=conversation, sender=self.bob, content='Who scored?')
+
+        frames = self.send_replies(['abc', str(original.id), 10 ** 30, original.id])
+        self.assertEqual([frame['type'] for frame in frames], ['error', 'ack', 'error', 'ack'])
+        self.assertEqual(frames[0], {'type': 'error', 'client_id': 'c0', 'error': 'reply_to_id must be a message id'})
+        self.assertEqual(
+            list(conversation.messages.filter(sender=self.alice).values_list('content', 'reply_to_id')),
+            [('Reply 1', original.id), ('Reply 3', original.id)]
+        )
+
+    def test_batched_send(self):
+        frames = self.exchange()
+        acks = [frame['client_id'] for frame in frames if frame['type'] == 'ack']
+        broadcasts = [frame['message'] for frame in frames if frame['type'] == 'message']
+        self.assertEqual(acks, ['c2', 'c3'])
+        self.assertEqual([message['client_id'] for message in broadcasts], ['c0', 'c1', 'c2'])
+        self.assertEqual(frames[-1], {'type': 'error', 'client_id': 'c4', 'error': 'content is required'})
+
+        conversation = Conversation.get_direct(self.alice, self.bob)
+        saved = list(conversation.messages.values_list('id', 'content', 'sequence'))
+        self.assertEqual([(content, sequence) for _, content, sequence in saved], [(f'Goal {i}', i + 1) for i in range(4)])
+        self.assertEqual([message['id'] for message in broadcasts], [id for id, _, _ in saved[:3]])
+        self.assertEqual(ConversationSummary.objects.select_related('conversation').get(user=self.bob).unread_count, 4)
+        self.assertEqual(ConversationSummary.objects.select_related('conversation').get(user=self.alice).unread_count, 0)
+        # Two flushes, one notification while Bob has not read it
+        self.assertEqual(Notification.objects.filter(recipient=self.bob, verb='messaged').count(), 1)
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Rows built at migrate_from, then messaging_app migrated to migrate_to"""
+    migrate_from = None
+    migrate_to = None
+
+    def historical_apps(self, executor, migration):
+        # Other apps at their latest state; nothing outside messaging_app depends on it
+        nodes = [node for node in executor.loader.graph.leaf_nodes() if node[0] != 'messaging_app']
+        return executor.loader.project_state(nodes + [('messaging_app', migration)]).apps
+
+    def migrate(self, migration):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('messaging_app', migration)])
+        return self.historical_apps(executor, migration)
+
+    def setUp(self):
+        self.apps = self.migrate(self.migrate_from)
+        User = self.apps.get_model('accounts', 'User')
+        self.alice = User.objects.create(username='alice')
+        self.bob = User.objects.create(username='bob')
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+
+class ReadCursorMigrationTest(MigrationTestCase):
+    """0003 turns per-message read flags into one cursor per participant"""
+    migrate_from = '0002_conversation_summary'
+    migrate_to = '0003_message_sequence_read_cursors'
+
+    def test_cursors_derived_from_read_flags(self):
+        Conversation = self.apps.get_model('messaging_app', 'Conversation')
+        Message = self.apps.get_model('messaging_app', 'Message')
+        ConversationSummary = self.apps.get_model('messaging_app', 'ConversationSummary')
+        start = timezone.now() - timedelta(hours=1)
+
+        conversation = Conversation.objects.create()
+        conversation.participants.add(self.alice, self.bob)
+        # Each sender has one message read by the other and one still unread
+        for sender, content, minute, read_minute in [
+            (self.alice, 'a1', 1, 5), (self.bob, 'b1', 2, 6), (self.alice, 'a2', 3, None), (self.bob, 'b2', 4, None),
+        ]:
+            Message.objects.create(
+                conversation=conversation, sender=sender, content=content, timestamp=start + timedelta(minutes=minute),
+                is_read=read_minute is not None,
+                read_at=start + timedelta(minutes=read_minute) if read_minute is not None else None
+            )
+        for user, other_user in [(self.alice, self.bob), (self.bob, self.alice)]:
+            ConversationSummary.objects.create(conversation=conversation, user=user, other_user=other_user, unread_count=1)
+
+        apps = self.migrate(self.migrate_to)
+        conversation = apps.get_model('messaging_app', 'Conversation').objects.get()
+
+        self.assertEqual(conversation.last_sequence, 4)
+        self.assertEqual(
+            list(conversation.messages.order_by('sequence').values_list('content', 'sequence')),
+            [('a1', 1), ('b1', 2), ('a2', 3), ('b2', 4)]
+        )
+        summaries = {summary.user_id: summary for summary in conversation.summaries.all()}
+        # Alice read b1 but not b2; her own a2 keeps the cursor at 3
+        alice = summaries[self.alice.id]
+        self.assertEqual((alice.last_read_sequence, alice.last_read_at), (3, start + timedelta(minutes=6)))
+        # Bob has not read a2, but sending b2 after it moves him to the end
+        bob = summaries[self.bob.id]
+        self.assertEqual((bob.last_read_sequence, bob.last_read_at), (4, start + timedelta(minutes=5)))
+
+
+class DirectKeyMigrationTest(MigrationTestCase):
+    """0005 merges one-to-one conversations that share a participant pair"""
+    migrate_from = '0004_remove_per_message_read_flags'
+    migrate_to = '0005_conversation_direct_key'
+
+    def test_duplicates_merged_into_oldest(self):
+        Conversation = self.apps.get_model('messaging_app', 'Conversation')
+        Message = self.apps.get_model('messaging_app', 'Message')
+        ConversationSummary = self.apps.get_model('messaging_app', 'ConversationSummary')
+        ContentType = self.apps.get_model('contenttypes', 'ContentType')
+        Notification = self.apps.get_model('notifications', 'Notification')
+        start = timezone.now() - timedelta(hours=1)
+        read_at = start + timedelta(minutes=30)
+
+        kept = Conversation.objects.create(created_at=start, last_sequence=2)
+        duplicate = Conversation.objects.create(created_at=start + timedelta(seconds=1), last_sequence=2)
+        for conversation in (kept, duplicate):
+            conversation.participants.add(self.alice, self.bob)
+        # Interleaved in time: a1, b1, b2, b3 once merged
+        for conversation, sender, content, minute, sequence in [
+            (kept, self.alice, 'a1', 1, 1), (duplicate, self.bob, 'b1', 2, 1),
+            (kept, self.bob, 'b2', 3, 2), (duplicate, self.bob, 'b3', 4, 2),
+        ]:
+            Message.objects.create(
+                conversation=conversation, sender=sender, content=content,
+                timestamp=start + timedelta(minutes=minute), sequence=sequence
+            )
+        # Alice has read b1 only; Bob has read everything
+        for conversation, user, other_user, cursor, last_read_at in [
+            (kept, self.alice, self.bob, 1, None), (duplicate, self.alice, self.bob, 1, read_at),
+            (kept, self.bob, self.alice, 2, read_at), (duplicate, self.bob, self.alice, 2, None),
+        ]:
+            ConversationSummary.objects.create(
+                conversation=conversation, user=user, other_user=other_user,
+                last_read_sequence=cursor, last_read_at=last_read_at
+            )
+        content_type = ContentType.objects.get_or_create(app_label='messaging_app', model='conversation')[0]
+        notification = Notification.objects.create(
+            recipient=self.alice, actor=self.bob, verb='messaged', content_type=content_type, object_id=duplicate.id
+        )
+
+        apps = self.migrate(self.migrate_to)
+        Conversation = apps.get_model('messaging_app', 'Conversation')
+        Notification = apps.get_model('notifications', 'Notification')
+
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.id, kept.id)
+        self.assertEqual(conversation.direct_key, f'{self.alice.id}:{self.bob.id}')
+        self.assertEqual(conversation.last_sequence, 4)
+        self.assertEqual(
+            list(conversation.messages.order_by('sequence').values_list('content', 'sequence')),
+            [('a1', 1), ('b1', 2), ('b2', 3), ('b3', 4)]
+        )
+
+        summaries = {summary.user_id: summary for summary in conversation.summaries.all()}
+        self.assertEqual(sorted(summaries), sorted([self.alice.id, self.bob.id]))
+        alice, bob = summaries[self.alice.id], summaries[self.bob.id]
+        # Alice still has b2 and b3 unread, as she did across the two conversations
+        self.assertEqual((alice.last_read_sequence, conversation.last_sequence - alice.last_read_sequence), (2, 2))
+        self.assertEqual((bob.last_read_sequence, conversation.last_sequence - bob.last_read_sequence), (4, 0))
+        self.assertEqual((alice.last_read_at, bob.last_read_at), (read_at, read_at))
+        self.assertEqual((alice.other_user_id, bob.other_user_id), (self.bob.id, self.alice.id))
+        self.assertEqual(alice.last_message_snippet, 'b3')
+
+        self.assertEqual(Notification.objects.get(id=notification.id).object_id, kept.id)
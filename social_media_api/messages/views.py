@@ -5,16 +5,15 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import PageNumberPagination, CursorPagination
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Max
-from django.utils import timezone
+from django.db.models import F, Max, OuterRef, Q, Subquery, prefetch_related_objects
 
-from .models import Conversation, Message
+from .models import Conversation, ConversationSummary, Message
 from .serializers import (
-    ConversationSerializer, MessageSerializer,
+    ConversationSerializer, ConversationSummarySerializer, MessageSerializer,
     SendMessageSerializer, UserSerializer
 )
+from .summaries import mark_conversation_read
 from accounts.models import User
-from notifications.models import Notification
 
 
 class MessagePagination(PageNumberPagination):
@@ -31,23 +30,50 @@ class MessageCursorPagination(CursorPagination):
     cursor_query_param = 'cursor'
 
 
+def inbox_queryset(user):
+    """The user's conversation summaries, latest activity first, in one query."""
+    # Furthest cursor among participants other than the viewer and the last
+    # message's sender, for the last message's read state
+    others = ConversationSummary.objects.filter(
+        conversation_id=OuterRef('conversation_id')
+    ).exclude(
+        user_id=OuterRef('user_id')
+    ).exclude(
+        user_id=OuterRef('last_message__sender_id')
+    ).order_by('-last_read_sequence')
+    return ConversationSummary.objects.filter(user=user).select_related(
+        'conversation', 'user', 'other_user', 'last_message__sender', 'last_message__reply_to__sender'
+    ).annotate(
+        others_read_sequence=Subquery(others.values('last_read_sequence')[:1]),
+        others_read_at=Subquery(others.values('last_read_at')[:1]),
+    ).order_by(F('last_message_at').desc(nulls_last=True), '-id')
+
+
+def inbox_summaries(user):
+    """The inbox rows as a list, with group chats' participants prefetched in one more query."""
+    summaries = list(inbox_queryset(user))
+    # One-to-one rows already carry the other user; only group chats need their participants
+    prefetch_related_objects(
+        [summary.conversation for summary in summaries if summary.other_user_id is None], 'participants'
+    )
+    return summaries
+
+
 class ConversationListView(generics.ListAPIView):
     """
     B-MSG-01: Conversation List
     Returns a list of the user's active conversations, sorted by latest message time.
     Includes the last message snippet and unread count.
     """
-    serializer_class = ConversationSerializer
+    serializer_class = ConversationSummarySerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        """Get conversations for the authenticated user."""
-        user = self.request.user
-        return Conversation.objects.filter(
-            participants=user
-        ).annotate(
-            last_message_time=Max('messages__timestamp')
-        ).order_by('-last_message_time')
+        """Get conversations for the authenticated user from their summary rows."""
+        return inbox_queryset(self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        return Response(self.get_serializer(inbox_summaries(request.user), many=True).data)
 
 
 class MessageRequestsView(generics.ListAPIView):
@@ -97,21 +123,14 @@ class ChatView(generics.ListCreateAPIView):
         # Get or create conversation between users
         other_user = get_object_or_404(User, username=username)
 
-        conversation = Conversation.objects.filter(
-            participants=user
-        ).filter(
-            participants=other_user
-        ).first()
+        conversation = Conversation.get_direct(user, other_user)
 
         if not conversation:
             # Return empty queryset if no conversation exists
             return Message.objects.none()
 
         # Mark messages from other user as read
-        conversation.messages.filter(
-            sender=other_user,
-            is_read=False
-        ).update(is_read=True, read_at=timezone.now())
+        mark_conversation_read(conversation, user)
 
         return conversation.messages.all()
 
@@ -126,15 +145,7 @@ class ChatView(generics.ListCreateAPIView):
             other_user = get_object_or_404(User, username=username)
 
             # Find existing conversation or create new one
-            conversation = Conversation.objects.filter(
-                participants=user
-            ).filter(
-                participants=other_user
-            ).first()
-
-            if not conversation:
-                conversation = Conversation.objects.create()
-                conversation.participants.add(user, other_user)
+            conversation, _ = Conversation.get_or_create_direct(user, other_user)
 
             context['conversation'] = conversation
             context['sender'] = user
@@ -147,21 +158,7 @@ class ChatView(generics.ListCreateAPIView):
         # Update conversation's updated_at timestamp
         message.conversation.save(update_fields=['updated_at'])
 
-        # Create notification for the recipient
-        recipient = None
-        for participant in message.conversation.participants.all():
-            if participant != message.sender:
-                recipient = participant
-                break
-
-        if recipient:
-            Notification.objects.create(
-                recipient=recipient,
-                actor=message.sender,
-                verb="messaged",
-                target=message.conversation
-            )
-
+        # The recipient is notified by the Message post_save signal
         return message
 
 
@@ -202,10 +199,8 @@ class ConversationMessagesView(generics.ListAPIView):
         try:
             conversation = Conversation.objects.get(id=conversation_id)
             # Mark all unread messages from other participants as read
-            conversation.messages.filter(
-                sender__in=conversation.participants.exclude(id=request.user.id),
-                is_read=False
-            ).update(is_read=True, read_at=timezone.now())
+            if conversation.participants.filter(id=request.user.id).exists():
+                mark_conversation_read(conversation, request.user)
         except Conversation.DoesNotExist:
             pass
 
@@ -269,15 +264,7 @@ class SendMessageView(APIView):
                 )
 
             # Get or create conversation
-            conversation = Conversation.objects.filter(
-                participants=request.user
-            ).filter(
-                participants=recipient
-            ).first()
-
-            if not conversation:
-                conversation = Conversation.objects.create()
-                conversation.participants.add(request.user, recipient)
+            conversation, _ = Conversation.get_or_create_direct(request.user, recipient)
         else:
             return Response(
                 {"error": "Either recipient_id or conversation_id is required"},
@@ -307,14 +294,8 @@ class MessageViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def conversations(self, request):
         """B-MSG-01: Get user's conversations."""
-        queryset = Conversation.objects.filter(
-            participants=request.user
-        ).annotate(
-            last_message_time=Max('messages__timestamp')
-        ).order_by('-last_message_time')
-
-        serializer = ConversationSerializer(
-            queryset,
+        serializer = ConversationSummarySerializer(
+            inbox_summaries(request.user),
             many=True,
             context={'request': request}
         )
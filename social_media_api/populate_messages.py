@@ -28,8 +28,7 @@ def populate_messages():
         return
 
     # Create conversation between first two users
-    conv1 = Conversation.objects.create()
-    conv1.participants.add(users[0], users[1])
+    conv1, _ = Conversation.get_or_create_direct(users[0], users[1])
 
     # Create messages for conv1
     base_time = datetime.now() - timedelta(minutes=30)
@@ -54,8 +53,7 @@ def populate_messages():
 
     # Create another conversation if we have more users
     if len(users) >= 3:
-        conv2 = Conversation.objects.create()
-        conv2.participants.add(users[0], users[2])
+        conv2, _ = Conversation.get_or_create_direct(users[0], users[2])
 
         Message.objects.create(
             conversation=conv2,
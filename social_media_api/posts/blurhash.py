@@ -0,0 +1,73 @@
+"""
+BlurHash placeholder encoding (https://blurha.sh).
+
+A BlurHash is a short base83 string holding the average colour and a few
+low-frequency cosine components of an image. Clients decode it into a
+blurred preview painted while the real variant loads.
+"""
+import math
+
+import numpy as np
+from PIL import Image
+
+BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+# Components only carry low frequencies, so a tiny sample loses nothing
+SAMPLE_SIZE = (32, 32)
+
+
+def encode83(value, length):
+    return ''.join(BASE83[(value // 83 ** (length - i)) % 83] for i in range(1, length + 1))
+
+
+def srgb_to_linear(values):
+    values = values / 255.0
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb(value):
+    value = min(max(value, 0.0), 1.0)
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _quantise_ac(value, max_value):
+    scaled = math.copysign(abs(value / max_value) ** 0.5, value)
+    return max(0, min(18, math.floor(scaled * 9 + 9.5)))
+
+
+def encode(image, x_components=4, y_components=3):
+    """BlurHash of a PIL image with the given number of horizontal and vertical components (1-9)."""
+    if not (1 <= x_components <= 9 and 1 <= y_components <= 9):
+        raise ValueError('BlurHash components must be between 1 and 9')
+
+    sample = image.convert('RGB').resize(SAMPLE_SIZE, Image.Resampling.BOX)
+    pixels = srgb_to_linear(np.asarray(sample, dtype=np.float64))
+    height, width = pixels.shape[:2]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            basis = np.outer(
+                np.cos(math.pi * j * np.arange(height) / height),
+                np.cos(math.pi * i * np.arange(width) / width)
+            )
+            normalisation = 1 if i == 0 and j == 0 else 2
+            factors.append(normalisation * (pixels * basis[:, :, None]).sum(axis=(0, 1)) / (width * height))
+
+    dc, ac = factors[0], factors[1:]
+    result = encode83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if ac:
+        quantised_max = max(0, min(82, math.floor(max(abs(component).max() for component in ac) * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+    else:
+        quantised_max, max_value = 0, 1
+    result += encode83(quantised_max, 1)
+
+    result += encode83((linear_to_srgb(dc[0]) << 16) + (linear_to_srgb(dc[1]) << 8) + linear_to_srgb(dc[2]), 4)
+    for component in ac:
+        r, g, b = (_quantise_ac(value, max_value) for value in component)
+        result += encode83(r * 19 * 19 + g * 19 + b, 2)
+    return result
@@ -7,6 +7,7 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from .models import Post, Comment
 from .throttling import ChatMessageThrottle
+from sports.live_events import LIVE_EVENTS_GROUP
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -402,6 +403,12 @@ class FeedConsumer(AsyncWebsocketConsumer):
             self.channel_name
         )
 
+        # Join the shared live events group (sidebar snapshot pushes)
+        await self.channel_layer.group_add(
+            LIVE_EVENTS_GROUP,
+            self.channel_name
+        )
+
         await self.accept()
 
     async def disconnect(self, close_code):
@@ -411,6 +418,10 @@ class FeedConsumer(AsyncWebsocketConsumer):
                 self.feed_group,
                 self.channel_name
             )
+            await self.channel_layer.group_discard(
+                LIVE_EVENTS_GROUP,
+                self.channel_name
+            )
 
     async def receive_json(self, content):
         """
@@ -441,4 +452,12 @@ class FeedConsumer(AsyncWebsocketConsumer):
             'type': 'trending_update',
             'trends': event['trends'],
             'timestamp': event['timestamp']
-        })
\ No newline at end of file
+        })
+
+    async def live_events_update(self, event):
+        """Send the latest live events snapshot"""
+        await self.send_json({
+            'type': 'live_events_update',
+            'events': event['events'],
+            'timestamp': event['timestamp']
+        })
@@ -0,0 +1,283 @@
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PATTERN = 'segment_%05d.ts'
+MEDIA_PLAYLIST_NAME = 'index.m3u8'
+SEGMENT_CONTENT_TYPE = 'video/mp2t'
+PLAYLIST_CONTENT_TYPE = 'application/vnd.apple.mpegurl'
+
+
+def get_ffmpeg_binary():
+    """ffmpeg executable used by moviepy (bundled by imageio-ffmpeg unless FFMPEG_BINARY is set)"""
+    from moviepy.config import get_setting
+    return get_setting('FFMPEG_BINARY')
+
+
+def get_ffprobe_binary():
+    """ffprobe beside the ffmpeg binary or on PATH (FFPROBE_BINARY overrides); None when there is none"""
+    configured = os.environ.get('FFPROBE_BINARY')
+    if configured:
+        return configured
+    ffmpeg = get_ffmpeg_binary()
+    sibling = os.path.join(os.path.dirname(ffmpeg), 'ffprobe')
+    if os.path.dirname(ffmpeg) and os.access(sibling, os.X_OK):
+        return sibling
+    return shutil.which('ffprobe')
+
+
+def _display_size(width, height, rotation):
+    # Phone clips store landscape frames plus a rotation; the player shows them turned
+    if int(round(float(rotation or 0))) % 180:
+        return height, width
+    return width, height
+
+
+def _probe_json(ffprobe, source, timeout):
+    result = subprocess.run(
+        [ffprobe, '-v', 'error', '-show_streams', '-show_format', '-of', 'json', source],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe could not read {source}: {result.stderr.decode(errors='replace').strip()}")
+
+    info = json.loads(result.stdout)
+    streams = info.get('streams', [])
+    video = next((s for s in streams if s.get('codec_type') == 'video'), None)
+    if video is None:
+        raise RuntimeError(f"No video stream in {source}")
+
+    rotation = video.get('tags', {}).get('rotate')
+    for side_data in video.get('side_data_list', []):
+        rotation = side_data.get('rotation', rotation)
+    width, height = _display_size(video['width'], video['height'], rotation)
+    duration = video.get('duration') or info.get('format', {}).get('duration')
+    return {
+        'duration': float(duration) if duration else None,
+        'width': width,
+        'height': height,
+        'has_audio': any(s.get('codec_type') == 'audio' for s in streams),
+    }
+
+
+def _probe_ffmpeg_header(source, timeout):
+    # ffmpeg with no output prints the input header to stderr and exits without decoding
+    result = subprocess.run(
+        [get_ffmpeg_binary(), '-hide_banner', '-nostdin', '-i', source],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=timeout
+    )
+    header = result.stderr.decode(errors='replace')
+    video = re.search(r'Stream #\S+.*?: Video: .*?, (\d{2,5})x(\d{2,5})', header)
+    if video is None:
+        raise RuntimeError(f"ffmpeg could not read {source}: {header.strip()}")
+
+    duration = re.search(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)', header)
+    rotation = re.search(r'rotation of (-?[\d.]+) degrees|rotate\s*: (-?\d+)', header)
+    width, height = _display_size(
+        int(video.group(1)), int(video.group(2)),
+        next(filter(None, rotation.groups())) if rotation else 0
+    )
+    return {
+        'duration': (
+            int(duration.group(1)) * 3600 + int(duration.group(2)) * 60 + float(duration.group(3))
+            if duration else None
+        ),
+        'width': width,
+        'height': height,
+        'has_audio': re.search(r'Stream #\S+.*?: Audio: ', header) is not None,
+    }
+
+
+def probe_video(source, timeout=30):
+    """
+    Duration (seconds), display width/height and audio presence of a video,
+    read from the container header without decoding any frames.
+
+    Uses ffprobe's JSON output; where only the bundled ffmpeg is available
+    (imageio-ffmpeg ships no ffprobe) the same header is read from ffmpeg's
+    input dump. Raises RuntimeError when the source has no readable video stream.
+    """
+    ffprobe = get_ffprobe_binary()
+    if ffprobe:
+        return _probe_json(ffprobe, source, timeout)
+    return _probe_ffmpeg_header(source, timeout)
+
+
+def _even(value):
+    return max(2, int(round(value / 2)) * 2)
+
+
+def plan_renditions(source_width, source_height, hls_config):
+    """
+    Pick the ladder rungs for a source: rungs taller than the source are
+    dropped rather than upscaled, and widths follow the source aspect ratio.
+    A source shorter than every rung gets the lowest bitrate at its own size.
+    """
+    rungs = sorted(zip(hls_config['bitrates'], hls_config['resolutions']), key=lambda rung: rung[1][1])
+    kept = [(bitrate, height) for bitrate, (_, height) in rungs if height <= source_height]
+    if not kept:
+        kept = [(rungs[0][0], source_height)]
+
+    return [
+        {
+            'index': index,
+            'bitrate': bitrate,
+            'width': _even(source_width * height / source_height),
+            'height': _even(height),
+        }
+        for index, (bitrate, height) in enumerate(kept)
+    ]
+
+
+def build_ffmpeg_command(source_path, output_dir, renditions, hls_config, has_audio):
+    """
+    One ffmpeg invocation that decodes the source once, splits the decoded
+    frames into every rendition and writes each as segmented HLS.
+    """
+    count = len(renditions)
+    filters = [f"[0:v]split={count}" + ''.join(f"[s{r['index']}]" for r in renditions)]
+    filters += [f"[s{r['index']}]scale={r['width']}:{r['height']}[v{r['index']}]" for r in renditions]
+    segment_duration = hls_config['segment_duration']
+
+    command = [
+        get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-nostdin', '-y',
+        '-i', source_path,
+        '-filter_complex', ';'.join(filters),
+    ]
+    for rendition in renditions:
+        command += ['-map', f"[v{rendition['index']}]"]
+        if has_audio:
+            command += ['-map', '0:a:0']
+
+    command += ['-c:v', 'libx264', '-preset', hls_config['preset'], '-pix_fmt', 'yuv420p']
+    for rendition in renditions:
+        index, bitrate = rendition['index'], rendition['bitrate']
+        command += [
+            f'-b:v:{index}', f'{bitrate}k',
+            f'-maxrate:v:{index}', f'{int(bitrate * 1.07)}k',
+            f'-bufsize:v:{index}', f'{bitrate * 2}k',
+        ]
+    if has_audio:
+        command += ['-c:a', 'aac', '-b:a', f"{hls_config['audio_bitrate']}k", '-ac', '2']
+
+    # Keyframes on segment boundaries so every rendition cuts at the same timestamps
+    command += [
+        '-force_key_frames', f'expr:gte(t,n_forced*{segment_duration})', '-sc_threshold', '0',
+        '-f', 'hls',
+        '-hls_time', str(segment_duration),
+        '-hls_playlist_type', 'vod',
+        '-hls_flags', 'independent_segments+temp_file',
+        '-hls_segment_filename', os.path.join(output_dir, '%v', SEGMENT_PATTERN),
+        '-var_stream_map', ' '.join(
+            f"v:{r['index']},a:{r['index']}" if has_audio else f"v:{r['index']}" for r in renditions
+        ),
+        os.path.join(output_dir, '%v', MEDIA_PLAYLIST_NAME),
+    ]
+    return command
+
+
+def build_master_playlist(renditions, audio_bitrate=0):
+    """Master playlist pointing at each rendition's media playlist, relative to the master"""
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3', '#EXT-X-INDEPENDENT-SEGMENTS']
+    for rendition in sorted(renditions, key=lambda r: r['bitrate']):
+        lines += [
+            '#EXT-X-STREAM-INF:BANDWIDTH={},RESOLUTION={}x{}'.format(
+                (rendition['bitrate'] + audio_bitrate) * 1000, rendition['width'], rendition['height']
+            ),
+            f"hls/{rendition['index']}/{MEDIA_PLAYLIST_NAME}",
+        ]
+    return '\n'.join(lines) + '\n'
+
+
+def _upload_file(upload, path, name, content_type):
+    with open(path, 'rb') as file_obj:
+        return upload(file_obj, name, content_type)
+
+
+def package_hls(source_path, renditions, hls_config, has_audio, upload, temp_dir=None):
+    """
+    Transcode source_path into every rendition in a single ffmpeg pass and
+    hand the output to upload(file_obj, name, content_type) as it appears.
+
+    ffmpeg renames each segment into place only once it is complete, so
+    finished segments are uploaded by a thread pool while later ones are
+    still being encoded. Media playlists are uploaded last, after all of
+    their segments. Names are relative, e.g. "1/segment_00003.ts".
+
+    Returns the renditions annotated with segment_count, size (bytes of
+    segments) and uploaded (every upload for the rendition succeeded).
+    Raises RuntimeError when ffmpeg fails.
+    """
+    results = {r['index']: dict(r, segment_count=0, size=0, uploaded=True) for r in renditions}
+    submitted = set()
+    futures = []
+
+    def submit_finished_segments(executor, output_dir):
+        for index in results:
+            rendition_dir = os.path.join(output_dir, str(index))
+            for filename in sorted(os.listdir(rendition_dir)):
+                if not filename.endswith('.ts') or (index, filename) in submitted:
+                    continue
+                submitted.add((index, filename))
+                path = os.path.join(rendition_dir, filename)
+                results[index]['segment_count'] += 1
+                results[index]['size'] += os.path.getsize(path)
+                futures.append((index, executor.submit(
+                    _upload_file, upload, path, f"{index}/{filename}", SEGMENT_CONTENT_TYPE
+                )))
+
+    with tempfile.TemporaryDirectory(dir=temp_dir) as output_dir, \
+            tempfile.TemporaryFile(dir=temp_dir) as stderr, \
+            ThreadPoolExecutor(max_workers=hls_config['upload_workers']) as executor:
+        for index in results:
+            os.makedirs(os.path.join(output_dir, str(index)))
+
+        process = subprocess.Popen(
+            build_ffmpeg_command(source_path, output_dir, renditions, hls_config, has_audio),
+            stdout=subprocess.DEVNULL, stderr=stderr
+        )
+        try:
+            while process.poll() is None:
+                submit_finished_segments(executor, output_dir)
+                time.sleep(hls_config['poll_interval'])
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+        if process.returncode != 0:
+            for _, future in futures:
+                future.cancel()
+            stderr.seek(0)
+            error = stderr.read().decode('utf-8', 'replace').strip()[-2000:]
+            raise RuntimeError(f"ffmpeg exited with status {process.returncode}: {error}")
+
+        submit_finished_segments(executor, output_dir)
+        for index, future in futures:
+            if not future.result():
+                results[index]['uploaded'] = False
+
+        playlist_futures = [
+            (index, executor.submit(
+                _upload_file, upload, os.path.join(output_dir, str(index), MEDIA_PLAYLIST_NAME),
+                f"{index}/{MEDIA_PLAYLIST_NAME}", PLAYLIST_CONTENT_TYPE
+            ))
+            for index in results
+        ]
+        for index, future in playlist_futures:
+            if not future.result():
+                results[index]['uploaded'] = False
+
+    logger.info(
+        f"Packaged {source_path} into {len(results)} HLS renditions "
+        f"({sum(r['segment_count'] for r in results.values())} segments)"
+    )
+    return [results[r['index']] for r in renditions]
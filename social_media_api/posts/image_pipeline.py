@@ -0,0 +1,261 @@
+import logging
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+try:
+    import pillow_avif  # noqa: F401  (registers an AVIF encoder on Pillow builds without one)
+except ImportError:
+    pass
+
+logger = logging.getLogger(__name__)
+
+# Fixed variants, each stored in its own MediaFile URL field
+VARIANT_ORDER = ('full', 'preview', 'thumbnail')
+
+FORMAT_CONTENT_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+}
+
+# EXIF orientation tag value -> transpose that displays the image upright
+ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+EXIF_ORIENTATION = 0x0112
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def target_size(size, variant_config):
+    """
+    Pixel size a variant is resized to before any crop. Boxes without
+    'crop' are fit inside (never upscaled); 'crop' variants cover the box.
+    """
+    width, height = size
+    if 'max_dimension' in variant_config:
+        scale = min(1.0, variant_config['max_dimension'] / max(width, height))
+    elif 'height' not in variant_config:
+        scale = min(1.0, variant_config['width'] / width)
+    elif variant_config.get('crop'):
+        scale = max(variant_config['width'] / width, variant_config['height'] / height)
+    else:
+        scale = min(1.0, variant_config['width'] / width, variant_config['height'] / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def supported_formats(formats):
+    """The requested responsive formats this Pillow build can encode, in preference order."""
+    Image.init()  # Plugins register their encoders lazily
+    available = [fmt for fmt in formats if fmt.upper() in Image.SAVE]
+    if len(available) < len(formats):
+        logger.debug(f"Skipping unsupported image formats: {sorted(set(formats) - set(available))}")
+    return available
+
+
+def responsive_widths(original_size, responsive_config):
+    """Ladder widths for an image: those narrower than the original, or the original width if it is below them all."""
+    widths = [width for width in responsive_config['widths'] if width < original_size[0]]
+    return widths or [original_size[0]]
+
+
+def variant_plan(original_size, config):
+    """(name, variant config) for every image to produce: the fixed variants plus the responsive ladder."""
+    plan = [(variant_type, config[variant_type]) for variant_type in VARIANT_ORDER]
+    plan += [(f"w{width}", {'width': width}) for width in responsive_widths(original_size, config['responsive'])]
+    return plan
+
+
+def open_reduced(source, config):
+    """
+    Open an image decoded at the smallest size that still covers every
+    configured variant. JPEGs use draft mode, so the decoder does the 1/2,
+    1/4 or 1/8 reduction while decoding. Returns the EXIF-rotated RGB image
+    and the oriented size of the original.
+    """
+    image = Image.open(source)
+    transpose = ORIENTATION_TRANSPOSE.get(image.getexif().get(EXIF_ORIENTATION))
+    swaps_axes = transpose in (Image.Transpose.TRANSPOSE, Image.Transpose.ROTATE_270,
+                               Image.Transpose.TRANSVERSE, Image.Transpose.ROTATE_90)
+    original_size = image.size[::-1] if swaps_axes else image.size
+
+    longest_edge = max(max(target_size(original_size, variant_config))
+                       for _, variant_config in variant_plan(original_size, config))
+    scale = longest_edge / max(image.size)
+    drafted = scale < 1 and image.format == 'JPEG'
+    if drafted:
+        image.draft('RGB', (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+    image.load()
+
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    if scale < 1 and not drafted and int(1 / scale) >= 2:
+        # Integer box reduction before the Lanczos pass, for formats without draft support
+        image = image.reduce(int(1 / scale))
+    if transpose is not None:
+        image = image.transpose(transpose)
+    return image, original_size
+
+
+def build_variants(image, original_size, config):
+    """
+    Resize every planned variant, largest first, deriving each from the
+    smallest larger intermediate. Returns images keyed by variant name.
+    """
+    planned = [
+        (name, variant_config, target_size(original_size, variant_config))
+        for name, variant_config in variant_plan(original_size, config)
+    ]
+    planned.sort(key=lambda entry: entry[2][0] * entry[2][1], reverse=True)
+
+    intermediates = [image]
+    variants = {}
+    for name, variant_config, size in planned:
+        base = next(
+            (im for im in reversed(intermediates) if im.width >= size[0] and im.height >= size[1]),
+            image
+        )
+        resized = base if base.size == size else base.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        if variant_config.get('crop'):
+            resized = ImageOps.fit(resized, (variant_config['width'], variant_config['height']), Image.Resampling.LANCZOS)
+        else:
+            intermediates.append(resized)
+        variants[name] = resized
+    return variants
+
+
+def encode_image(mode, size, data, fmt, quality):
+    """Encode raw pixels as WEBP or AVIF; runs in a pool worker."""
+    buffer = BytesIO()
+    Image.frombytes(mode, size, data).save(buffer, format=fmt.upper(), quality=quality)
+    return buffer.getvalue()
+
+
+def _fallback_pool(config):
+    global _pool
+    logger.warning("Process pool unavailable for image encoding; using threads")
+    _pool = ThreadPoolExecutor(max_workers=config['workers'])
+    return _pool
+
+
+def get_image_pool(config):
+    """
+    Shared encoder pool, created on first use. Falls back to threads where
+    child processes cannot be started (Pillow releases the GIL while encoding).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                _pool = ProcessPoolExecutor(
+                    max_workers=config['workers'],
+                    mp_context=multiprocessing.get_context(config['start_method'])
+                )
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not create image process pool: {e}")
+                return _fallback_pool(config)
+        return _pool
+
+
+def _encode_jobs(variants, config):
+    """(key, variant type, format, encode args) for each output file."""
+    responsive = config['responsive']
+    jobs = []
+    for name, image in variants.items():
+        pixels = (image.mode, image.size, image.tobytes())
+        if name in VARIANT_ORDER:
+            quality = config[name].get('quality', config['full']['quality'])
+            jobs.append((name, name, 'webp', (*pixels, 'webp', quality)))
+        else:
+            for fmt in supported_formats(responsive['formats']):
+                jobs.append((f"{name}.{fmt}", 'responsive', fmt, (*pixels, fmt, responsive['quality'][fmt])))
+    return jobs
+
+
+def _encode_all(jobs, config):
+    """Submit every encode to the pool; returns futures of encoded bytes keyed by output name."""
+    if config['workers'] <= 0:
+        return {name: _Done(encode_image(*args)) for name, _, _, args in jobs}
+
+    pool = get_image_pool(config)
+    try:
+        return {name: pool.submit(encode_image, *args) for name, _, _, args in jobs}
+    except (AssertionError, BrokenProcessPool, OSError) as e:
+        # e.g. daemonic Celery prefork children may not start processes of their own
+        logger.warning(f"Image process pool failed to start workers: {e}")
+        with _pool_lock:
+            pool = _fallback_pool(config)
+        return {name: pool.submit(encode_image, *args) for name, _, _, args in jobs}
+
+
+class _Done:
+    """Already-computed result with the Future interface used below."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+def encode_variants(image, original_size, key_prefix, config):
+    """
+    Build thumbnail/preview/full and the responsive width ladder from an
+    image returned by open_reduced, and encode them in parallel.
+
+    Fixed variants are WEBP and keyed by variant type; ladder rungs are
+    encoded once per supported responsive format and keyed 'w<width>.<format>'.
+    Each entry holds its key, variant_type, format, content_type, width,
+    height and encoded bytes (data), ready for a batch upload.
+    """
+    variants = build_variants(image, original_size, config)
+    jobs = _encode_jobs(variants, config)
+    encodes = _encode_all(jobs, config)
+
+    encoded = {}
+    for name, variant_type, fmt, _ in jobs:
+        variant = variants[name.split('.')[0]]
+        encoded[name] = {
+            'key': f"{key_prefix}/{name.split('.')[0]}.{fmt}",
+            'variant_type': variant_type,
+            'format': fmt,
+            'content_type': FORMAT_CONTENT_TYPES[fmt],
+            'width': variant.width,
+            'height': variant.height,
+            'data': encodes[name].result(),
+        }
+    return encoded
+
+
+def build_srcset(encoded, urls):
+    """
+    Responsive entries for MediaFile.srcset from encode_variants output and
+    the uploaded URL of each key: one per format and width, preferred format
+    first, narrowest first.
+    """
+    order = {fmt: position for position, fmt in enumerate(FORMAT_CONTENT_TYPES)}
+    entries = [
+        {'url': urls[variant['key']], 'format': variant['format'],
+         'width': variant['width'], 'height': variant['height'], 'size': len(variant['data'])}
+        for variant in encoded.values()
+        if variant['variant_type'] == 'responsive' and urls.get(variant['key'])
+    ]
+    return sorted(entries, key=lambda entry: (order[entry['format']], entry['width']))
+
+
+def generate_image_variants(source, key_prefix, config):
+    """Decode source once at reduced size and encode every variant (see encode_variants)."""
+    image, original_size = open_reduced(source, config)
+    return original_size, encode_variants(image, original_size, key_prefix, config)
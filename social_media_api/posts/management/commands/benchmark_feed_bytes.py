@@ -0,0 +1,60 @@
+import random
+from io import BytesIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageFilter
+
+from posts.image_pipeline import generate_image_variants, supported_formats
+
+
+class Command(BaseCommand):
+    help = 'Compare image bytes transferred per feed page with fixed variants against srcset selection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=20, help='Posts per feed page, one image each')
+        parser.add_argument('--size', default='4032x3024', help='Frame size of the synthetic photos')
+        parser.add_argument('--card-width', type=int, default=360, help='CSS width of a feed card image')
+        parser.add_argument('--dpr', type=float, nargs='+', default=[1.0, 2.0, 3.0], help='Device pixel ratios to report')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        config = dict(settings.MEDIA_PROCESSING_CONFIG['image'], workers=0)
+        width, height = map(int, options['size'].split('x'))
+        rng = random.Random(options['seed'])
+        formats = supported_formats(config['responsive']['formats'])
+
+        self.stdout.write(
+            f"Encoding {options['page_size']} {width}x{height} photos (responsive formats: {', '.join(formats)})..."
+        )
+        page = []
+        for index in range(options['page_size']):
+            noise = Image.effect_noise((width, height), rng.uniform(20, 60)).filter(ImageFilter.GaussianBlur(1))
+            gradient = Image.linear_gradient('L').resize((width, height)).rotate(rng.uniform(0, 360))
+            source = BytesIO()
+            Image.merge('RGB', (noise, gradient, Image.blend(noise, gradient, 0.5))).save(source, format='JPEG', quality=90)
+            source.seek(0)
+            _, variants = generate_image_variants(source, f'benchmark/{index}', config)
+            page.append(variants)
+
+        full = sum(len(variants['full']['data']) for variants in page)
+        preview = sum(len(variants['preview']['data']) for variants in page)
+        self.stdout.write(f"  before, media_url (full):   {full / 1024:9.1f} KB per page")
+        self.stdout.write(f"  before, preview_url:        {preview / 1024:9.1f} KB per page")
+
+        for dpr in options['dpr']:
+            needed = round(options['card_width'] * dpr)
+            total = sum(len(self.pick(variants, needed, formats)['data']) for variants in page)
+            self.stdout.write(
+                f"  after, srcset at {dpr:.1f}x ({needed}px): {total / 1024:9.1f} KB per page "
+                f"({full / total:.1f}x less than full, {preview / total:.1f}x less than preview)"
+            )
+
+    def pick(self, variants, needed, formats):
+        """What a browser takes from srcset: the narrowest candidate covering the slot, in the first supported format"""
+        candidates = sorted(
+            (variant for variant in variants.values()
+             if variant['variant_type'] == 'responsive' and variant['format'] == formats[0]),
+            key=lambda variant: variant['width']
+        )
+        return next((variant for variant in candidates if variant['width'] >= needed), candidates[-1])
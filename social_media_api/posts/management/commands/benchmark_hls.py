@@ -0,0 +1,90 @@
+import os
+import resource
+import subprocess
+import tempfile
+import time
+
+import moviepy.editor as mp
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.hls import get_ffmpeg_binary, package_hls, plan_renditions
+
+
+def cpu_seconds():
+    """User + system CPU of this process and its waited-for children (ffmpeg runs as a child)"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+class Command(BaseCommand):
+    help = 'Compare wall time and CPU-seconds of per-rendition moviepy transcoding against the single-pass HLS packager'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', help='Video to transcode (default: a generated test clip)')
+        parser.add_argument('--seconds', type=int, default=30, help='Length of the generated clip')
+        parser.add_argument('--size', default='1920x1080', help='Frame size of the generated clip')
+        parser.add_argument('--preset', help='libx264 preset for both paths (default: the HLS config preset)')
+
+    def handle(self, *args, **options):
+        hls_config = dict(settings.MEDIA_PROCESSING_CONFIG['video']['hls'])
+        if options['preset']:
+            hls_config['preset'] = options['preset']
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            source = options['source']
+            if not source:
+                source = os.path.join(work_dir, 'sample.mp4')
+                self.stdout.write(f"Generating {options['seconds']}s {options['size']} sample clip...")
+                subprocess.run([
+                    get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y',
+                    '-f', 'lavfi', '-i', f"testsrc2=size={options['size']}:rate=30",
+                    '-f', 'lavfi', '-i', 'sine=frequency=440',
+                    '-t', str(options['seconds']), '-c:v', 'libx264', '-preset', 'veryfast',
+                    '-c:a', 'aac', '-shortest', source
+                ], check=True)
+
+            clip = mp.VideoFileClip(source)
+            renditions = plan_renditions(int(clip.w), int(clip.h), hls_config)
+            has_audio = clip.audio is not None
+            clip.close()
+            self.stdout.write(
+                "Renditions: " + ', '.join(f"{r['width']}x{r['height']}@{r['bitrate']}k" for r in renditions)
+            )
+
+            legacy = self.measure(lambda: self.legacy_transcode(source, renditions, hls_config, work_dir))
+            uploaded = []
+            packaged = self.measure(lambda: package_hls(
+                source, renditions, hls_config, has_audio,
+                lambda file_obj, name, content_type: uploaded.append(len(file_obj.read())) or True
+            ))
+
+        for label, (wall, cpu) in (('moviepy per rendition', legacy), ('single-pass HLS', packaged)):
+            self.stdout.write(f"{label:>22}: {wall:7.2f}s wall, {cpu:7.2f} CPU-seconds")
+        self.stdout.write(self.style.SUCCESS(
+            f"Speedup: {legacy[0] / packaged[0]:.2f}x wall, {legacy[1] / packaged[1]:.2f}x CPU "
+            f"({len(uploaded)} objects, {sum(uploaded) / 1e6:.1f} MB handed to the uploader)"
+        ))
+
+    def measure(self, func):
+        start_wall, start_cpu = time.perf_counter(), cpu_seconds()
+        func()
+        return time.perf_counter() - start_wall, cpu_seconds() - start_cpu
+
+    def legacy_transcode(self, source, renditions, hls_config, work_dir):
+        """The previous path: re-decode and re-encode the whole source once per rendition"""
+        video = mp.VideoFileClip(source)
+        try:
+            for rendition in renditions:
+                output_path = os.path.join(work_dir, f"legacy_{rendition['index']}.mp4")
+                video.resize(height=rendition['height']).write_videofile(
+                    output_path,
+                    bitrate=f"{rendition['bitrate']}k",
+                    audio_bitrate=f"{hls_config['audio_bitrate']}k",
+                    preset=hls_config['preset'],
+                    threads=4,
+                    logger=None
+                )
+        finally:
+            video.close()
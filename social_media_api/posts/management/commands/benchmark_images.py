@@ -0,0 +1,73 @@
+import random
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageFilter
+
+import posts.image_pipeline
+from posts.image_pipeline import generate_image_variants
+
+
+class Command(BaseCommand):
+    help = 'Compare images/sec of the sequential full-decode variant path against the reduced-decode image pipeline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', type=int, default=20, help='Synthetic JPEGs to process')
+        parser.add_argument('--size', default='4032x3024', help='Frame size of the synthetic JPEGs')
+        parser.add_argument('--workers', type=int, help='Encoder processes (default: the image config)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        config = dict(settings.MEDIA_PROCESSING_CONFIG['image'])
+        if options['workers'] is not None:
+            config['workers'] = options['workers']
+        width, height = map(int, options['size'].split('x'))
+        rng = random.Random(options['seed'])
+
+        self.stdout.write(f"Generating {options['images']} {width}x{height} JPEGs...")
+        # Noise over a gradient, blurred slightly, so JPEG/WEBP encoders see photo-like entropy
+        sources = []
+        for _ in range(options['images']):
+            noise = Image.effect_noise((width, height), rng.uniform(20, 60)).filter(ImageFilter.GaussianBlur(1))
+            gradient = Image.linear_gradient('L').resize((width, height)).rotate(rng.uniform(0, 360))
+            image = Image.merge('RGB', (noise, gradient, Image.blend(noise, gradient, 0.5)))
+            buffer = BytesIO()
+            image.save(buffer, format='JPEG', quality=90)
+            sources.append(buffer.getvalue())
+
+        legacy = self.measure(sources, lambda data: self.legacy_variants(BytesIO(data), config))
+        # Warm the pool so worker start-up is not billed to the first image
+        if config['workers'] > 0:
+            generate_image_variants(BytesIO(sources[0]), 'benchmark', config)
+        pipeline = self.measure(sources, lambda data: generate_image_variants(BytesIO(data), 'benchmark', config))
+        if posts.image_pipeline._pool is not None:
+            posts.image_pipeline._pool.shutdown()
+            posts.image_pipeline._pool = None
+
+        self.stdout.write(f"  sequential full decode: {legacy:6.2f} images/sec")
+        self.stdout.write(f"  reduced-decode pipeline: {pipeline:6.2f} images/sec ({config['workers']} encoder workers)")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {pipeline / legacy:.2f}x"))
+
+    def measure(self, sources, func):
+        start = time.perf_counter()
+        for data in sources:
+            func(data)
+        return len(sources) / (time.perf_counter() - start)
+
+    def legacy_variants(self, source, config):
+        """The previous path: full decode, one copy per variant, sequential WEBP encodes"""
+        image = Image.open(source)
+        image.load()
+        quality = config['full']['quality']
+
+        thumb_copy = image.copy()
+        thumb_copy.thumbnail((config['thumbnail']['width'], config['thumbnail']['height']), Image.Resampling.LANCZOS)
+        thumb_copy.save(BytesIO(), format='WEBP', quality=quality)
+
+        preview = image.copy()
+        preview.thumbnail((config['preview']['width'], config['preview']['height']), Image.Resampling.LANCZOS)
+        preview.save(BytesIO(), format='WEBP', quality=quality)
+
+        image.save(BytesIO(), format='WEBP', quality=quality)
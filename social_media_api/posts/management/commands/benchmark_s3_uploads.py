@@ -0,0 +1,152 @@
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+import boto3
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+import posts.s3_utils
+from posts.s3_utils import S3MediaManager
+
+# Approximate WEBP sizes of thumbnail, preview and full variants
+VARIANT_SIZES = (('thumbnail', 12 * 1024), ('preview', 120 * 1024), ('full', 600 * 1024))
+
+
+class Command(BaseCommand):
+    help = 'Compare serial per-variant uploads against pooled concurrent batch uploads on an S3 endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', help='S3-compatible endpoint (default: AWS_S3_ENDPOINT_URL, else a local moto server)')
+        parser.add_argument('--media-files', type=int, default=30, help='Media files of three variants each')
+        parser.add_argument('--large-mb', type=int, default=64, help='Size of one additional multipart object')
+
+    def handle(self, *args, **options):
+        endpoint = options['endpoint'] or getattr(settings, 'AWS_S3_ENDPOINT_URL', None)
+        server = None
+        if not endpoint:
+            server, endpoint = self.start_moto_server()
+        bucket = 'benchmark-uploads'
+
+        try:
+            with override_settings(
+                AWS_S3_ENDPOINT_URL=endpoint, AWS_STORAGE_BUCKET_NAME=bucket,
+                AWS_ACCESS_KEY_ID=settings.AWS_ACCESS_KEY_ID or 'testing',
+                AWS_SECRET_ACCESS_KEY=settings.AWS_SECRET_ACCESS_KEY or 'testing'
+            ):
+                client = boto3.client(
+                    's3', endpoint_url=endpoint, region_name=settings.AWS_S3_REGION_NAME,
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID, aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
+                )
+                try:
+                    client.create_bucket(Bucket=bucket)
+                except client.exceptions.BucketAlreadyOwnedByYou:
+                    pass
+
+                payloads = {name: os.urandom(size) for name, size in VARIANT_SIZES}
+                large = os.urandom(options['large_mb'] * 1024 * 1024)
+                self.stdout.write(
+                    f"{options['media_files']} media files x {len(VARIANT_SIZES)} variants "
+                    f"+ one {options['large_mb']} MB object against {endpoint}"
+                )
+
+                legacy = self.run_serial(client, bucket, payloads, large, options['media_files'])
+                posts.s3_utils._s3_manager = None
+                batched = self.run_batched(payloads, large, options['media_files'])
+        finally:
+            posts.s3_utils._s3_manager = None
+            if server:
+                server.terminate()
+                server.wait()
+
+        for label, result in (('serial, default config', legacy), ('pooled batch upload', batched)):
+            self.stdout.write(
+                f"{label:>23}: variants {result['wall']:6.2f}s wall, "
+                f"per-media-file latency p50 {result['p50'] * 1000:6.1f} ms p95 {result['p95'] * 1000:6.1f} ms, "
+                f"{result['variant_mbps']:6.1f} MB/s; large object {result['large_mbps']:6.1f} MB/s"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Variant upload speedup: {legacy['wall'] / batched['wall']:.2f}x"
+        ))
+
+    def start_moto_server(self):
+        try:
+            import moto.server  # noqa: F401
+        except ImportError:
+            raise CommandError('No --endpoint given and moto[server] is not installed (see requirements-dev.txt)')
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'moto.server', '-H', '127.0.0.1', '-p', str(port)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        endpoint = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=1):
+                    return server, endpoint
+            except OSError:
+                if time.monotonic() > deadline:
+                    server.terminate()
+                    raise CommandError('moto server did not start')
+                time.sleep(0.2)
+
+    def summarize(self, latencies, wall, variant_bytes, large_seconds, large_bytes):
+        latencies = sorted(latencies)
+        return {
+            'wall': wall,
+            'p50': statistics.median(latencies),
+            'p95': latencies[int(len(latencies) * 0.95) - 1],
+            'variant_mbps': variant_bytes / wall / (1024 * 1024),
+            'large_mbps': large_bytes / large_seconds / (1024 * 1024),
+        }
+
+    def run_serial(self, client, bucket, payloads, large, media_files):
+        """The previous path: one variant at a time through a default-config client"""
+        latencies = []
+        start = time.perf_counter()
+        for media_id in range(media_files):
+            media_start = time.perf_counter()
+            for name, data in payloads.items():
+                client.upload_fileobj(BytesIO(data), bucket, f"serial/{media_id}/{name}.webp")
+            latencies.append(time.perf_counter() - media_start)
+        wall = time.perf_counter() - start
+
+        large_start = time.perf_counter()
+        client.upload_fileobj(BytesIO(large), bucket, 'serial/large.bin')
+        large_seconds = time.perf_counter() - large_start
+        variant_bytes = media_files * sum(map(len, payloads.values()))
+        return self.summarize(latencies, wall, variant_bytes, large_seconds, len(large))
+
+    def run_batched(self, payloads, large, media_files):
+        """All variants of a media file in one upload_many() call over the shared pooled client"""
+        manager = S3MediaManager()
+        latencies = []
+        start = time.perf_counter()
+        for media_id in range(media_files):
+            batch_start = time.perf_counter()
+            results = manager.upload_many(
+                (BytesIO(data), f"batched/{media_id}/{name}.webp", 'image/webp') for name, data in payloads.items()
+            )
+            if not all(results.values()):
+                raise CommandError(f"Batch upload failed: {results}")
+            latencies.append(time.perf_counter() - batch_start)
+        wall = time.perf_counter() - start
+
+        large_start = time.perf_counter()
+        manager.upload_fileobj(BytesIO(large), 'batched/large.bin', 'application/octet-stream')
+        large_seconds = time.perf_counter() - large_start
+        variant_bytes = media_files * sum(map(len, payloads.values()))
+        stats = manager.upload_stats.snapshot()
+        self.stdout.write(
+            f"Manager stats: {stats['uploads']} uploads, avg {stats['avg_latency_ms']} ms, "
+            f"max {stats['max_latency_ms']} ms, {stats['throughput_mbps']} MB/s per upload"
+        )
+        return self.summarize(latencies, wall, variant_bytes, large_seconds, len(large))
@@ -0,0 +1,79 @@
+import random
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from posts.trending import TrendingEngine, get_trending_config, ALL_CATEGORY
+
+
+class Command(BaseCommand):
+    help = 'Replay a day of synthetic hashtag events through the trending engine and report throughput and accuracy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=1000000, help='Events spread over the simulated day')
+        parser.add_argument('--topics', type=int, default=50000, help='Distinct topics per category')
+        parser.add_argument('--categories', type=int, default=5, help='Sport categories')
+        parser.add_argument('--top', type=int, default=10, help='Trends compared per category')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        config = get_trending_config()
+        half_life = config['half_life']
+        day = 86400
+        categories = [f'sport{index}' for index in range(options['categories'])]
+
+        # Zipf-distributed background traffic plus one topic per category that bursts in the last two hours
+        cumulative, total = [], 0.0
+        for rank in range(1, options['topics'] + 1):
+            total += 1 / rank ** 1.1
+            cumulative.append(total)
+
+        self.stdout.write(f"Generating {options['events']} events...")
+        events = []
+        for _ in range(options['events']):
+            category = rng.choice(categories)
+            timestamp = rng.uniform(0, day)
+            if timestamp > day - 7200 and rng.random() < 0.2:
+                topic = f'#{category}_burst'
+            else:
+                topic = f"#{category}_{rng.choices(range(options['topics']), cum_weights=cumulative)[0]}"
+            events.append((timestamp, topic, category))
+        events.sort()
+
+        engine = TrendingEngine(config)
+        start = time.perf_counter()
+        for timestamp, topic, category in events:
+            engine.record(topic, topic, category, 1.0, timestamp)
+        elapsed = time.perf_counter() - start
+
+        # Exact decayed counts at the end of the day, for comparison
+        exact = defaultdict(lambda: defaultdict(float))
+        for timestamp, topic, category in events:
+            weight = 2 ** (-(day - timestamp) / half_life)
+            exact[category][topic] += weight
+            exact[ALL_CATEGORY][topic] += weight
+
+        top = options['top']
+        recalls, errors = [], []
+        for category in [ALL_CATEGORY] + categories:
+            expected = sorted(exact[category].items(), key=lambda item: item[1], reverse=True)[:top]
+            reported = engine.top(category, top, now=day)
+            expected_topics = {topic for topic, _ in expected}
+            recalls.append(len(expected_topics & {topic for topic, _, _ in reported}) / top)
+            for topic, _, score in reported:
+                true_score = exact[category][topic]
+                errors.append(abs(score - true_score) / true_score if true_score else 1.0)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Throughput: {len(events) / elapsed:,.0f} updates/sec ({elapsed:.2f}s for {len(events)} events)"
+        ))
+        self.stdout.write(f"Recall@{top}: {sum(recalls) / len(recalls):.3f} (min {min(recalls):.3f})")
+        self.stdout.write(f"Mean relative error of reported scores: {sum(errors) / len(errors):.4f}")
+        burst_ranks = [
+            next((rank for rank, (topic, _, _) in enumerate(engine.top(category, top, now=day), 1)
+                  if topic == f'#{category}_burst'), None)
+            for category in categories
+        ]
+        self.stdout.write(f"Burst topic rank per category: {burst_ranks}")
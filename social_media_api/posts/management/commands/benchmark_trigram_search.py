@@ -0,0 +1,47 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.trigram_search import TrigramIndex, get_fuzzy_search_config
+
+
+class Command(BaseCommand):
+    help = 'Build an in-process trigram index over synthetic names and report build time and lookup latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entities', type=int, default=100000, help='Synthetic names indexed')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query')
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        consonants, vowels = 'bcdfghjklmnprstvwz', 'aeiou'
+        threshold = get_fuzzy_search_config()['similarity_threshold']
+
+        def name():
+            return ''.join(rng.choice(consonants) + rng.choice(vowels) for _ in range(rng.randint(2, 4)))
+
+        index = TrigramIndex()
+        start = time.perf_counter()
+        for entity_id in range(options['entities']):
+            first, last = name(), name()
+            index.add(entity_id, f"{first} {last}")
+            index.add(entity_id, last)
+        target = options['entities']
+        index.add(target, 'Kylian Mbappe')
+        index.add(target, 'Mbappe')
+        self.stdout.write(f"Built {len(index)} terms in {time.perf_counter() - start:.2f}s")
+
+        for query in ['mbape', 'kilian', 'ronaldo', 'mesi', 'lewandowsky']:
+            start = time.perf_counter()
+            for _ in range(options['repeat']):
+                results = index.search(query, threshold, 20)
+            average_ms = (time.perf_counter() - start) / options['repeat'] * 1000
+            self.stdout.write(f"{query}: {average_ms:.2f} ms, {len(results)} results")
+
+        found = index.search('mbape', threshold, 1)
+        if found and found[0][0] == target:
+            self.stdout.write(self.style.SUCCESS("'mbape' ranks Kylian Mbappe first"))
+        else:
+            self.stdout.write(self.style.ERROR("'mbape' did not rank Kylian Mbappe first"))
@@ -0,0 +1,65 @@
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+
+import moviepy.editor as mp
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from posts.hls import get_ffmpeg_binary
+from posts.video_poster import extract_poster_frame
+
+
+class Command(BaseCommand):
+    help = 'Compare time-to-thumbnail of opening the clip with moviepy against the keyframe-seeking poster extractor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=int, default=600, help='Length of the synthetic clip in seconds')
+        parser.add_argument('--size', default='1920x1080', help='Frame size of the synthetic clip')
+        parser.add_argument('--time', type=float, help='Poster time in seconds (default: the thumbnail config)')
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **options):
+        config = settings.MEDIA_PROCESSING_CONFIG['video']['thumbnail']
+        poster_time = options['time'] if options['time'] is not None else config['time']
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            source = os.path.join(work_dir, 'clip.mp4')
+            self.stdout.write(f"Encoding a {options['duration']}s {options['size']} clip...")
+            subprocess.run([
+                get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y',
+                '-f', 'lavfi', '-i', f"testsrc2=size={options['size']}:rate=30",
+                '-f', 'lavfi', '-i', 'sine=frequency=440',
+                '-t', str(options['duration']), '-c:v', 'libx264', '-preset', 'ultrafast', '-g', '60',
+                '-c:a', 'aac', '-shortest', source
+            ], check=True)
+
+            legacy = self.measure(options['runs'], lambda: self.legacy_thumbnail(source, poster_time, config))
+            poster = self.measure(options['runs'], lambda: extract_poster_frame(
+                source, poster_time, config['width'], config['height'], config['timeout']
+            ))
+
+        self.stdout.write(f"  moviepy VideoFileClip + get_frame: median {legacy * 1000:8.1f} ms")
+        self.stdout.write(f"  keyframe-seek poster extractor:    median {poster * 1000:8.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {legacy / poster:.1f}x"))
+
+    def measure(self, runs, func):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
+
+    def legacy_thumbnail(self, source, poster_time, config):
+        """The previous path: open the clip with moviepy and decode the frame at poster_time"""
+        video = mp.VideoFileClip(source)
+        try:
+            image = Image.fromarray(video.get_frame(min(poster_time, video.duration)))
+            image.thumbnail((config['width'], config['height']), Image.Resampling.LANCZOS)
+            return image
+        finally:
+            video.close()
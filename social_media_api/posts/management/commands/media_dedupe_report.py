@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts.media_dedupe import dedupe_savings, get_media_dedupe_config
+
+
+class Command(BaseCommand):
+    help = 'Report storage and processing CPU saved by linking duplicate media uploads'
+
+    def handle(self, *args, **options):
+        config = get_media_dedupe_config()
+        savings = dedupe_savings()
+        originals = 'removed' if config['delete_duplicate_originals'] else 'kept'
+
+        self.stdout.write(
+            f"Duplicates linked: {savings['duplicates']} "
+            f"({savings['exact']} exact, {savings['perceptual']} perceptual"
+            f"{'' if config['perceptual'] else ', perceptual matching off'})"
+        )
+        self.stdout.write(f"Variant storage saved: {savings['variant_bytes_saved'] / (1024 * 1024):.1f} MB")
+        self.stdout.write(
+            f"Duplicate originals ({originals}): {savings['original_bytes_saved'] / (1024 * 1024):.1f} MB"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Processing CPU saved: {savings['cpu_seconds_saved']:.1f} s"
+        ))
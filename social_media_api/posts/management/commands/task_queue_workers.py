@@ -0,0 +1,21 @@
+import shlex
+
+from django.core.management.base import BaseCommand, CommandError
+
+from social_media_api.task_queues import get_task_queue_config, worker_command
+
+
+class Command(BaseCommand):
+    help = 'Print the celery worker command for each task queue, with its configured concurrency and prefetch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('queues', nargs='*', help='Queues to print (default: all configured queues)')
+
+    def handle(self, *args, **options):
+        configured = get_task_queue_config()['queues']
+        unknown = set(options['queues']) - set(configured)
+        if unknown:
+            raise CommandError(f"Unknown queues: {', '.join(sorted(unknown))}")
+
+        for queue in options['queues'] or configured:
+            self.stdout.write(shlex.join(worker_command(queue)))
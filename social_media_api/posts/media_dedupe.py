@@ -0,0 +1,162 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEDIA_DEDUPE_CONFIG = {
+    'enabled': True,
+    'perceptual': False,                  # Also link near-duplicate images (re-encodes, resizes)
+    'phash_max_distance': 3,              # Hamming distance; band lookup finds every match up to 3
+    'delete_duplicate_originals': True,   # Remove the re-uploaded S3 original once it is linked
+}
+
+# Fields copied from the canonical media onto a linked duplicate
+LINKED_FIELDS = (
+    'width', 'height', 'duration', 'thumbnail_url', 'preview_url', 'full_url',
+    'video_thumbnail_url', 'hls_playlist_url', 'blurhash', 'srcset',
+)
+
+PHASH_BANDS = 4
+PHASH_BAND_BITS = 16
+
+
+def get_media_dedupe_config():
+    """Return media deduplication settings merged over the defaults."""
+    config = dict(DEFAULT_MEDIA_DEDUPE_CONFIG)
+    config.update(getattr(settings, 'MEDIA_DEDUPE_CONFIG', {}))
+    return config
+
+
+def hash_file(file_obj, chunk_size=1024 * 1024):
+    """SHA-256 hex digest of a binary file object, read in chunks."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file_obj.read(chunk_size), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def perceptual_hash(image):
+    """
+    64-bit difference hash: each bit says whether a pixel of the 9x8
+    grayscale thumbnail is brighter than its right-hand neighbour.
+    Survives re-encoding, resizing and small colour changes.
+    """
+    pixels = list(image.convert('L').resize((9, 8), Image.Resampling.LANCZOS).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return f"{bits:016x}"
+
+
+def hamming_distance(first, second):
+    return bin(int(first, 16) ^ int(second, 16)).count('1')
+
+
+def phash_bands(phash):
+    """Split a 64-bit hash into (band, value) slices, most significant first."""
+    bits = int(phash, 16)
+    mask = (1 << PHASH_BAND_BITS) - 1
+    return [
+        (band, (bits >> (PHASH_BAND_BITS * (PHASH_BANDS - 1 - band))) & mask)
+        for band in range(PHASH_BANDS)
+    ]
+
+
+def _canonical_candidates(media_file):
+    from .models import MediaFile
+
+    return MediaFile.objects.filter(
+        media_type=media_file.media_type, processing_status='completed', duplicate_of__isnull=True
+    ).exclude(id=media_file.id)
+
+
+def find_exact_duplicate(media_file, content_hash):
+    """Oldest processed media with identical content, or None."""
+    return _canonical_candidates(media_file).filter(content_hash=content_hash).order_by('id').first()
+
+
+def find_near_duplicate(media_file, phash, max_distance):
+    """Closest processed image whose perceptual hash is within max_distance, or None."""
+    band_match = Q()
+    for band, value in phash_bands(phash):
+        band_match |= Q(phash_bands__band=band, phash_bands__value=value)
+
+    candidates = _canonical_candidates(media_file).filter(band_match).exclude(perceptual_hash='').distinct()
+    scored = [
+        (hamming_distance(phash, candidate.perceptual_hash), candidate.id, candidate)
+        for candidate in candidates.only('id', 'perceptual_hash')
+    ]
+    scored = [entry for entry in scored if entry[0] <= max_distance]
+    return min(scored)[2] if scored else None
+
+
+def store_perceptual_hash(media_file, phash):
+    """
+    Record the indexed slices of an image's perceptual hash. The hash itself
+    is set on media_file and saved by the caller with the rest of the row.
+    """
+    from .models import PerceptualHashBand
+
+    media_file.perceptual_hash = phash
+    PerceptualHashBand.objects.filter(media_file=media_file).delete()
+    PerceptualHashBand.objects.bulk_create([
+        PerceptualHashBand(media_file=media_file, band=band, value=value) for band, value in phash_bands(phash)
+    ])
+
+
+def link_duplicate(media_file, canonical, match, update_fields=()):
+    """
+    Point media_file at canonical's processed variants and mark it completed,
+    in one save that also writes any caller-set update_fields.
+    """
+    from .models import MediaFile
+
+    canonical = MediaFile.objects.get(id=canonical.id)
+    for field in LINKED_FIELDS:
+        setattr(media_file, field, getattr(canonical, field))
+    media_file.duplicate_of = canonical
+    media_file.duplicate_match = match
+    media_file.processing_status = 'completed'
+    media_file.processing_error = ''
+    media_file.save(update_fields=[
+        *LINKED_FIELDS, 'duplicate_of', 'duplicate_match', 'processing_status', 'processing_error',
+        *update_fields, 'updated_at'
+    ])
+    logger.info(f"Linked media {media_file.id} to {canonical.id} ({match} duplicate); skipped processing")
+    return media_file
+
+
+def dedupe_savings():
+    """
+    Totals for media linked to an existing upload instead of processed:
+    originals not kept, canonical variant bytes not stored again, and the
+    canonical's processing CPU not spent again.
+    """
+    from .models import MediaFile, MediaVariant
+
+    duplicates = MediaFile.objects.filter(duplicate_of__isnull=False)
+    totals = duplicates.aggregate(
+        count=Count('id'),
+        exact=Count('id', filter=Q(duplicate_match='exact')),
+        perceptual=Count('id', filter=Q(duplicate_match='perceptual')),
+        original_bytes=Sum('file_size'),
+        cpu_seconds=Sum('duplicate_of__processing_seconds'),
+    )
+    # One row per (canonical variant, duplicate) pair, so each duplicate counts the variants it reuses
+    variant_bytes = MediaVariant.objects.filter(media_file__duplicates__isnull=False).aggregate(
+        total=Sum('file_size')
+    )['total']
+
+    return {
+        'duplicates': totals['count'],
+        'exact': totals['exact'],
+        'perceptual': totals['perceptual'],
+        'original_bytes_saved': totals['original_bytes'] or 0,
+        'variant_bytes_saved': variant_bytes or 0,
+        'cpu_seconds_saved': round(totals['cpu_seconds'] or 0.0, 2),
+    }
@@ -0,0 +1,32 @@
+import logging
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_KEY = 'media_progress:{}'
+PROGRESS_TIMEOUT = 60 * 60  # Outlives the longest transcode; the row holds the final state
+
+
+def report_progress(media_file_id, stage, percent, task=None):
+    """
+    Publish a processing stage for a media file without touching its row.
+
+    Writes a cache entry readers poll through get_media_progress(), and
+    mirrors it into the Celery result backend when running as a worker task.
+    """
+    progress = {'stage': stage, 'percent': percent, 'updated': time.time()}
+    cache.set(PROGRESS_KEY.format(media_file_id), progress, PROGRESS_TIMEOUT)
+
+    if task is not None and task.request.id:
+        try:
+            task.update_state(state='PROGRESS', meta=progress)
+        except Exception as e:
+            logger.debug(f"Could not record task state for media {media_file_id}: {e}")
+    return progress
+
+
+def get_media_progress(media_file_id):
+    """Latest reported stage for a media file, or None once expired/never reported."""
+    return cache.get(PROGRESS_KEY.format(media_file_id))
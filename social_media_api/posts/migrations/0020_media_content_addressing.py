@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_post_reposts_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerceptualHashBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField(help_text='Slice position, 0-3')),
+                ('value', models.PositiveIntegerField(help_text='Slice bits')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='mediafile',
+            name='content_hash',
+            field=models.CharField(blank=True, help_text='SHA-256 of the original upload', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='mediafile',
+            name='duplicate_match',
+            field=models.CharField(blank=True, choices=[('exact', 'Identical content'), ('perceptual', 'Near-duplicate image')], help_text='How the duplicate was detected', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='mediafile',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, help_text='Already-processed media whose variants this upload reuses', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='posts.mediafile'),
+        ),
+        migrations.AddField(
+            model_name='mediafile',
+            name='perceptual_hash',
+            field=models.CharField(blank=True, help_text='64-bit dHash of images, as hex', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='mediafile',
+            name='processing_seconds',
+            field=models.FloatField(blank=True, help_text='CPU seconds spent processing (task process and its ffmpeg children)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='mediafile',
+            index=models.Index(fields=['content_hash'], name='posts_media_content_25e5a9_idx'),
+        ),
+        migrations.AddField(
+            model_name='perceptualhashband',
+            name='media_file',
+            field=models.ForeignKey(help_text='Image the slice belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='phash_bands', to='posts.mediafile'),
+        ),
+        migrations.AddIndex(
+            model_name='perceptualhashband',
+            index=models.Index(fields=['band', 'value'], name='posts_perce_band_8bd7fc_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='perceptualhashband',
+            unique_together={('media_file', 'band')},
+        ),
+    ]
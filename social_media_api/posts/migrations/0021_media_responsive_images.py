@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_media_content_addressing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediafile',
+            name='blurhash',
+            field=models.CharField(blank=True, help_text='BlurHash placeholder shown while loading', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='mediafile',
+            name='srcset',
+            field=models.JSONField(blank=True, default=list, help_text='Responsive variants: url, format, width, height and size of each'),
+        ),
+        migrations.AlterField(
+            model_name='mediavariant',
+            name='variant_type',
+            field=models.CharField(choices=[('thumbnail', 'Thumbnail'), ('preview', 'Preview'), ('full', 'Full Size'), ('responsive', 'Responsive Width'), ('hls_segment', 'HLS Segment'), ('hls_playlist', 'HLS Playlist')], help_text='Type of variant', max_length=20),
+        ),
+    ]
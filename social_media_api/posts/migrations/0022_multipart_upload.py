@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_media_responsive_images'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MultipartUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='S3 key of the object being uploaded', max_length=500, unique=True)),
+                ('upload_id', models.CharField(help_text='S3 multipart upload ID', max_length=1024)),
+                ('file_name', models.CharField(help_text='Original filename', max_length=255)),
+                ('content_type', models.CharField(help_text='MIME type', max_length=100)),
+                ('file_size', models.PositiveBigIntegerField(help_text='Declared size in bytes')),
+                ('part_size', models.PositiveBigIntegerField(help_text='Size of every part but the last, in bytes')),
+                ('parts', models.JSONField(blank=True, default=dict, help_text='Parts received by S3: part number -> etag and size')),
+                ('status', models.CharField(choices=[('active', 'Active'), ('completed', 'Completed'), ('aborted', 'Aborted')], default='active', max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='multipart_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='posts_multi_status_eecfdd_idx')],
+            },
+        ),
+    ]
@@ -9,7 +9,7 @@ from .sports import (
     League, Team, Athlete
 )
 from .media import (
-    MediaFile, MediaVariant
+    MediaFile, MediaVariant, PerceptualHashBand, MultipartUpload
 )
 from .streaming import (
     LiveStream, LiveStreamView
@@ -24,7 +24,7 @@ __all__ = [
     # Sports models
     'League', 'Team', 'Athlete',
     # Media models
-    'MediaFile', 'MediaVariant',
+    'MediaFile', 'MediaVariant', 'PerceptualHashBand', 'MultipartUpload',
     # Streaming models
     'LiveStream', 'LiveStreamView',
 ]
\ No newline at end of file
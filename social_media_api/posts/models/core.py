@@ -70,7 +70,9 @@ class Post(models.Model):
 
     @property
     def thumbnail_url(self):
-        """Get thumbnail URL"""
+        """Get thumbnail URL; a video's poster frame is served as soon as it is extracted"""
+        if self.media_file and self.media_file.is_video and self.media_file.video_thumbnail_url:
+            return self.media_file.video_thumbnail_url
         return self.media_url('thumbnail')
 
     @property
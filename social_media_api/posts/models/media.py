@@ -1,4 +1,5 @@
 from django.db import models
+from django.conf import settings
 from django.utils import timezone
 
 
@@ -37,11 +38,38 @@ class MediaFile(models.Model):
         help_text="Current processing status"
     )
     processing_error = models.TextField(blank=True, help_text="Error message if processing failed")
+    processing_seconds = models.FloatField(
+        null=True, blank=True, help_text="CPU seconds spent processing (task process and its ffmpeg children)"
+    )
+
+    # Content addressing
+    DUPLICATE_MATCHES = [
+        ('exact', 'Identical content'),
+        ('perceptual', 'Near-duplicate image'),
+    ]
+
+    content_hash = models.CharField(max_length=64, blank=True, help_text="SHA-256 of the original upload")
+    perceptual_hash = models.CharField(max_length=16, blank=True, help_text="64-bit dHash of images, as hex")
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='duplicates',
+        help_text="Already-processed media whose variants this upload reuses"
+    )
+    duplicate_match = models.CharField(
+        max_length=10, choices=DUPLICATE_MATCHES, blank=True, help_text="How the duplicate was detected"
+    )
 
     # Generated sizes
     thumbnail_url = models.URLField(blank=True, help_text="Thumbnail size URL (150x150)")
     preview_url = models.URLField(blank=True, help_text="Preview size URL (800x600)")
     full_url = models.URLField(blank=True, help_text="Full size URL")
+    srcset = models.JSONField(
+        default=list, blank=True, help_text="Responsive variants: url, format, width, height and size of each"
+    )
+    blurhash = models.CharField(max_length=100, blank=True, help_text="BlurHash placeholder shown while loading")
 
     # Video specific fields
     video_thumbnail_url = models.URLField(blank=True, help_text="Video thumbnail frame")
@@ -56,6 +84,7 @@ class MediaFile(models.Model):
         indexes = [
             models.Index(fields=['media_type', 'processing_status']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['content_hash']),
         ]
 
     def __str__(self):
@@ -93,6 +122,7 @@ class MediaVariant(models.Model):
         ('thumbnail', 'Thumbnail'),
         ('preview', 'Preview'),
         ('full', 'Full Size'),
+        ('responsive', 'Responsive Width'),
         ('hls_segment', 'HLS Segment'),
         ('hls_playlist', 'HLS Playlist'),
     ]
@@ -128,4 +158,87 @@ class MediaVariant(models.Model):
     def __str__(self):
         if self.segment_index is not None:
             return f"{self.media_file.file_name} - {self.variant_type} (segment {self.segment_index})"
-        return f"{self.media_file.file_name} - {self.variant_type}"
\ No newline at end of file
+        return f"{self.media_file.file_name} - {self.variant_type}"
+
+
+class PerceptualHashBand(models.Model):
+    """
+    One 16-bit slice of an image's perceptual hash. Two hashes within
+    Hamming distance 3 share at least one of their four slices, so an
+    indexed lookup on the slices finds every near-duplicate candidate.
+    """
+
+    media_file = models.ForeignKey(
+        MediaFile,
+        on_delete=models.CASCADE,
+        related_name='phash_bands',
+        help_text="Image the slice belongs to"
+    )
+    band = models.PositiveSmallIntegerField(help_text="Slice position, 0-3")
+    value = models.PositiveIntegerField(help_text="Slice bits")
+
+    class Meta:
+        unique_together = ['media_file', 'band']
+        indexes = [
+            models.Index(fields=['band', 'value']),
+        ]
+
+    def __str__(self):
+        return f"{self.media_file_id} band {self.band}: {self.value:04x}"
+
+
+class MultipartUpload(models.Model):
+    """
+    A resumable direct-to-S3 upload. The client PUTs each part to its own
+    pre-signed URL; the parts S3 has received are synced into `parts`, so
+    an interrupted upload resumes with only the missing parts.
+    """
+
+    UPLOAD_STATUS = [
+        ('active', 'Active'),
+        ('completed', 'Completed'),
+        ('aborted', 'Aborted'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='multipart_uploads')
+    key = models.CharField(max_length=500, unique=True, help_text="S3 key of the object being uploaded")
+    upload_id = models.CharField(max_length=1024, help_text="S3 multipart upload ID")
+    file_name = models.CharField(max_length=255, help_text="Original filename")
+    content_type = models.CharField(max_length=100, help_text="MIME type")
+    file_size = models.PositiveBigIntegerField(help_text="Declared size in bytes")
+    part_size = models.PositiveBigIntegerField(help_text="Size of every part but the last, in bytes")
+    parts = models.JSONField(
+        default=dict, blank=True, help_text="Parts received by S3: part number -> etag and size"
+    )
+    status = models.CharField(max_length=10, choices=UPLOAD_STATUS, default='active')
+
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.file_name} ({self.status}, {len(self.parts)}/{self.part_count} parts)"
+
+    @property
+    def part_count(self):
+        return max(1, -(-self.file_size // self.part_size))
+
+    def expected_part_size(self, part_number):
+        """Bytes the given part must hold; only the last part may be short"""
+        if part_number < self.part_count:
+            return self.part_size
+        return self.file_size - self.part_size * (self.part_count - 1)
+
+    @property
+    def missing_parts(self):
+        return [number for number in range(1, self.part_count + 1) if str(number) not in self.parts]
+
+    @property
+    def uploaded_bytes(self):
+        return sum(part['size'] for part in self.parts.values())
@@ -0,0 +1,169 @@
+"""
+Resumable uploads built on S3 multipart upload.
+
+The client PUTs fixed-size parts straight to S3 through pre-signed part
+URLs issued in batches. Which parts have landed is read back from S3
+(ListParts) rather than trusted from the client, so after a dropped
+connection the client asks for the missing parts and sends only those.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import MultipartUpload
+from .s3_utils import get_s3_manager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MULTIPART_UPLOAD_CONFIG = {
+    'part_size': 8 * 1024 * 1024,          # Bytes per part; a dropped part costs at most this much
+    'url_batch_size': 10,                  # Part URLs issued per request when none are named
+    'max_url_batch': 100,                  # Most part URLs issued in one request
+    'url_expiration': 3600,                # Seconds a part URL stays valid
+    'max_file_size': 2 * 1024 * 1024 * 1024,
+    'multipart_threshold': 64 * 1024 * 1024,  # Batch URL requests open a session for files this large
+    'expire_after': 24 * 3600,             # Seconds before an unfinished upload is aborted
+}
+
+# S3 rejects non-final parts below 5 MiB and uploads of more than 10,000 parts
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+
+ALLOWED_CONTENT_TYPES = ['image/jpeg', 'image/png', 'image/gif', 'image/webp', 'video/mp4', 'video/quicktime']
+
+
+class UploadError(Exception):
+    """A multipart upload request that cannot be carried out"""
+
+
+class IncompleteUpload(UploadError):
+    """Completion was requested before S3 had every part"""
+
+    def __init__(self, missing):
+        super().__init__(f"Parts not uploaded: {missing}")
+        self.missing = missing
+
+
+def get_multipart_upload_config():
+    """Return multipart upload settings merged over the defaults."""
+    config = dict(DEFAULT_MULTIPART_UPLOAD_CONFIG)
+    config.update(getattr(settings, 'MULTIPART_UPLOAD_CONFIG', {}))
+    return config
+
+
+def choose_part_size(file_size, part_size):
+    """Configured part size, raised to S3's minimum and so the file fits in MAX_PARTS parts"""
+    return max(part_size, MIN_PART_SIZE, -(-file_size // MAX_PARTS))
+
+
+def upload_key(user, file_name):
+    """S3 key for a new direct upload: uploads/{user_id}/{uuid}.{ext}"""
+    file_extension = file_name.split('.')[-1] if '.' in file_name else 'bin'
+    return f"uploads/{user.id}/{uuid.uuid4()}.{file_extension}"
+
+
+def start_upload(user, file_name, content_type, file_size):
+    """Create the S3 multipart upload and its tracking row."""
+    config = get_multipart_upload_config()
+    if content_type not in ALLOWED_CONTENT_TYPES:
+        raise UploadError(f'Content type {content_type} not allowed')
+    if file_size <= 0 or file_size > config['max_file_size']:
+        raise UploadError(f"file_size must be between 1 and {config['max_file_size']} bytes")
+
+    key = upload_key(user, file_name)
+    upload_id = get_s3_manager().create_multipart_upload(key, content_type)
+    if not upload_id:
+        return None
+
+    return MultipartUpload.objects.create(
+        user=user, key=key, upload_id=upload_id, file_name=file_name, content_type=content_type,
+        file_size=file_size, part_size=choose_part_size(file_size, config['part_size'])
+    )
+
+
+def sync_parts(upload):
+    """
+    Refresh `upload.parts` from S3. A part counts as uploaded only if it
+    holds exactly the bytes its position requires, so a truncated PUT is
+    reported as missing and sent again.
+    """
+    received = get_s3_manager().list_parts(upload.key, upload.upload_id)
+    if received is None:
+        raise UploadError('Upload no longer exists in storage')
+
+    parts = {}
+    for part in received:
+        number = part['PartNumber']
+        if number <= upload.part_count and part['Size'] == upload.expected_part_size(number):
+            parts[str(number)] = {'etag': part['ETag'], 'size': part['Size']}
+    if parts != upload.parts:
+        upload.parts = parts
+        upload.save(update_fields=['parts', 'updated_at'])
+    return upload
+
+
+def presign_parts(upload, part_numbers=None):
+    """
+    Pre-signed PUT URLs for the named parts, or for the next batch of
+    parts S3 has not received.
+    """
+    config = get_multipart_upload_config()
+    if part_numbers is None:
+        part_numbers = upload.missing_parts[:config['url_batch_size']]
+    part_numbers = sorted(set(part_numbers))
+
+    if len(part_numbers) > config['max_url_batch']:
+        raise UploadError(f"At most {config['max_url_batch']} part URLs per request")
+    if any(number < 1 or number > upload.part_count for number in part_numbers):
+        raise UploadError(f'Part numbers must be between 1 and {upload.part_count}')
+
+    manager = get_s3_manager()
+    urls = []
+    for number in part_numbers:
+        url = manager.generate_presigned_part_url(upload.key, upload.upload_id, number, config['url_expiration'])
+        if not url:
+            raise UploadError(f'Could not sign part {number}')
+        urls.append({'part_number': number, 'url': url, 'size': upload.expected_part_size(number)})
+    return urls
+
+
+def complete_upload(upload):
+    """Assemble the object once S3 holds every part; raises IncompleteUpload otherwise."""
+    sync_parts(upload)
+    missing = upload.missing_parts
+    if missing:
+        raise IncompleteUpload(missing)
+
+    parts = [
+        {'PartNumber': int(number), 'ETag': part['etag']}
+        for number, part in sorted(upload.parts.items(), key=lambda item: int(item[0]))
+    ]
+    if not get_s3_manager().complete_multipart_upload(upload.key, upload.upload_id, parts):
+        raise UploadError('Storage could not assemble the upload')
+
+    upload.status = 'completed'
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=['status', 'completed_at', 'updated_at'])
+    return upload
+
+
+def abort_upload(upload):
+    """Abort the S3 upload, freeing stored parts, and mark the row aborted."""
+    get_s3_manager().abort_multipart_upload(upload.key, upload.upload_id)
+    upload.status = 'aborted'
+    upload.save(update_fields=['status', 'updated_at'])
+    return upload
+
+
+def abort_stale_uploads():
+    """Abort active uploads older than expire_after; returns how many were aborted."""
+    cutoff = timezone.now() - timedelta(seconds=get_multipart_upload_config()['expire_after'])
+    stale = MultipartUpload.objects.filter(status='active', created_at__lt=cutoff)
+    aborted = 0
+    for upload in stale:
+        abort_upload(upload)
+        aborted += 1
+    return aborted
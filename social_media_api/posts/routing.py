@@ -5,7 +5,7 @@ Defines URL patterns for live streaming WebSocket consumers.
 """
 
 from django.urls import re_path
-from .consumers import LiveStreamConsumer, StreamStatusConsumer
+from .consumers import LiveStreamConsumer, StreamStatusConsumer, FeedConsumer
 
 websocket_urlpatterns = [
     # Live stream WebSocket for specific streams
@@ -15,4 +15,8 @@ websocket_urlpatterns = [
     # Global stream status updates for users
     # /ws/posts/streams/status/
     re_path(r'ws/posts/streams/status/$', StreamStatusConsumer.as_asgi()),
+
+    # Feed updates and live events sidebar pushes for users
+    # /ws/posts/feed/
+    re_path(r'ws/posts/feed/$', FeedConsumer.as_asgi()),
 ]
\ No newline at end of file
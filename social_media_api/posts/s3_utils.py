@@ -1,23 +1,106 @@
 import boto3
 import logging
-from botocore.exceptions import ClientError
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
 from django.conf import settings
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_S3_TRANSFER_CONFIG = {
+    'max_pool_connections': 32,               # HTTP connections kept alive by the shared client
+    'multipart_threshold': 8 * 1024 * 1024,   # Objects from this size upload in parts
+    'multipart_chunksize': 8 * 1024 * 1024,
+    'max_concurrency': 8,                     # Parts in flight per multipart upload
+    'batch_workers': 8,                       # Objects in flight per upload_many() call
+    'connect_timeout': 5,
+    'read_timeout': 60,
+    'max_attempts': 3,
+}
+
+
+def get_s3_transfer_config():
+    """Return S3 client and transfer settings merged over the defaults."""
+    config = dict(DEFAULT_S3_TRANSFER_CONFIG)
+    config.update(getattr(settings, 'S3_TRANSFER_CONFIG', {}))
+    return config
+
+
+class UploadStats:
+    """Thread-safe running totals of upload latency and throughput"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.uploads = 0
+            self.failures = 0
+            self.bytes = 0
+            self.seconds = 0.0
+            self.max_latency = 0.0
+
+    def record(self, size, elapsed, ok):
+        with self._lock:
+            self.uploads += 1
+            self.failures += 0 if ok else 1
+            if ok:
+                self.bytes += size
+                self.seconds += elapsed
+            self.max_latency = max(self.max_latency, elapsed)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'uploads': self.uploads,
+                'failures': self.failures,
+                'bytes': self.bytes,
+                'avg_latency_ms': round(self.seconds / max(1, self.uploads - self.failures) * 1000, 2),
+                'max_latency_ms': round(self.max_latency * 1000, 2),
+                'throughput_mbps': round(self.bytes / self.seconds / (1024 * 1024), 2) if self.seconds else 0.0,
+            }
+
 
 class S3MediaManager:
     """Utility class for managing S3 media operations"""
 
     def __init__(self):
+        config = get_s3_transfer_config()
+        # The client is thread-safe and keeps a pool of keep-alive connections; the
+        # get_s3_manager() singleton shares one instance (and so one pool) per process
         self.s3_client = boto3.client(
             's3',
             aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
             aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_S3_REGION_NAME
+            region_name=settings.AWS_S3_REGION_NAME,
+            endpoint_url=getattr(settings, 'AWS_S3_ENDPOINT_URL', None),
+            config=Config(
+                max_pool_connections=config['max_pool_connections'],
+                connect_timeout=config['connect_timeout'],
+                read_timeout=config['read_timeout'],
+                retries={'max_attempts': config['max_attempts'], 'mode': 'standard'},
+                tcp_keepalive=True
+            )
         )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=config['multipart_threshold'],
+            multipart_chunksize=config['multipart_chunksize'],
+            max_concurrency=config['max_concurrency'],
+            use_threads=True
+        )
+        self.batch_workers = config['batch_workers']
         self.bucket_name = settings.AWS_STORAGE_BUCKET_NAME
+        self.upload_stats = UploadStats()
+        self._executor = None
+        self._executor_lock = threading.Lock()
 
     def generate_presigned_url(self, key, expiration=60, operation='get_object'):
         """
@@ -51,6 +134,20 @@ class S3MediaManager:
             logger.error(f"Error generating pre-signed URL for {key}: {e}")
             return None
 
+    def generate_presigned_urls(self, keys, expiration=60, operation='get_object'):
+        """
+        Pre-signed URLs for several keys, signed locally with the shared client
+
+        Args:
+            keys: Iterable of S3 object keys
+            expiration: URL expiration time in seconds
+            operation: S3 operation ('get_object', 'put_object', etc.)
+
+        Returns:
+            dict: key -> pre-signed URL (None for keys that could not be signed)
+        """
+        return {key: self.generate_presigned_url(key, expiration, operation) for key in keys}
+
     def upload_fileobj(self, file_obj, key, content_type=None, acl='public-read'):
         """
         Upload a file-like object to S3
@@ -64,21 +161,79 @@ class S3MediaManager:
         Returns:
             bool: True if successful, False otherwise
         """
-        try:
-            extra_args = {'ACL': acl}
-            if content_type:
-                extra_args['ContentType'] = content_type
+        extra_args = {'ACL': acl}
+        if content_type:
+            extra_args['ContentType'] = content_type
 
+        transferred = []
+        start = time.perf_counter()
+        try:
             self.s3_client.upload_fileobj(
                 file_obj,
                 self.bucket_name,
                 key,
-                ExtraArgs=extra_args
+                ExtraArgs=extra_args,
+                Config=self.transfer_config,
+                Callback=transferred.append
             )
-            return True
-        except ClientError as e:
+            ok = True
+        except (ClientError, BotoCoreError) as e:
             logger.error(f"Error uploading file to S3 {key}: {e}")
-            return False
+            ok = False
+
+        elapsed = time.perf_counter() - start
+        size = sum(transferred)
+        self.upload_stats.record(size, elapsed, ok)
+        if ok:
+            logger.debug(
+                f"Uploaded {key}: {size} bytes in {elapsed * 1000:.1f} ms "
+                f"({size / elapsed / (1024 * 1024) if elapsed else 0:.2f} MB/s)"
+            )
+        return ok
+
+    def upload_many(self, uploads):
+        """
+        Upload several objects concurrently over the shared client
+
+        Args:
+            uploads: Iterable of (file_obj, key, content_type)
+
+        Returns:
+            dict: key -> True if that upload succeeded
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.batch_workers, thread_name_prefix='s3-upload'
+                )
+        futures = {
+            key: self._executor.submit(self.upload_fileobj, file_obj, key, content_type)
+            for file_obj, key, content_type in uploads
+        }
+        return {key: future.result() for key, future in futures.items()}
+
+    def download_to_file(self, key, file_obj, chunk_size=None, digest=None):
+        """
+        Stream an S3 object into a writable file object without holding it in memory
+
+        Args:
+            key: S3 object key
+            file_obj: Writable binary file object
+            chunk_size: Bytes read per chunk (default: MEDIA_PROCESSING_CONFIG['download_chunk_size'])
+            digest: Optional hashlib object updated with every chunk
+
+        Returns:
+            int: Number of bytes written
+        """
+        chunk_size = chunk_size or settings.MEDIA_PROCESSING_CONFIG.get('download_chunk_size', 1024 * 1024)
+        response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+        written = 0
+        for chunk in response['Body'].iter_chunks(chunk_size):
+            file_obj.write(chunk)
+            if digest is not None:
+                digest.update(chunk)
+            written += len(chunk)
+        return written
 
     def delete_object(self, key):
         """
@@ -97,6 +252,131 @@ class S3MediaManager:
             logger.error(f"Error deleting S3 object {key}: {e}")
             return False
 
+    def get_object_size(self, key):
+        """
+        Size of an S3 object from a HEAD request, without reading it
+
+        Args:
+            key: S3 object key
+
+        Returns:
+            int: Size in bytes, or None if the object cannot be read
+        """
+        try:
+            return self.s3_client.head_object(Bucket=self.bucket_name, Key=key)['ContentLength']
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f"Error reading size of S3 object {key}: {e}")
+            return None
+
+    def create_multipart_upload(self, key, content_type=None):
+        """
+        Start an S3 multipart upload whose parts the client PUTs directly
+
+        Args:
+            key: S3 object key
+            content_type: MIME type stored on the completed object
+
+        Returns:
+            str: Upload ID, or None if the upload could not be started
+        """
+        params = {'Bucket': self.bucket_name, 'Key': key}
+        if content_type:
+            params['ContentType'] = content_type
+        try:
+            return self.s3_client.create_multipart_upload(**params)['UploadId']
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f"Error starting multipart upload of {key}: {e}")
+            return None
+
+    def generate_presigned_part_url(self, key, upload_id, part_number, expiration=3600):
+        """
+        Pre-signed PUT URL for one part of a multipart upload
+
+        Args:
+            key: S3 object key
+            upload_id: Multipart upload ID
+            part_number: 1-based part number
+            expiration: URL expiration time in seconds
+
+        Returns:
+            str: Pre-signed URL or None if error
+        """
+        try:
+            return self.s3_client.generate_presigned_url(
+                'upload_part',
+                Params={'Bucket': self.bucket_name, 'Key': key, 'UploadId': upload_id, 'PartNumber': part_number},
+                ExpiresIn=expiration
+            )
+        except ClientError as e:
+            logger.error(f"Error generating part URL for {key} part {part_number}: {e}")
+            return None
+
+    def list_parts(self, key, upload_id):
+        """
+        Parts S3 has received for a multipart upload
+
+        Args:
+            key: S3 object key
+            upload_id: Multipart upload ID
+
+        Returns:
+            list: {'PartNumber', 'ETag', 'Size'} dicts in part order, or None if the upload is gone
+        """
+        parts = []
+        try:
+            paginator = self.s3_client.get_paginator('list_parts')
+            for page in paginator.paginate(Bucket=self.bucket_name, Key=key, UploadId=upload_id):
+                parts.extend(
+                    {'PartNumber': part['PartNumber'], 'ETag': part['ETag'], 'Size': part['Size']}
+                    for part in page.get('Parts', [])
+                )
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f"Error listing parts of multipart upload {key}: {e}")
+            return None
+        return parts
+
+    def complete_multipart_upload(self, key, upload_id, parts):
+        """
+        Assemble uploaded parts into the final object
+
+        Args:
+            key: S3 object key
+            upload_id: Multipart upload ID
+            parts: {'PartNumber', 'ETag'} dicts in part order
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name, Key=key, UploadId=upload_id,
+                MultipartUpload={'Parts': [
+                    {'PartNumber': part['PartNumber'], 'ETag': part['ETag']} for part in parts
+                ]}
+            )
+            return True
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f"Error completing multipart upload of {key}: {e}")
+            return False
+
+    def abort_multipart_upload(self, key, upload_id):
+        """
+        Abort a multipart upload and free the parts stored so far
+
+        Args:
+            key: S3 object key
+            upload_id: Multipart upload ID
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+            return True
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f"Error aborting multipart upload of {key}: {e}")
+            return False
+
     def get_object_url(self, key, use_cloudfront=True):
         """
         Get the public URL for an S3 object
@@ -169,6 +449,21 @@ def get_presigned_url_for_media(media_key, expiration=60, operation='get_object'
     return get_s3_manager().generate_presigned_url(media_key, expiration, operation)
 
 
+def get_presigned_urls_for_media(media_keys, expiration=60, operation='get_object'):
+    """
+    Convenience function to get pre-signed URLs for several media keys at once
+
+    Args:
+        media_keys: Media file keys in S3
+        expiration: URL expiration in seconds
+        operation: S3 operation ('get_object', 'put_object', etc.)
+
+    Returns:
+        dict: key -> pre-signed URL or None
+    """
+    return get_s3_manager().generate_presigned_urls(media_keys, expiration, operation)
+
+
 def upload_media_to_s3(file_obj, key, content_type=None):
     """
     Convenience function to upload media to S3
@@ -184,6 +479,48 @@ def upload_media_to_s3(file_obj, key, content_type=None):
     return get_s3_manager().upload_fileobj(file_obj, key, content_type)
 
 
+def upload_media_batch(uploads):
+    """
+    Convenience function to upload several media objects concurrently
+
+    Args:
+        uploads: Iterable of (file_obj, key, content_type)
+
+    Returns:
+        dict: key -> success status
+    """
+    return get_s3_manager().upload_many(uploads)
+
+
+@contextmanager
+def download_media_to_tempfile(key, suffix='', digest=None):
+    """
+    Stream an S3 object to a temporary file for processing
+
+    Memory use is bounded by the download chunk size regardless of the
+    object size. The file is removed when the block exits.
+
+    Args:
+        key: S3 key
+        suffix: Temporary file suffix (e.g. '.mp4') for tools that sniff extensions
+        digest: Optional hashlib object fed the content as it downloads
+
+    Yields:
+        tuple: (path, size in bytes)
+    """
+    temp_dir = settings.MEDIA_PROCESSING_CONFIG.get('temp_dir')
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=temp_dir)
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            size = get_s3_manager().download_to_file(key, temp_file, digest=digest)
+        yield path, size
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
 def get_media_url(key, use_cloudfront=True):
     """
     Convenience function to get media URL
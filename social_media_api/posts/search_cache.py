@@ -0,0 +1,131 @@
+import hashlib
+import logging
+import threading
+import time
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+SEARCH_RESULT_KEY = 'search_results_{}_{}_{}'
+SEARCH_LOCK_KEY = 'search_results_lock_{}_{}_{}'
+
+DEFAULT_SEARCH_CACHE_CONFIG = {
+    'result_timeout': 60,        # Seconds a cached ID list is served
+    'lock_timeout': 10,          # Longest a recomputation may hold the single-flight lock
+    'wait_interval': 0.05,       # Poll interval for workers waiting on another's result
+    'max_wait': 0.5,             # Longest a request waits on another's search before running its own
+    'max_ids': 500,              # IDs cached per query; pages are cut after per-viewer filtering
+    'page_sizes': {
+        'users': 20,
+        'posts': 50,
+    },
+}
+
+
+def get_search_cache_config():
+    """Return search cache settings merged over the defaults."""
+    config = dict(DEFAULT_SEARCH_CACHE_CONFIG)
+    config.update(getattr(settings, 'SEARCH_CACHE_CONFIG', {}))
+    return config
+
+
+def normalize_search_query(query):
+    """
+    Reduce a raw query to its cache identity: NFKC-normalized, casefolded,
+    whitespace collapsed and any leading '#' dropped, so "Messi ", "messi"
+    and "#messi" share one entry.
+    """
+    if not query:
+        return ''
+    normalized = unicodedata.normalize('NFKC', str(query)).casefold()
+    normalized = ' '.join(normalized.split())
+    return normalized.lstrip('#').strip()
+
+
+class SearchResultCache:
+    """
+    Short-lived cache of search result ID lists keyed by (type, normalized
+    query, page).
+
+    Only IDs are cached (post entries carry their author ID); callers
+    filter them per viewer (blocks and mutes), then page and hydrate them. Recomputation is
+    single-flight: within a worker, concurrent requests for the same key
+    wait on the first thread, and across workers a cache.add lock lets one
+    search run while the rest poll for its result. Waiters give up after
+    max_wait and search themselves.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def _key_parts(self, search_type, query, page):
+        digest = hashlib.md5(query.encode('utf-8')).hexdigest()
+        return search_type, page, digest
+
+    def get_or_compute(self, search_type, query, page, compute):
+        """
+        Return the cached ID list for (search_type, query, page), calling
+        compute() to build it on a miss. `query` must already be normalized.
+        """
+        config = get_search_cache_config()
+        parts = self._key_parts(search_type, query, page)
+        result_key = SEARCH_RESULT_KEY.format(*parts)
+
+        ids = cache.get(result_key)
+        if ids is not None:
+            return ids
+
+        with self._lock:
+            event = self._inflight.get(result_key)
+            leader = event is None
+            if leader:
+                event = self._inflight[result_key] = threading.Event()
+
+        if not leader:
+            event.wait(config['max_wait'])
+            ids = cache.get(result_key)
+            if ids is not None:
+                return ids
+            # The leader failed or timed out; search without coordination
+            return list(compute())
+
+        try:
+            return self._compute_shared(result_key, SEARCH_LOCK_KEY.format(*parts), compute, config)
+        finally:
+            with self._lock:
+                self._inflight.pop(result_key, None)
+            event.set()
+
+    def _compute_shared(self, result_key, lock_key, compute, config):
+        """Run compute() in at most one worker at a time for this key."""
+        if cache.add(lock_key, 1, config['lock_timeout']):
+            try:
+                ids = list(compute())
+                cache.set(result_key, ids, config['result_timeout'])
+                return ids
+            finally:
+                cache.delete(lock_key)
+
+        # Poll only briefly: this runs in a web worker, so a slow leader is
+        # cheaper to duplicate than to wait out
+        deadline = time.monotonic() + config['max_wait']
+        while time.monotonic() < deadline:
+            time.sleep(config['wait_interval'])
+            ids = cache.get(result_key)
+            if ids is not None:
+                return ids
+            if cache.get(lock_key) is None:
+                break
+
+        logger.warning(f"Search single-flight wait expired for {result_key}; computing directly")
+        ids = list(compute())
+        cache.set(result_key, ids, config['result_timeout'])
+        return ids
+
+
+# Global search result cache (one per worker process)
+search_result_cache = SearchResultCache()
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from .models import Post, Comment, Repost, MediaFile, LiveStream
 from accounts.serializers import UserSerializer
 from .s3_utils import get_presigned_url_for_media
+from .image_pipeline import FORMAT_CONTENT_TYPES
 
 class CommentSerializer(serializers.ModelSerializer):
     # Read-only field to display the author's details in the CommentDrawer
@@ -77,6 +78,8 @@ class PostSerializer(serializers.ModelSerializer):
     media_url = serializers.SerializerMethodField()
     thumbnail_url = serializers.SerializerMethodField()
     preview_url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+    blurhash = serializers.SerializerMethodField()
     is_media_processed = serializers.SerializerMethodField()
     media_type = serializers.SerializerMethodField()
 
@@ -88,7 +91,7 @@ class PostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Post
-        fields = ['id', 'type', 'author', 'title', 'content', 'video', 'image', 'created_at', 'updated_at', 'comments_count', 'likes_count', 'reposts_count', 'shares_count', 'is_liked', 'is_reposted', 'is_bookmarked', 'views_count', 'recent_comments', 'is_repost_in_feed', 'reposted_by', 'hasVideo', 'media_url', 'thumbnail_url', 'preview_url', 'is_media_processed', 'media_type', 'original_post', 'repost_comment', 'repost_timestamp']
+        fields = ['id', 'type', 'author', 'title', 'content', 'video', 'image', 'created_at', 'updated_at', 'comments_count', 'likes_count', 'reposts_count', 'shares_count', 'is_liked', 'is_reposted', 'is_bookmarked', 'views_count', 'recent_comments', 'is_repost_in_feed', 'reposted_by', 'hasVideo', 'media_url', 'thumbnail_url', 'preview_url', 'srcset', 'blurhash', 'is_media_processed', 'media_type', 'original_post', 'repost_comment', 'repost_timestamp']
         read_only_fields = ['author']
 
     def get_is_liked(self, obj):
@@ -336,6 +339,29 @@ class PostSerializer(serializers.ModelSerializer):
             print(f"Error getting preview URL for post {obj.id}: {e}")
             return None
 
+    def get_srcset(self, obj):
+        """Responsive sources, preferred format first: a type and a width-descriptor srcset for each <source>"""
+        try:
+            if not obj.is_media_processed:
+                return []
+            sources = {}
+            for entry in obj.media_file.srcset:
+                sources.setdefault(entry['format'], []).append(
+                    f"{self._get_secure_media_url(entry['url'])} {entry['width']}w"
+                )
+            return [
+                {'type': FORMAT_CONTENT_TYPES[fmt], 'srcset': ', '.join(candidates)}
+                for fmt, candidates in sources.items()
+            ]
+        except (AttributeError, Exception) as e:
+            print(f"Error getting srcset for post {obj.id}: {e}")
+            return []
+
+    def get_blurhash(self, obj):
+        """BlurHash placeholder to paint until the image loads"""
+        media_file = getattr(obj, 'media_file', None)
+        return (media_file.blurhash or None) if media_file else None
+
     def get_is_media_processed(self, obj):
         """Check if media has been processed"""
         try:
@@ -501,6 +527,86 @@ class PostSerializer(serializers.ModelSerializer):
             return None
 
 
+
+class CreatedPostAuthorSerializer(UserSerializer):
+    """
+    The author of a post that was just created, who is also the viewer.
+    Follower counts come from annotations on the user (see CreatePostView).
+    """
+
+    def get_followers_count(self, obj):
+        return obj.followers_count
+
+    def get_following_count(self, obj):
+        return obj.following_count
+
+    def get_is_following(self, obj):
+        return False
+
+    def get_is_blocked(self, obj):
+        return False
+
+    def get_is_muted(self, obj):
+        return False
+
+
+class CreatedPostSerializer(PostSerializer):
+    """
+    Same shape as PostSerializer for a post that was just created. A new
+    post has no engagement, replies or repost context and is viewed by its
+    author, so those fields are filled in without querying.
+    """
+    author = serializers.SerializerMethodField()
+
+    def get_author(self, obj):
+        return CreatedPostAuthorSerializer(obj.author, context=self.context).data
+
+    def get_comments_count(self, obj):
+        return 0
+
+    def get_reposts_count(self, obj):
+        return 0
+
+    def get_shares_count(self, obj):
+        return 0
+
+    def get_views_count(self, obj):
+        return 0
+
+    def get_is_liked(self, obj):
+        return False
+
+    def get_is_reposted(self, obj):
+        return False
+
+    def get_is_bookmarked(self, obj):
+        return False
+
+    def get_recent_comments(self, obj):
+        return []
+
+    def get_is_repost_in_feed(self, obj):
+        return False
+
+    def get_reposted_by(self, obj):
+        return None
+
+    def get_hasVideo(self, obj):
+        # An empty FileField on a just-created post holds None rather than ''
+        return bool(obj.video)
+
+    def get_type(self, obj):
+        return 'post'
+
+    def get_original_post(self, obj):
+        return None
+
+    def get_repost_comment(self, obj):
+        return None
+
+    def get_repost_timestamp(self, obj):
+        return None
+
 class LiveStreamSerializer(serializers.ModelSerializer):
     """
     Serializer for LiveStream model
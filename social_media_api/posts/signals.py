@@ -9,7 +9,7 @@ import os
 
 from .models import Like, Comment, MediaFile
 from .serializers import CommentSerializer
-from .tasks import process_image_file, process_video_file
+from .tasks import process_image_file, queue_video_processing
 from notifications.models import Notification
 from notifications.serializers import NotificationSerializer
 
@@ -97,7 +97,7 @@ def process_media_file(sender, instance, created, **kwargs):
                 process_image_file.delay(instance.id)
             elif mime_type.startswith('video/'):
                 instance.media_type = 'video'
-                # Trigger video processing
-                process_video_file.delay(instance.id)
+                # Trigger poster frame extraction and video processing
+                queue_video_processing(instance.id, file_size=instance.file_size)
 
-        instance.save()
\ No newline at end of file
+        instance.save(update_fields=['media_type', 'updated_at'])
\ No newline at end of file
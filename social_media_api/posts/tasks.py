@@ -1,222 +1,205 @@
+import hashlib
 import os
 import logging
+import resource
+from contextlib import ExitStack
 from io import BytesIO
-from PIL import Image
-import moviepy.editor as mp
 from django.conf import settings
 from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
 from celery import shared_task
 from .models import MediaFile, MediaVariant
-from .s3_utils import upload_media_to_s3, get_media_url
+from .s3_utils import (
+    upload_media_to_s3, upload_media_batch, get_media_url, download_media_to_tempfile, get_s3_manager,
+    get_presigned_url_for_media
+)
+from .image_pipeline import open_reduced, encode_variants, build_srcset, VARIANT_ORDER
+from . import blurhash
+from .media_dedupe import (
+    get_media_dedupe_config, hash_file, perceptual_hash, find_exact_duplicate, find_near_duplicate,
+    link_duplicate, store_perceptual_hash
+)
+from .media_progress import report_progress
+from .video_poster import extract_poster_frame
+from social_media_api.task_queues import video_queue
+from .hls import package_hls, plan_renditions, build_master_playlist, probe_video, MEDIA_PLAYLIST_NAME
 
 logger = logging.getLogger(__name__)
 
 
+def _cpu_seconds():
+    """CPU time of this process plus its waited-for children (ffmpeg)"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def _link_if_duplicate(media_file, s3_key, phash=None, update_fields=()):
+    """
+    Link media_file to already-processed media with the same content hash
+    (or, for images with perceptual matching on, a near-identical perceptual
+    hash). Returns True when linked; the re-uploaded original is then removed.
+    """
+    config = get_media_dedupe_config()
+    if not config['enabled']:
+        return False
+
+    match, canonical = 'exact', find_exact_duplicate(media_file, media_file.content_hash)
+    if canonical is None and phash and config['perceptual']:
+        match, canonical = 'perceptual', find_near_duplicate(media_file, phash, config['phash_max_distance'])
+    if canonical is None:
+        return False
+
+    link_duplicate(media_file, canonical, match, update_fields)
+    if s3_key and config['delete_duplicate_originals']:
+        get_s3_manager().delete_object(s3_key)
+    report_progress(media_file.id, 'completed', 100)
+    return True
+
+
+def _commit_media(media_file, fields, variants):
+    """
+    Persist a task's accumulated results at once: every variant in one
+    INSERT and only the changed columns of the file row in one UPDATE.
+    """
+    with transaction.atomic():
+        MediaVariant.objects.bulk_create(variants)
+        media_file.save(update_fields=[*fields, 'updated_at'])
+
+
+def _mark_failed(media_file_id, error):
+    """Record a failure with a narrow UPDATE that skips post_save and untouched columns"""
+    MediaFile.objects.filter(id=media_file_id).update(
+        processing_status='failed', processing_error=error, updated_at=timezone.now()
+    )
+    report_progress(media_file_id, 'failed', None)
+
+
 @shared_task(bind=True)
 def process_image_file(self, media_file_id, s3_key=None):
     """Process uploaded image file - create multiple sizes"""
     try:
         media_file = MediaFile.objects.get(id=media_file_id)
-        media_file.processing_status = 'processing'
-        media_file.save()
+        report_progress(media_file.id, 'processing', 0, self)
 
-        # If s3_key is provided, download from S3, otherwise use local file
-        if s3_key:
-            # Download file from S3
-            from .s3_utils import s3_manager
-            import io
+        config = settings.MEDIA_PROCESSING_CONFIG['image']
+        key_prefix = f"media/{media_file.id}"
+        start_cpu = _cpu_seconds()
 
-            s3_response = s3_manager.s3_client.get_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=s3_key)
-            image_data = s3_response['Body'].read()
-            image = Image.open(io.BytesIO(image_data))
+        # Hash the original while reading it, and decode it once (reduced for JPEGs)
+        if s3_key:
+            # Stream the original from S3 to a temp file, then decode it from disk
+            digest = hashlib.sha256()
+            with download_media_to_tempfile(s3_key, digest=digest) as (image_path, file_size):
+                image, (width, height) = open_reduced(image_path, config)
+            media_file.content_hash = digest.hexdigest()
 
             # Update file size
-            media_file.file_size = len(image_data)
-            media_file.save()
+            media_file.file_size = file_size
         else:
             # Fallback to local file processing
-            with media_file.original_file.open() as f:
-                image = Image.open(f)
-
-            # Convert to RGB if necessary
-            if image.mode in ('RGBA', 'LA', 'P'):
-                image = image.convert('RGB')
-
-            # Get config
-            config = settings.MEDIA_PROCESSING_CONFIG['image']
-
-            # Create thumbnail (150x150, cropped)
-            thumbnail_config = config['thumbnail']
-            thumbnail = Image.new('RGB', (thumbnail_config['width'], thumbnail_config['height']), (255, 255, 255))
-            thumb_copy = image.copy()
-            thumb_copy.thumbnail((thumbnail_config['width'], thumbnail_config['height']), Image.Resampling.LANCZOS)
-
-            # Center crop for thumbnail
-            width, height = thumb_copy.size
-            left = (width - thumbnail_config['width']) // 2
-            top = (height - thumbnail_config['height']) // 2
-            right = left + thumbnail_config['width']
-            bottom = top + thumbnail_config['height']
-            thumb_copy = thumb_copy.crop((left, top, right, bottom))
-
-            thumbnail.paste(thumb_copy, (0, 0))
-
-            # Save thumbnail
-            thumb_buffer = BytesIO()
-            thumbnail.save(thumb_buffer, format='WEBP', quality=config['full']['quality'])
-            thumb_buffer.seek(0)
-
-            # Upload thumbnail to S3
-            thumb_key = f"media/{media_file.id}/thumbnail.webp"
-            thumb_uploaded = upload_media_to_s3(thumb_buffer, thumb_key, 'image/webp')
-            thumb_url = get_media_url(thumb_key) if thumb_uploaded else None
-
-            # Create MediaVariant for thumbnail
-            MediaVariant.objects.create(
-                media_file=media_file,
-                variant_type='thumbnail',
-                file_url=thumb_url,
-                width=thumbnail_config['width'],
-                height=thumbnail_config['height'],
-                file_size=thumb_buffer.tell(),
-                format='webp'
-            )
-
-            # Update media file thumbnail URL
-            if thumb_uploaded:
-                media_file.thumbnail_url = thumb_url
-                media_file.save()
-
-            # Create preview (800x600, smart resize)
-            preview_config = config['preview']
-            preview = image.copy()
-            preview.thumbnail((preview_config['width'], preview_config['height']), Image.Resampling.LANCZOS)
-
-            preview_buffer = BytesIO()
-            preview.save(preview_buffer, format='WEBP', quality=config['full']['quality'])
-            preview_buffer.seek(0)
-
-            # Upload preview to S3
-            preview_key = f"media/{media_file.id}/preview.webp"
-            preview_uploaded = upload_media_to_s3(preview_buffer, preview_key, 'image/webp')
-            preview_url = get_media_url(preview_key) if preview_uploaded else None
-
-            # Create MediaVariant for preview
-            MediaVariant.objects.create(
-                media_file=media_file,
-                variant_type='preview',
-                file_url=preview_url,
-                width=preview.size[0],
-                height=preview.size[1],
-                file_size=preview_buffer.tell(),
-                format='webp'
-            )
-
-            # Update media file preview URL
-            if preview_uploaded:
-                media_file.preview_url = preview_url
-                media_file.save()
-
-            # Full size (optimized)
-            full_buffer = BytesIO()
-            image.save(full_buffer, format='WEBP', quality=config['full']['quality'])
-            full_buffer.seek(0)
+            with media_file.original_file.open('rb') as f:
+                media_file.content_hash = hash_file(f)
+                f.seek(0)
+                image, (width, height) = open_reduced(f, config)
+
+        # Re-uploads reuse the variants of the first copy instead of being encoded and stored again
+        phash = perceptual_hash(image)
+        if _link_if_duplicate(media_file, s3_key, phash, update_fields=['content_hash', 'file_size']):
+            return True
+
+        report_progress(media_file.id, 'encoding', 25, self)
+        variants = encode_variants(image, (width, height), key_prefix, config)
+
+        # Upload the fixed sizes and the responsive ladder concurrently
+        report_progress(media_file.id, 'uploading', 60, self)
+        uploaded = upload_media_batch(
+            (BytesIO(variant['data']), variant['key'], variant['content_type']) for variant in variants.values()
+        )
+        urls = {key: get_media_url(key) for key, ok in uploaded.items() if ok}
 
-            # Upload full size to S3
-            full_key = f"media/{media_file.id}/full.webp"
-            full_uploaded = upload_media_to_s3(full_buffer, full_key, 'image/webp')
-            full_url = get_media_url(full_key) if full_uploaded else None
+        variant_rows = []
+        fields = ['content_hash', 'file_size', 'width', 'height', 'perceptual_hash', 'blurhash', 'srcset',
+                  'processing_status', 'processing_seconds']
+        for variant in variants.values():
+            variant_url = urls.get(variant['key'])
 
-            # Create MediaVariant for full size
-            MediaVariant.objects.create(
+            # MediaVariant for every stored size and format
+            variant_rows.append(MediaVariant(
                 media_file=media_file,
-                variant_type='full',
-                file_url=full_url,
-                width=image.size[0],
-                height=image.size[1],
-                file_size=full_buffer.tell(),
-                format='webp'
-            )
-
-            # Update media file full URL
-            if full_uploaded:
-                media_file.full_url = full_url
-                media_file.save()
+                variant_type=variant['variant_type'],
+                file_url=variant_url or variant['key'],
+                width=variant['width'],
+                height=variant['height'],
+                file_size=len(variant['data']),
+                format=variant['format']
+            ))
+
+            # Update media file thumbnail/preview/full URL
+            if variant_url and variant['variant_type'] in VARIANT_ORDER:
+                setattr(media_file, f"{variant['variant_type']}_url", variant_url)
+                fields.append(f"{variant['variant_type']}_url")
+
+        # Responsive set for srcset, and a blurred placeholder shown while it loads
+        media_file.srcset = build_srcset(variants, urls)
+        media_file.blurhash = blurhash.encode(image, *config['placeholder']['components'])
 
         # Update media file status
         media_file.processing_status = 'completed'
-        media_file.width = image.size[0]
-        media_file.height = image.size[1]
-        media_file.save()
+        media_file.width = width
+        media_file.height = height
+        media_file.processing_seconds = _cpu_seconds() - start_cpu
+        with transaction.atomic():
+            store_perceptual_hash(media_file, phash)
+            _commit_media(media_file, fields, variant_rows)
+        report_progress(media_file.id, 'completed', 100, self)
 
         logger.info(f"Successfully processed image file: {media_file.file_name}")
         return True
 
     except Exception as e:
         logger.error(f"Failed to process image file {media_file_id}: {str(e)}")
-        media_file = MediaFile.objects.get(id=media_file_id)
-        media_file.processing_status = 'failed'
-        media_file.processing_error = str(e)
-        media_file.save()
+        _mark_failed(media_file_id, str(e))
         raise
 
 
-@shared_task(bind=True)
-def process_video_file(self, media_file_id, s3_key=None):
-    """Process uploaded video file - create thumbnail and transcode"""
-    try:
-        media_file = MediaFile.objects.get(id=media_file_id)
-        media_file.processing_status = 'processing'
-        media_file.save()
-
-        config = settings.MEDIA_PROCESSING_CONFIG['video']
-
-        # If s3_key is provided, download from S3, otherwise use local file
-        if s3_key:
-            # Download video from S3 to temporary location
-            from .s3_utils import s3_manager
-            import tempfile
-            import os
-
-            s3_response = s3_manager.s3_client.get_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=s3_key)
-            video_data = s3_response['Body'].read()
-
-            # Update file size
-            media_file.file_size = len(video_data)
-            media_file.save()
-
-            # Save to temporary file for processing
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_file:
-                temp_file.write(video_data)
-                video_path = temp_file.name
-
-            # Load video from temp file
-            video = mp.VideoFileClip(video_path)
-        else:
-            # Fallback to local file processing
-            video_path = media_file.original_file.path
-            video = mp.VideoFileClip(video_path)
+def queue_video_processing(media_file_id, s3_key=None, file_size=None):
+    """
+    Enqueue a video's poster frame ahead of its transcode. The poster task
+    only seeks to one keyframe, so the thumbnail is up within seconds while
+    the HLS packaging runs behind it. The transcode goes to media-fast or
+    media-heavy by size, so long uploads do not hold up short ones.
+    """
+    poster_config = settings.MEDIA_PROCESSING_CONFIG['video']['thumbnail']
+    extract_video_poster.apply_async((media_file_id, s3_key), priority=poster_config['priority'])
 
-        # Update duration
-        media_file.duration = video.duration
-        media_file.width = int(video.w)
-        media_file.height = int(video.h)
-        media_file.save()
+    if file_size is None:
+        file_size = get_s3_manager().get_object_size(s3_key) if s3_key else \
+            MediaFile.objects.filter(id=media_file_id).values_list('file_size', flat=True).first()
+    process_video_file.apply_async((media_file_id, s3_key), queue=video_queue(file_size))
 
-        # Create video thumbnail at 1 second
-        thumbnail_time = min(config['thumbnail']['time'], video.duration)
-        thumbnail = video.get_frame(thumbnail_time)
 
-        # Convert to PIL Image
-        thumbnail_image = Image.fromarray(thumbnail)
+@shared_task(bind=True)
+def extract_video_poster(self, media_file_id, s3_key=None):
+    """Poster frame from the keyframe nearest the configured time, without opening the whole clip"""
+    try:
+        media_file = MediaFile.objects.get(id=media_file_id)
+        if media_file.duplicate_of_id:
+            # The transcode already linked this re-upload to the first copy's poster
+            logger.info(f"Skipped poster frame for duplicate video file {media_file_id}")
+            return False
+        config = settings.MEDIA_PROCESSING_CONFIG['video']['thumbnail']
 
-        # Resize thumbnail
-        thumb_config = config['thumbnail']
-        thumbnail_image.thumbnail((thumb_config['width'], thumb_config['height']), Image.Resampling.LANCZOS)
+        # ffmpeg range-reads S3 originals through a presigned URL instead of downloading them
+        source = get_presigned_url_for_media(s3_key, expiration=config['timeout'] * 2) if s3_key \
+            else media_file.original_file.path
+        poster = extract_poster_frame(source, config['time'], config['width'], config['height'], config['timeout'])
 
         # Save thumbnail
         thumb_buffer = BytesIO()
-        thumbnail_image.save(thumb_buffer, format='WEBP', quality=85)
+        poster.save(thumb_buffer, format='WEBP', quality=85)
+        thumb_size = thumb_buffer.tell()
         thumb_buffer.seek(0)
 
         # Upload video thumbnail to S3
@@ -224,154 +207,196 @@ def process_video_file(self, media_file_id, s3_key=None):
         thumb_uploaded = upload_media_to_s3(thumb_buffer, thumb_key, 'image/webp')
         thumb_url = get_media_url(thumb_key) if thumb_uploaded else None
 
-        # Create MediaVariant for video thumbnail
-        MediaVariant.objects.create(
-            media_file=media_file,
-            variant_type='thumbnail',
-            file_url=thumb_url,
-            width=thumbnail_image.size[0],
-            height=thumbnail_image.size[1],
-            file_size=thumb_buffer.tell(),
-            format='webp'
-        )
-
-        # Update media file thumbnail URL
+        # MediaVariant for video thumbnail
+        fields = []
         if thumb_uploaded:
             media_file.video_thumbnail_url = thumb_url
-            media_file.save()
-
-        # Generate HLS playlist and segments
-        self.update_state(state='PROGRESS', meta={'message': 'Generating HLS playlist'})
-
-        # For each bitrate/resolution combination
-        hls_config = config['hls']
-        for i, (bitrate, resolution) in enumerate(zip(hls_config['bitrates'], hls_config['resolutions'])):
-            # Transcode video segment
-            transcoded = video.resize(height=resolution[1])
-            output_path = f"/tmp/{media_file.id}_segment_{i}.mp4"
-
-            # Write transcoded segment
-            transcoded.write_videofile(
-                output_path,
-                bitrate=f"{bitrate}k",
-                audio_bitrate="128k",
-                preset="medium",
-                threads=4,
-                logger=None
-            )
-
-            # Upload HLS segment to S3
-            segment_key = f"media/{media_file.id}/hls/{i}/segment.mp4"
-            with open(output_path, 'rb') as segment_file:
-                segment_buffer = BytesIO(segment_file.read())
-                segment_uploaded = upload_media_to_s3(segment_buffer, segment_key, 'video/mp4')
-                segment_url = get_media_url(segment_key) if segment_uploaded else f"{media_file.id}/hls/{i}/segment.mp4"
-
-            # Create MediaVariant for HLS segment
-            MediaVariant.objects.create(
+            media_file.thumbnail_url = thumb_url
+            fields = ['video_thumbnail_url', 'thumbnail_url']
+        with transaction.atomic():
+            # Linked as a duplicate while the frame was being extracted: keep the linked poster
+            if not MediaFile.objects.select_for_update().filter(id=media_file.id, duplicate_of__isnull=True).exists():
+                logger.info(f"Discarded poster frame for duplicate video file {media_file_id}")
+                return False
+            _commit_media(media_file, fields, [MediaVariant(
                 media_file=media_file,
-                variant_type='hls_segment',
-                segment_index=i,
-                bitrate=bitrate,
-                width=resolution[0],
-                height=resolution[1],
-                file_url=segment_url,
-                format='mp4'
-            )
+                variant_type='thumbnail',
+                file_url=thumb_url or thumb_key,
+                width=poster.width,
+                height=poster.height,
+                file_size=thumb_size,
+                format='webp'
+            )])
 
-            # Clean up local segment file
-            try:
-                os.unlink(output_path)
-            except:
-                pass
+        logger.info(f"Extracted poster frame for video file: {media_file.file_name}")
+        return True
 
-        # Generate M3U8 playlist with full S3 URLs
-        playlist_content = generate_hls_playlist(media_file, hls_config)
+    except Exception as e:
+        # The transcode carries on without a poster; only the thumbnail is missing
+        logger.error(f"Failed to extract poster frame for video file {media_file_id}: {str(e)}")
+        raise
 
-        # Upload playlist to S3
-        playlist_key = f"media/{media_file.id}/playlist.m3u8"
-        playlist_buffer = BytesIO(playlist_content.encode('utf-8'))
-        playlist_uploaded = upload_media_to_s3(playlist_buffer, playlist_key, 'application/vnd.apple.mpegurl')
-        playlist_url = get_media_url(playlist_key) if playlist_uploaded else None
-
-        # Create MediaVariant for playlist
-        MediaVariant.objects.create(
-            media_file=media_file,
-            variant_type='hls_playlist',
-            file_url=playlist_url,
-            format='m3u8'
-        )
 
-        # Update media file HLS playlist URL
-        if playlist_uploaded:
-            media_file.hls_playlist_url = playlist_url
-            media_file.save()
+@shared_task(bind=True)
+def process_video_file(self, media_file_id, s3_key=None):
+    """Process uploaded video file - create thumbnail and transcode"""
+    try:
+        media_file = MediaFile.objects.get(id=media_file_id)
+        report_progress(media_file.id, 'processing', 0, self)
+
+        config = settings.MEDIA_PROCESSING_CONFIG['video']
+        start_cpu = _cpu_seconds()
+        variant_rows = []
+        fields = ['content_hash', 'file_size', 'duration', 'width', 'height',
+                  'processing_status', 'processing_seconds']
+
+        # The S3 temp copy is released when this block exits, even on failure
+        with ExitStack() as stack:
+            if s3_key:
+                # Stream the video from S3 to a temp file in chunks, hashing as it arrives
+                digest = hashlib.sha256()
+                video_path, file_size = stack.enter_context(
+                    download_media_to_tempfile(s3_key, suffix=os.path.splitext(s3_key)[1] or '.mp4', digest=digest)
+                )
+                media_file.content_hash = digest.hexdigest()
+
+                # Update file size
+                media_file.file_size = file_size
+            else:
+                # Fallback to local file processing
+                video_path = media_file.original_file.path
+                with open(video_path, 'rb') as f:
+                    media_file.content_hash = hash_file(f)
+
+            # A re-uploaded clip reuses the first copy's thumbnail and HLS renditions
+            if _link_if_duplicate(media_file, s3_key, update_fields=['content_hash', 'file_size']):
+                return True
+
+            # Duration, size and audio come from the container header; only the HLS pass decodes
+            probe = probe_video(video_path)
+            media_file.duration = probe['duration']
+            media_file.width = probe['width']
+            media_file.height = probe['height']
+
+            # Generate HLS renditions and segments (the poster frame comes from extract_video_poster)
+            report_progress(media_file.id, 'transcoding', 10, self)
+
+            # Decode once, encode every rendition in the same pass, upload segments as they finish
+            hls_config = config['hls']
+            hls_prefix = f"media/{media_file.id}/hls"
+            renditions = package_hls(
+                video_path,
+                plan_renditions(media_file.width, media_file.height, hls_config),
+                hls_config,
+                has_audio=probe['has_audio'],
+                upload=lambda file_obj, name, content_type: upload_media_to_s3(
+                    file_obj, f"{hls_prefix}/{name}", content_type
+                ),
+                temp_dir=settings.MEDIA_PROCESSING_CONFIG['temp_dir']
+            )
 
-        # Clean up
-        video.close()
+            # One hls_segment variant per rendition, pointing at its media playlist
+            for rendition in renditions:
+                rendition_key = f"{hls_prefix}/{rendition['index']}/{MEDIA_PLAYLIST_NAME}"
+                variant_rows.append(MediaVariant(
+                    media_file=media_file,
+                    variant_type='hls_segment',
+                    segment_index=rendition['index'],
+                    bitrate=rendition['bitrate'],
+                    width=rendition['width'],
+                    height=rendition['height'],
+                    file_url=get_media_url(rendition_key) if rendition['uploaded'] else rendition_key,
+                    file_size=rendition['size'],
+                    format='ts'
+                ))
+
+            # Master playlist referencing the media playlists by relative URI
+            report_progress(media_file.id, 'playlist', 90, self)
+            playlist_content = build_master_playlist(renditions, hls_config['audio_bitrate'])
+
+            # Upload playlist to S3
+            playlist_key = f"media/{media_file.id}/playlist.m3u8"
+            playlist_buffer = BytesIO(playlist_content.encode('utf-8'))
+            playlist_uploaded = upload_media_to_s3(playlist_buffer, playlist_key, 'application/vnd.apple.mpegurl')
+            playlist_url = get_media_url(playlist_key) if playlist_uploaded else None
+
+            # MediaVariant for playlist
+            variant_rows.append(MediaVariant(
+                media_file=media_file,
+                variant_type='hls_playlist',
+                file_url=playlist_url or playlist_key,
+                file_size=len(playlist_content),
+                format='m3u8'
+            ))
 
-        # Clean up temporary file if it was created
-        if s3_key and 'temp_file' in locals():
-            try:
-                os.unlink(video_path)
-            except:
-                pass
+            # Update media file HLS playlist URL
+            if playlist_uploaded:
+                media_file.hls_playlist_url = playlist_url
+                fields.append('hls_playlist_url')
 
         # Update status
         media_file.processing_status = 'completed'
-        media_file.save()
+        media_file.processing_seconds = _cpu_seconds() - start_cpu
+        _commit_media(media_file, fields, variant_rows)
+        report_progress(media_file.id, 'completed', 100, self)
 
         logger.info(f"Successfully processed video file: {media_file.file_name}")
         return True
 
     except Exception as e:
         logger.error(f"Failed to process video file {media_file_id}: {str(e)}")
-        media_file = MediaFile.objects.get(id=media_file_id)
-        media_file.processing_status = 'failed'
-        media_file.processing_error = str(e)
-        media_file.save()
+        _mark_failed(media_file_id, str(e))
         raise
 
 
-def generate_hls_playlist(media_file, hls_config):
-    """Generate M3U8 playlist content"""
-    playlist_lines = [
-        '#EXTM3U',
-        '#EXT-X-VERSION:3',
-        f'#EXT-X-TARGETDURATION:{int(media_file.duration)}',
-        '#EXT-X-MEDIA-SEQUENCE:0',
-    ]
-
-    for i, (bitrate, resolution) in enumerate(zip(hls_config['bitrates'], hls_config['resolutions'])):
-        # Use full S3 URLs for segments
-        segment_url = f"{media_file.id}/hls/{i}/segment.mp4"
-        playlist_lines.extend([
-            '#EXT-X-STREAM-INF:BANDWIDTH={},RESOLUTION={}x{}'.format(
-                bitrate * 1000, resolution[0], resolution[1]
-            ),
-            segment_url
-        ])
-
-    playlist_lines.append('#EXT-X-ENDLIST')
-    return '\n'.join(playlist_lines)
-
-
 @shared_task(bind=True)
 def generate_hls_playlist(self, media_file_id):
-    """Generate HLS playlist for video"""
+    """Rebuild and upload a video's master playlist from its rendition variants"""
     try:
         media_file = MediaFile.objects.get(id=media_file_id)
         hls_config = settings.MEDIA_PROCESSING_CONFIG['video']['hls']
 
-        playlist_content = generate_hls_playlist(media_file, hls_config)
+        renditions = [
+            {'index': variant.segment_index, 'bitrate': variant.bitrate,
+             'width': variant.width, 'height': variant.height}
+            for variant in media_file.variants.filter(variant_type='hls_segment')
+        ]
+        if not renditions:
+            return False
 
-        # Save playlist content (this would be handled by storage backend)
-        # For now, just mark as completed
-        media_file.processing_status = 'completed'
-        media_file.save()
+        playlist_content = build_master_playlist(renditions, hls_config['audio_bitrate'])
+        playlist_key = f"media/{media_file.id}/playlist.m3u8"
+        if upload_media_to_s3(BytesIO(playlist_content.encode('utf-8')), playlist_key, 'application/vnd.apple.mpegurl'):
+            media_file.hls_playlist_url = get_media_url(playlist_key)
+            media_file.save(update_fields=['hls_playlist_url', 'updated_at'])
 
         return True
 
     except Exception as e:
         logger.error(f"Failed to generate HLS playlist for {media_file_id}: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+@shared_task
+def update_trending_topics():
+    """Feed new posts and engagements into the trending engine and snapshot it to the cache"""
+    from .trending import update_trending_engine
+
+    snapshot = update_trending_engine()
+    return len(snapshot['categories']) if snapshot else 0
+
+
+@shared_task
+def refresh_trending_posts():
+    """Recompute the materialized trending post ranking read by TrendingSidebarView"""
+    from .trending_posts import refresh_trending_posts as refresh
+
+    ranking = refresh()
+    return len(ranking['post_ids']) if ranking else 0
+
+
+@shared_task
+def abort_stale_multipart_uploads():
+    """Abort resumable uploads left unfinished, so S3 stops storing their parts"""
+    from .multipart_upload import abort_stale_uploads
+
+    return abort_stale_uploads()
@@ -1,9 +1,18 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
+from django.core.cache import cache
+from unittest.mock import patch
+import hashlib
+import threading
+import time
+from sports.models import League, Team, Athlete
+from sports.search_index import sports_search_index
 from .models import Post
+from .search_cache import SearchResultCache, search_result_cache, normalize_search_query
+from .trigram_search import TrigramIndex, trigrams, fuzzy_search_index, postgres_search_queryset
 
 User = get_user_model()
 
@@ -13,6 +22,7 @@ class SearchTestCase(APITestCase):
 
     def setUp(self):
         """Set up test users and posts"""
+        cache.clear()
         self.user1 = User.objects.create_user(
             username='user1',
             email='user1@test.com',
@@ -213,3 +223,156 @@ class SearchTestCase(APITestCase):
         # Should not find user3 in results
         usernames = [user['username'] for user in response.data['results']]
         self.assertNotIn('user3', usernames)
+
+
+class SearchResultCacheTestCase(APITestCase):
+    """Test cases for search result caching"""
+
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(username='viewer', email='viewer@test.com', password='password123')
+        self.author = User.objects.create_user(username='author', email='author@test.com', password='password123')
+        self.post = Post.objects.create(author=self.author, title='Derby', content='What a night for #Messi')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_normalize_search_query(self):
+        """Case, whitespace, hashtag prefix and Unicode width variants normalize together"""
+        for raw in ['messi', 'Messi ', '#messi', '  MESSI', '\uff2d\uff45\uff53\uff53\uff49']:
+            self.assertEqual(normalize_search_query(raw), 'messi')
+        self.assertEqual(normalize_search_query('lionel   messi'), 'lionel messi')
+        self.assertEqual(normalize_search_query('#'), '')
+
+    def test_query_variants_share_cached_ids(self):
+        """Equivalent queries run the backend search once"""
+        with patch.object(search_result_cache, 'get_or_compute', wraps=search_result_cache.get_or_compute) as lookup:
+            for raw in ['messi', 'Messi ', '#messi']:
+                response = self.client.get(reverse('search'), {'q': raw, 'type': 'posts'})
+                self.assertEqual([p['id'] for p in response.data['results']], [self.post.id])
+                self.assertEqual(response.data['query'], raw.strip())
+            self.assertEqual({call.args[1] for call in lookup.call_args_list}, {'messi'})
+
+        with self.assertNumQueries(0):
+            SearchResultCache().get_or_compute('posts', 'messi', 1, lambda: self.fail('recomputed'))
+
+    def test_hydration_is_viewer_specific(self):
+        """Cached IDs are filtered by each viewer's blocks after the lookup"""
+        response = self.client.get(reverse('search'), {'q': 'messi', 'type': 'posts'})
+        self.assertEqual(len(response.data['results']), 1)
+
+        self.viewer.blocked_users.add(self.author)
+        self.client.force_authenticate(user=self.viewer)
+        response = self.client.get(reverse('search'), {'q': '#MESSI', 'type': 'posts'})
+        self.assertEqual(response.data['results'], [])
+
+    def test_pages_filled_after_viewer_filtering(self):
+        """Blocked authors are removed before paging, so pages are not short"""
+        other = User.objects.create_user(username='other', email='other@test.com', password='password123')
+        for index in range(4):
+            Post.objects.create(author=other if index % 2 else self.author, content=f'Messi goal {index}')
+        self.viewer.blocked_users.add(self.author)
+        self.client.force_authenticate(user=self.viewer)
+
+        with override_settings(SEARCH_CACHE_CONFIG={'page_sizes': {'users': 20, 'posts': 1}}):
+            pages = [
+                self.client.get(reverse('search'), {'q': 'messi', 'type': 'posts', 'page': page}).data['results']
+                for page in (1, 2, 3)
+            ]
+        self.assertEqual([len(results) for results in pages], [1, 1, 0])
+        self.assertEqual({post['author']['id'] for results in pages for post in results}, {other.id})
+
+    def test_waiters_do_not_block_behind_a_slow_search(self):
+        """A request that loses the lock waits at most max_wait, then searches itself"""
+        cache.add('search_results_lock_posts_1_' + hashlib.md5(b'slow').hexdigest(), 1, 60)
+        started = time.monotonic()
+        with override_settings(SEARCH_CACHE_CONFIG={'max_wait': 0.1}):
+            ids = SearchResultCache().get_or_compute('posts', 'slow', 1, lambda: [7])
+        self.assertEqual(ids, [7])
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_single_flight_recomputation(self):
+        """A burst of identical lookups runs compute once"""
+        result_cache = SearchResultCache()
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return [1, 2, 3]
+
+        def lookup():
+            results.append(result_cache.get_or_compute('posts', 'burst', 1, compute))
+
+        threads = [threading.Thread(target=lookup) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [[1, 2, 3]] * 8)
+
+
+class FuzzySearchTestCase(APITestCase):
+    """Test cases for trigram fuzzy search"""
+
+    def setUp(self):
+        cache.clear()
+        fuzzy_search_index.reset()
+        sports_search_index.reset()
+        league = League.objects.create(name='Ligue 1', sport='football', description='French top flight', country='France')
+        premier = League.objects.create(name='Premier League', sport='football', description='English top flight')
+        psg = Team.objects.create(name='Paris Saint-Germain', league=league, abbreviation='PSG', description='Paris')
+        Team.objects.create(
+            name='Manchester United', league=premier, abbreviation='MUN', description='Red Devils', aliases=['Man Utd']
+        )
+        self.mbappe = Athlete.objects.create(
+            first_name='Kylian', last_name='Mbappe', team=psg, position='Forward', nationality='France', description='Striker'
+        )
+        self.user = User.objects.create_user(username='ronaldinho', email='r10@test.com', password='password123')
+
+    def tearDown(self):
+        cache.clear()
+        fuzzy_search_index.reset()
+        sports_search_index.reset()
+
+    def test_trigrams_match_pg_trgm(self):
+        """Trigram extraction and similarity follow pg_trgm"""
+        self.assertEqual(trigrams('cat'), {'  c', ' ca', 'cat', 'at '})
+        index = TrigramIndex()
+        index.add(1, 'two words')
+        [(entity_id, similarity)] = index.search('word', 0.3, 10)
+        self.assertAlmostEqual(similarity, 0.363636, places=5)  # SELECT similarity('word', 'two words')
+
+    def test_fuzzy_mode_finds_misspelt_names(self):
+        """Misspelt athlete, team and user names are found and ranked by similarity"""
+        response = self.client.get(reverse('search'), {'q': 'Mbape', 'type': 'athletes', 'mode': 'fuzzy'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['id'], self.mbappe.id)
+        self.assertGreater(response.data['results'][0]['similarity'], 0.5)
+
+        response = self.client.get(reverse('search'), {'q': 'Man Untd', 'type': 'teams', 'mode': 'fuzzy'})
+        self.assertEqual(response.data['results'][0]['name'], 'Manchester United')
+
+        response = self.client.get(reverse('search'), {'q': 'ronaldino', 'type': 'all', 'mode': 'fuzzy'})
+        self.assertEqual([u['username'] for u in response.data['results']['users']], ['ronaldinho'])
+
+    def test_postgres_query_narrows_with_indexed_operators(self):
+        """The pg_trgm query filters with % and <% on the indexed columns and expressions before ranking"""
+        where = str(postgres_search_queryset('mbape', 'athletes', 0.3).query).split(' WHERE ', 1)[1]
+        self.assertIn('''(("sports_athlete"."first_name" || ' ' || "sports_athlete"."last_name") % mbape)''', where)
+        self.assertIn('''("sports_athlete"."last_name" % mbape)''', where)
+        self.assertIn('''(mbape <% ("sports_athlete"."aliases")::text)''', where)
+
+        where = str(postgres_search_queryset('psg', 'teams', 0.3).query).split(' WHERE ', 1)[1]
+        self.assertIn('''("sports_team"."name" % psg) OR ("sports_team"."abbreviation" % psg)''', where)
+
+    def test_fuzzy_mode_rejects_posts(self):
+        """Posts have no trigram index"""
+        response = self.client.get(reverse('search'), {'q': 'messi', 'type': 'posts', 'mode': 'fuzzy'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,73 @@
+import socket
+import subprocess
+import sys
+import time
+
+import boto3
+from django.conf import settings
+
+import posts.s3_utils
+
+CREDENTIALS = {'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing'}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_moto_server(bucket=None, timeout=30):
+    """Run a moto S3 server in a child process; returns (process, endpoint URL)"""
+    port = free_port()
+    endpoint = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'moto.server', '-H', '127.0.0.1', '-p', str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    client = boto3.client(
+        's3', endpoint_url=endpoint, region_name='us-east-1',
+        aws_access_key_id='testing', aws_secret_access_key='testing'
+    )
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            client.create_bucket(Bucket=bucket or settings.AWS_STORAGE_BUCKET_NAME)
+            return server, endpoint
+        except Exception:
+            if time.monotonic() > deadline:
+                server.terminate()
+                raise
+            time.sleep(0.2)
+
+
+class MotoS3ServerMixin:
+    """Starts a moto S3 server for the test class (an out-of-process S3 stand-in)"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server, cls.endpoint = start_moto_server()
+        cls.credentials = dict(CREDENTIALS)
+        cls.s3 = boto3.client(
+            's3', endpoint_url=cls.endpoint, region_name='us-east-1',
+            aws_access_key_id='testing', aws_secret_access_key='testing'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.terminate()
+        cls.server.wait()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        posts.s3_utils._s3_manager = None
+
+    def tearDown(self):
+        posts.s3_utils._s3_manager = None
+        super().tearDown()
+
+    def s3_settings(self, **extra):
+        """override_settings pointing S3MediaManager at the stand-in"""
+        return self.settings(AWS_S3_ENDPOINT_URL=self.endpoint, **CREDENTIALS, **extra)
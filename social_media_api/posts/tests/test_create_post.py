@@ -0,0 +1,80 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from posts.models import MediaFile, Post, PostActionLog
+from posts.serializers import PostSerializer
+
+# Media lookup, SAVEPOINT, MediaFile INSERT, Post INSERT, RELEASE, action log INSERT, author counts
+CREATE_WITH_MEDIA_QUERIES = 7
+# SAVEPOINT, Post INSERT, RELEASE, action log INSERT, author counts
+CREATE_TEXT_QUERIES = 5
+
+
+@patch('posts.views.posts.queue_video_processing')
+@patch('posts.views.posts.process_image_file')
+class CreatePostQueryTest(APITestCase):
+    """Post creation writes each table once and queues processing after commit"""
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create_user(username='reporter', password='pw')
+        User.objects.create_user(username='fan', password='pw').following.add(self.user)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('post:create-post')
+
+    def create(self, media_keys, queries):
+        cache.clear()  # PostCreationThrottle allows two posts a minute
+        with self.captureOnCommitCallbacks(execute=True) as callbacks, self.assertNumQueries(queries):
+            response = self.client.post(self.url, {'content': 'Full time', 'media_keys': media_keys}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(callbacks), 1)
+        return response
+
+    def test_fixed_query_count_regardless_of_media(self, process_image_file, queue_video_processing):
+        self.create([], CREATE_TEXT_QUERIES)
+        self.create(['uploads/1/a.jpg'], CREATE_WITH_MEDIA_QUERIES)
+        response = self.create(
+            ['uploads/1/a.jpg', 'uploads/1/b.png', 'uploads/1/c.webp', 'uploads/1/d.mp4'], CREATE_WITH_MEDIA_QUERIES
+        )
+
+        post = Post.objects.get(id=response.data['id'])
+        self.assertEqual(MediaFile.objects.count(), 5)
+        self.assertEqual(post.media_file.file_name, 'd.mp4')
+        self.assertEqual(process_image_file.delay.call_count, 4)
+        queue_video_processing.assert_called_once_with(post.media_file.id, 'uploads/1/d.mp4', file_size=None)
+        self.assertEqual(PostActionLog.objects.filter(action_type='create_post').count(), 3)
+
+    def test_processing_queued_only_after_commit(self, process_image_file, queue_video_processing):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(self.url, {'content': 'Goal', 'media_keys': ['uploads/1/a.jpg']}, format='json')
+            process_image_file.delay.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+        media_file = MediaFile.objects.get()
+        process_image_file.delay.assert_called_once_with(media_file.id, 'uploads/1/a.jpg')
+        self.assertEqual(Post.objects.get(id=response.data['id']).media_file, media_file)
+
+    def test_invalid_media_writes_nothing(self, process_image_file, queue_video_processing):
+        response = self.client.post(
+            self.url, {'content': 'Goal', 'media_keys': ['uploads/1/notes.pdf', 'bad-key']}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(MediaFile.objects.exists())
+
+    def test_response_matches_full_serializer(self, process_image_file, queue_video_processing):
+        """The lean representation has the same fields and values as PostSerializer for a new post"""
+        response = self.create(['uploads/1/a.jpg'], CREATE_WITH_MEDIA_QUERIES)
+
+        post = Post.objects.get(id=response.data['id'])
+        request = response.wsgi_request
+        request.user = self.user
+        expected = PostSerializer(post, context={'request': request}).data
+        self.assertEqual(response.data, expected)
+        self.assertEqual(response.data['author']['followers_count'], 1)
@@ -0,0 +1,164 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from unittest.mock import patch
+
+import pytest
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from posts.hls import get_ffmpeg_binary, package_hls, plan_renditions, probe_video
+from posts.models import MediaFile
+from posts.tasks import process_video_file
+
+HLS_CONFIG = dict(
+    settings.MEDIA_PROCESSING_CONFIG['video']['hls'],
+    segment_duration=1, preset='ultrafast', poll_interval=0.05
+)
+
+
+def make_clip(path, width=854, height=480, seconds=3):
+    subprocess.run([
+        get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y',
+        '-f', 'lavfi', '-i', f'testsrc2=size={width}x{height}:rate=25',
+        '-f', 'lavfi', '-i', 'sine=frequency=440',
+        '-t', str(seconds), '-c:v', 'libx264', '-preset', 'ultrafast', '-c:a', 'aac', '-shortest', path
+    ], check=True)
+
+
+class Uploads:
+    """Collects uploaded objects in upload order"""
+
+    def __init__(self):
+        self.objects = {}
+        self.order = []
+        self.lock = threading.Lock()
+
+    def __call__(self, file_obj, name, content_type):
+        with self.lock:
+            self.objects[name] = (file_obj.read(), content_type)
+            self.order.append(name)
+        return True
+
+
+class RenditionPlanTest(TestCase):
+    """Ladder rungs are chosen from the source size"""
+
+    def test_ladder_never_upscales(self):
+        """Rungs taller than the source are dropped; a tiny source keeps the lowest bitrate at its own size"""
+        self.assertEqual(
+            [(r['width'], r['height'], r['bitrate']) for r in plan_renditions(1920, 1080, HLS_CONFIG)],
+            [(640, 360, 800), (854, 480, 1200), (1280, 720, 2400)]
+        )
+        self.assertEqual([r['height'] for r in plan_renditions(854, 480, HLS_CONFIG)], [360, 480])
+        self.assertEqual(
+            [(r['width'], r['height'], r['bitrate']) for r in plan_renditions(320, 240, HLS_CONFIG)],
+            [(320, 240, 800)]
+        )
+
+
+@pytest.mark.slow
+class HLSPackagerTest(TestCase):
+    """Single-pass HLS packaging with ffmpeg"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.work_dir = tempfile.mkdtemp()
+        cls.source = os.path.join(cls.work_dir, 'clip.mp4')
+        make_clip(cls.source)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir)
+        super().tearDownClass()
+
+    def test_package_writes_segmented_renditions(self):
+        """Each rendition gets .ts segments and a media playlist uploaded after all of its segments"""
+        uploads = Uploads()
+        renditions = package_hls(self.source, plan_renditions(854, 480, HLS_CONFIG), HLS_CONFIG, True, uploads)
+
+        self.assertEqual([r['height'] for r in renditions], [360, 480])
+        for rendition in renditions:
+            prefix = f"{rendition['index']}/"
+            segments = [name for name in uploads.order if name.startswith(prefix) and name.endswith('.ts')]
+            playlist, content_type = uploads.objects[prefix + 'index.m3u8']
+
+            self.assertTrue(rendition['uploaded'])
+            self.assertGreaterEqual(rendition['segment_count'], 3)
+            self.assertEqual(len(segments), rendition['segment_count'])
+            self.assertEqual(rendition['size'], sum(len(uploads.objects[name][0]) for name in segments))
+            self.assertEqual(content_type, 'application/vnd.apple.mpegurl')
+            self.assertGreater(uploads.order.index(prefix + 'index.m3u8'), max(map(uploads.order.index, segments)))
+
+            listed = [line for line in playlist.decode().splitlines() if line and not line.startswith('#')]
+            self.assertEqual([prefix + name for name in listed], sorted(segments))
+            self.assertIn('#EXT-X-ENDLIST', playlist.decode())
+            self.assertTrue(all(uploads.objects[name][1] == 'video/mp2t' for name in segments))
+
+    def test_ffmpeg_failure_raises(self):
+        """A source ffmpeg cannot read surfaces as RuntimeError with its error output"""
+        broken = os.path.join(self.work_dir, 'broken.mp4')
+        with open(broken, 'wb') as file_obj:
+            file_obj.write(b'not a video')
+
+        with self.assertRaisesRegex(RuntimeError, 'ffmpeg exited'):
+            package_hls(broken, plan_renditions(854, 480, HLS_CONFIG), HLS_CONFIG, True, Uploads())
+
+    def test_probe_reads_header_without_decoding(self):
+        """Duration, size and audio come from one header read, through ffprobe or the ffmpeg fallback"""
+        expected = {'duration': 3.0, 'width': 854, 'height': 480, 'has_audio': True}
+        with patch('posts.hls.get_ffprobe_binary', return_value=None):
+            fallback = probe_video(self.source)
+        self.assertEqual(dict(fallback, duration=round(fallback['duration'])), expected)
+
+        ffprobe_output = (
+            b'{"streams": [{"codec_type": "video", "width": 1920, "height": 1080, "duration": "12.5",'
+            b' "side_data_list": [{"rotation": -90}]}], "format": {"duration": "12.6"}}'
+        )
+        with patch('posts.hls.get_ffprobe_binary', return_value='ffprobe'), \
+                patch('posts.hls.subprocess.run') as run:
+            run.return_value = subprocess.CompletedProcess([], 0, stdout=ffprobe_output, stderr=b'')
+            probed = probe_video(self.source)
+        self.assertEqual(run.call_args[0][0][:6], ['ffprobe', '-v', 'error', '-show_streams', '-show_format', '-of'])
+        self.assertEqual(probed, {'duration': 12.5, 'width': 1080, 'height': 1920, 'has_audio': False})
+
+        broken = os.path.join(self.work_dir, 'unprobeable.mp4')
+        with open(broken, 'wb') as file_obj:
+            file_obj.write(b'not a video')
+        with patch('posts.hls.get_ffprobe_binary', return_value=None), \
+                self.assertRaisesRegex(RuntimeError, 'could not read'):
+            probe_video(broken)
+
+    def test_video_task_records_renditions_and_master_playlist(self):
+        """process_video_file stores one variant per rendition and a master playlist pointing at them"""
+        uploads = Uploads()
+        media_root = os.path.join(self.work_dir, 'media')
+        os.makedirs(os.path.join(media_root, 'media/original'), exist_ok=True)
+        shutil.copy(self.source, os.path.join(media_root, 'media/original/clip.mp4'))
+        media_file = MediaFile.objects.create(
+            original_file='media/original/clip.mp4', file_name='clip.mp4', file_size=os.path.getsize(self.source),
+            mime_type='video/mp4', media_type='video'
+        )
+        media_config = dict(settings.MEDIA_PROCESSING_CONFIG)
+        media_config['video'] = dict(media_config['video'], hls=HLS_CONFIG)
+
+        with override_settings(MEDIA_ROOT=media_root, MEDIA_PROCESSING_CONFIG=media_config), \
+                patch('posts.tasks.upload_media_to_s3', side_effect=lambda f, key, ct: uploads(f, key, ct)), \
+                patch('posts.tasks.get_media_url', side_effect=lambda key: f'https://cdn.example.com/{key}'):
+            self.assertTrue(process_video_file(media_file.id))
+
+        media_file.refresh_from_db()
+        self.assertEqual(media_file.processing_status, 'completed')
+        self.assertEqual(media_file.hls_playlist_url, f'https://cdn.example.com/media/{media_file.id}/playlist.m3u8')
+
+        variants = media_file.variants.filter(variant_type='hls_segment').order_by('segment_index')
+        self.assertEqual([(v.width, v.height, v.bitrate) for v in variants], [(640, 360, 800), (854, 480, 1200)])
+        self.assertEqual(variants[1].file_url, f'https://cdn.example.com/media/{media_file.id}/hls/1/index.m3u8')
+
+        master = uploads.objects[f'media/{media_file.id}/playlist.m3u8'][0].decode()
+        self.assertIn('BANDWIDTH=928000,RESOLUTION=640x360\nhls/0/index.m3u8', master)
+        self.assertIn('BANDWIDTH=1328000,RESOLUTION=854x480\nhls/1/index.m3u8', master)
+        self.assertIn(f'media/{media_file.id}/hls/1/segment_00000.ts', uploads.objects)
@@ -0,0 +1,153 @@
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+import posts.image_pipeline
+from posts import blurhash
+from posts.image_pipeline import generate_image_variants, open_reduced, responsive_widths, supported_formats
+from posts.models import MediaFile, Post
+from posts.serializers import PostSerializer
+from posts.tasks import process_image_file
+
+INLINE_CONFIG = dict(settings.MEDIA_PROCESSING_CONFIG['image'], workers=0)
+
+
+def jpeg_bytes(size, orientation=None):
+    image = Image.new('RGB', size, (200, 30, 30))
+    # Left half blue so orientation is observable after decoding
+    image.paste((30, 30, 200), (0, 0, size[0] // 2, size[1]))
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=90, exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+class ImagePipelineTest(TestCase):
+    """Reduced decoding, EXIF orientation and variant derivation"""
+
+    def test_jpeg_decoded_at_reduced_size(self):
+        """Draft mode decodes a 6000x4000 JPEG at 1/2 scale when the largest variant is 2048px"""
+        image, original_size = open_reduced(BytesIO(jpeg_bytes((6000, 4000))), INLINE_CONFIG)
+
+        self.assertEqual(original_size, (6000, 4000))
+        self.assertEqual(image.size, (3000, 2000))
+
+    def test_exif_orientation_applied(self):
+        """An orientation 6 JPEG is rotated upright; recorded and variant sizes follow the rotated frame"""
+        image, _ = open_reduced(BytesIO(jpeg_bytes((1200, 800), orientation=6)), INLINE_CONFIG)
+        self.assertEqual(image.size, (800, 1200))
+        # The stored left (blue) half ends up on top after the 90 degree clockwise rotation
+        self.assertGreater(image.getpixel((400, 100))[2], 150)
+        self.assertGreater(image.getpixel((400, 1100))[0], 150)
+
+        (width, height), variants = generate_image_variants(
+            BytesIO(jpeg_bytes((1200, 800), orientation=6)), 'media/1', INLINE_CONFIG
+        )
+
+        self.assertEqual((width, height), (800, 1200))
+        self.assertEqual((variants['full']['width'], variants['full']['height']), (800, 1200))
+        self.assertEqual((variants['preview']['width'], variants['preview']['height']), (400, 600))
+        self.assertEqual((variants['thumbnail']['width'], variants['thumbnail']['height']), (150, 150))
+        self.assertEqual(variants['preview']['key'], 'media/1/preview.webp')
+
+    def test_process_pool_encodes_variants(self):
+        """Variants encoded in worker processes are valid WEBP images of the reported size"""
+        config = dict(INLINE_CONFIG, workers=2)
+        posts.image_pipeline._pool = None
+        try:
+            _, variants = generate_image_variants(BytesIO(jpeg_bytes((3000, 2000))), 'media/2', config)
+        finally:
+            posts.image_pipeline._pool.shutdown()
+            posts.image_pipeline._pool = None
+
+        self.assertEqual(
+            sorted(variant['key'] for variant in variants.values() if variant['variant_type'] != 'responsive'),
+            ['media/2/full.webp', 'media/2/preview.webp', 'media/2/thumbnail.webp']
+        )
+        for variant in variants.values():
+            image = Image.open(BytesIO(variant['data']))
+            self.assertEqual(image.format, variant['format'].upper())
+            self.assertEqual(image.size, (variant['width'], variant['height']))
+        self.assertEqual(variants['full']['width'], 2048)
+
+    @override_settings(MEDIA_PROCESSING_CONFIG=dict(settings.MEDIA_PROCESSING_CONFIG, image=INLINE_CONFIG))
+    @patch('posts.tasks.get_media_url', side_effect=lambda key: f'https://cdn.example.com/{key}')
+    @patch('posts.tasks.upload_media_batch', side_effect=lambda uploads: {key: True for _, key, _ in uploads})
+    def test_task_records_variants(self, upload, get_media_url):
+        """process_image_file stores a variant and URL for each size, the srcset and a placeholder"""
+        media_file = MediaFile.objects.create(file_name='photo.jpg', file_size=0, mime_type='image/jpeg', media_type='image')
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            media_file.original_file.save('photo.jpg', ContentFile(jpeg_bytes((1600, 1200))))
+            self.assertTrue(process_image_file(media_file.id))
+
+        media_file.refresh_from_db()
+        upload.assert_called_once()
+        self.assertEqual((media_file.width, media_file.height), (1600, 1200))
+        self.assertEqual(media_file.preview_url, f'https://cdn.example.com/media/{media_file.id}/preview.webp')
+        self.assertEqual(
+            sorted(media_file.variants.exclude(variant_type='responsive').values_list('variant_type', 'width', 'height')),
+            [('full', 1600, 1200), ('preview', 800, 600), ('thumbnail', 150, 150)]
+        )
+        self.assertEqual(
+            [(entry['format'], entry['width']) for entry in media_file.srcset],
+            [(fmt, width) for fmt in supported_formats(['avif', 'webp']) for width in (320, 640, 960, 1280)]
+        )
+        self.assertEqual(len(media_file.blurhash), 28)
+
+        self.assertEqual(media_file.srcset[0]['url'], f'https://cdn.example.com/media/{media_file.id}/w320.{media_file.srcset[0]["format"]}')
+
+        post = Post.objects.create(
+            author=get_user_model().objects.create_user(username='photographer', password='pw'),
+            title='Photo', content='Photo', media_file=media_file
+        )
+        data = PostSerializer(post).data
+        self.assertEqual(data['blurhash'], media_file.blurhash)
+        self.assertEqual(data['srcset'][-1], {
+            'type': 'image/webp',
+            'srcset': ', '.join(f'https://cdn.example.com/media/{media_file.id}/w{width}.webp {width}w'
+                                for width in (320, 640, 960, 1280))
+        })
+
+
+class ResponsiveImageTest(SimpleTestCase):
+    """Width ladder, format negotiation and BlurHash placeholders"""
+
+    def test_ladder_skips_widths_above_original(self):
+        """Only rungs narrower than the original are produced; tiny originals keep their own width"""
+        responsive = INLINE_CONFIG['responsive']
+        self.assertEqual(responsive_widths((1000, 800), responsive), [320, 640, 960])
+        self.assertEqual(responsive_widths((200, 200), responsive), [200])
+
+        _, variants = generate_image_variants(BytesIO(jpeg_bytes((1000, 800))), 'media/3', INLINE_CONFIG)
+        ladder = sorted((v['format'], v['width'], v['height']) for v in variants.values() if v['variant_type'] == 'responsive')
+        self.assertEqual(ladder, sorted(
+            (fmt, width, round(width * 0.8)) for fmt in supported_formats(['avif', 'webp']) for width in (320, 640, 960)
+        ))
+        self.assertIn('media/3/w640.webp', [v['key'] for v in variants.values()])
+
+    def test_unsupported_formats_skipped(self):
+        """Formats the Pillow build cannot write are dropped instead of failing the encode"""
+        self.assertEqual(supported_formats(['jxl-unsupported', 'webp']), ['webp'])
+
+    def test_blurhash_encodes_components_and_average_colour(self):
+        """The hash header records the component counts and the DC term the average colour"""
+        flat = Image.new('RGB', (300, 200), (200, 30, 30))
+        value = blurhash.encode(flat, 4, 3)
+
+        self.assertEqual(len(value), 6 + 2 * 11)
+        self.assertEqual(value[0], blurhash.BASE83[3 + 2 * 9])
+        dc = sum(blurhash.BASE83.index(char) * 83 ** (3 - i) for i, char in enumerate(value[2:6]))
+        self.assertEqual((dc >> 16, (dc >> 8) & 255, dc & 255), (200, 30, 30))
+
+        split = Image.open(BytesIO(jpeg_bytes((300, 200))))
+        self.assertNotEqual(blurhash.encode(split, 4, 3)[6:8], value[6:8])
+        with self.assertRaises(ValueError):
+            blurhash.encode(flat, 10, 3)
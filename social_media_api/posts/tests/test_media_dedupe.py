@@ -0,0 +1,99 @@
+import tempfile
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image, ImageDraw
+
+from posts.media_dedupe import dedupe_savings, find_near_duplicate, hamming_distance, perceptual_hash, phash_bands
+from posts.models import MediaFile
+from posts.tasks import process_image_file
+
+INLINE_MEDIA_CONFIG = dict(
+    settings.MEDIA_PROCESSING_CONFIG, image=dict(settings.MEDIA_PROCESSING_CONFIG['image'], workers=0)
+)
+
+
+def meme(size=(1200, 900), quality=90):
+    image = Image.new('RGB', (1200, 900), (240, 240, 240))
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((200, 150, 700, 650), fill=(220, 40, 40))
+    draw.rectangle((750, 300, 1100, 800), fill=(30, 60, 200))
+    buffer = BytesIO()
+    image.resize(size).save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_PROCESSING_CONFIG=INLINE_MEDIA_CONFIG)
+@patch('posts.tasks.get_media_url', side_effect=lambda key: f'https://cdn.example.com/{key}')
+@patch('posts.tasks.upload_media_batch', side_effect=lambda uploads: {key: True for _, key, _ in uploads})
+class MediaDedupeTest(TestCase):
+    """Duplicate uploads link to the first copy's variants instead of being processed again"""
+
+    def setUp(self):
+        self.media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(self.settings(MEDIA_ROOT=self.media_root))
+
+    def upload(self, data, name='meme.jpg'):
+        media_file = MediaFile.objects.create(file_name=name, file_size=len(data), mime_type='image/jpeg', media_type='image')
+        media_file.original_file.save(name, ContentFile(data))
+        process_image_file(media_file.id)
+        media_file.refresh_from_db()
+        return media_file
+
+    def test_identical_upload_linked_without_processing(self, upload_batch, get_media_url):
+        """A byte-identical re-upload reuses the first copy's URLs and creates no variants"""
+        first = self.upload(meme())
+        second = self.upload(meme())
+
+        self.assertEqual(upload_batch.call_count, 1)
+        self.assertEqual(second.content_hash, first.content_hash)
+        self.assertEqual((second.duplicate_of, second.duplicate_match), (first, 'exact'))
+        self.assertEqual(second.processing_status, 'completed')
+        self.assertEqual((second.preview_url, second.width), (first.preview_url, first.width))
+        self.assertFalse(second.variants.exists())
+        self.assertGreater(first.processing_seconds, 0)
+
+        savings = dedupe_savings()
+        self.assertEqual((savings['duplicates'], savings['exact']), (1, 1))
+        self.assertEqual(savings['variant_bytes_saved'], sum(first.variants.values_list('file_size', flat=True)))
+        self.assertEqual(savings['cpu_seconds_saved'], round(first.processing_seconds, 2))
+
+        output = StringIO()
+        call_command('media_dedupe_report', stdout=output)
+        self.assertIn('Duplicates linked: 1 (1 exact, 0 perceptual', output.getvalue())
+
+    def test_near_duplicate_linked_only_with_perceptual_matching(self, upload_batch, get_media_url):
+        """A resized re-encode is processed separately by default and linked when perceptual matching is on"""
+        first = self.upload(meme())
+        self.assertEqual(first.phash_bands.count(), 4)
+
+        resized = self.upload(meme(size=(800, 600), quality=70), 'resized.jpg')
+        self.assertIsNone(resized.duplicate_of)
+        self.assertEqual(upload_batch.call_count, 2)
+
+        with self.settings(MEDIA_DEDUPE_CONFIG={'perceptual': True}):
+            linked = self.upload(meme(size=(1000, 750), quality=60), 'again.jpg')
+        # Either processed copy is a valid canonical; the closest hash wins
+        self.assertIn(linked.duplicate_of, [first, resized])
+        self.assertEqual(linked.duplicate_match, 'perceptual')
+        self.assertEqual(upload_batch.call_count, 2)
+
+    def test_band_lookup_finds_hashes_within_distance(self, upload_batch, get_media_url):
+        """Any hash within distance 3 shares a band with the stored hash; farther ones are rejected"""
+        first = self.upload(meme())
+        stored = int(first.perceptual_hash, 16)
+        probe = MediaFile.objects.create(file_name='probe.jpg', file_size=0, mime_type='image/jpeg', media_type='image')
+
+        # Flip one bit in each of three different bands
+        near = f"{stored ^ (1 << 3) ^ (1 << 20) ^ (1 << 40):016x}"
+        far = f"{stored ^ 0xF000F000F000F000:016x}"
+
+        self.assertEqual(hamming_distance(near, first.perceptual_hash), 3)
+        self.assertEqual(find_near_duplicate(probe, near, 3), first)
+        self.assertEqual(len(set(phash_bands(far)) & set(phash_bands(first.perceptual_hash))), 0)
+        self.assertIsNone(find_near_duplicate(probe, far, 3))
+        self.assertEqual(perceptual_hash(Image.open(BytesIO(meme()))), first.perceptual_hash)
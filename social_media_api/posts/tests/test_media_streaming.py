@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+from io import BytesIO
+
+import pytest
+from django.conf import settings
+from django.test import TestCase
+from PIL import Image
+
+from posts.models import MediaFile
+from posts.tasks import process_image_file
+from s3_server import MotoS3ServerMixin
+
+OBJECT_SIZE = 128 * 1024 * 1024
+RSS_BUDGET = 48 * 1024 * 1024
+
+# Runs in a fresh interpreter so ru_maxrss reflects only the download
+MEASURE_SCRIPT = textwrap.dedent('''
+    import json, resource, sys
+    import django
+    django.setup()
+    from posts.s3_utils import download_media_to_tempfile
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with download_media_to_tempfile(sys.argv[1]) as (path, size):
+        pass
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'size': size, 'growth_kb': after - before}))
+''')
+
+
+@pytest.mark.s3
+@pytest.mark.slow
+class StreamingS3DownloadTest(MotoS3ServerMixin, TestCase):
+    """Media tasks stream S3 originals to disk with bounded memory (moto server as the S3 stand-in)"""
+
+    def test_large_download_has_bounded_rss(self):
+        """Downloading a 128 MB object grows peak RSS by far less than the object size"""
+        with tempfile.NamedTemporaryFile() as source:
+            block = os.urandom(1024 * 1024)
+            for _ in range(OBJECT_SIZE // len(block)):
+                source.write(block)
+            source.flush()
+            self.s3.upload_file(source.name, settings.AWS_STORAGE_BUCKET_NAME, 'uploads/large.bin')
+
+        env = dict(os.environ, AWS_S3_ENDPOINT_URL=self.endpoint, **self.credentials)
+        result = subprocess.run(
+            [sys.executable, '-c', MEASURE_SCRIPT, 'uploads/large.bin'],
+            env=env, cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=300
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        measured = json.loads(result.stdout.strip().splitlines()[-1])
+
+        self.assertEqual(measured['size'], OBJECT_SIZE)
+        self.assertLess(measured['growth_kb'] * 1024, RSS_BUDGET)
+
+    def test_image_task_reads_original_from_disk(self):
+        """process_image_file streams the S3 original and records its size and dimensions"""
+        buffer = BytesIO()
+        Image.new('RGB', (640, 480), (200, 30, 30)).save(buffer, format='JPEG')
+        self.s3.put_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key='uploads/photo.jpg', Body=buffer.getvalue())
+        media_file = MediaFile.objects.create(
+            original_file='media/original/photo.jpg', file_name='photo.jpg', file_size=0,
+            mime_type='image/jpeg', media_type='image'
+        )
+
+        with self.s3_settings():
+            process_image_file(media_file.id, s3_key='uploads/photo.jpg')
+
+        media_file.refresh_from_db()
+        self.assertEqual(media_file.processing_status, 'completed')
+        self.assertEqual(media_file.file_size, len(buffer.getvalue()))
+        self.assertEqual((media_file.width, media_file.height), (640, 480))
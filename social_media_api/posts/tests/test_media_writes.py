@@ -0,0 +1,104 @@
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from posts.media_progress import get_media_progress
+from posts.models import MediaFile
+from posts.tasks import process_image_file
+
+INLINE_MEDIA_CONFIG = dict(
+    settings.MEDIA_PROCESSING_CONFIG, image=dict(settings.MEDIA_PROCESSING_CONFIG['image'], workers=0)
+)
+
+
+def photo():
+    buffer = BytesIO()
+    Image.new('RGB', (1600, 1200), (90, 140, 200)).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_PROCESSING_CONFIG=INLINE_MEDIA_CONFIG)
+@patch('posts.tasks.get_media_url', side_effect=lambda key: f'https://cdn.example.com/{key}')
+@patch('posts.tasks.upload_media_batch', side_effect=lambda uploads: {key: True for _, key, _ in uploads})
+class MediaTaskWritesTest(TestCase):
+    """Media tasks accumulate their results and write the file row once"""
+
+    def setUp(self):
+        cache.clear()
+        self.enterContext(self.settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        data = photo()
+        self.media_file = MediaFile.objects.create(
+            file_name='photo.jpg', file_size=len(data), mime_type='image/jpeg', media_type='image'
+        )
+        self.media_file.original_file.save('photo.jpg', ContentFile(data))
+
+    def writes(self, queries, table):
+        return [q['sql'].split()[0] for q in queries if table in q['sql'] and not q['sql'].startswith('SELECT')]
+
+    def test_image_task_commits_once(self, upload_batch, get_media_url):
+        """One bulk INSERT of variants, one UPDATE of the row, one post_save"""
+        saves_seen = []
+        post_save.connect(lambda **kwargs: saves_seen.append(kwargs['update_fields']),
+                          sender=MediaFile, weak=False, dispatch_uid='record-fields')
+        self.addCleanup(post_save.disconnect, sender=MediaFile, dispatch_uid='record-fields')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(process_image_file(self.media_file.id))
+
+        self.assertEqual(self.writes(queries, '"posts_mediafile"'), ['UPDATE'])
+        self.assertEqual(self.writes(queries, '"posts_mediavariant"'), ['INSERT'])
+        self.assertEqual(len(saves_seen), 1)
+        self.assertIn('processing_status', saves_seen[0])
+        self.assertNotIn('original_file', saves_seen[0])
+
+        self.media_file.refresh_from_db()
+        self.assertEqual(self.media_file.processing_status, 'completed')
+        self.assertEqual(self.media_file.variants.exclude(variant_type='responsive').count(), 3)
+        self.assertTrue(self.media_file.thumbnail_url.endswith('/thumbnail.webp'))
+        self.assertEqual(get_media_progress(self.media_file.id)['stage'], 'completed')
+
+    def test_progress_does_not_rewrite_row(self, upload_batch, get_media_url):
+        """Intermediate stages go to the progress channel while the row stays untouched"""
+        stages = []
+
+        def record(uploads):
+            stages.append(get_media_progress(self.media_file.id)['stage'])
+            stages.append(MediaFile.objects.get(id=self.media_file.id).processing_status)
+            return {key: True for _, key, _ in uploads}
+
+        upload_batch.side_effect = record
+        process_image_file(self.media_file.id)
+        self.assertEqual(stages, ['uploading', 'pending'])
+
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username='viewer', password='pw'))
+        response = client.get(reverse('post:media-progress', args=[self.media_file.id]))
+        self.assertEqual(response.json(), {'id': self.media_file.id, 'stage': 'completed', 'percent': 100})
+
+    def test_failure_recorded_with_narrow_update(self, upload_batch, get_media_url):
+        """A failed task marks the row failed without a full save"""
+        upload_batch.side_effect = RuntimeError('bucket unavailable')
+
+        with CaptureQueriesContext(connection) as queries, self.assertRaises(RuntimeError):
+            process_image_file(self.media_file.id)
+
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "posts_mediafile"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('original_file', updates[0])
+        self.media_file.refresh_from_db()
+        self.assertEqual((self.media_file.processing_status, self.media_file.processing_error),
+                         ('failed', 'bucket unavailable'))
+        self.assertEqual(get_media_progress(self.media_file.id)['stage'], 'failed')
+        self.assertFalse(self.media_file.variants.exists())
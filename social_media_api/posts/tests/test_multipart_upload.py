@@ -0,0 +1,210 @@
+import os
+import socket
+from datetime import timedelta
+from unittest.mock import patch
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from posts.models import MediaFile, MultipartUpload
+from posts.multipart_upload import MIN_PART_SIZE, abort_stale_uploads
+from s3_server import MotoS3ServerMixin
+
+BUCKET = 'upload-media'
+PART_SIZE = MIN_PART_SIZE
+
+
+def put_part(url, data):
+    response = requests.put(url, data=data, timeout=30)
+    response.raise_for_status()
+
+
+def put_part_interrupted(url, data):
+    """Send the headers and half the body of a part PUT, then drop the connection"""
+    parts = urlsplit(url)
+    with socket.create_connection((parts.hostname, parts.port), timeout=30) as sock:
+        sock.sendall(
+            f"PUT {parts.path}?{parts.query} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+            f"Content-Length: {len(data)}\r\n\r\n".encode() + data[:len(data) // 2]
+        )
+
+
+@pytest.mark.s3
+class MultipartUploadTest(MotoS3ServerMixin, TestCase):
+    """Resumable uploads against a local S3 stand-in"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.s3.create_bucket(Bucket=BUCKET)
+        settings_override = self.s3_settings(
+            AWS_STORAGE_BUCKET_NAME=BUCKET, MULTIPART_UPLOAD_CONFIG={'part_size': PART_SIZE, 'url_batch_size': 2}
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = get_user_model().objects.create_user(username='uploader', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.data = os.urandom(2 * PART_SIZE + 1234)
+
+    def start(self, **overrides):
+        body = {'file_name': 'match.mp4', 'content_type': 'video/mp4', 'file_size': len(self.data), **overrides}
+        return self.client.post(reverse('post:multipart-upload-list'), body, format='json')
+
+    def chunk(self, part_number):
+        return self.data[(part_number - 1) * PART_SIZE:part_number * PART_SIZE]
+
+    def test_interrupted_upload_resumes_with_missing_parts(self):
+        """A dropped part is reported missing and only it is sent again"""
+        response = self.start()
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.data['id']
+        self.assertEqual(response.data['part_count'], 3)
+        self.assertEqual([url['part_number'] for url in response.data['part_urls']], [1, 2])
+
+        urls = {url['part_number']: url['url'] for url in response.data['part_urls']}
+        put_part(urls[1], self.chunk(1))
+        put_part_interrupted(urls[2], self.chunk(2))
+
+        status = self.client.get(reverse('post:multipart-upload-detail', args=[upload_id]))
+        self.assertEqual(status.data['uploaded_parts'], [1])
+        self.assertEqual(status.data['missing_parts'], [2, 3])
+        self.assertEqual(status.data['uploaded_bytes'], PART_SIZE)
+
+        complete_url = reverse('post:multipart-upload-complete', args=[upload_id])
+        early = self.client.post(complete_url)
+        self.assertEqual(early.status_code, 409)
+        self.assertEqual(early.data['missing_parts'], [2, 3])
+
+        # Resume: the next batch is exactly the missing parts
+        batch = self.client.post(reverse('post:multipart-upload-parts', args=[upload_id]), {}, format='json')
+        self.assertEqual([url['part_number'] for url in batch.data['part_urls']], [2, 3])
+        self.assertEqual(batch.data['part_urls'][1]['size'], 1234)
+        for url in batch.data['part_urls']:
+            put_part(url['url'], self.chunk(url['part_number']))
+
+        completed = self.client.post(complete_url)
+        self.assertEqual(completed.status_code, 200)
+        self.assertEqual(completed.data['status'], 'completed')
+
+        stored = self.s3.get_object(Bucket=BUCKET, Key=completed.data['key'])
+        self.assertEqual(stored['ContentType'], 'video/mp4')
+        self.assertEqual(stored['Body'].read(), self.data)
+
+    def test_truncated_part_is_not_counted(self):
+        """A part that landed short of its expected size must be sent again"""
+        response = self.start()
+        upload_id = response.data['id']
+        part_urls = self.client.post(
+            reverse('post:multipart-upload-parts', args=[upload_id]), {'part_numbers': [1, 2, 3]}, format='json'
+        ).data['part_urls']
+        put_part(part_urls[0]['url'], self.chunk(1)[:-10])
+        put_part(part_urls[1]['url'], self.chunk(2))
+        put_part(part_urls[2]['url'], self.chunk(3))
+
+        status = self.client.get(reverse('post:multipart-upload-detail', args=[upload_id]))
+        self.assertEqual(status.data['missing_parts'], [1])
+
+        bad_numbers = self.client.post(
+            reverse('post:multipart-upload-parts', args=[upload_id]), {'part_numbers': [4]}, format='json'
+        )
+        self.assertEqual(bad_numbers.status_code, 400)
+
+    def test_abort_frees_parts(self):
+        response = self.start()
+        upload = MultipartUpload.objects.get(id=response.data['id'])
+        put_part(response.data['part_urls'][0]['url'], self.chunk(1))
+
+        aborted = self.client.post(reverse('post:multipart-upload-abort', args=[upload.id]))
+        self.assertEqual(aborted.data['status'], 'aborted')
+        self.assertEqual(self.s3.list_multipart_uploads(Bucket=BUCKET).get('Uploads', []), [])
+        self.assertEqual(self.client.post(reverse('post:multipart-upload-complete', args=[upload.id])).status_code, 409)
+
+        other = get_user_model().objects.create_user(username='other', password='pw')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(reverse('post:multipart-upload-detail', args=[upload.id])).status_code, 404)
+
+    def test_stale_uploads_aborted(self):
+        fresh = self.start().data['id']
+        stale = self.start().data['id']
+        MultipartUpload.objects.filter(id=stale).update(created_at=timezone.now() - timedelta(days=2))
+
+        self.assertEqual(abort_stale_uploads(), 1)
+        self.assertEqual(MultipartUpload.objects.get(id=stale).status, 'aborted')
+        self.assertEqual(MultipartUpload.objects.get(id=fresh).status, 'active')
+
+    def test_rejects_invalid_uploads(self):
+        self.assertEqual(self.start(content_type='application/zip').status_code, 400)
+        self.assertEqual(self.start(file_size=0).status_code, 400)
+        self.assertEqual(self.start(file_size='').status_code, 400)
+
+    @patch('posts.views.posts.queue_video_processing')
+    def test_create_post_accepts_completed_upload_only(self, queue_video_processing):
+        response = self.start()
+        upload_id, key = response.data['id'], response.data['key']
+        create_url = reverse('post:create-post')
+
+        pending = self.client.post(create_url, {'content': 'Last minute winner', 'media_keys': [key]}, format='json')
+        self.assertEqual(pending.status_code, 400)
+
+        urls = self.client.post(
+            reverse('post:multipart-upload-parts', args=[upload_id]), {'part_numbers': [1, 2, 3]}, format='json'
+        ).data['part_urls']
+        for url in urls:
+            put_part(url['url'], self.chunk(url['part_number']))
+        self.assertEqual(self.client.post(reverse('post:multipart-upload-complete', args=[upload_id])).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            created = self.client.post(
+                create_url, {'content': 'Last minute winner', 'media_keys': [key]}, format='json'
+            )
+        self.assertEqual(created.status_code, 201)
+        media_file = MediaFile.objects.get()
+        self.assertEqual((media_file.file_size, media_file.mime_type), (len(self.data), 'video/mp4'))
+        queue_video_processing.assert_called_once_with(media_file.id, key, file_size=len(self.data))
+
+    def test_batch_issues_every_upload_url_in_one_request(self):
+        """Small files get PUT URLs and large ones resumable sessions, all from one request"""
+        files = [
+            {'file_name': f'photo{index}.jpg', 'content_type': 'image/jpeg', 'file_size': 200 * 1024}
+            for index in range(3)
+        ] + [{'file_name': 'match.mp4', 'content_type': 'video/mp4', 'file_size': len(self.data)}]
+
+        with self.settings(MULTIPART_UPLOAD_CONFIG={'part_size': PART_SIZE, 'multipart_threshold': PART_SIZE}):
+            response = self.client.post(reverse('post:get-upload-urls'), {'files': files}, format='json')
+        self.assertEqual(response.status_code, 200)
+        uploads = response.data['uploads']
+        self.assertEqual([upload['file_name'] for upload in uploads], [entry['file_name'] for entry in files])
+        self.assertEqual(len({upload['key'] for upload in uploads}), 4)
+
+        put_part(uploads[0]['upload_url'], b'jpeg bytes')
+        self.assertEqual(self.s3.get_object(Bucket=BUCKET, Key=uploads[0]['key'])['Body'].read(), b'jpeg bytes')
+
+        session = uploads[3]['multipart']
+        self.assertNotIn('upload_url', uploads[3])
+        self.assertEqual(session['part_count'], 3)
+        self.assertEqual(MultipartUpload.objects.get().key, uploads[3]['key'])
+
+    def test_batch_rejects_whole_request_on_any_invalid_file(self):
+        files = [
+            {'file_name': 'photo.jpg', 'content_type': 'image/jpeg'},
+            {'file_name': 'notes.pdf', 'content_type': 'application/pdf'},
+            {'file_name': 'huge.mp4', 'content_type': 'video/mp4', 'file_size': 'big'},
+        ]
+        response = self.client.post(reverse('post:get-upload-urls'), {'files': files}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.data['files']], [1, 2])
+
+        too_many = [{'file_name': 'photo.jpg', 'content_type': 'image/jpeg'}] * 5
+        self.assertEqual(
+            self.client.post(reverse('post:get-upload-urls'), {'files': too_many}, format='json').status_code, 400
+        )
+        self.assertFalse(MultipartUpload.objects.exists())
@@ -0,0 +1,60 @@
+import os
+from io import BytesIO
+from unittest.mock import patch
+
+import boto3
+import pytest
+from django.conf import settings
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.s3_utils import get_s3_manager, upload_media_batch
+from s3_server import MotoS3ServerMixin
+
+
+@pytest.mark.s3
+class S3TransferTest(MotoS3ServerMixin, TestCase):
+    """Pooled client, multipart transfer config and concurrent batch uploads against a moto server"""
+
+    def test_batch_upload_sends_every_variant(self):
+        """upload_media_batch uploads all objects, using multipart above the threshold, and records stats"""
+        large = os.urandom(20 * 1024 * 1024)
+        uploads = [(BytesIO(b'x' * size), f'media/1/{name}.webp', 'image/webp')
+                   for name, size in (('thumbnail', 4096), ('preview', 65536), ('full', 262144))]
+        uploads.append((BytesIO(large), 'media/1/original.bin', 'application/octet-stream'))
+
+        with self.s3_settings(S3_TRANSFER_CONFIG={'multipart_threshold': 8 * 1024 * 1024}):
+            results = upload_media_batch(uploads)
+            stats = get_s3_manager().upload_stats.snapshot()
+
+        self.assertEqual(results, {key: True for _, key, _ in uploads})
+        preview = self.s3.head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key='media/1/preview.webp')
+        self.assertEqual((preview['ContentLength'], preview['ContentType']), (65536, 'image/webp'))
+        original = self.s3.head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key='media/1/original.bin')
+        # Multipart ETags carry the part count
+        self.assertEqual(original['ETag'].strip('"').rsplit('-', 1)[1], '3')
+
+        self.assertEqual(stats['uploads'], 4)
+        self.assertEqual(stats['failures'], 0)
+        self.assertEqual(stats['bytes'], 4096 + 65536 + 262144 + len(large))
+        self.assertGreater(stats['throughput_mbps'], 0)
+
+    def test_failed_upload_reported(self):
+        """A rejected upload returns False for its key without failing the rest of the batch"""
+        with self.s3_settings(AWS_STORAGE_BUCKET_NAME='missing-bucket'):
+            results = upload_media_batch([(BytesIO(b'data'), 'media/2/full.webp', 'image/webp')])
+            stats = get_s3_manager().upload_stats.snapshot()
+
+        self.assertEqual(results, {'media/2/full.webp': False})
+        self.assertEqual(stats['failures'], 1)
+
+    def test_health_check_reuses_shared_client(self):
+        """Repeated health checks probe S3 through one client instead of building one per request"""
+        with self.s3_settings(USE_S3=True), patch.object(
+            boto3.session.Session, 'client', autospec=True, side_effect=boto3.session.Session.client
+        ) as make_client:
+            for _ in range(3):
+                response = self.client.get(reverse('post:health-check'))
+                self.assertEqual(response.json()['s3'], 'healthy')
+
+        self.assertEqual(make_client.call_count, 1)
@@ -0,0 +1,111 @@
+import time
+from unittest.mock import patch
+
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from posts.models import MediaFile
+from posts.tasks import extract_video_poster, process_video_file, queue_video_processing
+from social_media_api.celery import app as celery_app
+from social_media_api.task_queues import queue_stats, record_task, video_queue, worker_command
+
+
+class TaskRoutingTest(TestCase):
+    """Tasks land on their dedicated queues; video transcodes are routed by size"""
+
+    def route(self, name):
+        return celery_app.amqp.router.route({}, name)['queue'].name
+
+    def test_tasks_routed_to_dedicated_queues(self):
+        self.assertEqual(self.route('posts.tasks.process_image_file'), 'media-fast')
+        self.assertEqual(self.route('posts.tasks.extract_video_poster'), 'media-fast')
+        self.assertEqual(self.route('posts.tasks.process_video_file'), 'media-heavy')
+        self.assertEqual(self.route('sports.tasks.refresh_all_sports_data'), 'sports-sync')
+        self.assertEqual(self.route('sports.tasks.update_team_schedules'), 'sports-sync')
+        self.assertEqual(self.route('sports.tasks.refresh_swr_cache'), 'celery')
+        self.assertEqual(self.route('posts.tasks.refresh_trending_posts'), 'analytics')
+        self.assertEqual(self.route('accounts.tasks.compute_follow_suggestions'), 'analytics')
+        self.assertEqual(self.route('social_media_api.celery.debug_task'), 'celery')
+
+    @override_settings(TASK_QUEUE_CONFIG={'heavy_video_bytes': 50 * 1024 * 1024})
+    def test_videos_routed_by_size(self):
+        """Short clips stay on media-fast; large and unknown-size uploads go to media-heavy"""
+        self.assertEqual(video_queue(8 * 1024 * 1024), 'media-fast')
+        self.assertEqual(video_queue(500 * 1024 * 1024), 'media-heavy')
+        self.assertEqual(video_queue(0), 'media-heavy')
+        self.assertEqual(video_queue(None), 'media-heavy')
+
+        small = MediaFile.objects.create(file_name='clip.mp4', file_size=4 * 1024 * 1024, mime_type='video/mp4',
+                                         media_type='video')
+        queues = []
+        with patch.object(extract_video_poster, 'apply_async'), \
+                patch.object(process_video_file, 'apply_async', side_effect=lambda args, queue: queues.append(queue)), \
+                patch('posts.tasks.get_s3_manager') as s3_manager:
+            s3_manager.return_value.get_object_size.return_value = 700 * 1024 * 1024
+            queue_video_processing(small.id)
+            queue_video_processing(small.id, 'uploads/1/long.mp4')
+
+        self.assertEqual(queues, ['media-fast', 'media-heavy'])
+        s3_manager.return_value.get_object_size.assert_called_once_with('uploads/1/long.mp4')
+
+    def test_worker_commands_apply_queue_settings(self):
+        """Heavy queues get one task per process and fair scheduling; fast ones prefetch"""
+        heavy = worker_command('media-heavy')
+        self.assertEqual(heavy[heavy.index('-Q') + 1], 'media-heavy')
+        self.assertEqual(heavy[heavy.index('--prefetch-multiplier') + 1], '1')
+        self.assertIn('-O', heavy)
+        self.assertNotIn('-O', worker_command('media-fast'))
+
+
+class QueueMetricsTest(SimpleTestCase):
+    """Queue wait and run time are recorded from tasks consumed by a worker"""
+
+    def setUp(self):
+        cache.clear()
+        self.app = Celery('queue-metrics-test', broker='memory://', backend='cache+memory://')
+        self.app.conf.task_routes = {'queue_metrics_test.*': {'queue': 'media-fast'}}
+
+        @self.app.task(name='queue_metrics_test.resize')
+        def resize(seconds):
+            time.sleep(seconds)
+            return seconds
+
+        self.resize = resize
+
+    def test_worker_records_wait_and_runtime(self):
+        with start_worker(self.app, perform_ping_check=False, queues=['media-fast']):
+            results = [self.resize.delay(0.05) for _ in range(3)]
+            for result in results:
+                result.get(timeout=10)
+            # task_postrun fires after the result is stored
+            deadline = time.monotonic() + 5
+            while queue_stats(include_backlog=False)['media-fast']['completed'] < 3 and time.monotonic() < deadline:
+                time.sleep(0.05)
+
+        stats = queue_stats(include_backlog=False)['media-fast']
+        self.assertEqual(stats['completed'], 3)
+        self.assertGreaterEqual(stats['runtime_p50'], 0.05)
+        # With one solo worker the third task waits behind the first two
+        self.assertGreaterEqual(stats['wait_max'], 0.1)
+        self.assertEqual(queue_stats(include_backlog=False)['media-heavy']['completed'], 0)
+
+    def test_samples_read_before_window_fills(self):
+        """Every sample recorded so far is read back while the window is still filling"""
+        record_task('media-fast', 1.0, 2.0)
+        stats = queue_stats(include_backlog=False)['media-fast']
+        self.assertEqual((stats['completed'], stats['wait_max'], stats['runtime_p50']), (1, 1.0, 2.0))
+
+        record_task('media-fast', 3.0, 4.0)
+        self.assertEqual(queue_stats(include_backlog=False)['media-fast']['wait_max'], 3.0)
+
+    @override_settings(TASK_QUEUE_CONFIG={'metrics_window': 3})
+    def test_window_keeps_most_recent_samples(self):
+        """Each task writes its own ring-buffer slot; the completed count keeps growing past the window"""
+        for runtime in (1.0, 2.0, 3.0, 4.0, 5.0):
+            record_task('analytics', None, runtime)
+        stats = queue_stats(include_backlog=False)['analytics']
+        self.assertEqual(stats['completed'], 5)
+        self.assertEqual(stats['runtime_p50'], 4.0)
+        self.assertIsNone(stats['wait_p50'])
@@ -0,0 +1,167 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from posts.models import Post, Like, Comment
+from posts.tasks import update_trending_topics, refresh_trending_posts
+from posts.trending import TrendingEngine, CountMinSketch, extract_hashtags, get_trending_config
+from posts.trending_posts import TRENDING_POSTS_KEY
+from sports.models import League, Team
+from sports.search_index import sports_search_index
+
+User = get_user_model()
+
+
+class TrendingEngineTest(TestCase):
+    """Test the Count-Min Sketch / top-K trending engine"""
+
+    def test_extract_hashtags(self):
+        """Hashtags are deduplicated case-insensitively and keep their first spelling"""
+        self.assertEqual(
+            extract_hashtags('#NBA finals tonight #nba #LukaTripleDouble'),
+            [('#nba', '#NBA'), ('#lukatripledouble', '#LukaTripleDouble')]
+        )
+
+    def test_sketch_never_undercounts(self):
+        """Count-Min estimates are upper bounds on the true counts"""
+        sketch = CountMinSketch(64, 4)
+        counts = {f'#topic{i}': i % 7 + 1 for i in range(500)}
+        for topic, count in counts.items():
+            sketch.add(topic, count)
+        for topic, count in counts.items():
+            self.assertGreaterEqual(sketch.estimate(topic), count)
+
+    def test_heavy_hitters_per_category_with_decay(self):
+        """Recent bursts outrank older volume and categories are tracked separately"""
+        config = dict(get_trending_config(), half_life=3600, top_k=5)
+        engine = TrendingEngine(config)
+        for i in range(100):
+            engine.record('#old', '#Old', 'football', timestamp=0)
+        for i in range(40):
+            engine.record('#fresh', '#Fresh', 'football', timestamp=4 * 3600)
+        for i in range(200):
+            engine.record(f'#noise{i}', f'#Noise{i}', 'basketball', timestamp=4 * 3600)
+
+        football = engine.top('football', 2, now=4 * 3600)
+        self.assertEqual([topic for topic, _, _ in football], ['#fresh', '#old'])
+        self.assertAlmostEqual(football[1][2], 100 / 16, places=3)
+        self.assertNotIn('#fresh', [topic for topic, _, _ in engine.top('basketball', 5, now=4 * 3600)])
+        self.assertLessEqual(len(engine.categories['basketball'][1].scores), 5)
+
+    def test_categories_past_the_cap_fold_into_general(self):
+        """Once max_categories is reached new sports are counted under 'general'"""
+        config = dict(get_trending_config(), max_categories=3)
+        engine = TrendingEngine(config)
+        for sport in ('football', 'basketball', 'tennis', 'cricket'):
+            engine.record(f'#{sport}', f'#{sport.title()}', sport, timestamp=0)
+
+        self.assertEqual(set(engine.categories), {'all', 'football', 'basketball', 'general'})
+        self.assertEqual({topic for topic, _, _ in engine.top('general', 5, now=0)}, {'#tennis', '#cricket'})
+        self.assertEqual(len(engine.top('all', 5, now=0)), 4)
+
+    def test_rescale_keeps_scores(self):
+        """Moving the decay landmark does not change decayed scores"""
+        config = dict(get_trending_config(), half_life=60)
+        engine = TrendingEngine(config)
+        engine.record('#a', '#A', 'football', timestamp=0)
+        engine.record('#a', '#A', 'football', timestamp=60 * 50)  # Forces a rescale
+        [(_, _, score)] = engine.top('football', 1, now=60 * 50)
+        self.assertAlmostEqual(score, 1.0, places=6)
+
+
+class TrendingTopicsTaskTest(TestCase):
+    """Test ingestion from the database and the TrendsView snapshot"""
+
+    def setUp(self):
+        cache.clear()
+        sports_search_index.reset()
+        league = League.objects.create(name='La Liga', sport='football', description='Spain')
+        Team.objects.create(name='Real Madrid', league=league, description='Madrid')
+        self.author = User.objects.create_user(username='fan', email='fan@test.com', password='password123')
+        self.fan = User.objects.create_user(username='fan2', email='fan2@test.com', password='password123')
+
+    def tearDown(self):
+        cache.clear()
+        sports_search_index.reset()
+
+    def test_task_builds_snapshot_served_by_trends_view(self):
+        """Posts and likes feed per-sport trends that TrendsView returns from the cache"""
+        Post.objects.create(author=self.author, title='', content='#Throwback', created_at=timezone.now() - timedelta(days=3))
+        post = Post.objects.create(author=self.author, title='', content='Real Madrid win again #HalaMadrid')
+        Post.objects.create(author=self.author, title='', content='What a game #HalaMadrid')
+        Like.objects.create(user=self.fan, post=post)
+
+        update_trending_topics()
+
+        client = APIClient()
+        trends = client.get(reverse('trends')).data
+        topics = [trend['topic'] for trend in trends]
+        self.assertEqual(topics[0], '#HalaMadrid')
+        self.assertIn('Real Madrid', topics)
+        self.assertNotIn('#Throwback', topics)  # Outside the bootstrap window
+
+        football = client.get(reverse('trends'), {'category': 'football'}).data
+        self.assertEqual(football[0]['category'], 'Trending in Football')
+        self.assertEqual([trend['topic'] for trend in football], ['#HalaMadrid', 'Real Madrid'])
+
+        # Only new rows are consumed on the next run
+        Post.objects.create(author=self.author, title='', content='#HalaMadrid again')
+        update_trending_topics()
+        trends = client.get(reverse('trends')).data
+        self.assertEqual(trends[0]['score'], 3)
+
+    def test_trends_view_without_snapshot(self):
+        """Before the engine first runs the view returns an empty list"""
+        response = APIClient().get(reverse('trends'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [])
+
+
+class TrendingPostsRankingTest(TestCase):
+    """Test the materialized trending post ranking behind TrendingSidebarView"""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='poster', email='poster@test.com', password='password123')
+        self.fan = User.objects.create_user(username='reader', email='reader@test.com', password='password123')
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_ranking_decays_with_age_and_rewards_recent_activity(self):
+        """Fresh engagement outranks larger but older totals; posts without engagement are left out"""
+        old = Post.objects.create(author=self.author, title='', content='Old hit', likes_count=40,
+                                  created_at=timezone.now() - timedelta(hours=48))
+        fresh = Post.objects.create(author=self.author, title='', content='New hit', likes_count=5)
+        active = Post.objects.create(author=self.author, title='', content='Busy thread', comments_count=1,
+                                     created_at=timezone.now() - timedelta(hours=6))
+        Comment.objects.create(author=self.fan, post=active, content='Great point')
+        Post.objects.create(author=self.author, title='', content='Nobody saw this')
+        Post.objects.create(author=self.author, title='', content='Ancient', likes_count=500,
+                            created_at=timezone.now() - timedelta(days=30))
+
+        self.assertEqual(refresh_trending_posts(), 3)
+        self.assertEqual(cache.get(TRENDING_POSTS_KEY)['post_ids'], [fresh.id, active.id, old.id])
+
+    def test_sidebar_reads_ranking_in_order(self):
+        """The view serves the stored ranking order without aggregating interactions"""
+        first = Post.objects.create(author=self.author, title='', content='First', likes_count=3)
+        second = Post.objects.create(author=self.author, title='', content='Second', likes_count=9)
+        cache.set(TRENDING_POSTS_KEY, {'generated_at': '', 'post_ids': [first.id, second.id], 'scores': {}}, None)
+
+        response = APIClient().get(reverse('post:trends-sidebar'))
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual([post['id'] for post in results], [first.id, second.id])
+
+    def test_sidebar_computes_ranking_when_missing(self):
+        """Before the first refresh the view builds the ranking inline"""
+        post = Post.objects.create(author=self.author, title='', content='Only one', likes_count=1)
+        response = APIClient().get(reverse('post:trends-sidebar'))
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual([item['id'] for item in results], [post.id])
+        self.assertIsNotNone(cache.get(TRENDING_POSTS_KEY))
@@ -0,0 +1,153 @@
+import os
+import shutil
+import subprocess
+import tempfile
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from posts.hls import get_ffmpeg_binary
+from posts.models import MediaFile, Post
+from posts.tasks import extract_video_poster, process_video_file, queue_video_processing
+from posts.video_poster import build_poster_command, extract_poster_frame
+from s3_server import MotoS3ServerMixin
+
+
+def make_two_colour_clip(path, seconds_each=5):
+    """Red for the first half, blue for the second, with a keyframe every second"""
+    subprocess.run([
+        get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y',
+        '-f', 'lavfi', '-i', f'color=red:size=640x360:rate=25:duration={seconds_each}',
+        '-f', 'lavfi', '-i', f'color=blue:size=640x360:rate=25:duration={seconds_each}',
+        '-filter_complex', '[0:v][1:v]concat=n=2:v=1:a=0',
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-g', '25', '-pix_fmt', 'yuv420p', path
+    ], check=True)
+
+
+def is_blue(image):
+    red, _, blue = image.getpixel((image.width // 2, image.height // 2))
+    return blue > 150 and red < 100
+
+
+class PosterFrameTest(TestCase):
+    """Keyframe-seeking poster extraction and the poster task"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.work_dir = tempfile.mkdtemp()
+        cls.source = os.path.join(cls.work_dir, 'clip.mp4')
+        make_two_colour_clip(cls.source)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir)
+        super().tearDownClass()
+
+    def test_seeks_input_to_keyframe(self):
+        """The seek is applied before the input and only keyframes are decoded"""
+        command = build_poster_command('clip.mp4', 1.0, 320, 180)
+        self.assertLess(command.index('-ss'), command.index('-i'))
+        self.assertLess(command.index('-skip_frame'), command.index('-i'))
+        self.assertIn('-noaccurate_seek', command)
+
+    def test_frame_taken_at_requested_time(self):
+        """Frames come from the requested point, scaled to fit the box; past-the-end times fall back to the start"""
+        early = extract_poster_frame(self.source, 1.0, 320, 180)
+        late = extract_poster_frame(self.source, 7.0, 320, 180)
+        past_end = extract_poster_frame(self.source, 60.0, 320, 180)
+
+        self.assertEqual(early.size, (320, 180))
+        self.assertFalse(is_blue(early))
+        self.assertTrue(is_blue(late))
+        self.assertFalse(is_blue(past_end))
+
+        with self.assertRaises(RuntimeError):
+            extract_poster_frame(os.path.join(self.work_dir, 'missing.mp4'), 1.0, 320, 180)
+
+    @patch('posts.tasks.get_media_url', side_effect=lambda key: f'https://cdn.example.com/{key}')
+    @patch('posts.tasks.upload_media_to_s3', return_value=True)
+    def test_poster_task_publishes_thumbnail_before_transcode(self, upload, get_media_url):
+        """The post shows the poster while the video itself is still unprocessed"""
+        media_root = os.path.join(self.work_dir, 'media')
+        os.makedirs(os.path.join(media_root, 'media/original'), exist_ok=True)
+        shutil.copy(self.source, os.path.join(media_root, 'media/original/clip.mp4'))
+        media_file = MediaFile.objects.create(
+            original_file='media/original/clip.mp4', file_name='clip.mp4', file_size=os.path.getsize(self.source),
+            mime_type='video/mp4', media_type='video'
+        )
+
+        with override_settings(MEDIA_ROOT=media_root):
+            self.assertTrue(extract_video_poster(media_file.id))
+
+        media_file.refresh_from_db()
+        poster_url = f'https://cdn.example.com/media/{media_file.id}/thumbnail.webp'
+        self.assertEqual(media_file.video_thumbnail_url, poster_url)
+        self.assertEqual(media_file.processing_status, 'pending')
+        self.assertEqual(
+            list(media_file.variants.values_list('variant_type', 'width', 'height', 'format')),
+            [('thumbnail', 320, 180, 'webp')]
+        )
+        self.assertEqual(upload.call_args.args[1:], (f'media/{media_file.id}/thumbnail.webp', 'image/webp'))
+
+        post = Post.objects.create(
+            author=get_user_model().objects.create_user(username='uploader', password='pw'),
+            title='Clip', content='Clip', media_file=media_file
+        )
+        self.assertEqual(post.thumbnail_url, poster_url)
+        self.assertFalse(post.is_media_processed)
+
+    @patch('posts.tasks.extract_poster_frame')
+    def test_poster_skipped_for_linked_duplicate(self, extract):
+        """A clip the transcode already linked to an earlier copy keeps that copy's poster"""
+        canonical = MediaFile.objects.create(
+            file_name='clip.mp4', file_size=1, mime_type='video/mp4', media_type='video',
+            processing_status='completed', video_thumbnail_url='https://cdn.example.com/media/1/thumbnail.webp'
+        )
+        duplicate = MediaFile.objects.create(
+            file_name='clip.mp4', file_size=1, mime_type='video/mp4', media_type='video', duplicate_of=canonical,
+            video_thumbnail_url=canonical.video_thumbnail_url
+        )
+
+        self.assertFalse(extract_video_poster(duplicate.id, 'uploads/1/clip.mp4'))
+        extract.assert_not_called()
+        self.assertFalse(duplicate.variants.exists())
+
+    def test_poster_queued_ahead_of_transcode(self):
+        """queue_video_processing sends the poster task first, at the configured high priority"""
+        calls = []
+        with patch.object(extract_video_poster, 'apply_async', side_effect=lambda *a, **kw: calls.append(('poster', a, kw))), \
+                patch.object(process_video_file, 'apply_async', side_effect=lambda *a, **kw: calls.append(('transcode', a, kw))):
+            queue_video_processing(7, 'uploads/1/clip.mp4', file_size=1024)
+
+        self.assertEqual(calls, [
+            ('poster', ((7, 'uploads/1/clip.mp4'),), {'priority': 0}),
+            ('transcode', ((7, 'uploads/1/clip.mp4'),), {'queue': 'media-fast'}),
+        ])
+
+
+@pytest.mark.s3
+class S3PosterFrameTest(MotoS3ServerMixin, TestCase):
+    """Posters of S3 originals are read through a presigned URL"""
+
+    def test_poster_read_without_downloading_original(self):
+        """ffmpeg range-reads the S3 object; the original is never streamed to a temp file"""
+        # moto rejects unsigned-client reads from bucket names with underscores, such as the test default
+        bucket = 'poster-media'
+        self.s3.create_bucket(Bucket=bucket)
+        with tempfile.TemporaryDirectory() as work_dir:
+            source = os.path.join(work_dir, 'clip.mp4')
+            make_two_colour_clip(source)
+            self.s3.upload_file(source, bucket, 'uploads/1/clip.mp4')
+
+        media_file = MediaFile.objects.create(file_name='clip.mp4', file_size=0, mime_type='video/mp4', media_type='video')
+        with self.s3_settings(AWS_STORAGE_BUCKET_NAME=bucket), \
+                patch('posts.tasks.download_media_to_tempfile', side_effect=AssertionError):
+            self.assertTrue(extract_video_poster(media_file.id, 'uploads/1/clip.mp4'))
+
+        media_file.refresh_from_db()
+        self.assertTrue(media_file.video_thumbnail_url.endswith(f'media/{media_file.id}/thumbnail.webp'))
+        thumbnail = self.s3.head_object(Bucket=bucket, Key=f'media/{media_file.id}/thumbnail.webp')
+        self.assertEqual(thumbnail['ContentType'], 'image/webp')
@@ -176,6 +176,15 @@ class SearchThrottle(UserRateThrottle):
     rate = '30/minute'  # Allow 30 searches per minute
 
 
+class TypeaheadThrottle(UserRateThrottle):
+    """
+    Throttling for keystroke-by-keystroke typeahead lookups.
+    Each keystroke is one request, so the limit is well above SearchThrottle.
+    """
+    scope = 'typeahead'
+    rate = '120/minute'  # Allow 120 typeahead lookups per minute
+
+
 class AnalyticsThrottle(UserRateThrottle):
     """
     Throttling for analytics endpoints.
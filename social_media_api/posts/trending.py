@@ -0,0 +1,301 @@
+import hashlib
+import logging
+import re
+import time
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+TRENDING_ENGINE_KEY = 'trending_engine_state'
+TRENDING_SNAPSHOT_KEY = 'trending_topics_snapshot'
+TRENDING_LOCK_KEY = 'trending_engine_lock'
+
+ALL_CATEGORY = 'all'
+GENERAL_CATEGORY = 'general'
+
+DEFAULT_TRENDING_CONFIG = {
+    'sketch_width': 2048,          # Count-Min Sketch counters per row
+    'sketch_depth': 4,             # Rows (independent hashes)
+    'top_k': 50,                   # Heavy hitters tracked per category
+    'half_life': 6 * 3600,         # Seconds for an occurrence to lose half its weight
+    'snapshot_size': 10,           # Trends stored per category in the snapshot
+    'max_categories': 32,          # Sports categories tracked before folding into 'general'
+    'max_events_per_run': 50000,   # Rows consumed per table each engine run
+    'bootstrap_window': 86400,     # Seconds of history replayed when no state exists
+    'event_weights': {
+        'post': 1.0,
+        'comment': 0.5,
+        'repost': 1.0,
+        'like': 0.2,
+    },
+}
+
+HASHTAG_RE = re.compile(r'#(\w{2,100})')
+
+
+def get_trending_config():
+    """Return trending settings merged over the defaults."""
+    config = dict(DEFAULT_TRENDING_CONFIG)
+    config.update(getattr(settings, 'TRENDING_CONFIG', {}))
+    return config
+
+
+def extract_hashtags(text):
+    """Return the distinct hashtags in text as (key, display) pairs, e.g. ('#nba', '#NBA')."""
+    seen, hashtags = set(), []
+    for tag in HASHTAG_RE.findall(text or ''):
+        key = f"#{tag.casefold()}"
+        if key not in seen:
+            seen.add(key)
+            hashtags.append((key, f"#{tag}"))
+    return hashtags
+
+
+class CountMinSketch:
+    """
+    Fixed-size frequency sketch. Estimates never undercount; with conservative
+    update the overcount is at most total_weight * e / width with probability
+    1 - exp(-depth). Hashing is stable across processes so state can be pickled.
+    """
+
+    def __init__(self, width, depth):
+        self.width = width
+        self.depth = depth
+        self.rows = [array('d', [0.0]) * width for _ in range(depth)]
+
+    def _columns(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + row * second) % self.width for row in range(self.depth)]
+
+    def add(self, item, weight):
+        """Add weight to item and return its new estimate (conservative update)."""
+        columns = self._columns(item)
+        rows = self.rows
+        target = min(rows[row][column] for row, column in enumerate(columns)) + weight
+        for row, column in enumerate(columns):
+            if rows[row][column] < target:
+                rows[row][column] = target
+        return target
+
+    def estimate(self, item):
+        return min(self.rows[row][column] for row, column in enumerate(self._columns(item)))
+
+    def scale(self, factor):
+        for row in self.rows:
+            for column in range(self.width):
+                row[column] *= factor
+
+
+class TopK:
+    """Heavy-hitter candidates with their latest sketch estimates and display labels."""
+
+    def __init__(self, k):
+        self.k = k
+        self.scores = {}
+        self.labels = {}
+        self._floor = 0.0  # Lower bound on the smallest tracked score
+
+    def offer(self, item, label, score):
+        if item in self.scores:
+            self.scores[item] = score
+            return
+        if len(self.scores) < self.k:
+            self.scores[item] = score
+            self.labels[item] = label
+            return
+        if score <= self._floor:
+            return
+        weakest = min(self.scores, key=self.scores.get)
+        self._floor = self.scores[weakest]
+        if score > self._floor:
+            del self.scores[weakest]
+            del self.labels[weakest]
+            self.scores[item] = score
+            self.labels[item] = label
+            self._floor = min(self.scores.values())
+
+    def scale(self, factor):
+        for item in self.scores:
+            self.scores[item] *= factor
+        self._floor *= factor
+
+    def top(self, limit):
+        ranked = sorted(self.scores.items(), key=lambda entry: entry[1], reverse=True)
+        return [(item, self.labels[item], score) for item, score in ranked[:limit]]
+
+
+class TrendingEngine:
+    """
+    Time-decayed heavy hitters per sport category.
+
+    Each category holds a Count-Min Sketch plus a top-K candidate set, so
+    memory is fixed no matter how many distinct topics are seen. Decay uses
+    forward decay: an occurrence at time t is added with weight
+    2 ** ((t - landmark) / half_life), and reads divide by the same factor
+    taken at the read time. Every counter then decays at the same rate
+    without being touched. When the weights grow large, every structure is
+    rescaled and the landmark moves forward.
+    """
+
+    RESCALE_EXPONENT = 40
+
+    def __init__(self, config=None):
+        config = config or get_trending_config()
+        self.width = config['sketch_width']
+        self.depth = config['sketch_depth']
+        self.top_k = config['top_k']
+        self.half_life = config['half_life']
+        self.max_categories = config['max_categories']
+        self.landmark = None
+        self.categories = {}
+        self.watermarks = {}
+        self.events = 0
+
+    def _category(self, name):
+        state = self.categories.get(name)
+        if state is None:
+            # 'all' and 'general' are always tracked; only sports categories count towards the cap
+            if name not in (ALL_CATEGORY, GENERAL_CATEGORY) and len(self.categories) >= self.max_categories:
+                return self._category(GENERAL_CATEGORY)
+            state = self.categories[name] = (CountMinSketch(self.width, self.depth), TopK(self.top_k))
+        return state
+
+    def _weight(self, timestamp):
+        if self.landmark is None:
+            self.landmark = timestamp
+        exponent = (timestamp - self.landmark) / self.half_life
+        if exponent > self.RESCALE_EXPONENT:
+            factor = 2 ** -exponent
+            for sketch, top in self.categories.values():
+                sketch.scale(factor)
+                top.scale(factor)
+            self.landmark = timestamp
+            exponent = 0
+        return 2 ** exponent
+
+    def record(self, topic, label, category, weight=1.0, timestamp=None):
+        """Count one occurrence of topic in category (and in the 'all' category)."""
+        decayed = weight * self._weight(timestamp if timestamp is not None else time.time())
+        self.events += 1
+        for name in {ALL_CATEGORY, category or GENERAL_CATEGORY}:
+            sketch, top = self._category(name)
+            top.offer(topic, label, sketch.add(topic, decayed))
+
+    def top(self, category=ALL_CATEGORY, limit=10, now=None):
+        """Return [(topic, label, decayed_score)] for a category, highest first."""
+        if category not in self.categories or self.landmark is None:
+            return []
+        now = now if now is not None else time.time()
+        scale = 2 ** (-(now - self.landmark) / self.half_life)
+        return [(topic, label, score * scale) for topic, label, score in self.categories[category][1].top(limit)]
+
+    def snapshot(self, limit=10, now=None):
+        """Serializable trends per category, shaped like the TrendsView response."""
+        now = now if now is not None else time.time()
+        categories = {}
+        for name in self.categories:
+            trends = []
+            for rank, (topic, label, score) in enumerate(self.top(name, limit, now), start=1):
+                if score < 0.5:
+                    break
+                trends.append({
+                    'id': topic,
+                    'rank': rank,
+                    'category': 'Trending' if name in (ALL_CATEGORY, GENERAL_CATEGORY) else f"Trending in {name.title()}",
+                    'sport': name,
+                    'topic': label,
+                    # Decayed, event-weighted activity, not a number of posts
+                    'score': int(round(score)),
+                })
+            categories[name] = trends
+        return {'generated_at': now, 'categories': categories}
+
+
+def _post_topics(content, title=''):
+    """Return ([(topic, label)], category) for a post's hashtags and sports entity mentions."""
+    from sports.search_index import sports_search_index
+
+    text = f"{title or ''} {content or ''}"
+    topics = extract_hashtags(text)
+    mentions = sports_search_index.find_mentions(HASHTAG_RE.sub(' ', text))
+    for entity in mentions:
+        name = entity.get('name') or f"{entity.get('first_name', '')} {entity.get('last_name', '')}".strip()
+        topics.append((f"{entity['type']}:{entity['id']}", name))
+    sports = [entity['sport'].casefold() for entity in mentions if entity.get('sport')]
+    return topics, sports[0] if sports else GENERAL_CATEGORY
+
+
+def _new_rows(queryset, watermark, limit):
+    return list(queryset.filter(id__gt=watermark).order_by('id')[:limit])
+
+
+def update_trending_engine():
+    """
+    Feed posts, comments, reposts and likes created since the last run into
+    the engine, then write a fresh snapshot. Engine state (sketches, top-K
+    sets and per-table watermarks) lives in the cache between runs, and a
+    cache lock keeps a single writer.
+    """
+    from datetime import datetime, timezone as dt_timezone
+    from .models import Post, Comment, Repost, Like
+
+    config = get_trending_config()
+    if not cache.add(TRENDING_LOCK_KEY, 1, 300):
+        logger.info("Trending engine update already running; skipping")
+        return None
+
+    try:
+        engine = cache.get(TRENDING_ENGINE_KEY) or TrendingEngine(config)
+        limit = config['max_events_per_run']
+        weights = config['event_weights']
+
+        if not engine.watermarks:
+            # First run: replay only the bootstrap window
+            since = datetime.fromtimestamp(time.time() - config['bootstrap_window'], tz=dt_timezone.utc)
+            for name, model in (('post', Post), ('comment', Comment), ('repost', Repost), ('like', Like)):
+                first = model.objects.filter(created_at__gte=since).order_by('id').values_list('id', flat=True).first()
+                last = model.objects.order_by('-id').values_list('id', flat=True).first() or 0
+                engine.watermarks[name] = first - 1 if first is not None else last
+
+        events = []
+        posts = _new_rows(Post.objects.only('id', 'title', 'content', 'created_at'), engine.watermarks['post'], limit)
+        events += [('post', post.id, post.created_at) for post in posts]
+        topic_cache = {post.id: _post_topics(post.content, post.title) for post in posts}
+
+        for name, model in (('comment', Comment), ('repost', Repost), ('like', Like)):
+            post_field = 'original_post_id' if model is Repost else 'post_id'
+            rows = _new_rows(model.objects.only('id', post_field, 'created_at'), engine.watermarks[name], limit)
+            events += [(name, getattr(row, post_field), row.created_at) for row in rows]
+            if rows:
+                engine.watermarks[name] = rows[-1].id
+        if posts:
+            engine.watermarks['post'] = posts[-1].id
+
+        missing = {post_id for _, post_id, _ in events if post_id not in topic_cache}
+        for post in Post.objects.filter(id__in=missing).only('id', 'title', 'content'):
+            topic_cache[post.id] = _post_topics(post.content, post.title)
+
+        # Replay in time order so decay weights grow monotonically
+        events.sort(key=lambda event: event[2])
+        for kind, post_id, created_at in events:
+            topics, category = topic_cache.get(post_id, ([], GENERAL_CATEGORY))
+            for topic, label in topics:
+                engine.record(topic, label, category, weights[kind], created_at.timestamp())
+
+        snapshot = engine.snapshot(config['snapshot_size'])
+        cache.set(TRENDING_ENGINE_KEY, engine, None)
+        cache.set(TRENDING_SNAPSHOT_KEY, snapshot, None)
+        logger.info(f"Trending engine consumed {len(events)} events")
+        return snapshot
+    finally:
+        cache.delete(TRENDING_LOCK_KEY)
+
+
+def get_trending_snapshot():
+    """Latest snapshot written by the engine, or None before the first run."""
+    return cache.get(TRENDING_SNAPSHOT_KEY)
@@ -0,0 +1,110 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TRENDING_POSTS_KEY = 'trending_posts_ranking'
+TRENDING_POSTS_LOCK_KEY = 'trending_posts_ranking_lock'
+
+DEFAULT_TRENDING_POSTS_CONFIG = {
+    'window_hours': 72,            # Only posts this recent, or with recent interactions, are ranked
+    'rate_window_minutes': 60,     # Interactions in this window form the recent interaction rate
+    'max_candidates': 5000,        # Candidates scored per refresh, by raw engagement
+    'ranking_size': 50,            # Post IDs kept in the stored ranking
+    'gravity': 1.5,                # Age decay exponent: score / (age_hours + 2) ** gravity
+    'rate_weight': 4.0,            # Weight of one recent interaction per hour vs one lifetime interaction
+    'counter_weights': {
+        'likes_count': 1.0,
+        'comments_count': 2.0,
+        'reposts_count': 3.0,
+        'shares_count': 3.0,
+    },
+}
+
+
+def get_trending_posts_config():
+    """Return trending post ranking settings merged over the defaults."""
+    config = dict(DEFAULT_TRENDING_POSTS_CONFIG)
+    config.update(getattr(settings, 'TRENDING_POSTS_CONFIG', {}))
+    return config
+
+
+def _recent_interactions(since):
+    """Return {post_id: interactions since `since`} across likes, comments and reposts."""
+    from .models import Like, Comment, Repost
+
+    counts = {}
+    sources = (
+        (Like.objects.filter(created_at__gte=since), 'post_id'),
+        (Comment.objects.filter(created_at__gte=since), 'post_id'),
+        (Repost.objects.filter(created_at__gte=since), 'original_post_id'),
+    )
+    for queryset, post_field in sources:
+        for row in queryset.values(post_field).annotate(total=Count('id')):
+            counts[row[post_field]] = counts.get(row[post_field], 0) + row['total']
+    return counts
+
+
+def score_post(counters, recent_interactions, age_hours, config):
+    """Time-decayed engagement: weighted counters plus recent rate, divided by an age penalty."""
+    engagement = sum(counters[field] * weight for field, weight in config['counter_weights'].items())
+    rate = recent_interactions / (config['rate_window_minutes'] / 60)
+    return (engagement + config['rate_weight'] * rate) / (age_hours + 2) ** config['gravity']
+
+
+def refresh_trending_posts():
+    """
+    Recompute the trending post ranking from the denormalized counters and
+    store it in the cache. Cost is bounded by the candidate window, not the
+    size of the Post table.
+    """
+    from .models import Post
+
+    config = get_trending_posts_config()
+    if not cache.add(TRENDING_POSTS_LOCK_KEY, 1, 300):
+        return cache.get(TRENDING_POSTS_KEY)
+
+    try:
+        now = timezone.now()
+        recent = _recent_interactions(now - timedelta(minutes=config['rate_window_minutes']))
+        weights = config['counter_weights']
+        raw_engagement = sum((F(field) * weight for field, weight in weights.items()), start=0)
+
+        candidates = Post.objects.filter(
+            Q(created_at__gte=now - timedelta(hours=config['window_hours'])) | Q(id__in=list(recent))
+        ).filter(
+            Q(likes_count__gt=0) | Q(comments_count__gt=0) | Q(reposts_count__gt=0) |
+            Q(shares_count__gt=0) | Q(id__in=list(recent))
+        ).annotate(
+            raw_engagement=raw_engagement
+        ).order_by('-raw_engagement').values('id', 'created_at', *weights)[:config['max_candidates']]
+
+        scored = []
+        for row in candidates:
+            age_hours = max((now - row['created_at']).total_seconds() / 3600, 0)
+            scored.append((score_post(row, recent.get(row['id'], 0), age_hours, config), row['id']))
+        scored.sort(reverse=True)
+
+        ranking = {
+            'generated_at': now.isoformat(),
+            'post_ids': [post_id for _, post_id in scored[:config['ranking_size']]],
+            'scores': {post_id: round(score, 4) for score, post_id in scored[:config['ranking_size']]},
+        }
+        cache.set(TRENDING_POSTS_KEY, ranking, None)
+        logger.info(f"Refreshed trending post ranking from {len(scored)} candidates")
+        return ranking
+    finally:
+        cache.delete(TRENDING_POSTS_LOCK_KEY)
+
+
+def get_trending_post_ids(limit=10):
+    """Ranked trending post IDs, refreshing inline only when no ranking exists yet."""
+    ranking = cache.get(TRENDING_POSTS_KEY)
+    if ranking is None:
+        ranking = refresh_trending_posts() or {'post_ids': []}
+    return ranking['post_ids'][:limit]
@@ -0,0 +1,317 @@
+import logging
+import math
+import operator
+import re
+import threading
+import time
+from collections import defaultdict
+from functools import reduce
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import BooleanField, CharField, F, FloatField, Func, Q, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, Greatest
+
+from accounts.typeahead import TYPEAHEAD_VERSION_KEY, normalize_term
+from sports.search_index import SPORTS_SEARCH_VERSION_KEY
+
+logger = logging.getLogger(__name__)
+
+FUZZY_ENTITY_TYPES = ('users', 'leagues', 'teams', 'athletes')
+
+DEFAULT_FUZZY_SEARCH_CONFIG = {
+    'similarity_threshold': 0.3,   # Same default as pg_trgm.similarity_threshold
+    'max_results': 20,
+    'min_rebuild_interval': 30,    # Seconds between in-process rebuilds of one entity type
+}
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def get_fuzzy_search_config():
+    """Return fuzzy search settings merged over the defaults."""
+    config = dict(DEFAULT_FUZZY_SEARCH_CONFIG)
+    config.update(getattr(settings, 'FUZZY_SEARCH_CONFIG', {}))
+    return config
+
+
+def trigrams(value):
+    """
+    Trigram set of a string, extracted the way pg_trgm does: each word is
+    lowercased and padded with two leading spaces and one trailing space.
+    """
+    grams = set()
+    for word in _WORD_RE.findall(normalize_term(value)):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class TrigramIndex:
+    """
+    Inverted index from trigram to the documents containing it, for one entity type.
+
+    Each entity contributes one document per searchable term (name, alias,
+    abbreviation...), and posting lists are split by document trigram count.
+    For a query of n trigrams and a document of m, similarity >= t needs at
+    least k = ceil(t * (n + m) / (1 + t)) shared trigrams, so the document must
+    appear in one of the n - k + 1 rarest size-m lists. Only those lists are
+    walked; candidates are then scored exactly with pg_trgm's similarity
+    (shared / union of trigram sets).
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(lambda: defaultdict(list))
+        self._doc_entities = []
+        self._doc_trigrams = []
+
+    def __len__(self):
+        return len(self._doc_entities)
+
+    def add(self, entity_id, term):
+        grams = trigrams(term)
+        if not grams:
+            return
+        doc_id = len(self._doc_entities)
+        self._doc_entities.append(entity_id)
+        self._doc_trigrams.append(grams)
+        for gram in grams:
+            self._postings[gram][len(grams)].append(doc_id)
+
+    def search(self, query, threshold, limit):
+        """Return [(entity_id, similarity)] best first, one row per entity."""
+        query_grams = trigrams(query)
+        if not query_grams or threshold <= 0:
+            return []
+
+        size = len(query_grams)
+        postings = [self._postings.get(gram, {}) for gram in query_grams]
+        best = {}
+
+        for doc_size in range(math.ceil(threshold * size), math.floor(size / threshold) + 1):
+            required = math.ceil(threshold * (size + doc_size) / (1 + threshold) - 1e-9)
+            lists = sorted((by_size.get(doc_size, ()) for by_size in postings), key=len)
+            seen = set()
+            for doc_ids in lists[:size - required + 1]:
+                for doc_id in doc_ids:
+                    if doc_id in seen:
+                        continue
+                    seen.add(doc_id)
+                    shared = len(query_grams & self._doc_trigrams[doc_id])
+                    similarity = shared / (size + doc_size - shared)
+                    if similarity >= threshold:
+                        entity_id = self._doc_entities[doc_id]
+                        if similarity > best.get(entity_id, 0):
+                            best[entity_id] = similarity
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+
+class FuzzySearchIndex:
+    """
+    In-process trigram indexes over usernames and sports entity names, used
+    when the database has no pg_trgm (SQLite in development and tests).
+
+    Each entity type is rebuilt lazily when the shared version counter it
+    depends on moves: user saves bump the typeahead version, sports saves
+    the sports search version.
+    """
+
+    VERSION_KEYS = {
+        'users': TYPEAHEAD_VERSION_KEY,
+        'leagues': SPORTS_SEARCH_VERSION_KEY,
+        'teams': SPORTS_SEARCH_VERSION_KEY,
+        'athletes': SPORTS_SEARCH_VERSION_KEY,
+    }
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        """Drop all local indexes; the next query rebuilds them."""
+        with self._lock:
+            self._indexes = {}
+            self._versions = {}
+            self._built_at = {}
+
+    def _terms(self, entity_type):
+        """Yield (entity_id, term) for every searchable term of an entity type."""
+        from sports.models import League, Team, Athlete
+
+        if entity_type == 'users':
+            rows = get_user_model().objects.filter(is_active=True).values_list(
+                'id', 'username', 'first_name', 'last_name'
+            )
+            for user_id, username, first_name, last_name in rows.iterator():
+                yield user_id, username
+                yield user_id, f"{first_name} {last_name}"
+        elif entity_type == 'leagues':
+            for league_id, name, aliases in League.objects.values_list('id', 'name', 'aliases').iterator():
+                yield league_id, name
+                yield from ((league_id, alias) for alias in aliases or [])
+        elif entity_type == 'teams':
+            rows = Team.objects.values_list('id', 'name', 'abbreviation', 'aliases')
+            for team_id, name, abbreviation, aliases in rows.iterator():
+                yield team_id, name
+                yield team_id, abbreviation
+                yield from ((team_id, alias) for alias in aliases or [])
+        elif entity_type == 'athletes':
+            rows = Athlete.objects.values_list('id', 'first_name', 'last_name', 'aliases')
+            for athlete_id, first_name, last_name, aliases in rows.iterator():
+                yield athlete_id, f"{first_name} {last_name}"
+                yield athlete_id, last_name
+                yield from ((athlete_id, alias) for alias in aliases or [])
+
+    def build(self, entity_type):
+        """Load every searchable term of an entity type into a fresh index."""
+        with self._lock:
+            version = cache.get(self.VERSION_KEYS[entity_type], 0)
+            index = TrigramIndex()
+            for entity_id, term in self._terms(entity_type):
+                index.add(entity_id, term)
+            self._indexes[entity_type] = index
+            self._versions[entity_type] = version
+            self._built_at[entity_type] = time.monotonic()
+            logger.info(f"Built trigram index for {entity_type} with {len(index)} terms")
+
+    def sync(self, entity_type):
+        """Rebuild an entity type when its shared version has moved, rate limited."""
+        with self._lock:
+            if entity_type not in self._indexes:
+                self.build(entity_type)
+                return
+            if cache.get(self.VERSION_KEYS[entity_type], 0) == self._versions[entity_type]:
+                return
+            if time.monotonic() - self._built_at[entity_type] < get_fuzzy_search_config()['min_rebuild_interval']:
+                return
+            self.build(entity_type)
+
+    def search(self, query, entity_type, threshold, limit):
+        with self._lock:
+            try:
+                self.sync(entity_type)
+            except Exception as e:
+                logger.error(f"Failed to sync trigram index for {entity_type}: {e}")
+                if entity_type not in self._indexes:
+                    return []
+            index = self._indexes[entity_type]
+        return index.search(query, threshold, limit)
+
+
+class TrigramMatch(Func):
+    """`term % query`: pg_trgm similarity above pg_trgm.similarity_threshold; served by gin_trgm_ops indexes."""
+    arg_joiner = ' %% '
+    template = '(%(expressions)s)'
+    output_field = BooleanField()
+
+
+class TrigramWordMatch(Func):
+    """`query <% text`: query's word similarity to some run of words in text above pg_trgm.word_similarity_threshold."""
+    arg_joiner = ' <%% '
+    template = '(%(expressions)s)'
+    output_field = BooleanField()
+
+
+class Similarity(Func):
+    function = 'similarity'
+    output_field = FloatField()
+
+
+class FullName(Func):
+    """first_name || ' ' || last_name, exactly as the full-name trigram expression indexes are built."""
+    arg_joiner = " || ' ' || "
+    template = '(%(expressions)s)'
+    output_field = CharField()
+
+    def __init__(self):
+        super().__init__(F('first_name'), F('last_name'))
+
+
+class AliasesText(Func):
+    """The aliases JSON list as text, the expression the alias trigram indexes cover."""
+    template = '(%(expressions)s)::text'
+    output_field = TextField()
+
+    def __init__(self):
+        super().__init__(F('aliases'))
+
+
+def _alias_similarity(model, query):
+    """Best similarity between `query` and any entry of the model's `aliases` JSON list."""
+    table = connection.ops.quote_name(model._meta.db_table)
+    return Coalesce(
+        RawSQL(
+            f"(SELECT MAX(similarity(alias, %s)) FROM jsonb_array_elements_text({table}.aliases) AS alias)",
+            [query],
+            output_field=FloatField(),
+        ),
+        0.0,
+    )
+
+
+def postgres_search_queryset(query, entity_type, threshold):
+    """
+    pg_trgm query over the same terms FuzzySearchIndex indexes: full names,
+    last names, abbreviations and aliases. Candidates are narrowed first with
+    the % and <% operators, which the trigram GIN indexes serve (given the
+    thresholds _search_postgres sets), and only those are ranked by exact
+    similarity. Every term with similarity >= threshold passes the operators,
+    so the narrowing drops nothing the ranking would keep.
+    """
+    from sports.models import League, Team, Athlete
+
+    querysets = {
+        'users': (get_user_model().objects.filter(is_active=True), [F('username'), FullName()]),
+        'leagues': (League.objects.all(), [F('name')]),
+        'teams': (Team.objects.all(), [F('name'), F('abbreviation')]),
+        'athletes': (Athlete.objects.all(), [FullName(), F('last_name')]),
+    }
+    queryset, terms = querysets[entity_type]
+    matches = [TrigramMatch(term, Value(query)) for term in terms]
+    scores = [Similarity(term, Value(query)) for term in terms]
+    if entity_type != 'users':
+        # Word similarity to the whole list is never below similarity to one alias in it
+        matches.append(TrigramWordMatch(Value(query), AliasesText()))
+        scores.append(_alias_similarity(queryset.model, query))
+
+    return queryset.filter(reduce(operator.or_, [Q(match) for match in matches])).annotate(
+        similarity=Greatest(*scores) if len(scores) > 1 else scores[0]
+    ).filter(similarity__gte=threshold).order_by('-similarity', 'id')
+
+
+def _search_postgres(query, entity_type, threshold, limit):
+    """Run postgres_search_queryset with the pg_trgm operator thresholds set for this transaction only."""
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.similarity_threshold', %s, true), "
+                "set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                [str(threshold), str(threshold)]
+            )
+        rows = postgres_search_queryset(query, entity_type, threshold).values_list('id', 'similarity')[:limit]
+        return [(entity_id, float(score)) for entity_id, score in rows]
+
+
+def fuzzy_search(query, entity_type, limit=None, threshold=None):
+    """
+    Return [(entity_id, similarity)] for `entity_type`, most similar first.
+    Uses pg_trgm on PostgreSQL and the in-process trigram index otherwise.
+    """
+    if entity_type not in FUZZY_ENTITY_TYPES:
+        return []
+    config = get_fuzzy_search_config()
+    limit = limit or config['max_results']
+    threshold = config['similarity_threshold'] if threshold is None else threshold
+
+    if connection.vendor == 'postgresql':
+        return _search_postgres(query, entity_type, threshold, limit)
+    return fuzzy_search_index.search(query, entity_type, threshold, limit)
+
+
+# Global in-process index (one per worker process), used without pg_trgm
+fuzzy_search_index = FuzzySearchIndex()
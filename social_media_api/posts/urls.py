@@ -9,7 +9,8 @@ from .views import (
     PostViewView, PostPinView, PostHighlightView, PostAnalyticsView,
     PostReplySettingsView, PostEngagementsView, PostEmbedView, SearchViewSet,
     LiveStreamViewSet, LiveStreamWatchView, mux_webhook, CommentRepliesView,
-    HomeFeedViewSet, DevUploadView
+    HomeFeedViewSet, DevUploadView, MediaProgressView, MultipartUploadViewSet,
+    BatchUploadURLView
 )
 from .views_health import health_check, detailed_health_check, metrics_endpoint, rate_limit_status
 from django.urls import path, include
@@ -23,7 +24,14 @@ urlpatterns = [
     path('create/', CreatePostView.as_view(), name='create-post'),  # B-POST-01
     path('feed/home/', HomeFeedViewSet.as_view({'get': 'list'}), name='feed-timeline'),
     path('upload-url/', GetUploadURLView.as_view(), name='get-upload-url'),  # B-UPLOAD-01
+    path('upload-urls/', BatchUploadURLView.as_view(), name='get-upload-urls'),  # B-UPLOAD-03
+    path('uploads/multipart/', MultipartUploadViewSet.as_view({'post': 'create'}), name='multipart-upload-list'),  # B-UPLOAD-02
+    path('uploads/multipart/<int:pk>/', MultipartUploadViewSet.as_view({'get': 'retrieve'}), name='multipart-upload-detail'),
+    path('uploads/multipart/<int:pk>/parts/', MultipartUploadViewSet.as_view({'post': 'parts'}), name='multipart-upload-parts'),
+    path('uploads/multipart/<int:pk>/complete/', MultipartUploadViewSet.as_view({'post': 'complete'}), name='multipart-upload-complete'),
+    path('uploads/multipart/<int:pk>/abort/', MultipartUploadViewSet.as_view({'post': 'abort'}), name='multipart-upload-abort'),
     path('dev-upload/', DevUploadView.as_view(), name='dev-upload'),  # Development upload endpoint
+    path('media/<int:pk>/progress/', MediaProgressView.as_view(), name='media-progress'),
     path('<int:pk>/like/', PostLikeView.as_view(), name='post-like'),
     path('<int:pk>/share/', PostShareView.as_view(), name='post-share'),
     path('<int:pk>/repost/', PostRepostView.as_view(), name='post-repost'),
@@ -66,6 +74,7 @@ urlpatterns = [
     # Search endpoints
     path('search/', SearchViewSet.as_view({'get': 'list'}), name='search'),  # B-SEARCH-01
     path('search/context/', SearchViewSet.as_view({'get': 'context'}), name='search-context'),  # B-SEARCH-02
+    path('search/typeahead/', SearchViewSet.as_view({'get': 'typeahead'}), name='search-typeahead'),  # B-SEARCH-03
 
     # Live streaming endpoints
     path('live/stream/', LiveStreamViewSet.as_view({'get': 'list', 'post': 'create'}), name='live-stream-list'),  # B-LIVE-01
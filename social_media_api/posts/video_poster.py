@@ -0,0 +1,51 @@
+import logging
+import subprocess
+from io import BytesIO
+
+from PIL import Image
+
+from .hls import get_ffmpeg_binary
+
+logger = logging.getLogger(__name__)
+
+
+def build_poster_command(source, time, width, height):
+    """
+    ffmpeg invocation that seeks the input to the keyframe at or before
+    `time` and decodes only that frame, scaled down to fit width x height.
+    The source may be a local path or an HTTP(S) URL; with a URL ffmpeg
+    fetches just the index and the byte range around the keyframe.
+    """
+    return [
+        get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-nostdin',
+        '-skip_frame', 'nokey',               # decode keyframes only
+        '-ss', f"{time:.3f}", '-noaccurate_seek',  # input seek: jump straight to the preceding keyframe
+        '-i', source,
+        '-map', '0:v:0', '-frames:v', '1',
+        '-vf', f"scale=w='min({width},iw)':h='min({height},ih)':force_original_aspect_ratio=decrease",
+        '-f', 'image2pipe', '-c:v', 'bmp', 'pipe:1',
+    ]
+
+
+def extract_poster_frame(source, time, width, height, timeout=30):
+    """
+    Poster frame of a video as a PIL image no larger than width x height.
+
+    Seeks to the keyframe nearest before `time`; clips shorter than `time`
+    fall back to their first keyframe. Raises RuntimeError when ffmpeg
+    cannot produce a frame.
+    """
+    for seek in dict.fromkeys((time, 0.0)):
+        result = subprocess.run(
+            build_poster_command(source, seek, width, height),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout
+        )
+        if result.returncode == 0 and result.stdout:
+            image = Image.open(BytesIO(result.stdout))
+            image.load()
+            # ffmpeg rounds the scaled size; thumbnail() makes the bound exact
+            image.thumbnail((width, height), Image.Resampling.LANCZOS)
+            return image.convert('RGB')
+        logger.debug(f"No poster frame at {seek}s: {result.stderr.decode(errors='replace').strip()}")
+
+    raise RuntimeError(f"ffmpeg could not extract a poster frame: {result.stderr.decode(errors='replace').strip()}")
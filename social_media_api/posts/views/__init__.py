@@ -16,8 +16,10 @@ from .posts import (
     PostViewSet, CommentViewSet, CreatePostView, GetUploadURLView,
     PostDetailView, PostRepliesView, PostReplyView, PostViewView,
     PostPinView, PostHighlightView, PostAnalyticsView,
-    PostReplySettingsView, PostEngagementsView, PostEmbedView, DevUploadView
+    PostReplySettingsView, PostEngagementsView, PostEmbedView, DevUploadView,
+    MediaProgressView
 )
+from .uploads import MultipartUploadViewSet, BatchUploadURLView
 from .live_streaming import LiveStreamViewSet, LiveStreamWatchView
 from .webhooks import mux_webhook
 
@@ -32,5 +34,7 @@ __all__ = [
     'UserRepliesFeedView', 'UserLikesFeedView', 'LiveEventsView', 'TrendingSidebarView',
     'SuggestedUsersView', 'PostViewView', 'PostPinView', 'PostHighlightView',
     'PostAnalyticsView', 'PostReplySettingsView', 'PostEngagementsView', 'PostEmbedView',
-    'LiveStreamViewSet', 'LiveStreamWatchView', 'mux_webhook', 'log_post_action'
+    'LiveStreamViewSet', 'LiveStreamWatchView', 'mux_webhook', 'log_post_action',
+    'MediaProgressView', 'MultipartUploadViewSet',
+    'BatchUploadURLView'
 ]
\ No newline at end of file
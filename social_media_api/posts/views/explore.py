@@ -3,14 +3,19 @@ from rest_framework import viewsets, permissions
 from rest_framework.response import Response
 from ..models import Post
 from ..serializers import PostSerializer
+from ..trending import get_trending_snapshot, ALL_CATEGORY
+from ..trending_posts import get_trending_post_ids
+from sports.live_events import get_live_events
+from sports.swr_cache import swr_cached, UpstreamUnavailable
 import logging
+import requests
 
 logger = logging.getLogger(__name__)
 
 
 class TrendsView(viewsets.ReadOnlyModelViewSet):
     """
-    B-EXP-TRN-01: Trending Topics - GET /api/trends/
+    B-EXP-TRN-01: Trending Topics - GET /api/trends/?category={all/football/basketball/...}
     Returns trending topics based on recent engagement on sports-related posts.
     """
     permission_classes = []
@@ -18,52 +23,136 @@ class TrendsView(viewsets.ReadOnlyModelViewSet):
     def list(self, request):
         """
         B-EXP-TRN-03: Logic weighted by recent engagement on sports-related posts.
-        For now, return mock data. In production, this would analyze:
-        - Recent posts (last 24 hours)
-        - Like/comment counts
-        - Hashtag frequency
-        - User engagement metrics
+        Hashtags and sports entity mentions from new posts, comments, reposts and
+        likes are counted by the streaming engine in posts.trending (time-decayed
+        Count-Min Sketch plus top-K per sport category). This view only reads the
+        latest snapshot the engine wrote to the cache.
         """
-        # Mock trending data matching B-EXP-TRN-02 specification
-        trends = [
-            {
-                "id": 1,
-                "rank": 1,
-                "category": "Trending in Football",
-                "topic": "#MbappeToMadrid",
-                "post_count": 15420
-            },
-            {
-                "id": 2,
-                "rank": 2,
-                "category": "Trending in Basketball",
-                "topic": "#LukaTripleDouble",
-                "post_count": 12850
-            },
-            {
-                "id": 3,
-                "rank": 3,
-                "category": "Trending in NFL",
-                "topic": "#ChiefsInjury",
-                "post_count": 9870
-            },
-            {
-                "id": 4,
-                "rank": 4,
-                "category": "Trending in Soccer",
-                "topic": "#PremierLeague",
-                "post_count": 8760
-            },
-            {
-                "id": 5,
-                "rank": 5,
-                "category": "Trending in Tennis",
-                "topic": "#WimbledonFin...",
-                "post_count": 5430
-            }
-        ]
-
-        return Response(trends)
+        category = request.query_params.get('category', ALL_CATEGORY).casefold()
+        snapshot = get_trending_snapshot()
+        if not snapshot:
+            return Response([])
+        return Response(snapshot['categories'].get(category, []))
+
+
+MAJOR_TEAMS = [
+    "Manchester United", "Real Madrid", "Barcelona", "Bayern Munich",
+    "Liverpool", "Chelsea", "Arsenal", "Manchester City", "Tottenham",
+    "Juventus", "AC Milan", "Inter Milan", "Napoli", "Roma",
+    "PSG", "Marseille", "Lyon", "Monaco",
+    "Borussia Dortmund", "Schalke 04", "Bayer Leverkusen", "RB Leipzig",
+    "Los Angeles Lakers", "Golden State Warriors", "Boston Celtics", "Miami Heat",
+    "Chicago Bulls", "Los Angeles Clippers", "Brooklyn Nets", "Milwaukee Bucks",
+    "Dallas Mavericks", "Phoenix Suns", "Denver Nuggets", "Memphis Grizzlies"
+]
+
+POPULAR_ATHLETES = [
+    "Lionel Messi", "Cristiano Ronaldo", "Neymar", "Kylian Mbappe",
+    "Mohamed Salah", "Kevin De Bruyne", "Erling Haaland", "Harry Kane",
+    "LeBron James", "Stephen Curry", "Kevin Durant", "Giannis Antetokounmpo",
+    "Luka Doncic", "Nikola Jokic", "Joel Embiid", "James Harden",
+    "Tom Brady", "Patrick Mahomes", "Aaron Rodgers", "Josh Allen",
+    "Serena Williams", "Simona Halep", "Naomi Osaka", "Ashleigh Barty",
+    "Roger Federer", "Rafael Nadal", "Novak Djokovic", "Andy Murray"
+]
+
+
+@swr_cached('sportsdb_all_leagues', ttl=86400)
+def fetch_sportsdb_leagues():
+    """Major leagues from TheSportsDB. Request failures propagate so they are negatively cached."""
+    url = "https://www.thesportsdb.com/api/v1/json/3/all_leagues.php"
+    response = requests.get(url, timeout=15)
+    response.raise_for_status()
+    data = response.json()
+
+    leagues_data = []
+    for league_data in (data.get('leagues') or [])[:50]:  # Limit to 50 major leagues
+        leagues_data.append({
+            'id': league_data.get('idLeague', ''),
+            'name': league_data.get('strLeague', ''),
+            'slug': league_data.get('strLeague', '').lower().replace(' ', '-'),
+            'logo_url': league_data.get('strBadge', ''),
+            'description': league_data.get('strDescription', '')[:300] + '...' if league_data.get('strDescription') else '',
+            'sport': league_data.get('strSport', ''),
+            'country': league_data.get('strCountry', '')
+        })
+    return leagues_data
+
+
+@swr_cached('sportsdb_all_teams', ttl=86400)
+def fetch_sportsdb_teams():
+    """Popular teams from TheSportsDB, one search per team; fails only if every search fails."""
+    teams_data, seen_names, failures = [], set(), 0
+    for team_name in MAJOR_TEAMS[:30]:  # Limit to 30 teams
+        try:
+            url = f"https://www.thesportsdb.com/api/v1/json/3/searchteams.php?t={team_name}"
+            response = requests.get(url, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+        except requests.RequestException:
+            failures += 1
+            continue  # Skip failed requests
+
+        if data.get('teams'):
+            team_data = data['teams'][0]
+            # Remove duplicates based on team name
+            if team_data.get('strTeam', '') in seen_names:
+                continue
+            seen_names.add(team_data.get('strTeam', ''))
+            teams_data.append({
+                'id': team_data.get('idTeam', ''),
+                'name': team_data.get('strTeam', ''),
+                'slug': team_data.get('strTeam', '').lower().replace(' ', '-'),
+                'logo_url': team_data.get('strTeamBadge', ''),
+                'abbreviation': team_data.get('strTeamShort', ''),
+                'sport': team_data.get('strSport', ''),
+                'league': team_data.get('strLeague', ''),
+                'city': team_data.get('strStadiumLocation', ''),
+                'country': team_data.get('strCountry', '')
+            })
+
+    if failures == len(MAJOR_TEAMS[:30]):
+        raise requests.RequestException("Every TheSportsDB team search failed")
+    return teams_data
+
+
+@swr_cached('sportsdb_popular_athletes', ttl=86400)
+def fetch_sportsdb_athletes():
+    """Popular athletes from TheSportsDB, one search per athlete; fails only if every search fails."""
+    athletes_data, seen_names, failures = [], set(), 0
+    for athlete_name in POPULAR_ATHLETES[:25]:  # Limit to 25 athletes
+        try:
+            url = f"https://www.thesportsdb.com/api/v1/json/3/searchplayers.php?p={athlete_name}"
+            response = requests.get(url, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+        except requests.RequestException:
+            failures += 1
+            continue  # Skip failed requests
+
+        if data.get('player'):
+            athlete_data = data['player'][0]
+            full_name = athlete_data.get('strPlayer') or ''
+            # Remove duplicates based on athlete name
+            if full_name in seen_names:
+                continue
+            seen_names.add(full_name)
+            athletes_data.append({
+                'id': athlete_data.get('idPlayer', ''),
+                'first_name': full_name.split(' ')[0] if full_name else '',
+                'last_name': ' '.join(full_name.split(' ')[1:]) if full_name else '',
+                'slug': full_name.lower().replace(' ', '-'),
+                'position': athlete_data.get('strPosition', ''),
+                'team': athlete_data.get('strTeam', ''),
+                'sport': athlete_data.get('strSport', ''),
+                'league': athlete_data.get('strLeague', ''),
+                'country': athlete_data.get('strNationality', ''),
+                'logo_url': athlete_data.get('strThumb', '')
+            })
+
+    if failures == len(POPULAR_ATHLETES[:25]):
+        raise requests.RequestException("Every TheSportsDB athlete search failed")
+    return athletes_data
 
 
 class LeaguesView(viewsets.ReadOnlyModelViewSet):
@@ -76,47 +165,13 @@ class LeaguesView(viewsets.ReadOnlyModelViewSet):
 
     def list(self, request):
         """
-        Returns leagues from TheSportsDB API with caching for offline usage.
+        Returns leagues from TheSportsDB API, served stale while a background refresh runs.
         """
-        from django.core.cache import cache
-        import requests
-
-        # Check cache first
-        cache_key = "sportsdb_all_leagues"
-        cached_leagues = cache.get(cache_key)
-        if cached_leagues:
-            return Response(cached_leagues)
-
         try:
-            # Fetch all leagues from TheSportsDB
-            url = "https://www.thesportsdb.com/api/v1/json/3/all_leagues.php"
-            response = requests.get(url, timeout=15)
-            response.raise_for_status()
-            data = response.json()
-
-            leagues_data = []
-            if data.get('leagues'):
-                for league_data in data['leagues'][:50]:  # Limit to 50 major leagues
-                    league = {
-                        'id': league_data.get('idLeague', ''),
-                        'name': league_data.get('strLeague', ''),
-                        'slug': league_data.get('strLeague', '').lower().replace(' ', '-'),
-                        'logo_url': league_data.get('strBadge', ''),
-                        'description': league_data.get('strDescription', '')[:300] + '...' if league_data.get('strDescription') else '',
-                        'sport': league_data.get('strSport', ''),
-                        'country': league_data.get('strCountry', '')
-                    }
-                    leagues_data.append(league)
-
-            # Cache for 24 hours
-            cache.set(cache_key, leagues_data, 86400)
-            return Response(leagues_data)
-
-        except requests.RequestException as e:
-            logger.error(f"Error fetching leagues from TheSportsDB API: {e}")
-            # Return cached data if available, otherwise empty list
-            cached_data = cache.get(cache_key, [])
-            return Response(cached_data)
+            return Response(fetch_sportsdb_leagues())
+        except UpstreamUnavailable:
+            # Nothing cached and TheSportsDB is failing
+            return Response([])
 
 
 class TeamsView(viewsets.ReadOnlyModelViewSet):
@@ -129,72 +184,13 @@ class TeamsView(viewsets.ReadOnlyModelViewSet):
 
     def list(self, request):
         """
-        Returns teams from TheSportsDB API with caching for offline usage.
+        Returns teams from TheSportsDB API, served stale while a background refresh runs.
         """
-        from django.core.cache import cache
-        import requests
-
-        # Check cache first
-        cache_key = "sportsdb_all_teams"
-        cached_teams = cache.get(cache_key)
-        if cached_teams:
-            return Response(cached_teams)
-
         try:
-            # Fetch popular teams from TheSportsDB (using search for major teams)
-            major_teams = [
-                "Manchester United", "Real Madrid", "Barcelona", "Bayern Munich",
-                "Liverpool", "Chelsea", "Arsenal", "Manchester City", "Tottenham",
-                "Juventus", "AC Milan", "Inter Milan", "Napoli", "Roma",
-                "PSG", "Marseille", "Lyon", "Monaco",
-                "Borussia Dortmund", "Schalke 04", "Bayer Leverkusen", "RB Leipzig",
-                "Los Angeles Lakers", "Golden State Warriors", "Boston Celtics", "Miami Heat",
-                "Chicago Bulls", "Los Angeles Clippers", "Brooklyn Nets", "Milwaukee Bucks",
-                "Dallas Mavericks", "Phoenix Suns", "Denver Nuggets", "Memphis Grizzlies"
-            ]
-
-            teams_data = []
-            for team_name in major_teams[:30]:  # Limit to 30 teams
-                try:
-                    url = f"https://www.thesportsdb.com/api/v1/json/3/searchteams.php?t={team_name}"
-                    response = requests.get(url, timeout=10)
-                    response.raise_for_status()
-                    data = response.json()
-
-                    if data.get('teams') and len(data['teams']) > 0:
-                        team_data = data['teams'][0]
-                        team = {
-                            'id': team_data.get('idTeam', ''),
-                            'name': team_data.get('strTeam', ''),
-                            'slug': team_data.get('strTeam', '').lower().replace(' ', '-'),
-                            'logo_url': team_data.get('strTeamBadge', ''),
-                            'abbreviation': team_data.get('strTeamShort', ''),
-                            'sport': team_data.get('strSport', ''),
-                            'league': team_data.get('strLeague', ''),
-                            'city': team_data.get('strStadiumLocation', ''),
-                            'country': team_data.get('strCountry', '')
-                        }
-                        teams_data.append(team)
-                except requests.RequestException:
-                    continue  # Skip failed requests
-
-            # Remove duplicates based on team name
-            unique_teams = []
-            seen_names = set()
-            for team in teams_data:
-                if team['name'] not in seen_names:
-                    unique_teams.append(team)
-                    seen_names.add(team['name'])
-
-            # Cache for 24 hours
-            cache.set(cache_key, unique_teams, 86400)
-            return Response(unique_teams)
-
-        except Exception as e:
-            logger.error(f"Error fetching teams from TheSportsDB API: {e}")
-            # Return cached data if available, otherwise empty list
-            cached_data = cache.get(cache_key, [])
-            return Response(cached_data)
+            return Response(fetch_sportsdb_teams())
+        except UpstreamUnavailable:
+            # Nothing cached and TheSportsDB is failing
+            return Response([])
 
 
 class AthletesView(viewsets.ReadOnlyModelViewSet):
@@ -207,111 +203,28 @@ class AthletesView(viewsets.ReadOnlyModelViewSet):
 
     def list(self, request):
         """
-        Returns athletes from TheSportsDB API with caching for offline usage.
+        Returns athletes from TheSportsDB API, served stale while a background refresh runs.
         """
-        from django.core.cache import cache
-        import requests
-
-        # Check cache first
-        cache_key = "sportsdb_popular_athletes"
-        cached_athletes = cache.get(cache_key)
-        if cached_athletes:
-            return Response(cached_athletes)
-
         try:
-            # Fetch popular athletes from TheSportsDB (using search for major athletes)
-            popular_athletes = [
-                "Lionel Messi", "Cristiano Ronaldo", "Neymar", "Kylian Mbappe",
-                "Mohamed Salah", "Kevin De Bruyne", "Erling Haaland", "Harry Kane",
-                "LeBron James", "Stephen Curry", "Kevin Durant", "Giannis Antetokounmpo",
-                "Luka Doncic", "Nikola Jokic", "Joel Embiid", "James Harden",
-                "Tom Brady", "Patrick Mahomes", "Aaron Rodgers", "Josh Allen",
-                "Serena Williams", "Simona Halep", "Naomi Osaka", "Ashleigh Barty",
-                "Roger Federer", "Rafael Nadal", "Novak Djokovic", "Andy Murray"
-            ]
-
-            athletes_data = []
-            for athlete_name in popular_athletes[:25]:  # Limit to 25 athletes
-                try:
-                    url = f"https://www.thesportsdb.com/api/v1/json/3/searchplayers.php?p={athlete_name}"
-                    response = requests.get(url, timeout=10)
-                    response.raise_for_status()
-                    data = response.json()
-
-                    if data.get('player') and len(data['player']) > 0:
-                        athlete_data = data['player'][0]
-                        athlete = {
-                            'id': athlete_data.get('idPlayer', ''),
-                            'first_name': athlete_data.get('strPlayer', '').split(' ')[0] if athlete_data.get('strPlayer') else '',
-                            'last_name': ' '.join(athlete_data.get('strPlayer', '').split(' ')[1:]) if athlete_data.get('strPlayer') else '',
-                            'slug': athlete_data.get('strPlayer', '').lower().replace(' ', '-'),
-                            'position': athlete_data.get('strPosition', ''),
-                            'team': athlete_data.get('strTeam', ''),
-                            'sport': athlete_data.get('strSport', ''),
-                            'league': athlete_data.get('strLeague', ''),
-                            'country': athlete_data.get('strNationality', ''),
-                            'logo_url': athlete_data.get('strThumb', '')
-                        }
-                        athletes_data.append(athlete)
-                except requests.RequestException:
-                    continue  # Skip failed requests
-
-            # Remove duplicates based on athlete name
-            unique_athletes = []
-            seen_names = set()
-            for athlete in athletes_data:
-                full_name = f"{athlete['first_name']} {athlete['last_name']}"
-                if full_name not in seen_names:
-                    unique_athletes.append(athlete)
-                    seen_names.add(full_name)
-
-            # Cache for 24 hours
-            cache.set(cache_key, unique_athletes, 86400)
-            return Response(unique_athletes)
-
-        except Exception as e:
-            logger.error(f"Error fetching athletes from TheSportsDB API: {e}")
-            # Return cached data if available, otherwise empty list
-            cached_data = cache.get(cache_key, [])
-            return Response(cached_data)
+            return Response(fetch_sportsdb_athletes())
+        except UpstreamUnavailable:
+            # Nothing cached and TheSportsDB is failing
+            return Response([])
 
 
 class LiveEventsView(viewsets.ReadOnlyModelViewSet):
     """
-    Returns mock live events data for the sidebar.
-    In production, this would fetch real-time live events from sports APIs.
+    Returns live events for the sidebar: in-play fixtures and live streams.
     """
     permission_classes = []
 
     def list(self, request):
         """
-        Return mock live events data.
+        Return the cached live events snapshot. It is rebuilt from sports.Fixture
+        and LiveStream only when one of them changes state (sports.live_events),
+        and each rebuild is pushed to connected FeedConsumer clients.
         """
-        live_events = [
-            {
-                'id': 1,
-                'host_name': 'NBA Official',
-                'title': 'NBA Finals Game 7',
-                'engagement_type': 'fire',
-                'engagement_count': 15420
-            },
-            {
-                'id': 2,
-                'host_name': 'Premier League',
-                'title': 'Manchester City vs Arsenal',
-                'engagement_type': 'heart',
-                'engagement_count': 12850
-            },
-            {
-                'id': 3,
-                'host_name': 'NFL',
-                'title': 'Super Bowl LVIII',
-                'engagement_type': 'fire',
-                'engagement_count': 9870
-            }
-        ]
-
-        return Response(live_events)
+        return Response(get_live_events())
 
 
 class TrendingSidebarView(viewsets.ReadOnlyModelViewSet):
@@ -322,13 +235,14 @@ class TrendingSidebarView(viewsets.ReadOnlyModelViewSet):
     serializer_class = PostSerializer
 
     def get_queryset(self):
-        # Return recent posts with high engagement (likes + comments + reposts)
+        # Read the materialized ranking (time-decayed engagement from the denormalized
+        # counters, refreshed by posts.tasks.refresh_trending_posts)
         try:
-            return Post.objects.annotate(
-                engagement_score=models.Count('likes') + models.Count('comments') + models.Count('reposts')
-            ).filter(
-                engagement_score__gt=0
-            ).order_by('-engagement_score', '-created_at')[:10]
+            post_ids = get_trending_post_ids(limit=10)
+            if not post_ids:
+                return Post.objects.none()
+            order = models.Case(*[models.When(id=post_id, then=position) for position, post_id in enumerate(post_ids)])
+            return Post.objects.filter(id__in=post_ids).select_related('author').order_by(order)
         except Exception as e:
             logger.error(f"Error in TrendingSidebarView.get_queryset: {e}")
             # Return recent posts as fallback
@@ -344,25 +258,19 @@ class SuggestedUsersView(viewsets.ReadOnlyModelViewSet):
     serializer_class = UserSerializer
 
     def get_queryset(self):
+        # Read the precomputed who-to-follow list (accounts.recommendations), falling
+        # back to the most-followed accounts for anonymous users and new accounts
+        from django.contrib.auth import get_user_model
+        from accounts.recommendations import get_follow_suggestions
+        User = get_user_model()
         try:
-            # Return users with high follower counts (excluding current user if authenticated)
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            queryset = User.objects.annotate(
-                followers_count=models.Count('followers', distinct=True),
-                following_count=models.Count('following', distinct=True)
-            ).filter(
-                followers_count__gt=0
-            ).order_by('-followers_count')[:10]
-
-            # Exclude current user if authenticated
-            if self.request.user.is_authenticated:
-                queryset = queryset.exclude(id=self.request.user.id)
-
-            return queryset
+            user_id = self.request.user.id if self.request.user.is_authenticated else None
+            user_ids = get_follow_suggestions(user_id, limit=10)
+            if not user_ids:
+                return User.objects.none()
+            order = models.Case(*[models.When(id=pk, then=position) for position, pk in enumerate(user_ids)])
+            return User.objects.filter(id__in=user_ids, is_active=True).order_by(order)
         except Exception as e:
             logger.error(f"Error in SuggestedUsersView.get_queryset: {e}")
             # Return empty queryset on error
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            return User.objects.none()
\ No newline at end of file
+            return User.objects.none()
@@ -1,14 +1,16 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from rest_framework import viewsets, status, permissions, views
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.pagination import CursorPagination, LimitOffsetPagination
-from ..models import Post, Comment, MediaFile
-from ..serializers import PostSerializer, CommentSerializer
+from ..models import Post, Comment, MediaFile, MultipartUpload
+from ..serializers import PostSerializer, CommentSerializer, CreatedPostSerializer
 from ..throttling import PostCreationThrottle
-from ..tasks import process_image_file, process_video_file
+from ..tasks import process_image_file, queue_video_processing
 from ..s3_utils import get_presigned_url_for_media
+from ..media_progress import get_media_progress
+from ..multipart_upload import ALLOWED_CONTENT_TYPES, upload_key
 from django.utils import timezone
 from django.conf import settings
 import logging
@@ -300,16 +302,93 @@ class CreatePostView(views.APIView):
     """
     B-POST-01: Create Post with Media Processing
     Handles post creation with automatic media processing and optimization.
+    The media files and the post are inserted in one transaction, one
+    INSERT per table, and media processing is queued once it commits.
     """
     permission_classes = [permissions.IsAuthenticated]
     throttle_classes = [PostCreationThrottle]
 
+    image_extensions = ['jpg', 'jpeg', 'png', 'gif', 'webp']
+    video_extensions = ['mp4', 'mov', 'avi', 'mkv']
+
+    def build_media(self, media_keys, user):
+        """Unsaved (MediaFile, S3 key) pairs for the usable keys; invalid keys are skipped"""
+        # Keys from resumable uploads: only completed uploads of this user may be attached
+        multipart_uploads = {
+            upload.key: upload for upload in MultipartUpload.objects.filter(key__in=media_keys)
+        }
+        media = []
+        for s3_key in media_keys:
+            upload = multipart_uploads.get(s3_key)
+            if upload is not None and (upload.user_id != user.id or upload.status != 'completed'):
+                logger.warning(f"Rejected media key {s3_key}: not a completed upload of this user")
+                continue
+
+            # Extract file info from S3 key
+            # Key format: uploads/{user_id}/{uuid}.{ext}
+            key_parts = s3_key.split('/')
+            if len(key_parts) < 3:
+                continue
+
+            file_name = key_parts[-1]
+            file_extension = file_name.split('.')[-1].lower() if '.' in file_name else ''
+
+            # Determine media type from file extension
+            if file_extension in self.image_extensions:
+                media_type = 'image'
+            elif file_extension in self.video_extensions:
+                media_type = 'video'
+            else:
+                continue  # Skip unsupported files
+            mime_type = f'{media_type}/{file_extension}'
+
+            # A completed multipart upload knows its exact size and type
+            file_size = 0  # Size unknown from key, will be updated during processing
+            if upload is not None:
+                file_size = upload.file_size
+                mime_type = upload.content_type
+
+            # We don't store the actual file, just reference the S3 key
+            media_instance = MediaFile(
+                file_name=file_name,
+                file_size=file_size,
+                mime_type=mime_type,
+                media_type=media_type,
+                processing_status='pending'
+            )
+            media.append((media_instance, s3_key))
+        return media
+
+    def dispatch_processing(self, media):
+        """Queue processing of committed media (handle Celery unavailability gracefully)"""
+        for media_instance, s3_key in media:
+            try:
+                if media_instance.media_type == 'image':
+                    process_image_file.delay(media_instance.id, s3_key)
+                elif media_instance.media_type == 'video':
+                    queue_video_processing(media_instance.id, s3_key, file_size=media_instance.file_size or None)
+            except Exception as celery_error:
+                logger.warning(f"Celery not available for media processing: {celery_error}")
+                # Mark as processed for now - in production this would be handled differently
+                media_url = get_presigned_url_for_media(s3_key, expiration=3600) or ''
+                media_instance.processing_status = 'completed'
+                media_instance.full_url = media_url
+                media_instance.preview_url = media_url  # Use same URL for preview
+                media_instance.thumbnail_url = media_url  # Use same URL for thumbnail
+                MediaFile.objects.filter(id=media_instance.id).update(
+                    processing_status='completed', full_url=media_url, preview_url=media_url,
+                    thumbnail_url=media_url, updated_at=timezone.now()
+                )
+
     def post(self, request):
         try:
             # Extract data from request
             content = request.data.get('content', '').strip()
             title = request.data.get('title', '').strip()
-            media_keys = request.data.getlist('media_keys', [])
+            if hasattr(request.data, 'getlist'):
+                media_keys = request.data.getlist('media_keys', [])
+            else:
+                media_keys = request.data.get('media_keys', [])
 
             # Validation
             if not content and not title and not media_keys:
@@ -330,88 +409,24 @@ class CreatePostView(views.APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Create post first
-            post = Post.objects.create(
-                author=request.user,
-                title=title,
-                content=content,
-            )
+            # Validate media keys before writing anything
+            media = self.build_media(media_keys, request.user) if media_keys else []
+            if media_keys and not media:
+                return Response(
+                    {'error': 'No valid media files provided'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-            # Process media keys if any
-            if media_keys:
-                processed_media = []
-                for s3_key in media_keys:
-                    try:
-                        # Extract file info from S3 key
-                        # Key format: uploads/{user_id}/{uuid}.{ext}
-                        key_parts = s3_key.split('/')
-                        if len(key_parts) < 3:
-                            continue
-
-                        file_name = key_parts[-1]
-                        file_extension = file_name.split('.')[-1] if '.' in file_name else ''
-
-                        # Determine media type from file extension
-                        image_extensions = ['jpg', 'jpeg', 'png', 'gif', 'webp']
-                        video_extensions = ['mp4', 'mov', 'avi', 'mkv']
-
-                        if file_extension.lower() in image_extensions:
-                            media_type = 'image'
-                            mime_type = f'image/{file_extension.lower()}'
-                        elif file_extension.lower() in video_extensions:
-                            media_type = 'video'
-                            mime_type = f'video/{file_extension.lower()}'
-                        else:
-                            continue  # Skip unsupported files
-
-                        # Create MediaFile instance with S3 reference
-                        # Note: We don't store the actual file, just reference the S3 key
-                        media_instance = MediaFile.objects.create(
-                            file_name=file_name,
-                            file_size=0,  # Size unknown from key, will be updated during processing
-                            mime_type=mime_type,
-                            media_type=media_type,
-                            # Store S3 key in a way that processing can access it
-                            processing_status='pending'
-                        )
-
-                        # Store S3 key for processing (temporary solution)
-                        # In production, you might want to add a field to MediaFile model
-                        media_instance._s3_key = s3_key
-
-                        # Link to post
-                        post.media_file = media_instance
-                        post.save()
-
-                        # Trigger async processing with S3 key (handle Celery unavailability gracefully)
-                        try:
-                            if media_instance.media_type == 'image':
-                                process_image_file.delay(media_instance.id, s3_key)
-                            elif media_instance.media_type == 'video':
-                                process_video_file.delay(media_instance.id, s3_key)
-                        except Exception as celery_error:
-                            logger.warning(f"Celery not available for media processing: {celery_error}")
-                            # Mark as processed for now - in production this would be handled differently
-                            media_instance.processing_status = 'completed'
-                            media_url = get_presigned_url_for_media(s3_key, expiration=3600)
-                            media_instance.full_url = media_url
-                            media_instance.preview_url = media_url  # Use same URL for preview
-                            media_instance.thumbnail_url = media_url  # Use same URL for thumbnail
-                            media_instance.save()
-
-                        processed_media.append(media_instance.id)
-
-                    except Exception as e:
-                        logger.error(f"Failed to process media key {s3_key}: {e}")
-                        continue
-
-                if not processed_media:
-                    # If no valid media was processed, delete the post
-                    post.delete()
-                    return Response(
-                        {'error': 'No valid media files provided'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
+            with transaction.atomic():
+                MediaFile.objects.bulk_create([media_instance for media_instance, _ in media])
+                # A post holds one media file; as before, the last valid key is attached
+                post = Post.objects.create(
+                    author=request.user,
+                    title=title,
+                    content=content,
+                    media_file=media[-1][0] if media else None,
+                )
+                transaction.on_commit(lambda: self.dispatch_processing(media))
 
             # Log the action
             log_post_action(request.user, 'create_post', post, 'success', {
@@ -419,8 +434,12 @@ class CreatePostView(views.APIView):
                 'media_count': len(media_keys) if media_keys else 0
             })
 
-            # Return serialized post data
-            serializer = PostSerializer(post, context={'request': request})
+            # Return the lean representation of a new post, with author counts in one query
+            post.author = User.objects.annotate(
+                followers_count=models.Count('followers', distinct=True),
+                following_count=models.Count('following', distinct=True),
+            ).get(pk=request.user.pk)
+            serializer = CreatedPostSerializer(post, context={'request': request})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         except Exception as e:
@@ -451,16 +470,14 @@ class GetUploadURLView(views.APIView):
                 )
 
             # Validate content type
-            allowed_types = ['image/jpeg', 'image/png', 'image/gif', 'image/webp', 'video/mp4', 'video/quicktime']
-            if content_type not in allowed_types:
+            if content_type not in ALLOWED_CONTENT_TYPES:
                 return Response(
                     {'error': f'Content type {content_type} not allowed'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
             # Generate S3 key
-            file_extension = file_name.split('.')[-1] if '.' in file_name else 'bin'
-            s3_key = f"uploads/{request.user.id}/{uuid.uuid4()}.{file_extension}"
+            s3_key = upload_key(request.user, file_name)
 
             # Get pre-signed upload URL
             upload_url = get_presigned_url_for_media(s3_key, expiration=900, operation='put_object')
@@ -484,6 +501,24 @@ class GetUploadURLView(views.APIView):
             )
 
 
+class MediaProgressView(views.APIView):
+    """
+    Processing progress of an uploaded media file. Reads the live stage
+    published by the media tasks, falling back to the stored status.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        progress = get_media_progress(pk)
+        if progress is None:
+            media_file = MediaFile.objects.filter(id=pk).only('processing_status').first()
+            if media_file is None:
+                return Response({'error': 'Media file not found'}, status=status.HTTP_404_NOT_FOUND)
+            progress = {'stage': media_file.processing_status, 'percent': None}
+
+        return Response({'id': pk, 'stage': progress['stage'], 'percent': progress['percent']})
+
+
 class PostDetailView(views.APIView):
     def get(self, request, pk):
         return Response({"id": pk, "title": "Mock Post"})
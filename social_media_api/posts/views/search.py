@@ -1,4 +1,4 @@
-from django.db.models import Q, Count, Value, BooleanField
+from django.db.models import Q, Count
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -8,7 +8,11 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 from ..serializers import PostSerializer
 from accounts.serializers import UserSerializer
-from ..throttling import SearchThrottle
+from accounts.typeahead import user_typeahead_index, get_viewer_context
+from sports.search_index import sports_search_index
+from ..search_cache import search_result_cache, normalize_search_query, get_search_cache_config
+from ..trigram_search import fuzzy_search, FUZZY_ENTITY_TYPES
+from ..throttling import SearchThrottle, TypeaheadThrottle
 import logging
 import requests
 
@@ -18,8 +22,10 @@ logger = logging.getLogger(__name__)
 class SearchViewSet(viewsets.ReadOnlyModelViewSet):
     """
     B-SEARCH-01: Unified Search API
-    GET /api/search/?q={query}&type={all/users/posts/leagues/teams/athletes}
+    GET /api/search/?q={query}&type={all/users/posts/leagues/teams/athletes}&page={n}&mode={default/fuzzy}
     Returns search results based on query and optional type filter.
+    Result IDs are cached briefly per normalized query and hydrated per viewer.
+    mode=fuzzy ranks users and sports entities by trigram similarity, for misspelt names.
     """
     permission_classes = []  # Allow unauthenticated search
     throttle_classes = [SearchThrottle]
@@ -27,11 +33,24 @@ class SearchViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         return Post.objects.none()  # We'll override list()
 
+    def get_throttles(self):
+        # Typeahead fires on every keystroke and has its own, higher limit
+        if self.action == 'typeahead':
+            return [TypeaheadThrottle()]
+        return super().get_throttles()
+
     def list(self, request):
         query = request.query_params.get('q', '').strip()
         search_type = request.query_params.get('type', 'all')
+        mode = request.query_params.get('mode', 'default')
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+        except ValueError:
+            page = 1
 
-        if not query:
+        # "Messi ", "messi" and "#messi" share one cached result list
+        normalized_query = normalize_search_query(query)
+        if not normalized_query:
             return Response({
                 'results': [],
                 'total': 0,
@@ -39,14 +58,29 @@ class SearchViewSet(viewsets.ReadOnlyModelViewSet):
                 'type': search_type
             })
 
-        if search_type == 'all':
-            results = self._unified_search(query, request.user)
+        if mode == 'fuzzy':
+            if search_type == 'all':
+                results = {
+                    'users': self._fuzzy_search(normalized_query, 'users', request.user)[:5],
+                    'leagues': self._fuzzy_search(normalized_query, 'leagues', request.user)[:3],
+                    'teams': self._fuzzy_search(normalized_query, 'teams', request.user)[:5],
+                    'athletes': self._fuzzy_search(normalized_query, 'athletes', request.user)[:5],
+                }
+            elif search_type in FUZZY_ENTITY_TYPES:
+                results = self._fuzzy_search(normalized_query, search_type, request.user)
+            else:
+                return Response(
+                    {'error': f'Fuzzy search is not available for type: {search_type}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        elif search_type == 'all':
+            results = self._unified_search(normalized_query, request.user)
         elif search_type == 'users':
-            results = self._search_users(query, request.user)
+            results = self._search_users(normalized_query, request.user, page)
         elif search_type == 'posts':
-            results = self._search_posts(query, request.user)
+            results = self._search_posts(normalized_query, request.user, page)
         elif search_type in ['leagues', 'teams', 'athletes']:
-            results = self._search_sports_entities(query, search_type, request.user)
+            results = self._search_sports_entities(normalized_query, search_type, request.user)
         else:
             return Response(
                 {'error': f'Invalid search type: {search_type}'},
@@ -71,57 +105,112 @@ class SearchViewSet(viewsets.ReadOnlyModelViewSet):
         }
         return results
 
-    def _search_users(self, query, user):
+    def _excluded_user_ids(self, user):
+        """Blocked and muted user IDs for the viewer"""
+        if not user.is_authenticated:
+            return set()
+        blocked_ids = set(user.blocked_users.values_list('id', flat=True))
+        muted_ids = set(user.muted_users.values_list('id', flat=True))
+        return blocked_ids | muted_ids
+
+    def _page(self, ids, page, page_size):
+        offset = (page - 1) * page_size
+        return ids[offset:offset + page_size]
+
+    def _search_users(self, query, user, page=1):
         """Search for users by username, first name, last name, or bio"""
-        # Exclude blocked/muted users if authenticated
-        queryset = User.objects.all()
-
-        if user.is_authenticated:
-            blocked_ids = set(user.blocked_users.values_list('id', flat=True))
-            muted_ids = set(user.muted_users.values_list('id', flat=True))
-            excluded_ids = blocked_ids | muted_ids
-            if excluded_ids:
-                queryset = queryset.exclude(id__in=excluded_ids)
-
-        # Search by username, name, or bio
-        users = queryset.filter(
-            Q(username__icontains=query) |
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query) |
-            Q(bio__icontains=query)
-        ).annotate(
-            followers_count=Count('followers'),
-            following_count=Count('following')
-        )[:20]  # Limit results
+        config = get_search_cache_config()
+
+        def compute():
+            # Search by username, name, or bio
+            return User.objects.filter(
+                Q(username__icontains=query) |
+                Q(first_name__icontains=query) |
+                Q(last_name__icontains=query) |
+                Q(bio__icontains=query)
+            ).order_by('id').values_list('id', flat=True)[:config['max_ids']]
+
+        # One cached ID list per query; pages are cut after viewer filtering so they stay full
+        user_ids = search_result_cache.get_or_compute('users', query, 1, compute)
+        excluded_ids = self._excluded_user_ids(user)
+        user_ids = self._page(
+            [user_id for user_id in user_ids if user_id not in excluded_ids], page, config['page_sizes']['users']
+        )
+        users_by_id = User.objects.annotate(
+            followers_count=Count('followers', distinct=True),
+            following_count=Count('following', distinct=True)
+        ).in_bulk(user_ids)
+        users = [users_by_id[user_id] for user_id in user_ids if user_id in users_by_id]
 
         # Serialize with request context for URLs
         serializer = UserSerializer(users, many=True, context={'request': self.request})
         return serializer.data
 
-    def _search_posts(self, query, user):
+    def _search_posts(self, query, user, page=1):
         """Search for posts by content, title, or hashtags"""
-        # Base queryset
-        queryset = Post.objects.all()
-
-        # Exclude posts from blocked/muted users if authenticated
-        if user.is_authenticated:
-            blocked_ids = set(user.blocked_users.values_list('id', flat=True))
-            muted_ids = set(user.muted_users.values_list('id', flat=True))
-            excluded_ids = blocked_ids | muted_ids
-            if excluded_ids:
-                queryset = queryset.exclude(author__in=excluded_ids)
-
-        # Search by content, title, or hashtags
-        posts = queryset.filter(
-            Q(content__icontains=query) |
-            Q(title__icontains=query) |
-            Q(hashtags__hashtag__icontains=query)
-        ).distinct().select_related('author').prefetch_related('likes', 'comments', 'reposts')[:50]
+        config = get_search_cache_config()
+
+        def compute():
+            # Search by content, title, or hashtags, keeping authors for viewer filtering
+            return [
+                list(row) for row in Post.objects.filter(
+                    Q(content__icontains=query) |
+                    Q(title__icontains=query) |
+                    Q(hashtags__hashtag__icontains=query)
+                ).distinct().order_by('-created_at', '-id').values_list('id', 'author_id')[:config['max_ids']]
+            ]
+
+        # Drop posts from blocked/muted users before paging, so pages stay full
+        matches = search_result_cache.get_or_compute('posts', query, 1, compute)
+        excluded_ids = self._excluded_user_ids(user)
+        post_ids = self._page(
+            [post_id for post_id, author_id in matches if author_id not in excluded_ids],
+            page, config['page_sizes']['posts']
+        )
+        posts_by_id = {
+            post.id: post
+            for post in Post.objects.filter(id__in=post_ids).select_related('author').prefetch_related(
+                'likes', 'comments', 'reposts'
+            )
+        }
+        posts = [posts_by_id[post_id] for post_id in post_ids if post_id in posts_by_id]
 
         serializer = PostSerializer(posts, many=True, context={'request': self.request})
         return serializer.data
 
+    def _fuzzy_search(self, query, entity_type, user):
+        """Similarity-ranked matches for misspelt usernames and sports entity names"""
+        matches = search_result_cache.get_or_compute(
+            f'fuzzy_{entity_type}', query, 1,
+            lambda: [[entity_id, round(similarity, 3)] for entity_id, similarity in fuzzy_search(query, entity_type)]
+        )
+        similarities = dict(matches)
+        entity_ids = list(similarities)
+
+        if entity_type == 'users':
+            excluded_ids = self._excluded_user_ids(user)
+            entity_ids = [user_id for user_id in entity_ids if user_id not in excluded_ids]
+            users_by_id = User.objects.annotate(
+                followers_count=Count('followers', distinct=True),
+                following_count=Count('following', distinct=True)
+            ).in_bulk(entity_ids)
+            users = [users_by_id[user_id] for user_id in entity_ids if user_id in users_by_id]
+            results = UserSerializer(users, many=True, context={'request': self.request}).data
+        else:
+            results = sports_search_index.get_entries(entity_type, entity_ids)
+
+        for result in results:
+            result['similarity'] = similarities[result['id']]
+        return results
+
     def _search_sports_entities(self, query, entity_type, user):
+        """Search local leagues/teams/athletes, calling TheSportsDB only on a local miss"""
+        results = sports_search_index.search(query, entity_type)
+        if results:
+            return results
+        return self._search_thesportsdb(query, entity_type)
+
+    def _search_thesportsdb(self, query, entity_type):
         """Search for sports entities using TheSportsDB API with caching"""
         from django.core.cache import cache
 
@@ -228,7 +317,7 @@ class SearchViewSet(viewsets.ReadOnlyModelViewSet):
         query = request.query_params.get('q', '').strip()
         context = request.query_params.get('context', 'general')
 
-        if not query:
+        if not normalize_search_query(query):
             return Response({
                 'results': [],
                 'total': 0,
@@ -244,10 +333,10 @@ class SearchViewSet(viewsets.ReadOnlyModelViewSet):
             results = self._search_communities(query, request.user)
         elif context in ['teams', 'leagues', 'athletes']:
             # Search for sports entities
-            results = self._search_sports_entities(query, context, request.user)
+            results = self._search_sports_entities(normalize_search_query(query), context, request.user)
         else:
             # General search
-            results = self._unified_search(query, request.user)
+            results = self._unified_search(normalize_search_query(query), request.user)
 
         return Response({
             'results': results,
@@ -261,36 +350,65 @@ class SearchViewSet(viewsets.ReadOnlyModelViewSet):
         if not user.is_authenticated:
             return []
 
-        # Get followed users first
-        followed_users = user.following.filter(
-            Q(username__icontains=query) |
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query)
-        ).annotate(
-            followers_count=Count('followers'),
-            following_count=Count('following'),
-            is_followed=Value(True, BooleanField())
+        # Prefix lookup against the in-memory typeahead index (followed users ranked first)
+        followed_ids, blocked_ids = get_viewer_context(user)
+        matches = user_typeahead_index.search(
+            query,
+            limit=20,
+            followed_ids=followed_ids,
+            exclude_ids=blocked_ids | {user.id}
         )
 
-        # Get other users (not followed, not blocked)
-        blocked_ids = set(user.blocked_users.values_list('id', flat=True))
-        other_users = User.objects.exclude(
-            id__in=[u.id for u in followed_users] + list(blocked_ids) + [user.id]
-        ).filter(
-            Q(username__icontains=query) |
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query)
-        ).annotate(
-            followers_count=Count('followers'),
-            following_count=Count('following'),
-            is_followed=Value(False, BooleanField())
-        )[:10]  # Limit other users
-
-        # Combine and serialize
-        all_users = list(followed_users) + list(other_users)
+        users_by_id = User.objects.in_bulk([match['id'] for match in matches])
+        all_users = [users_by_id[match['id']] for match in matches if match['id'] in users_by_id]
         serializer = UserSerializer(all_users, many=True, context={'request': self.request})
         return serializer.data
 
+    @action(detail=False, methods=['get'])
+    def typeahead(self, request):
+        """
+        B-SEARCH-03: Keystroke Typeahead
+        GET /api/search/typeahead/?q={prefix}&context={messaging/mentions}&limit={n}
+        Lightweight prefix matches served from the in-memory user index, with
+        followed users first. No per-user serializer queries are made.
+        """
+        query = request.query_params.get('q', '').strip()
+        context = request.query_params.get('context', 'mentions')
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 8)), 20))
+        except ValueError:
+            limit = 8
+
+        if not query or (context == 'messaging' and not request.user.is_authenticated):
+            return Response({'results': [], 'query': query, 'context': context})
+
+        followed_ids, blocked_ids = get_viewer_context(request.user)
+        exclude_ids = set(blocked_ids)
+        if request.user.is_authenticated:
+            exclude_ids.add(request.user.id)
+
+        matches = user_typeahead_index.search(
+            query,
+            limit=limit,
+            followed_ids=followed_ids,
+            exclude_ids=exclude_ids
+        )
+
+        profile_storage = User._meta.get_field('profile_image').storage
+        results = [
+            {
+                'id': match['id'],
+                'username': match['username'],
+                'name': match['name'],
+                'profile_picture_url': request.build_absolute_uri(profile_storage.url(match['profile_image'])) if match['profile_image'] else None,
+                'is_verified': match['is_verified'],
+                'is_followed': match['is_followed'],
+            }
+            for match in matches
+        ]
+
+        return Response({'results': results, 'query': query, 'context': context})
+
     def _search_communities(self, query, user):
         """Search for communities (mock implementation)"""
         # Mock community data
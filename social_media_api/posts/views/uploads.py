@@ -0,0 +1,203 @@
+from rest_framework import viewsets, status, permissions, views
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from ..models import MultipartUpload
+from ..multipart_upload import (
+    ALLOWED_CONTENT_TYPES, UploadError, IncompleteUpload, get_multipart_upload_config, upload_key,
+    start_upload, sync_parts, presign_parts, complete_upload, abort_upload
+)
+from ..s3_utils import get_presigned_urls_for_media
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def upload_state(upload, part_urls=None):
+    """Response body describing an upload and, when given, the part URLs just issued"""
+    data = {
+        'id': upload.id,
+        'key': upload.key,
+        'status': upload.status,
+        'file_size': upload.file_size,
+        'part_size': upload.part_size,
+        'part_count': upload.part_count,
+        'uploaded_parts': sorted(int(number) for number in upload.parts),
+        'missing_parts': upload.missing_parts,
+        'uploaded_bytes': upload.uploaded_bytes,
+    }
+    if part_urls is not None:
+        data['part_urls'] = part_urls
+    return data
+
+
+class MultipartUploadViewSet(viewsets.GenericViewSet):
+    """
+    B-UPLOAD-02: Resumable multipart upload
+    Start an upload, fetch part URLs in batches, check which parts S3 has,
+    then complete or abort. The completed key is passed to CreatePostView.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return MultipartUpload.objects.filter(user=self.request.user)
+
+    def get_active_upload(self):
+        upload = self.get_object()
+        if upload.status != 'active':
+            return upload, Response(
+                {'error': f'Upload is {upload.status}'}, status=status.HTTP_409_CONFLICT
+            )
+        return upload, None
+
+    def create(self, request):
+        file_name = request.data.get('file_name')
+        content_type = request.data.get('content_type')
+        try:
+            file_size = int(request.data.get('file_size'))
+        except (TypeError, ValueError):
+            file_size = None
+
+        if not file_name or not content_type or file_size is None:
+            return Response(
+                {'error': 'file_name, content_type and file_size are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            upload = start_upload(request.user, file_name, content_type, file_size)
+            if upload is None:
+                return Response(
+                    {'error': 'Failed to start upload'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+            return Response(upload_state(upload, presign_parts(upload)), status=status.HTTP_201_CREATED)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    def retrieve(self, request, pk=None):
+        """Parts received so far, read back from S3"""
+        upload = self.get_object()
+        if upload.status == 'active':
+            try:
+                sync_parts(upload)
+            except UploadError as e:
+                return Response({'error': str(e)}, status=status.HTTP_410_GONE)
+        return Response(upload_state(upload))
+
+    @action(detail=True, methods=['post'])
+    def parts(self, request, pk=None):
+        """URLs for the requested part numbers, or the next batch of missing parts"""
+        upload, error = self.get_active_upload()
+        if error:
+            return error
+
+        part_numbers = request.data.get('part_numbers')
+        try:
+            if part_numbers is None:
+                sync_parts(upload)
+            else:
+                part_numbers = [int(number) for number in part_numbers]
+            return Response(upload_state(upload, presign_parts(upload, part_numbers)))
+        except (TypeError, ValueError):
+            return Response({'error': 'part_numbers must be a list of integers'}, status=status.HTTP_400_BAD_REQUEST)
+        except UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        upload, error = self.get_active_upload()
+        if error:
+            return error
+
+        try:
+            complete_upload(upload)
+        except IncompleteUpload as e:
+            return Response(
+                {'error': 'Upload is missing parts', 'missing_parts': e.missing},
+                status=status.HTTP_409_CONFLICT
+            )
+        except UploadError as e:
+            logger.error(f"Failed to complete upload {upload.key}: {e}")
+            return Response({'error': str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+        return Response(upload_state(upload))
+
+    @action(detail=True, methods=['post'])
+    def abort(self, request, pk=None):
+        upload, error = self.get_active_upload()
+        if error:
+            return error
+        return Response(upload_state(abort_upload(upload)))
+
+
+class BatchUploadURLView(views.APIView):
+    """
+    B-UPLOAD-03: Upload URLs for every file of a post in one request
+    Validates all files up front, then signs a PUT URL for each with the
+    shared S3 client. Files from multipart_threshold bytes get a resumable
+    multipart session instead.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_files = 4  # MAX_MEDIA from frontend
+
+    def validate(self, files):
+        """Per-file errors; empty when every file is acceptable"""
+        if not isinstance(files, list) or not files:
+            return [{'index': None, 'error': 'files must be a non-empty list'}]
+        if len(files) > self.max_files:
+            return [{'index': None, 'error': 'Too many media files'}]
+
+        max_file_size = get_multipart_upload_config()['max_file_size']
+        errors = []
+        for index, entry in enumerate(files):
+            if not isinstance(entry, dict) or not entry.get('file_name') or not entry.get('content_type'):
+                errors.append({'index': index, 'error': 'file_name and content_type are required'})
+            elif entry['content_type'] not in ALLOWED_CONTENT_TYPES:
+                errors.append({'index': index, 'error': f"Content type {entry['content_type']} not allowed"})
+            elif entry.get('file_size') is not None:
+                try:
+                    valid_size = 0 < int(entry['file_size']) <= max_file_size
+                except (TypeError, ValueError):
+                    valid_size = False
+                if not valid_size:
+                    errors.append({'index': index, 'error': f'file_size must be between 1 and {max_file_size} bytes'})
+        return errors
+
+    def post(self, request):
+        files = request.data.get('files')
+        errors = self.validate(files)
+        if errors:
+            return Response({'error': 'Invalid upload request', 'files': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        threshold = get_multipart_upload_config()['multipart_threshold']
+        sessions = []
+        try:
+            uploads = []
+            for entry in files:
+                file_size = int(entry['file_size']) if entry.get('file_size') is not None else None
+                if file_size is not None and file_size >= threshold:
+                    upload = start_upload(request.user, entry['file_name'], entry['content_type'], file_size)
+                    if upload is None:
+                        raise UploadError('Failed to start upload')
+                    sessions.append(upload)
+                    uploads.append({
+                        'file_name': entry['file_name'], 'key': upload.key,
+                        'multipart': upload_state(upload, presign_parts(upload)),
+                    })
+                else:
+                    uploads.append({'file_name': entry['file_name'], 'key': upload_key(request.user, entry['file_name'])})
+
+            single_keys = [upload['key'] for upload in uploads if 'multipart' not in upload]
+            urls = get_presigned_urls_for_media(single_keys, expiration=900, operation='put_object')
+            for upload in uploads:
+                if 'multipart' not in upload:
+                    upload['upload_url'] = urls[upload['key']]
+                    if not upload['upload_url']:
+                        raise UploadError('Failed to generate upload URL')
+        except UploadError as e:
+            # All or nothing: release the sessions opened for this batch
+            for upload in sessions:
+                abort_upload(upload)
+            logger.error(f"Error generating batch upload URLs: {e}")
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response({'uploads': uploads})
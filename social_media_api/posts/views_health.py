@@ -5,11 +5,13 @@ from django.conf import settings
 from django.core.cache import cache
 from django.db import connection
 import redis
-import boto3
 import psutil
 import time
 from datetime import datetime, timedelta
 
+from .s3_utils import get_s3_manager
+from social_media_api.task_queues import queue_stats
+
 
 @require_GET
 def health_check(request):
@@ -46,12 +48,8 @@ def health_check(request):
     # Check S3 connectivity (if enabled)
     if getattr(settings, 'USE_S3', True):
         try:
-            s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_S3_REGION_NAME
-            )
+            # Shared pooled client: no new connection pool or credential resolution per probe
+            s3_client = get_s3_manager().s3_client
             # Simple head bucket operation
             s3_client.head_bucket(Bucket=settings.AWS_STORAGE_BUCKET_NAME)
             health_status["s3"] = "healthy"
@@ -79,6 +77,7 @@ def detailed_health_check(request):
         "database": {},
         "cache": {},
         "storage": {},
+        "task_queues": {},
         "throttling": {}
     }
 
@@ -140,12 +139,8 @@ def detailed_health_check(request):
     # Storage metrics
     if getattr(settings, 'USE_S3', True):
         try:
-            s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_S3_REGION_NAME
-            )
+            s3_manager = get_s3_manager()
+            s3_client = s3_manager.s3_client
 
             storage_start = time.time()
             # Get bucket size (approximate)
@@ -167,7 +162,8 @@ def detailed_health_check(request):
                 "bucket": settings.AWS_STORAGE_BUCKET_NAME,
                 "response_time": round(storage_time * 1000, 2),  # ms
                 "total_objects": total_objects,
-                "total_size_mb": round(total_size / (1024 * 1024), 2)
+                "total_size_mb": round(total_size / (1024 * 1024), 2),
+                "uploads": s3_manager.upload_stats.snapshot()
             }
         except Exception as e:
             health_data["storage"] = {
@@ -175,6 +171,12 @@ def detailed_health_check(request):
                 "error": str(e)
             }
 
+    # Celery queue backlog and latency
+    try:
+        health_data["task_queues"] = queue_stats()
+    except Exception as e:
+        health_data["task_queues"] = {"error": str(e)}
+
     # Throttling metrics
     try:
         # Get throttling statistics from cache
@@ -268,6 +270,40 @@ def metrics_endpoint(request):
     except Exception as e:
         metrics.append(f'# ERROR collecting database metrics: {e}')
 
+    # Celery queue metrics
+    try:
+        stats = queue_stats()
+        metrics.extend([
+            f'',
+            f'# HELP sportisode_task_queue_backlog Tasks waiting on the broker per queue',
+            f'# TYPE sportisode_task_queue_backlog gauge',
+        ])
+        metrics.extend(
+            f'sportisode_task_queue_backlog{{queue="{queue}"}} {queue_data["backlog"]}'
+            for queue, queue_data in stats.items() if queue_data['backlog'] is not None
+        )
+        metrics.extend([
+            f'',
+            f'# HELP sportisode_task_queue_wait_seconds Time from enqueue to start over recent tasks',
+            f'# TYPE sportisode_task_queue_wait_seconds summary',
+        ])
+        for queue, queue_data in stats.items():
+            if queue_data['wait_p50'] is not None:
+                metrics.append(f'sportisode_task_queue_wait_seconds{{queue="{queue}",quantile="0.5"}} {queue_data["wait_p50"]}')
+                metrics.append(f'sportisode_task_queue_wait_seconds{{queue="{queue}",quantile="0.95"}} {queue_data["wait_p95"]}')
+        metrics.extend([
+            f'',
+            f'# HELP sportisode_task_queue_completed_total Tasks completed per queue',
+            f'# TYPE sportisode_task_queue_completed_total counter',
+        ])
+        metrics.extend(
+            f'sportisode_task_queue_completed_total{{queue="{queue}"}} {queue_data["completed"]}'
+            for queue, queue_data in stats.items()
+        )
+        metrics.append(f'')
+    except Exception as e:
+        metrics.append(f'# ERROR collecting task queue metrics: {e}')
+
     # Throttling metrics
     try:
         throttle_keys = cache.keys('throttle_*') if hasattr(cache, 'keys') else []
@@ -15,6 +15,9 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
 
+# Queue wait/run-time metrics are recorded through Celery signals
+from . import task_queues  # noqa: E402,F401
+
 # Configure periodic tasks (Celery Beat)
 app.conf.beat_schedule = {
     # Daily sync of leagues and teams data at 2 AM
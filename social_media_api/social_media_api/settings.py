@@ -162,11 +162,19 @@ AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
 AWS_STORAGE_BUCKET_NAME = os.getenv('AWS_STORAGE_BUCKET_NAME', 'sportisode-media')
 AWS_S3_REGION_NAME = os.getenv('AWS_S3_REGION_NAME', 'us-east-1')
 AWS_S3_CUSTOM_DOMAIN = os.getenv('AWS_S3_CUSTOM_DOMAIN')  # CloudFront distribution domain
+AWS_S3_ENDPOINT_URL = os.getenv('AWS_S3_ENDPOINT_URL')  # S3-compatible endpoint (MinIO, local stand-ins)
 AWS_DEFAULT_ACL = 'public-read'
 AWS_S3_OBJECT_PARAMETERS = {
     'CacheControl': 'max-age=86400',  # 24 hours
 }
 
+# Shared S3 client pool and multipart transfer tuning (see posts.s3_utils.DEFAULT_S3_TRANSFER_CONFIG)
+S3_TRANSFER_CONFIG = {
+    'max_pool_connections': int(os.getenv('S3_MAX_POOL_CONNECTIONS', 32)),
+    'max_concurrency': 8,  # parts in flight per multipart upload
+    'batch_workers': 8,  # objects in flight per batch upload
+}
+
 # Use S3 for media files by default (can be overridden for development)
 USE_S3 = os.getenv('USE_S3', 'true').lower() == 'true'
 if USE_S3:
@@ -247,6 +255,7 @@ REST_FRAMEWORK = {
         'chat_messages': '5/minute',
         'feed_access': '100/minute',
         'search': '30/minute',
+        'typeahead': '120/minute',
         'analytics': '10/minute',
         'premium': '1000/hour',
     },
@@ -341,6 +350,41 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Redis emulates priorities with one list per step; 0 is served first. Tasks default to the middle
+# so latency-sensitive work (video poster frames) can be queued ahead of them.
+CELERY_BROKER_TRANSPORT_OPTIONS = {'priority_steps': list(range(10)), 'sep': ':'}
+CELERY_TASK_DEFAULT_PRIORITY = 5
+
+# Dedicated queues so long transcodes and bulk syncs never sit in front of image work; each queue
+# gets its own worker (python manage.py task_queue_workers). Unrouted tasks stay on 'celery'.
+CELERY_TASK_ROUTES = {
+    # Seconds-long media work: images, poster frames, playlists, short videos
+    'posts.tasks.process_image_file': {'queue': 'media-fast'},
+    'posts.tasks.extract_video_poster': {'queue': 'media-fast'},
+    'posts.tasks.generate_hls_playlist': {'queue': 'media-fast'},
+    # Transcodes default to the heavy queue; queue_video_processing sends small clips to media-fast
+    'posts.tasks.process_video_file': {'queue': 'media-heavy'},
+    # Exact names win over patterns: SWR refreshes serve page reads and must not wait behind bulk syncs
+    'sports.tasks.refresh_swr_cache': {'queue': 'celery'},
+    'sports.tasks.*': {'queue': 'sports-sync'},
+    'posts.tasks.update_trending_topics': {'queue': 'analytics'},
+    'posts.tasks.refresh_trending_posts': {'queue': 'analytics'},
+    'posts.tasks.calculate_daily_analytics': {'queue': 'analytics'},
+    'posts.tasks.update_engagement_rates': {'queue': 'analytics'},
+    'accounts.tasks.compute_follow_suggestions': {'queue': 'analytics'},
+}
+
+# Per-queue worker settings and queue metrics (see social_media_api.task_queues)
+TASK_QUEUE_CONFIG = {
+    'queues': {
+        'celery': {'concurrency': 2, 'prefetch_multiplier': 4},
+        'media-fast': {'concurrency': int(os.getenv('MEDIA_FAST_CONCURRENCY', 4)), 'prefetch_multiplier': 4},
+        'media-heavy': {'concurrency': int(os.getenv('MEDIA_HEAVY_CONCURRENCY', 1)), 'prefetch_multiplier': 1},
+        'sports-sync': {'concurrency': 2, 'prefetch_multiplier': 1},
+        'analytics': {'concurrency': 2, 'prefetch_multiplier': 4},
+    },
+    'heavy_video_bytes': 100 * 1024 * 1024,  # 100 MB
+}
 
 # Celery Beat Settings (for periodic tasks)
 CELERY_BEAT_SCHEDULE = {
@@ -352,6 +396,22 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'posts.tasks.update_engagement_rates',
         'schedule': 3600.0,   # Every hour
     },
+    'update-trending-topics': {
+        'task': 'posts.tasks.update_trending_topics',
+        'schedule': 60.0,     # Every minute; TrendsView serves the resulting snapshot
+    },
+    'refresh-trending-posts': {
+        'task': 'posts.tasks.refresh_trending_posts',
+        'schedule': 120.0,    # Every 2 minutes; TrendingSidebarView reads the ranking
+    },
+    'abort-stale-multipart-uploads': {
+        'task': 'posts.tasks.abort_stale_multipart_uploads',
+        'schedule': 3600.0,   # Every hour; uploads expire after MULTIPART_UPLOAD_CONFIG['expire_after']
+    },
+    'compute-follow-suggestions': {
+        'task': 'accounts.tasks.compute_follow_suggestions',
+        'schedule': 86400.0,  # Every 24 hours; follow events update lists in between
+    },
     # Sports data refresh tasks
     'refresh-league-standings': {
         'task': 'sports.tasks.update_league_standings',
@@ -390,6 +450,74 @@ ANALYTICS_CACHE_TIMEOUT = 3600  # 1 hour
 ANALYTICS_BATCH_SIZE = 1000     # Process events in batches
 ANALYTICS_RETENTION_DAYS = 90   # Keep analytics data for 90 days
 
+# User typeahead index (accounts.typeahead)
+TYPEAHEAD_CONFIG = {
+    'max_local_users': 200000,     # Larger user tables fall back to cached prefix queries
+    'change_log_size': 500,        # Shared change log length before workers fully rebuild
+    'prefix_cache_timeout': 300,   # 5 minutes
+    'viewer_cache_timeout': 60,    # Follow/block sets per viewer
+    'max_results': 10,
+}
+
+# Search result cache (posts.search_cache)
+SEARCH_CACHE_CONFIG = {
+    'result_timeout': 60,          # Seconds a cached result ID list is served
+    'lock_timeout': 10,            # Single-flight lock held while one worker searches
+    'wait_interval': 0.05,         # Poll interval for requests waiting on that worker
+    'max_wait': 0.5,               # then they search themselves
+    'max_ids': 500,                # IDs cached per query, filtered per viewer, then paged
+    'page_sizes': {
+        'users': 20,
+        'posts': 50,
+    },
+}
+
+# Local sports entity search (sports.search_index)
+SPORTS_SEARCH_CONFIG = {
+    'max_results': 10,
+    'fuzzy_cutoff': 0.75,          # Similarity needed for a misspelt token to match
+    'min_rebuild_interval': 30,    # Seconds between worker rebuilds during a sync
+}
+
+# Trigram fuzzy search (posts.trigram_search): pg_trgm on PostgreSQL, in-process index otherwise
+FUZZY_SEARCH_CONFIG = {
+    'similarity_threshold': 0.3,   # Minimum trigram similarity returned
+    'max_results': 20,
+    'min_rebuild_interval': 30,    # Seconds between in-process index rebuilds
+}
+
+# Trending topics engine (posts.trending)
+TRENDING_CONFIG = {
+    'sketch_width': 2048,          # Count-Min Sketch counters per row
+    'sketch_depth': 4,
+    'top_k': 50,                   # Heavy hitters tracked per sport category
+    'half_life': 21600,            # 6 hours
+    'snapshot_size': 10,
+}
+
+# Trending post ranking for the sidebar (posts.trending_posts)
+TRENDING_POSTS_CONFIG = {
+    'window_hours': 72,
+    'rate_window_minutes': 60,
+    'max_candidates': 5000,
+    'ranking_size': 50,
+    'gravity': 1.5,                # score / (age_hours + 2) ** gravity
+}
+
+# Who-to-follow recommendations (accounts.recommendations)
+FOLLOW_SUGGESTIONS_CONFIG = {
+    'top_n': 30,
+    'fof_weight': 1.0,
+    'cofollow_weight': 0.25,
+}
+
+# Stale-while-revalidate cache for explore and sports detail endpoints (sports.swr_cache)
+SWR_CACHE_CONFIG = {
+    'stale_ttl': 86400,            # Serve expired values for up to a day while refreshing
+    'ttl_jitter': 0.1,             # +/- 10% so keys written together expire apart
+    'negative_ttl': 60,            # Remember upstream failures for a minute
+}
+
 # Media Processing Settings
 # ImageKit Settings
 IMAGEKIT_DEFAULT_IMAGE_QUALITY = 85
@@ -397,24 +525,69 @@ IMAGEKIT_DEFAULT_FORMAT = 'WEBP'
 
 # Media Processing Configuration
 MEDIA_PROCESSING_CONFIG = {
+    # S3 originals are streamed to a temp file in chunks of this size, never read whole
+    'download_chunk_size': 1024 * 1024,  # 1 MB
+    'temp_dir': os.getenv('MEDIA_PROCESSING_TEMP_DIR'),  # None: system temp directory
     'image': {
         'thumbnail': {'width': 150, 'height': 150, 'crop': 'center'},
-        'preview': {'width': 800, 'height': 600, 'crop': 'smart'},
-        'full': {'quality': 90, 'format': 'WEBP'},
+        'preview': {'width': 800, 'height': 600},  # fit inside, aspect ratio kept
+        'full': {'quality': 90, 'format': 'WEBP', 'max_dimension': 2048},
+        'responsive': {
+            'widths': [320, 640, 960, 1280, 1920],  # srcset ladder; widths above the original are skipped
+            'formats': ['avif', 'webp'],  # preference order; avif needs an AVIF-capable Pillow or pillow-avif-plugin
+            'quality': {'avif': 55, 'webp': 80},
+        },
+        'placeholder': {'components': (4, 3)},  # BlurHash x/y components
+        'workers': int(os.getenv('MEDIA_IMAGE_WORKERS', 2)),  # encoder processes; 0 encodes inline
+        'start_method': 'spawn',  # workers only encode pixels, so they need no Django state
     },
     'video': {
-        'thumbnail': {'time': 1.0, 'width': 320, 'height': 180},
+        'thumbnail': {
+            'time': 1.0, 'width': 320, 'height': 180,  # poster from the keyframe at or before `time`
+            'timeout': 30,  # seconds allowed for the ffmpeg seek and decode
+            'priority': 0,  # queued ahead of transcodes (see CELERY_TASK_DEFAULT_PRIORITY)
+        },
         'hls': {
             'bitrates': [800, 1200, 2400],  # kbps
             'resolutions': [(640, 360), (854, 480), (1280, 720)],
+            'segment_duration': 6,  # seconds; keyframes are forced on these boundaries
+            'audio_bitrate': 128,  # kbps
+            'preset': 'medium',  # libx264 preset
+            'upload_workers': 4,  # segments uploaded concurrently while ffmpeg encodes
+            'poll_interval': 0.5,  # seconds between scans for finished segments
         },
     },
 }
 
+# Content-addressed media deduplication (see posts.media_dedupe)
+MEDIA_DEDUPE_CONFIG = {
+    'enabled': True,
+    'perceptual': os.getenv('MEDIA_DEDUPE_PERCEPTUAL', 'false').lower() == 'true',  # near-duplicate images
+    'phash_max_distance': 3,
+}
+
+# Resumable direct-to-S3 uploads (see posts.multipart_upload)
+MULTIPART_UPLOAD_CONFIG = {
+    'part_size': 8 * 1024 * 1024,  # 8 MB; S3 requires at least 5 MB
+    'url_batch_size': 10,
+    'url_expiration': 3600,
+    'max_file_size': int(os.getenv('MAX_UPLOAD_BYTES', 2 * 1024 * 1024 * 1024)),
+    'multipart_threshold': 64 * 1024 * 1024,  # batch URL requests open resumable sessions from this size
+    'expire_after': 24 * 3600,
+}
+
+# Chat messages sent over the WebSocket (see messages.delivery)
+CHAT_SOCKET_CONFIG = {
+    'flush_interval': 0.05,  # seconds queued messages wait to share one bulk write
+    'max_batch': 50,
+    'max_length': 1000,
+}
+
 # Celery Media Processing Tasks
 CELERY_MEDIA_TASKS = {
     'process_image': 'posts.tasks.process_image_file',
     'process_video': 'posts.tasks.process_video_file',
+    'extract_video_poster': 'posts.tasks.extract_video_poster',
     'generate_hls_playlist': 'posts.tasks.generate_hls_playlist',
 }
 
@@ -0,0 +1,169 @@
+"""
+Celery queue layout and queue health.
+
+Tasks are routed by CELERY_TASK_ROUTES onto dedicated queues so that a long
+video transcode or a bulk sports sync cannot hold up image processing.
+Each queue is consumed by its own worker, started with the concurrency and
+prefetch from TASK_QUEUE_CONFIG (see the task_queue_workers command).
+
+Publish/start/finish signals record how long tasks wait on each queue and
+how long they run; queue_stats() combines that with the broker backlog.
+"""
+import logging
+import statistics
+import time
+
+from celery import current_app
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TASK_QUEUE_CONFIG = {
+    'queues': {
+        'celery': {'concurrency': 2, 'prefetch_multiplier': 4},
+        'media-fast': {'concurrency': 4, 'prefetch_multiplier': 4},
+        'media-heavy': {'concurrency': 1, 'prefetch_multiplier': 1},
+        'sports-sync': {'concurrency': 2, 'prefetch_multiplier': 1},
+        'analytics': {'concurrency': 2, 'prefetch_multiplier': 4},
+    },
+    'heavy_video_bytes': 100 * 1024 * 1024,  # videos this large (or of unknown size) go to media-heavy
+    'metrics_cache': 'default',              # must be shared by web and worker processes in production
+    'metrics_window': 200,                   # most recent tasks per queue kept for percentiles
+}
+
+METRICS_KEY = 'task_queue_metrics:{}'            # completed count, also the ring-buffer cursor
+METRICS_SAMPLE_KEY = 'task_queue_metrics:{}:{}'  # one (wait, runtime) sample per slot
+ENQUEUED_HEADER = 'enqueued_at'
+
+_started = {}
+
+
+def get_task_queue_config():
+    """Return Celery queue settings merged over the defaults."""
+    config = dict(DEFAULT_TASK_QUEUE_CONFIG)
+    config.update(getattr(settings, 'TASK_QUEUE_CONFIG', {}))
+    return config
+
+
+def video_queue(file_size):
+    """Queue for a video transcode: short clips stay on media-fast, large or unknown-size ones go to media-heavy."""
+    if file_size and file_size < get_task_queue_config()['heavy_video_bytes']:
+        return 'media-fast'
+    return 'media-heavy'
+
+
+def worker_command(queue):
+    """celery worker invocation consuming one queue with its configured concurrency and prefetch."""
+    options = get_task_queue_config()['queues'][queue]
+    command = [
+        'celery', '-A', 'social_media_api', 'worker', '-Q', queue, '-n', f'{queue}@%h',
+        '-c', str(options['concurrency']), '--prefetch-multiplier', str(options['prefetch_multiplier']),
+    ]
+    if options['prefetch_multiplier'] == 1:
+        # Hand tasks only to idle processes so a long task never holds a reserved one back
+        command += ['-O', 'fair']
+    return command
+
+
+def _metrics_cache():
+    return caches[get_task_queue_config()['metrics_cache']]
+
+
+def record_task(queue, wait, runtime):
+    """
+    Add one finished task's queue wait and run time to the queue's rolling
+    window. The window is a ring buffer of one cache key per slot: the atomic
+    incr of the completed count hands each task its own slot, so concurrent
+    workers never overwrite each other's samples.
+    """
+    cache = _metrics_cache()
+    key = METRICS_KEY.format(queue)
+    cache.add(key, 0, None)
+    completed = cache.incr(key)
+    # completed counts from 1, so the first task takes slot 0
+    slot = (completed - 1) % get_task_queue_config()['metrics_window']
+    cache.set(METRICS_SAMPLE_KEY.format(queue, slot), (wait, runtime), None)
+
+
+def _queue_samples(cache, queue, window):
+    """Return (completed, [(wait, runtime)]) for the most recent tasks of a queue."""
+    completed = cache.get(METRICS_KEY.format(queue)) or 0
+    keys = [METRICS_SAMPLE_KEY.format(queue, slot) for slot in range(min(completed, window))]
+    return completed, list(cache.get_many(keys).values()) if keys else []
+
+
+def queue_backlogs(queues):
+    """Messages waiting on the broker per queue (all priority levels), read over one connection; None where unreadable."""
+    backlogs = dict.fromkeys(queues)
+    try:
+        with current_app.connection_for_read() as connection:
+            connection.ensure_connection(max_retries=1, interval_start=0, timeout=2)
+            channel = connection.default_channel
+            for queue in queues:
+                try:
+                    backlogs[queue] = channel.queue_declare(queue=queue, passive=True).message_count
+                except connection.channel_errors as e:
+                    # AMQP closes the channel when a queue does not exist yet
+                    logger.debug(f"Could not read backlog of queue {queue}: {e}")
+                    channel = connection.channel()
+    except Exception as e:
+        logger.debug(f"Could not read queue backlogs: {e}")
+    return backlogs
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def queue_stats(include_backlog=True):
+    """Per-queue backlog, wait (enqueue to start) and run-time percentiles in seconds, and completed count."""
+    cache = _metrics_cache()
+    config = get_task_queue_config()
+    queues = list(config['queues'])
+    backlogs = queue_backlogs(queues) if include_backlog else dict.fromkeys(queues)
+    stats = {}
+    for queue in queues:
+        completed, samples = _queue_samples(cache, queue, config['metrics_window'])
+        waits = [wait for wait, _ in samples if wait is not None]
+        runtimes = [runtime for _, runtime in samples]
+        stats[queue] = {
+            'backlog': backlogs[queue],
+            'completed': completed,
+            'wait_p50': round(statistics.median(waits), 3) if waits else None,
+            'wait_p95': round(_percentile(waits, 0.95), 3) if waits else None,
+            'wait_max': round(max(waits), 3) if waits else None,
+            'runtime_p50': round(statistics.median(runtimes), 3) if runtimes else None,
+            'runtime_p95': round(_percentile(runtimes, 0.95), 3) if runtimes else None,
+        }
+    return stats
+
+
+@before_task_publish.connect
+def stamp_enqueue_time(headers=None, **kwargs):
+    if headers is not None:
+        headers[ENQUEUED_HEADER] = time.time()
+
+
+@task_prerun.connect
+def mark_task_start(task_id=None, task=None, **kwargs):
+    _started[task_id] = time.time()
+
+
+@task_postrun.connect
+def record_task_finish(task_id=None, task=None, **kwargs):
+    started = _started.pop(task_id, None)
+    if started is None or task is None:
+        return
+    delivery = getattr(task.request, 'delivery_info', None) or {}
+    queue = delivery.get('routing_key')
+    if not queue:
+        return  # Run eagerly or called directly, not taken from a queue
+
+    enqueued = getattr(task.request, ENQUEUED_HEADER, None)
+    try:
+        record_task(queue, started - enqueued if enqueued else None, time.time() - started)
+    except Exception as e:
+        logger.warning(f"Could not record metrics for queue {queue}: {e}")
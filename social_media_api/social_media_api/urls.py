@@ -33,6 +33,7 @@ urlpatterns = [
     path('feed/home/', HomeFeedViewSet.as_view({'get': 'list'}), name='home-feed'),  # B-FEED-01
     path('search/', SearchViewSet.as_view({'get': 'list'}), name='search'),  # B-SEARCH-01
     path('search/context/', SearchViewSet.as_view({'get': 'context'}), name='search-context'),  # B-SEARCH-02
+    path('search/typeahead/', SearchViewSet.as_view({'get': 'typeahead'}), name='search-typeahead'),  # B-SEARCH-03
     path('trends/', TrendsView.as_view({'get': 'list'}), name='trends'),  # B-EXP-TRN-01
     path('leagues/', LeaguesView.as_view({'get': 'list'}), name='leagues'),  # B-LEAGUE-01
     path('teams/', TeamsView.as_view({'get': 'list'}), name='teams'),  # B-TEAM-01
@@ -29,7 +29,7 @@ const TrendingTabContent = ({ trends }) => (
                             <div className="flex items-center space-x-4">
                                 <div className="flex items-center space-x-1">
                                     <span className="text-gray-400 text-sm">📊</span>
-                                    <span className="text-gray-300 text-sm">{trend.post_count ? trend.post_count.toLocaleString() : '0'} posts</span>
+                                    <span className="text-gray-300 text-sm">{trend.score ? trend.score.toLocaleString() : '0'} trend score</span>
                                 </div>
                                 <div className="flex items-center space-x-1">
                                     <TrendingUp className="h-4 w-4 text-orange-500" />
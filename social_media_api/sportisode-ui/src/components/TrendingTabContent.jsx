@@ -62,7 +62,7 @@ const TrendingTabContent = () => {
                                     {item.category}
                                 </p>
                                 <p className="font-bold text-primary-text leading-tight mt-1">{item.topic}</p>
-                                <p className="text-secondary-text text-sm mt-1">{item.post_count?.toLocaleString()} posts</p>
+                                <p className="text-secondary-text text-sm mt-1">{item.score?.toLocaleString()} trend score</p>
                             </div>
                             <Button variant="ghost" size="icon" className="text-gray-500 hover:bg-sport-accent/10 hover:text-sport-accent">
                                 <MoreHorizontal className="h-5 w-5" />
@@ -39,7 +39,7 @@ const TrendsSection = () => {
                         <MoreHorizontal className="h-4 w-4 text-gray-500 hover:text-white"/>
                     </div>
                     <p className="font-bold text-white mt-0.5">{trend.topic}</p>
-                    <p className="text-xs text-gray-500">{trend.post_count?.toLocaleString() || 0} posts</p>
+                    <p className="text-xs text-gray-500">{trend.score?.toLocaleString() || 0} trend score</p>
                 </div>
             ))}
 
@@ -0,0 +1,135 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+LIVE_EVENTS_KEY = 'live_events_snapshot'
+
+# Channel layer group joined by every FeedConsumer connection
+LIVE_EVENTS_GROUP = 'live_events'
+
+# API-Football short status codes for a match in progress
+IN_PLAY_STATUSES = ('1H', 'HT', '2H', 'ET', 'BT', 'P', 'SUSP', 'INT', 'LIVE')
+
+DEFAULT_LIVE_EVENTS_CONFIG = {
+    'max_fixtures': 10,
+    'max_streams': 10,
+}
+
+# Entry fields whose change alters the sidebar; viewer count bumps alone do not trigger a rebuild
+STATE_FIELDS = ('status', 'title', 'host_name', 'home_score', 'away_score')
+
+
+def get_live_events_config():
+    """Return live events settings merged over the defaults."""
+    config = dict(DEFAULT_LIVE_EVENTS_CONFIG)
+    config.update(getattr(settings, 'LIVE_EVENTS_CONFIG', {}))
+    return config
+
+
+def fixture_entry(fixture):
+    """Sidebar entry for an in-play fixture, or None when it is not in play."""
+    if fixture.status not in IN_PLAY_STATUSES:
+        return None
+    return {
+        'id': f"fixture-{fixture.id}",
+        'type': 'fixture',
+        'host_name': fixture.league_name,
+        'title': f"{fixture.home_team_name} vs {fixture.away_team_name}",
+        'status': fixture.status,
+        'home_score': fixture.home_score,
+        'away_score': fixture.away_score,
+        'started_at': fixture.scheduled_time.isoformat(),
+        'engagement_type': 'fire',
+        'engagement_count': 0,
+    }
+
+
+def stream_entry(stream):
+    """Sidebar entry for a public live stream, or None when it is not live."""
+    if stream.status != 'live' or stream.is_private:
+        return None
+    return {
+        'id': f"stream-{stream.id}",
+        'type': 'stream',
+        'host_name': stream.host.username,
+        'title': stream.title,
+        'status': stream.status,
+        'home_score': None,
+        'away_score': None,
+        'started_at': (stream.actual_start or stream.created_at).isoformat(),
+        'engagement_type': 'heart',
+        'engagement_count': stream.viewer_count,
+    }
+
+
+def build_live_events_snapshot():
+    """Query in-play fixtures and live streams and store the combined snapshot."""
+    from .models import Fixture
+    from posts.models import LiveStream
+
+    config = get_live_events_config()
+    fixtures = Fixture.objects.filter(status__in=IN_PLAY_STATUSES).order_by('scheduled_time')[:config['max_fixtures']]
+    streams = LiveStream.objects.filter(status='live', is_private=False).select_related('host').order_by(
+        'actual_start'
+    )[:config['max_streams']]
+
+    events = [fixture_entry(fixture) for fixture in fixtures] + [stream_entry(stream) for stream in streams]
+    events.sort(key=lambda entry: entry['started_at'])
+    snapshot = {'generated_at': timezone.now().isoformat(), 'events': events}
+    cache.set(LIVE_EVENTS_KEY, snapshot, None)
+    return snapshot
+
+
+def refresh_live_events():
+    """Rebuild the snapshot and push it to every connected feed."""
+    snapshot = build_live_events_snapshot()
+    try:
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+
+        channel_layer = get_channel_layer()
+        async_to_sync(channel_layer.group_send)(
+            LIVE_EVENTS_GROUP,
+            {
+                'type': 'live_events_update',
+                'events': snapshot['events'],
+                'timestamp': snapshot['generated_at']
+            }
+        )
+    except Exception as e:
+        logger.error(f"Error broadcasting live events update: {e}")
+    return snapshot
+
+
+def record_live_change(entry_id, entry):
+    """
+    Schedule a rebuild when a saved or deleted fixture/stream changes what the
+    sidebar shows: it entered or left the live set, or a state field changed.
+    """
+    snapshot = cache.get(LIVE_EVENTS_KEY)
+    if snapshot is None:
+        if entry is not None:
+            transaction.on_commit(refresh_live_events)
+        return
+
+    previous = next((event for event in snapshot['events'] if event['id'] == entry_id), None)
+    if previous is None and entry is None:
+        return
+    if previous is not None and entry is not None and all(
+        previous.get(field) == entry.get(field) for field in STATE_FIELDS
+    ):
+        return
+    transaction.on_commit(refresh_live_events)
+
+
+def get_live_events():
+    """Current live events, built inline only when no snapshot exists yet."""
+    snapshot = cache.get(LIVE_EVENTS_KEY)
+    if snapshot is None:
+        snapshot = build_live_events_snapshot()
+    return snapshot['events']
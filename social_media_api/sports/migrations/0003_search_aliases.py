@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sports", "0002_league_country_league_logo_url_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="league",
+            name="aliases",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Alternative names used by search, e.g. ['EPL']",
+            ),
+        ),
+        migrations.AddField(
+            model_name="team",
+            name="aliases",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Alternative names used by search, e.g. ['Man Utd']",
+            ),
+        ),
+        migrations.AddField(
+            model_name="athlete",
+            name="aliases",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Alternative names used by search, e.g. ['CR7']",
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# pg_trgm GIN indexes backing fuzzy search (posts.trigram_search); other databases use the in-process index
+TRIGRAM_INDEXES = [
+    ('League', 'name'),
+    ('Team', 'name'),
+    ('Team', 'abbreviation'),
+    ('Athlete', 'first_name'),
+    ('Athlete', 'last_name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for model_name, field in TRIGRAM_INDEXES:
+        table = apps.get_model('sports', model_name)._meta.db_table
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_{field}_trgm ON {table} USING gin ({field} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for model_name, field in TRIGRAM_INDEXES:
+        table = apps.get_model('sports', model_name)._meta.db_table
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_{field}_trgm')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sports", "0003_search_aliases"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Expression GIN indexes for the fuzzy search terms that are not plain columns:
+# the athlete's full name (matched with %) and the aliases list as text
+# (matched with <%, the word-similarity operator). The expressions must stay
+# identical to FullName and AliasesText in posts.trigram_search.
+TRIGRAM_EXPRESSION_INDEXES = [
+    ('Athlete', 'full_name', "(first_name || ' ' || last_name)"),
+    ('League', 'aliases', '(aliases::text)'),
+    ('Team', 'aliases', '(aliases::text)'),
+    ('Athlete', 'aliases', '(aliases::text)'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for model_name, name, expression in TRIGRAM_EXPRESSION_INDEXES:
+        table = apps.get_model('sports', model_name)._meta.db_table
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_{name}_trgm ON {table} USING gin ({expression} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for model_name, name, _ in TRIGRAM_EXPRESSION_INDEXES:
+        table = apps.get_model('sports', model_name)._meta.db_table
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_{name}_trgm')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("sports", "0004_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
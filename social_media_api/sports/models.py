@@ -11,6 +11,7 @@ class League(models.Model):
     feed_id = models.UUIDField(default=uuid.uuid4, unique=True, help_text="Unique ID for the league's feed")
     logo_url = models.URLField(blank=True, null=True, help_text="Cached logo URL from API-Football")
     country = models.CharField(max_length=100, blank=True, help_text="Country where league is played")
+    aliases = models.JSONField(default=list, blank=True, help_text="Alternative names used by search, e.g. ['EPL']")
     popularity_score = models.IntegerField(default=0, help_text="Popularity score for explore page ranking")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -31,6 +32,7 @@ class Team(models.Model):
     slug = models.SlugField(unique=True, blank=True)
     league = models.ForeignKey(League, on_delete=models.CASCADE, related_name='teams')
     abbreviation = models.CharField(max_length=10, blank=True)
+    aliases = models.JSONField(default=list, blank=True, help_text="Alternative names used by search, e.g. ['Man Utd']")
     description = models.TextField()
     roster = models.JSONField(default=list, help_text="Team roster as JSON array")
     schedule = models.JSONField(default=list, help_text="Team schedule as JSON array")
@@ -58,6 +60,7 @@ class Athlete(models.Model):
     team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='athletes', null=True, blank=True)
     position = models.CharField(max_length=50)
     nationality = models.CharField(max_length=50)
+    aliases = models.JSONField(default=list, blank=True, help_text="Alternative names used by search, e.g. ['CR7']")
     description = models.TextField()
     feed_id = models.UUIDField(default=uuid.uuid4, unique=True, help_text="Unique ID for the athlete's feed")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,354 @@
+import bisect
+import difflib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever a League, Team or Athlete changes; workers rebuild when it moves
+SPORTS_SEARCH_VERSION_KEY = 'sports_search_index_version'
+
+DEFAULT_SPORTS_SEARCH_CONFIG = {
+    'max_results': 10,
+    'fuzzy_cutoff': 0.75,          # difflib ratio needed for a misspelt token to match
+    'min_rebuild_interval': 30,    # Seconds between rebuilds while a sync is writing rows
+}
+
+ENTITY_TYPES = ('leagues', 'teams', 'athletes')
+
+# Match tiers, best first
+EXACT, PREFIX, TOKENS, FUZZY = 3, 2, 1, 0
+
+# Field weights: names and aliases outrank a country/nationality hit
+NAME_FIELD, COUNTRY_FIELD = 1, 0
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def get_sports_search_config():
+    """Return sports search settings merged over the defaults."""
+    config = dict(DEFAULT_SPORTS_SEARCH_CONFIG)
+    config.update(getattr(settings, 'SPORTS_SEARCH_CONFIG', {}))
+    return config
+
+
+def normalize_term(value):
+    """Casefold and strip accents so 'Atlético' and 'atletico' compare equal."""
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(value))
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.casefold().split())
+
+
+class IndexSnapshot(namedtuple('IndexSnapshot', 'entries terms vocab mentions version built_at')):
+    """
+    One build of the index, never modified once published: queries read the
+    current snapshot without locking, and a rebuild swaps in a new one.
+    """
+    __slots__ = ()
+
+
+EMPTY_SNAPSHOT = IndexSnapshot(
+    {entity_type: {} for entity_type in ENTITY_TYPES},
+    {entity_type: [] for entity_type in ENTITY_TYPES},
+    {entity_type: [] for entity_type in ENTITY_TYPES},
+    {}, None, 0
+)
+
+
+class SportsSearchIndex:
+    """
+    Per-worker search index over local League, Team and Athlete rows.
+
+    Names, aliases, abbreviations and countries are stored as a sorted list
+    of (term, entity_id, field) tuples per entity type, so exact and prefix
+    lookups are a bisect plus a short scan. Misspellings fall back to
+    difflib matching against the token vocabulary. Results are ranked by
+    match quality, then by popularity (league popularity_score, team
+    follower_count, an athlete's team follower_count).
+
+    The sports tables are small, so a change anywhere simply bumps a shared
+    version counter and each worker rebuilds on its next query. Queries work
+    on an IndexSnapshot and never wait for a rebuild once one exists: the
+    lock only keeps a single thread rebuilding while the others go on
+    answering from the previous snapshot.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = EMPTY_SNAPSHOT
+
+    def reset(self):
+        """Drop the local copy; the next query rebuilds it."""
+        with self._lock:
+            self._snapshot = EMPTY_SNAPSHOT
+
+    # Building
+
+    def _league_entries(self):
+        from .models import League
+
+        for league in League.objects.only(
+            'id', 'name', 'slug', 'sport', 'description', 'logo_url', 'country', 'aliases', 'popularity_score'
+        ).iterator():
+            entry = {
+                'id': league.id,
+                'name': league.name,
+                'slug': league.slug,
+                'logo_url': league.logo_url or '',
+                'description': league.description[:200] + '...' if league.description else '',
+                'sport': league.sport,
+                'country': league.country,
+                'source': 'local',
+            }
+            names = [league.name, *(league.aliases or [])]
+            yield entry, names, [league.country], league.popularity_score
+
+    def _team_entries(self):
+        from .models import Team
+
+        for team in Team.objects.select_related('league').only(
+            'id', 'name', 'slug', 'abbreviation', 'logo_url', 'aliases', 'follower_count',
+            'league__name', 'league__sport', 'league__country'
+        ).iterator():
+            entry = {
+                'id': team.id,
+                'name': team.name,
+                'slug': team.slug,
+                'logo_url': team.logo_url or '',
+                'abbreviation': team.abbreviation,
+                'sport': team.league.sport,
+                'league': team.league.name,
+                'country': team.league.country,
+                'follower_count': team.follower_count,
+                'source': 'local',
+            }
+            names = [team.name, team.abbreviation, *(team.aliases or [])]
+            yield entry, names, [team.league.country], team.follower_count
+
+    def _athlete_entries(self):
+        from .models import Athlete
+
+        for athlete in Athlete.objects.select_related('team__league').only(
+            'id', 'first_name', 'last_name', 'slug', 'position', 'nationality', 'aliases',
+            'team__name', 'team__follower_count', 'team__league__sport'
+        ).iterator():
+            team = athlete.team
+            entry = {
+                'id': athlete.id,
+                'first_name': athlete.first_name,
+                'last_name': athlete.last_name,
+                'slug': athlete.slug,
+                'position': athlete.position,
+                'team': team.name if team else '',
+                'sport': team.league.sport if team else '',
+                'logo_url': '',
+                'country': athlete.nationality,
+                'source': 'local',
+            }
+            names = [athlete.full_name, *(athlete.aliases or [])]
+            yield entry, names, [athlete.nationality], team.follower_count if team else 0
+
+    def _index(self, entity_type, rows, mentions):
+        entries, terms, vocab = {}, [], set()
+        for entry, names, countries, popularity in rows:
+            entry_id = entry['id']
+            entries[entry_id] = (entry, popularity)
+            for name in names:
+                words = _WORD_RE.findall(normalize_term(name))
+                if len(''.join(words)) >= 3:
+                    mentions.setdefault(' '.join(words), (entity_type, entry))
+            for field, values in ((NAME_FIELD, names), (COUNTRY_FIELD, countries)):
+                for value in values:
+                    term = normalize_term(value)
+                    if not term:
+                        continue
+                    tokens = term.split(' ')
+                    vocab.update(tokens)
+                    for candidate in {term, *tokens}:
+                        terms.append((candidate, entry_id, field))
+        terms.sort()
+        return entries, terms, sorted(vocab)
+
+    def _build(self):
+        """Load every league, team and athlete into a new snapshot. Call with the lock held."""
+        version = cache.get(SPORTS_SEARCH_VERSION_KEY, 0)
+        sources = {
+            'leagues': self._league_entries,
+            'teams': self._team_entries,
+            'athletes': self._athlete_entries,
+        }
+        entries, terms, vocab, mentions = {}, {}, {}, {}
+        for entity_type, source in sources.items():
+            entries[entity_type], terms[entity_type], vocab[entity_type] = self._index(entity_type, source(), mentions)
+        logger.info(
+            "Built sports search index: "
+            + ', '.join(f"{len(entries[t])} {t}" for t in ENTITY_TYPES)
+        )
+        return IndexSnapshot(entries, terms, vocab, mentions, version, time.monotonic())
+
+    def build(self):
+        """Load every league, team and athlete into the local index."""
+        with self._lock:
+            self._snapshot = self._build()
+            return self._snapshot
+
+    def sync(self):
+        """
+        Return the current snapshot, rebuilding it first when the shared
+        version has moved (at most once per min_rebuild_interval). While
+        another thread rebuilds, the previous snapshot is returned; only the
+        first build is waited for.
+        """
+        snapshot = self._snapshot
+        if snapshot.version is not None:
+            if cache.get(SPORTS_SEARCH_VERSION_KEY, 0) == snapshot.version:
+                return snapshot
+            if time.monotonic() - snapshot.built_at < get_sports_search_config()['min_rebuild_interval']:
+                return snapshot
+            if not self._lock.acquire(blocking=False):
+                return snapshot
+        else:
+            self._lock.acquire()
+        try:
+            current = self._snapshot
+            if current is not snapshot and current.version is not None:
+                # Rebuilt by another thread while this one waited
+                return current
+            self._snapshot = self._build()
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+    def _current(self):
+        """The snapshot to query: synced when possible, otherwise the last one built."""
+        try:
+            return self.sync()
+        except Exception as e:
+            logger.error(f"Failed to sync sports search index: {e}")
+            return self._snapshot
+
+    @staticmethod
+    def mark_stale():
+        """Tell every worker to rebuild on its next query."""
+        try:
+            cache.add(SPORTS_SEARCH_VERSION_KEY, 0, None)
+            cache.incr(SPORTS_SEARCH_VERSION_KEY)
+        except ValueError:
+            # Key evicted between add and incr
+            cache.set(SPORTS_SEARCH_VERSION_KEY, 1, None)
+
+    # Queries
+
+    def _prefix_matches(self, terms, prefix):
+        """Yield (term, entity_id, field) for every term starting with prefix."""
+        position = bisect.bisect_left(terms, (prefix,))
+        while position < len(terms) and terms[position][0].startswith(prefix):
+            yield terms[position]
+            position += 1
+
+    def _match(self, snapshot, entity_type, phrase, fuzzy_cutoff):
+        """Return {entity_id: (tier, field, similarity)} for the best match per entity."""
+        terms = snapshot.terms[entity_type]
+        matches = {}
+
+        def consider(entity_id, score):
+            if score > matches.get(entity_id, (-1, -1, 0)):
+                matches[entity_id] = score
+
+        for term, entity_id, field in self._prefix_matches(terms, phrase):
+            consider(entity_id, (EXACT if term == phrase else PREFIX, field, 1.0))
+
+        tokens = phrase.split(' ')
+        if len(tokens) > 1:
+            # "real mad" -> every query token must prefix some token of the entity
+            candidates = None
+            for token in tokens:
+                ids = {entity_id for _, entity_id, field in self._prefix_matches(terms, token) if field == NAME_FIELD}
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    break
+            for entity_id in candidates or ():
+                consider(entity_id, (TOKENS, NAME_FIELD, 1.0))
+
+        if matches:
+            return matches
+
+        # Nothing matched literally: try close spellings of each query token
+        vocab = snapshot.vocab[entity_type]
+        for token in tokens:
+            for close in difflib.get_close_matches(token, vocab, n=5, cutoff=fuzzy_cutoff):
+                similarity = round(difflib.SequenceMatcher(None, token, close).ratio(), 2)
+                position = bisect.bisect_left(terms, (close,))
+                while position < len(terms) and terms[position][0] == close:
+                    _, entity_id, field = terms[position]
+                    consider(entity_id, (FUZZY, field, similarity))
+                    position += 1
+        return matches
+
+    def get_entries(self, entity_type, entity_ids):
+        """Return index entries for the given IDs, in order, skipping unknown IDs."""
+        if entity_type not in ENTITY_TYPES:
+            return []
+        entries = self._current().entries[entity_type]
+        return [dict(entries[entity_id][0]) for entity_id in entity_ids if entity_id in entries]
+
+    def find_mentions(self, text, max_words=4):
+        """
+        Return index entries for leagues, teams and athletes named in free text
+        ("Real Madrid", "EPL"), longest name first, each entity once.
+        """
+        words = _WORD_RE.findall(normalize_term(text))
+        if not words:
+            return []
+        mentions = self._current().mentions
+
+        found, seen, position = [], set(), 0
+        while position < len(words):
+            for length in range(min(max_words, len(words) - position), 0, -1):
+                match = mentions.get(' '.join(words[position:position + length]))
+                if match is not None:
+                    entity_type, entry = match
+                    if (entity_type, entry['id']) not in seen:
+                        seen.add((entity_type, entry['id']))
+                        found.append(dict(entry, type=entity_type))
+                    position += length
+                    break
+            else:
+                position += 1
+        return found
+
+    def search(self, query, entity_type, limit=None):
+        """
+        Return up to `limit` local entities of `entity_type` matching `query`,
+        best match first and most popular first within a match tier.
+        """
+        if entity_type not in ENTITY_TYPES:
+            return []
+        phrase = normalize_term(query)
+        if not phrase:
+            return []
+        config = get_sports_search_config()
+        limit = limit or config['max_results']
+
+        snapshot = self._current()
+        matches = self._match(snapshot, entity_type, phrase, config['fuzzy_cutoff'])
+        entries = snapshot.entries[entity_type]
+        ranked = sorted(
+            matches.items(),
+            key=lambda item: (item[1], entries[item[0]][1]),
+            reverse=True
+        )
+        return [dict(entries[entity_id][0]) for entity_id, _ in ranked[:limit]]
+
+
+# Global index instance (one per worker process)
+sports_search_index = SportsSearchIndex()
@@ -0,0 +1,39 @@
+# sports/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .live_events import fixture_entry, stream_entry, record_live_change
+from .models import League, Team, Athlete, Fixture
+from .search_index import sports_search_index
+
+# Fields the search index reads; saves touching only other fields (standings, schedule...) are ignored
+INDEXED_FIELDS = {
+    League: {'name', 'slug', 'sport', 'description', 'logo_url', 'country', 'aliases', 'popularity_score'},
+    Team: {'name', 'slug', 'league', 'abbreviation', 'logo_url', 'aliases', 'follower_count'},
+    Athlete: {'first_name', 'last_name', 'slug', 'team', 'position', 'nationality', 'aliases'},
+}
+
+
+@receiver([post_save, post_delete], sender=League)
+@receiver([post_save, post_delete], sender=Team)
+@receiver([post_save, post_delete], sender=Athlete)
+def update_sports_search_index(sender, instance, **kwargs):
+    """Mark the sports search index stale when an indexed field changes."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields and not set(update_fields) & INDEXED_FIELDS[sender]:
+        return
+    sports_search_index.mark_stale()
+
+
+@receiver(post_save, sender=Fixture)
+@receiver(post_delete, sender=Fixture)
+def update_live_events_for_fixture(sender, instance, signal, **kwargs):
+    """Rebuild the live events snapshot when a fixture enters, leaves or changes in play."""
+    record_live_change(f"fixture-{instance.id}", fixture_entry(instance) if signal is post_save else None)
+
+
+@receiver(post_save, sender='posts.LiveStream')
+@receiver(post_delete, sender='posts.LiveStream')
+def update_live_events_for_stream(sender, instance, signal, **kwargs):
+    """Rebuild the live events snapshot when a stream goes live, ends or is renamed."""
+    record_live_change(f"stream-{instance.id}", stream_entry(instance) if signal is post_save else None)
@@ -0,0 +1,178 @@
+import functools
+import importlib
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+SWR_LOCK_KEY = '{}:refresh_lock'
+SWR_ERROR_KEY = '{}:upstream_error'
+
+DEFAULT_SWR_CACHE_CONFIG = {
+    'stale_ttl': 86400,        # Seconds a value may be served stale after it stops being fresh
+    'ttl_jitter': 0.1,         # Fresh TTLs are spread by +/- this fraction so keys expire apart
+    'negative_ttl': 60,        # Seconds an upstream failure is remembered before retrying
+    'lock_timeout': 60,        # Longest a refresh may hold a key's lock
+    'wait_timeout': 5,         # Longest a cold-miss request waits for another worker's value
+    'wait_interval': 0.05,
+}
+
+# Decorated loaders by dotted name, so the refresh task can find them
+_registry = {}
+
+
+class UpstreamUnavailable(Exception):
+    """No cached value exists and the upstream failed (now or within negative_ttl)."""
+
+
+def get_swr_cache_config():
+    """Return stale-while-revalidate settings merged over the defaults."""
+    config = dict(DEFAULT_SWR_CACHE_CONFIG)
+    config.update(getattr(settings, 'SWR_CACHE_CONFIG', {}))
+    return config
+
+
+def _entry(key):
+    """Return the envelope cached under key; anything else (e.g. a value cached before SWR) is a miss."""
+    entry = cache.get(key)
+    if isinstance(entry, dict) and 'value' in entry and 'fresh_until' in entry:
+        return entry
+    return None
+
+
+def _store(key, value, ttl, stale_ttl, config):
+    fresh_for = ttl * random.uniform(1 - config['ttl_jitter'], 1 + config['ttl_jitter'])
+    cache.set(key, {'value': value, 'fresh_until': time.time() + fresh_for}, int(fresh_for + stale_ttl))
+
+
+def refresh(key, compute, ttl, stale_ttl=None, config=None):
+    """
+    Recompute and store a key. Upstream failures are remembered for
+    negative_ttl so neither refreshes nor cold misses retry immediately.
+    """
+    config = config or get_swr_cache_config()
+    stale_ttl = config['stale_ttl'] if stale_ttl is None else stale_ttl
+    try:
+        value = compute()
+    except Exception as e:
+        logger.error(f"Upstream refresh failed for {key}: {e}")
+        cache.set(SWR_ERROR_KEY.format(key), 1, config['negative_ttl'])
+        raise UpstreamUnavailable(key) from e
+    _store(key, value, ttl, stale_ttl, config)
+    cache.delete(SWR_ERROR_KEY.format(key))
+    return value
+
+
+def _schedule_refresh(key, loader, args, compute, ttl, stale_ttl, config):
+    """Refresh in a Celery worker, or a local thread when the broker is unavailable."""
+    def run_locally():
+        try:
+            refresh(key, compute, ttl, stale_ttl, config)
+        except UpstreamUnavailable:
+            pass
+        finally:
+            cache.delete(SWR_LOCK_KEY.format(key))
+
+    if loader is not None:
+        try:
+            from .tasks import refresh_swr_cache
+            # No publish retries: a down broker must not stall the request serving the stale value
+            refresh_swr_cache.apply_async((loader, list(args)), retry=False)
+            return
+        except Exception as e:
+            logger.warning(f"Celery not available for cache refresh of {key}: {e}")
+    threading.Thread(target=run_locally, daemon=True).start()
+
+
+def get_or_refresh(key, compute, ttl, stale_ttl=None, loader=None, args=()):
+    """
+    Return the value cached under key, serving it stale while one background
+    refresh replaces it. A cold miss computes synchronously under a per-key
+    lock; other workers wait briefly for that value instead of calling the
+    upstream too. Raises UpstreamUnavailable when there is nothing to serve.
+    """
+    config = get_swr_cache_config()
+    lock_key, error_key = SWR_LOCK_KEY.format(key), SWR_ERROR_KEY.format(key)
+
+    entry = _entry(key)
+    if entry is not None:
+        if time.time() >= entry['fresh_until'] and cache.get(error_key) is None \
+                and cache.add(lock_key, 1, config['lock_timeout']):
+            _schedule_refresh(key, loader, args, compute, ttl, stale_ttl, config)
+        return entry['value']
+
+    if cache.get(error_key) is not None:
+        raise UpstreamUnavailable(key)
+
+    if not cache.add(lock_key, 1, config['lock_timeout']):
+        deadline = time.monotonic() + config['wait_timeout']
+        while time.monotonic() < deadline:
+            time.sleep(config['wait_interval'])
+            entry = _entry(key)
+            if entry is not None:
+                return entry['value']
+            if cache.get(error_key) is not None:
+                raise UpstreamUnavailable(key)
+            if cache.get(lock_key) is None:
+                break
+        logger.warning(f"Cache lock wait expired for {key}; computing directly")
+        return refresh(key, compute, ttl, stale_ttl, config)
+
+    try:
+        return refresh(key, compute, ttl, stale_ttl, config)
+    finally:
+        cache.delete(lock_key)
+
+
+def mark_stale(key):
+    """
+    Expire a key's freshness but keep its value, so the next read serves it
+    once and refreshes it in the background instead of recomputing inline.
+    """
+    entry = _entry(key)
+    if entry is not None:
+        cache.set(key, {'value': entry['value'], 'fresh_until': 0}, get_swr_cache_config()['stale_ttl'])
+
+
+def swr_cached(key, ttl, stale_ttl=None):
+    """
+    Decorator for loader functions whose positional arguments identify the
+    value: the result is cached under key.format(*args) with
+    stale-while-revalidate semantics (see get_or_refresh). Arguments must
+    be JSON-serializable so the refresh can run as a Celery task.
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            return get_or_refresh(
+                key.format(*args), lambda: func(*args), ttl, stale_ttl, loader=name, args=args
+            )
+
+        def refresh_now(*args):
+            try:
+                return refresh(key.format(*args), lambda: func(*args), ttl, stale_ttl)
+            finally:
+                cache.delete(SWR_LOCK_KEY.format(key.format(*args)))
+
+        wrapper.refresh = refresh_now
+        wrapper.cache_key = lambda *args: key.format(*args)
+        _registry[name] = wrapper
+        return wrapper
+    return decorator
+
+
+def refresh_loader(name, args):
+    """Run a decorated loader's refresh by dotted name (used by the Celery task)."""
+    if name not in _registry:
+        importlib.import_module(name.rsplit('.', 1)[0])
+    try:
+        return _registry[name].refresh(*args)
+    except UpstreamUnavailable:
+        return None
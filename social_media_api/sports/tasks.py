@@ -1,7 +1,7 @@
 import requests
 from celery import shared_task
-from django.core.cache import cache
 from .models import League, Team, Athlete
+from .swr_cache import mark_stale
 from .api_football_client import api_football_client
 from .utils.api_football import sync_leagues_data, sync_teams_data, sync_fixtures_data
 
@@ -25,9 +25,8 @@ def update_league_standings(league_id=None):
                 league_standings = standings_data['response'][0]['league']['standings'][0]
                 league.standings = league_standings
                 league.save(update_fields=['standings'])
-                # Invalidate cache
-                cache_key = f'league_detail_{league.slug}'
-                cache.delete(cache_key)
+                # Serve the cached page once more while it refreshes
+                mark_stale(f'league_detail_{league.slug}')
                 print(f"Updated standings for league {league.name}")
             else:
                 print(f"No standings data available for league {league.name}")
@@ -86,9 +85,8 @@ def update_team_schedules(team_id=None):
 
                     team.schedule = detailed_events
                     team.save(update_fields=['schedule'])
-                    # Invalidate cache
-                    cache_key = f'team_detail_{team.slug}'
-                    cache.delete(cache_key)
+                    # Serve the cached page once more while it refreshes
+                    mark_stale(f'team_detail_{team.slug}')
                     print(f"Updated schedule for team {team.name}")
                 else:
                     print(f"No fixtures data available for team {team.name}")
@@ -158,9 +156,8 @@ def update_athlete_info(athlete_id=None):
                 athlete.nationality = player_info.get('nationality', athlete.nationality)
                 athlete.description = player_info.get('name', athlete.description)  # Use name as description fallback
                 athlete.save(update_fields=['position', 'nationality', 'description'])
-                # Invalidate cache
-                cache_key = f'athlete_detail_{athlete.slug}'
-                cache.delete(cache_key)
+                # Serve the cached page once more while it refreshes
+                mark_stale(f'athlete_detail_{athlete.slug}')
                 print(f"Updated info for athlete {athlete.full_name}")
             else:
                 print(f"No player data found for athlete {athlete.full_name}")
@@ -251,4 +248,13 @@ def sync_api_football_fixtures():
     """
     print("Starting hourly fixtures sync...")
     sync_fixtures_data()
-    print("Fixtures sync completed")
\ No newline at end of file
+    print("Fixtures sync completed")
+
+@shared_task
+def refresh_swr_cache(loader, args):
+    """
+    Refresh one stale-while-revalidate cache entry in the background
+    """
+    from .swr_cache import refresh_loader
+
+    refresh_loader(loader, args)
@@ -0,0 +1,86 @@
+from datetime import timedelta
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from posts.models import LiveStream
+from sports.live_events import LIVE_EVENTS_GROUP, LIVE_EVENTS_KEY
+from sports.models import Fixture
+
+User = get_user_model()
+
+
+class LiveEventsTestCase(TestCase):
+    """Test cases for the live events sidebar snapshot"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('post:live-events')
+        self.host = User.objects.create_user(username='broadcaster', password='password123')
+        now = timezone.now()
+        self.fixture = Fixture.objects.create(
+            id=101, home_team_name='Arsenal', away_team_name='Chelsea', home_team_id=1, away_team_id=2,
+            league_name='Premier League', league_id=39, scheduled_time=now - timedelta(minutes=50),
+            status='2H', home_score=1, away_score=0
+        )
+        Fixture.objects.create(
+            id=102, home_team_name='Lyon', away_team_name='Nice', home_team_id=3, away_team_id=4,
+            league_name='Ligue 1', league_id=61, scheduled_time=now + timedelta(hours=2), status='NS'
+        )
+        self.stream = LiveStream.objects.create(
+            title='Post-match show', host=self.host, stream_key='key-1', status='live',
+            actual_start=now - timedelta(minutes=10), viewer_count=42
+        )
+        LiveStream.objects.create(title='Private', host=self.host, stream_key='key-2', status='live', is_private=True)
+        LiveStream.objects.create(title='Later', host=self.host, stream_key='key-3', status='scheduled')
+        cache.clear()
+
+    def test_view_combines_in_play_fixtures_and_live_streams(self):
+        """Only in-play fixtures and public live streams are listed, oldest start first"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([event['id'] for event in response.data], ['fixture-101', f'stream-{self.stream.id}'])
+        self.assertEqual(response.data[0]['title'], 'Arsenal vs Chelsea')
+        self.assertEqual(response.data[1]['engagement_count'], 42)
+
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_state_change_rebuilds_and_pushes_snapshot(self):
+        """A fixture kicking off rebuilds the snapshot and notifies the live events group"""
+        self.client.get(self.url)
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(LIVE_EVENTS_GROUP, channel_name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Fixture.objects.filter(id=102).update(status='1H')
+            Fixture.objects.get(id=102).save()
+
+        message = async_to_sync(channel_layer.receive)(channel_name)
+        self.assertEqual(message['type'], 'live_events_update')
+        self.assertIn('fixture-102', [event['id'] for event in message['events']])
+        self.assertIn('fixture-102', [event['id'] for event in self.client.get(self.url).data])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stream.end_stream()
+        self.assertNotIn(f'stream-{self.stream.id}', [event['id'] for event in self.client.get(self.url).data])
+
+    def test_unchanged_state_does_not_rebuild(self):
+        """Viewer count bumps and saves of fixtures that are not in play keep the snapshot"""
+        self.client.get(self.url)
+        generated_at = cache.get(LIVE_EVENTS_KEY)['generated_at']
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.stream.viewer_count += 1
+            self.stream.save()
+            Fixture.objects.get(id=102).save()
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(cache.get(LIVE_EVENTS_KEY)['generated_at'], generated_at)
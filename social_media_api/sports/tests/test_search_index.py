@@ -0,0 +1,106 @@
+import threading
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from sports.models import League, Team, Athlete
+from sports.search_index import sports_search_index
+
+
+@override_settings(SPORTS_SEARCH_CONFIG={'min_rebuild_interval': 0})
+class SportsSearchIndexTestCase(TestCase):
+    """Test cases for the local sports entity search index"""
+
+    def setUp(self):
+        cache.clear()
+        sports_search_index.reset()
+        self.premier = League.objects.create(
+            name='Premier League', sport='football', description='English top flight',
+            country='England', aliases=['EPL'], popularity_score=100
+        )
+        self.laliga = League.objects.create(
+            name='La Liga', sport='football', description='Spanish top flight',
+            country='Spain', popularity_score=80
+        )
+        self.united = Team.objects.create(
+            name='Manchester United', league=self.premier, abbreviation='MUN',
+            description='Red Devils', aliases=['Man Utd'], follower_count=500
+        )
+        self.city = Team.objects.create(
+            name='Manchester City', league=self.premier, abbreviation='MCI',
+            description='Citizens', follower_count=900
+        )
+        self.atletico = Team.objects.create(
+            name='Atlético Madrid', league=self.laliga, abbreviation='ATM',
+            description='Colchoneros', follower_count=300
+        )
+        Athlete.objects.create(
+            first_name='Bruno', last_name='Fernandes', team=self.united,
+            position='Midfielder', nationality='Portugal', description='Captain'
+        )
+
+    def tearDown(self):
+        cache.clear()
+        sports_search_index.reset()
+
+    def test_prefix_matches_ranked_by_popularity(self):
+        """Equal-quality matches are ordered by follower count"""
+        results = sports_search_index.search('manch', 'teams')
+        self.assertEqual([r['name'] for r in results], ['Manchester City', 'Manchester United'])
+        self.assertEqual(results[0]['source'], 'local')
+
+    def test_aliases_abbreviations_and_accents(self):
+        """Aliases, abbreviations and unaccented spellings all match"""
+        self.assertEqual(sports_search_index.search('epl', 'leagues')[0]['id'], self.premier.id)
+        self.assertEqual(sports_search_index.search('mun', 'teams')[0]['id'], self.united.id)
+        self.assertEqual(sports_search_index.search('man utd', 'teams')[0]['id'], self.united.id)
+        self.assertEqual(sports_search_index.search('atletico', 'teams')[0]['id'], self.atletico.id)
+
+    def test_country_match(self):
+        """Searching a country returns the leagues played there"""
+        results = sports_search_index.search('spain', 'leagues')
+        self.assertEqual([r['name'] for r in results], ['La Liga'])
+
+    def test_fuzzy_match(self):
+        """Misspelt queries still find the entity"""
+        results = sports_search_index.search('fernandez', 'athletes')
+        self.assertEqual(results[0]['last_name'], 'Fernandes')
+
+    def test_index_refreshes_after_sync_writes(self):
+        """Saves made by sync tasks are visible to the next query"""
+        self.assertEqual(sports_search_index.search('barcelona', 'teams'), [])
+        Team.objects.create(name='Barcelona', league=self.laliga, description='Blaugrana')
+        self.assertEqual(sports_search_index.search('barcelona', 'teams')[0]['name'], 'Barcelona')
+
+        self.city.delete()
+        self.assertEqual([r['name'] for r in sports_search_index.search('manch', 'teams')], ['Manchester United'])
+
+    def test_queries_not_held_up_by_rebuild(self):
+        """While one query rebuilds the index, others answer at once from the previous snapshot"""
+        self.assertEqual(len(sports_search_index.search('manch', 'teams')), 2)
+        Team.objects.create(name='Barcelona', league=self.laliga, description='Blaugrana')
+        answers, build = [], sports_search_index._build
+
+        def build_while_another_query_runs():
+            reader = threading.Thread(target=lambda: answers.append(sports_search_index.search('barcel', 'teams')))
+            reader.start()
+            reader.join(5)
+            return build()
+
+        with patch.object(sports_search_index, '_build', side_effect=build_while_another_query_runs):
+            self.assertEqual(sports_search_index.search('barcel', 'teams')[0]['name'], 'Barcelona')
+        self.assertEqual(answers, [[]])
+
+    @patch('posts.views.search.requests.get')
+    def test_search_endpoint_uses_local_index_before_api(self, mock_get):
+        """TheSportsDB is only called when the local index has no match"""
+        client = APIClient()
+        response = client.get(reverse('search'), {'q': 'premier', 'type': 'leagues'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['name'], 'Premier League')
+        mock_get.assert_not_called()
+
+        mock_get.return_value.json.return_value = {'countrys': None}
+        client.get(reverse('search'), {'q': 'zzzz', 'type': 'leagues'})
+        mock_get.assert_called_once()
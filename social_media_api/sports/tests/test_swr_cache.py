@@ -0,0 +1,118 @@
+import time
+from unittest.mock import patch, Mock
+import requests
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from sports.models import League
+from sports.swr_cache import get_or_refresh, mark_stale, refresh_loader, swr_cached, UpstreamUnavailable, SWR_LOCK_KEY
+
+calls = []
+
+
+@swr_cached('swr_test_square_{}', ttl=60)
+def square(number):
+    calls.append(number)
+    return number * number
+
+
+def expire(key):
+    entry = cache.get(key)
+    entry['fresh_until'] = 0
+    cache.set(key, entry, None)
+
+
+@override_settings(SWR_CACHE_CONFIG={'ttl_jitter': 0.1, 'negative_ttl': 60})
+class SWRCacheTestCase(TestCase):
+    """Test cases for the stale-while-revalidate cache helper"""
+
+    def setUp(self):
+        cache.clear()
+        calls.clear()
+
+    def test_fresh_values_computed_once_with_jittered_ttl(self):
+        """Fresh hits never call the loader; fresh TTLs are spread around the nominal TTL"""
+        before = time.time()
+        self.assertEqual(square(3), 9)
+        self.assertEqual(square(3), 9)
+        self.assertEqual(calls, [3])
+        fresh_until = cache.get('swr_test_square_3')['fresh_until']
+        self.assertTrue(before + 54 <= fresh_until <= time.time() + 66)
+
+    @patch('sports.tasks.refresh_swr_cache.apply_async')
+    def test_stale_value_served_while_one_refresh_runs(self, apply_async):
+        """Expired values are returned immediately and only the first request schedules a refresh"""
+        square(4)
+        expire('swr_test_square_4')
+
+        self.assertEqual(square(4), 16)
+        self.assertEqual(square(4), 16)
+        apply_async.assert_called_once_with((f'{__name__}.square', [4]), retry=False)
+        self.assertEqual(calls, [4])
+
+        refresh_loader(*apply_async.call_args.args[0])
+        self.assertEqual(calls, [4, 4])
+        self.assertGreater(cache.get('swr_test_square_4')['fresh_until'], 0)
+        self.assertIsNone(cache.get(SWR_LOCK_KEY.format('swr_test_square_4')))
+
+    @patch('sports.tasks.refresh_swr_cache.apply_async')
+    def test_legacy_values_and_marked_keys(self, apply_async):
+        """Values cached without the envelope are misses; marked keys serve their value once more"""
+        cache.set('swr_test_square_5', {'standings': []})
+        self.assertEqual(square(5), 25)
+        self.assertEqual(calls, [5])
+
+        mark_stale('swr_test_square_5')
+        self.assertEqual(square(5), 25)
+        self.assertEqual(calls, [5])
+        apply_async.assert_called_once()
+
+    def test_upstream_failures_negatively_cached(self):
+        """A failing upstream is called once per negative TTL, not once per request"""
+        upstream = Mock(side_effect=requests.RequestException('down'))
+
+        for _ in range(3):
+            with self.assertRaises(UpstreamUnavailable):
+                get_or_refresh('swr_test_failing', upstream, ttl=60)
+        self.assertEqual(upstream.call_count, 1)
+
+    @patch('posts.views.explore.requests.get')
+    def test_leagues_view_uses_cache(self, get):
+        """LeaguesView hits TheSportsDB once and degrades to an empty list when it is down"""
+        get.return_value.json.return_value = {'leagues': [{'idLeague': '4328', 'strLeague': 'English Premier League'}]}
+        client = APIClient()
+
+        for _ in range(2):
+            response = client.get(reverse('leagues'))
+            self.assertEqual(response.data[0]['slug'], 'english-premier-league')
+        self.assertEqual(get.call_count, 1)
+
+        cache.clear()
+        get.side_effect = requests.RequestException('down')
+        self.assertEqual(client.get(reverse('leagues')).data, [])
+        self.assertEqual(client.get(reverse('leagues')).data, [])
+        self.assertEqual(get.call_count, 2)
+
+    @patch('sports.views.api_football_client')
+    def test_detail_views(self, client_mock):
+        """League detail is cached per slug; event lookups return 404 for unknown and 503 for failing upstream"""
+        League.objects.create(name='Serie A', sport='football', description='Italy')
+        client_mock.get_league_standings.return_value = None
+        client = APIClient()
+        client.force_authenticate(user=get_user_model().objects.create_user(username='fan', password='password123'))
+
+        for _ in range(2):
+            response = client.get(reverse('sports:league-detail', args=['serie-a']))
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(client_mock.get_league_standings.call_count, 1)
+        self.assertEqual(client.get(reverse('sports:league-detail', args=['ligue-1'])).status_code, 404)
+
+        client_mock.get_fixtures.return_value = {'response': []}
+        self.assertEqual(client.get(reverse('sports:event-detail', args=['1'])).status_code, 404)
+
+        client_mock.get_fixtures.side_effect = requests.RequestException('down')
+        self.assertEqual(client.get(reverse('sports:event-detail', args=['2'])).status_code, 503)
+        self.assertEqual(client.get(reverse('sports:event-detail', args=['2'])).status_code, 503)
+        self.assertEqual(client_mock.get_fixtures.call_count, 2)